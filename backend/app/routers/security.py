@@ -9,19 +9,26 @@ YOLO11n(객체 감지) + MediaPipe Pose(관절 추출) 하이브리드 방식
 - 거수자 추적 및 알림
 - 이상행동 감지 (MediaPipe Pose)
 - 얼굴 인식 화이트리스트
-- 동적 모델 변경 API
+- 동적 모델 변경 API (카메라별 감지 모델 선택, 프레임 사이 무중단 교체)
 """
 from fastapi import APIRouter, WebSocket, Query, HTTPException, UploadFile, File, Form
-import numpy as np
-import cv2
 import time
 
 # 서비스 모듈 import
 from app.utils.path_utils import KNOWN_FACES_DIR
-from app.utils.face_recognition_module import FaceRecognitionWhitelist
-from app.services import ai_model_service
+from app.utils.face_recognition_module import FaceRecognitionWhitelist, person_name_from_file, unique_image_path
+from app.utils import frame_protocol
 from app.services import mediapipe_service
 from app.services import tracker_service
+from app.services import pipeline_service
+from app.services import session_service
+from app.services import batch_service
+from app.services import model_registry_service
+from app.services import motion_service
+from app.services import flow_service
+from app.services import reid_service
+from app.services import behavior_service
+from app.services.flow_control_service import FlowController
 from app.routers import kakao  # 카카오 알림 연동
 import asyncio
 
@@ -38,196 +45,348 @@ print(f"[Security] 화이트리스트 폴더: {KNOWN_FACES_DIR}")
 # WebSocket 엔드포인트 - 실시간 영상 분석
 # ============================================
 @router.websocket("/ws")
-async def websocket_endpoint(ws: WebSocket):
-    """실시간 영상 분석 WebSocket 엔드포인트"""
+async def websocket_endpoint(
+    ws: WebSocket,
+    camera_id: str = Query(None, description="카메라 이름 (선택)"),
+    protocol: int = Query(0, description="1: 바이너리 헤더 + 크레딧 흐름 제어 사용"),
+    model: str = Query(None, description="감지 모델 이름 (선택, 없으면 기본 모델)")
+):
+    """
+    실시간 영상 분석 WebSocket 엔드포인트
+
+    - protocol=0 (기본): JPEG만 수신, 결과만 전송 (기존 클라이언트)
+    - protocol=1: 프레임 헤더(seq, 캡처 시각, 카메라 ID) + 서버 제어 메시지(크레딧, 권장 FPS/해상도/품질)
+    - model: 감지 모델 이름 (로드 전이면 기본 모델로 시작하고 로드 완료 후 교체)
+    """
     await ws.accept()
-    print("[Security] WebSocket 연결됨 (Binary mode)")
+
+    # [학습 포인트: 상태 관리]
+    # - 트래커, 화재/연기 지속 시간, MediaPipe 카운터는 카메라 세션마다 따로 보관합니다.
+    # - 한 카메라의 연결이 끊겨도 다른 카메라의 추적 상태는 그대로 유지됩니다.
+    session = session_service.create_session(camera_id)
+    print(f"[Security] WebSocket 연결됨 (Binary mode) - 카메라: {session.camera_id}")
+    if model:
+        try:
+            model_registry_service.select_model(session, model)
+        except KeyError:
+            print(f"[Security] 감지 모델 없음: {model} - 기본 모델 사용")
 
     frame_count = 0
     start_time = time.time()
-    
-    # [학습 포인트: 상태 관리]
-    # - 화재/연기는 "순간적 오탐"이 많으므로 5초 이상 지속될 때만 알림을 보냅니다.
-    # - 이를 위해 각 위험 요소(fire, smoke)별로 "언제 처음 감지됐는지(start_time)"를 기록합니다.
-    hazard_states = {
-        "fire": {"start_time": None, "notified": False},
-        "smoke": {"start_time": None, "notified": False}
-    }
+
+    # [학습 포인트: latest-frame-wins]
+    # - 수신 태스크는 프레임을 슬롯에 넣기만 하고, 처리 루프는 항상 "가장 최근 프레임"만 분석합니다.
+    # - 분석이 30FPS를 못 따라가도 밀린 프레임이 쌓이지 않으므로 지연이 무한히 늘어나지 않습니다.
+    slot = session.frame_slot
+    receiver = asyncio.create_task(_receive_frames(ws, slot))
+
+    # [학습 포인트: 비동기 파이프라이닝]
+    # - 준비 태스크: 최신 프레임 → 디코딩/전처리 → 비동기 추론 시작 (워커 풀)
+    # - 처리 루프: 추론 완료 대기 → 후처리/추적 (워커 풀) → 결과 전송
+    # - 둘 사이의 큐 크기(PIPELINE_DEPTH)만큼 프레임이 겹쳐서 진행되고, 결과는 FIFO 순서로 나갑니다.
+    in_flight = asyncio.Queue(maxsize=pipeline_service.PIPELINE_DEPTH)
+    preparer = asyncio.create_task(_prepare_frames(session, in_flight))
+
+    # [학습 포인트: 크레딧 기반 흐름 제어]
+    # - 클라이언트는 서버가 준 크레딧만큼만 프레임을 보냅니다.
+    # - 서버는 프레임을 소비할 때마다 크레딧을 돌려주고, 처리 지연에 맞춰 권장 FPS/품질을 알려줍니다.
+    # - 초기 크레딧 = 파이프라인 깊이 + 1 (진행 중인 프레임 + 슬롯에서 대기하는 다음 프레임)
+    flow = FlowController(pipeline_service.PIPELINE_DEPTH + 1) if protocol >= 1 else None
+    if flow is not None:
+        await ws.send_json(flow.initial_grant())
 
     try:
         while True:
-            # Binary 데이터 수신
-            data = await ws.receive_bytes()
+            # 준비된 프레임 대기 (수신 종료 시 None)
+            item = await in_flight.get()
+            if item is None:
+                break
+            header, prepared, received_at, prepare_ms = item
+            complete_start = time.time()   # 큐에서 꺼낸 시점부터 (앞 프레임 뒤에서 기다린 시간 제외)
 
             try:
-                # Bytes -> numpy 배열 -> OpenCV 이미지
-                nparr = np.frombuffer(data, np.uint8)
-                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-                if frame is None:
-                    print("Frame decode failed")
+                if prepared is None:
                     continue
 
-                # 추론 시간 측정
-                inference_start = time.time()
-
-                # 전처리
-                input_data = ai_model_service.preprocess(frame)
-
-                # 추론
-                outputs = ai_model_service.run_inference(input_data)
+                # [학습 포인트: 이벤트 루프 보호]
+                # - 디코딩/추론/추적/DB 저장은 모두 블로킹 작업이므로 워커 풀/추론 큐에서 실행합니다.
+                # - 처리 루프는 큐 순서대로 한 프레임씩 완료하므로 한 연결 안에서는 처리 순서가 유지됩니다.
+                result = await pipeline_service.complete_frame(session, prepared, face_whitelist)
+                if result is None:
+                    continue
 
-                # 후처리
-                predictions = ai_model_service.postprocess(outputs)
+                # 카카오 알림 - 비동기로 전송하여 영상 처리 지연 방지
+                _dispatch_notifications(result["notifications"])
 
-                inference_time = (time.time() - inference_start) * 1000
+                session.processed_frames += 1
+                session.last_latency_ms = (time.time() - received_at) * 1000
 
                 # FPS 계산
                 frame_count += 1
                 if frame_count % 30 == 0:
                     elapsed = time.time() - start_time
                     fps = frame_count / elapsed
-                    print(f"[Security] FPS: {fps:.1f} | Inference: {inference_time:.1f}ms")
-
-                # 클래스별 조건 분기 처리
-                alerts = []
-                detected_hazards = {}  # 이번 프레임의 위험 요소 {label: max_score}
-                for pred in predictions:
-                    label = pred['label']
-                    score = pred['score']
-                    box = pred['box']
-                    
-                    if label == 'person' and score >= 0.6:
-                        # 사람만 얼굴 인식 + 배회자 추적 + 이상행동 감지
-                        track_id = tracker_service.match_detection_to_tracker(box)
-                        loiter_result = tracker_service.check_loitering(
-                            track_id, box, frame, score, face_whitelist
-                        )
-                        
-                        # 프론트엔드에서 구분할 수 있도록 track_id 추가
-                        pred["track_id"] = track_id
-                        
-                        # 배회자이면 관절 정보 및 배회자 플래그 추가
-                        if loiter_result:
-                            pred["is_loitering"] = True  # 배회자 플래그
-                            
-                            if loiter_result.get("keypoints"):
-                                pred["keypoints"] = loiter_result["keypoints"]
-                            
-                            if loiter_result["type"] == "abnormal":
-                                alert = {
-                                    "type": "abnormal",
-                                    "track_id": track_id,
-                                    "behaviors": loiter_result["behaviors"],
-                                    "box": box
-                                }
-                                alerts.append(alert)
-                                
-                                # 카카오 알림 (이상행동) - 비동기로 전송하여 영상 처리 지연 방지
-                                asyncio.create_task(kakao.notify_loitering(track_id, loiter_result.get("elapsed", 0.0)))
-                                
-                            elif loiter_result["type"] == "loitering":
-                                alert = {
-                                    "type": "loitering",
-                                    "track_id": track_id,
-                                    "box": box
-                                }
-                                alerts.append(alert)
-                                
-                                # 카카오 알림 (배회자) - 비동기로 전송
-                                asyncio.create_task(kakao.notify_loitering(track_id, loiter_result.get("elapsed", 0.0)))
-                        else:
-                            pred["is_loitering"] = False  # 일반인
-                    elif label in ['fire', 'smoke']:
-                        # 화재/연기는 즉시 경보
-                        print(f"[DANGER] 위험 감지: {label} (Score: {score:.2f})")
-                        alerts.append({
-                            "type": label,
-                            "box": box,
-                            "score": score
-                        })
-                        
-                        # 지속적인 화재 감지를 위해 기록 (신뢰도 50% 이상)
-                        # [학습 포인트: 오탐 방지]
-                        # - 신뢰도(score)가 0.5(50%) 이상인 경우만 위험 상황으로 간주합니다.
-                        # - 너무 낮은 신뢰도는 쓰레기통, 노란 옷 등을 불로 착각할 수 있기 때문입니다.
-                        if score >= 0.5:
-                            if label not in detected_hazards or score > detected_hazards[label]:
-                                detected_hazards[label] = score
-                
-                # 오래된 트래커 정리
-                tracker_service.cleanup_old_trackers()
-
-                # ─────────────────────────────────────────────
-                # 화재/연기 지속 시간 체크 (5초 이상)
-                # ─────────────────────────────────────────────
-                # [학습 포인트: 지속 시간 체크 로직]
-                # 1. 이번 프레임에 감지됨 -> 시작 시간이 없으면 현재 시간 기록 (start_time = now)
-                # 2. 이번 프레임에 감지됨 -> 시작 시간이 있으면 경과 시간(elapsed) 계산
-                # 3. 경과 시간이 5초 넘음 + 아직 알림 안 보냄 -> 카카오 알림 전송!
-                # 4. 감지 안 됨 -> 시작 시간 초기화 (가짜 화재였거나 상황 종료)
-                
-                now = time.time()
-                for h_type in ["fire", "smoke"]:
-                    if h_type in detected_hazards:
-                        # 처음 감지된 경우 시간 기록
-                        if hazard_states[h_type]["start_time"] is None:
-                            hazard_states[h_type]["start_time"] = now
-                            print(f"[Hazard] {h_type} 감지 시작... (Score: {detected_hazards[h_type]:.2f})")
-                        
-                        # 지속 시간 계산
-                        elapsed_hazard = now - hazard_states[h_type]["start_time"]
-                        
-                        # 5초 이상이고 아직 알림 안 보냈으면 전송
-                        if elapsed_hazard >= 5.0 and not hazard_states[h_type]["notified"]:
-                            print(f"[ALERT] {h_type} 5초 이상 지속됨! 카카오 알림 전송")
-                            asyncio.create_task(kakao.notify_hazard(
-                                h_type, 
-                                detected_hazards[h_type], 
-                                elapsed_hazard
-                            ))
-                            hazard_states[h_type]["notified"] = True
-                            
-                            # 스냅샷 저장 (화재)
-                            try:
-                                from app.services.database_service import save_snapshot
-                                save_snapshot(
-                                    frame, 
-                                    detected_hazards[h_type], 
-                                    [0,0,0,0], # 박스 정보는 임의로 처리 (전체 화면 위험)
-                                    stay_duration=elapsed_hazard, 
-                                    is_loitering=True # 위험 상황으로 저장
-                                )
-                            except Exception as e:
-                                print(f"스냅샷 저장 실패: {e}")
-
-                    else:
-                        # 감지 안 됨 -> 상태 초기화
-                        if hazard_states[h_type]["start_time"] is not None:
-                            print(f"[Hazard] {h_type} 상황 종료.")
-                        hazard_states[h_type]["start_time"] = None
-                        hazard_states[h_type]["notified"] = False
+                    print(f"[Security] [{session.camera_id}] FPS: {fps:.1f} | Inference: {result['inference_time']:.1f}ms"
+                          f" | Dropped: {slot.dropped} | Skipped: {session.motion_gate.skip_ratio * 100:.0f}%")
 
                 # 결과 전송
-                await ws.send_json({
-                    "predictions": predictions,
-                    "active_trackers": tracker_service.get_active_tracker_count(),
-                    "alerts": alerts
-                })
+                response = {
+                    "type": "result",
+                    "camera_id": session.camera_id,
+                    "predictions": result["predictions"],
+                    "active_trackers": tracker_service.get_active_tracker_count(session),
+                    "alerts": result["alerts"],
+                    "stats": session.get_frame_stats(),
+                    "model": result["model"],
+                    "input_size": result["input_size"],  # 박스/관절 좌표 기준 크기 (320 / 640)
+                    "skipped": result["skipped"],        # 움직임 없어 직전 감지 결과를 재사용한 프레임
+                    "propagated": result["propagated"]   # 감지 없이 광류로 박스를 옮긴 프레임
+                }
+                if header is not None:
+                    # 클라이언트가 프레임별 왕복 지연을 계산할 수 있도록 그대로 돌려줌
+                    response["seq"] = header.seq
+                    response["capture_ts"] = header.capture_ts
+                await ws.send_json(response)
 
             except Exception as e:
                 print(f"[Security] 처리 중 오류: {e}")
                 continue
 
+            finally:
+                # 성공/실패와 관계없이 소비한 프레임만큼 크레딧 반환 (클라이언트 정지 방지)
+                # [학습 포인트: 처리 시간 vs 종단 지연]
+                # - 파이프라이닝 중에는 준비된 프레임이 in_flight 큐에서 앞 프레임 완료를 기다림
+                # - 준비 시작 → 완료 시간에는 그 대기(최대 PIPELINE_DEPTH 프레임)가 섞여 권장 FPS가 절반 가까이로 떨어짐
+                # - 흐름 제어에는 실제 작업 시간만 전달: 준비 단계 + 큐에서 꺼낸 뒤 완료/전송까지
+                if flow is not None and not slot.closed:
+                    service_ms = prepare_ms + (time.time() - complete_start) * 1000
+                    await ws.send_json(flow.on_frame(service_ms, slot.consumed))
+
     except Exception as e:
         print(f"[Security] 클라이언트 연결 종료: {e}")
     finally:
-        print("[Security] 연결 종료 - 자원 정리 시작")
-        cleared = tracker_service.clear_trackers()
+        receiver.cancel()
+        preparer.cancel()
+        print(f"[Security] 연결 종료 - 자원 정리 시작 ({session.camera_id})")
+        stats = session.get_frame_stats()
+        print(f"[Security]   ✓ 프레임 수신 {stats['received']} / 처리 {stats['processed']} / 드롭 {stats['dropped']}")
+        cleared = session_service.close_session(session.camera_id)
         print(f"[Security]   ✓ 활성 트래커 {cleared}개 정리 완료")
         print("[Security] 자원 정리 완료")
 
 
+async def _prepare_frames(session, in_flight: asyncio.Queue):
+    """
+    프레임 준비 태스크 (헤더 분리 → 디코딩/전처리 → 비동기 추론 시작)
+
+    큐가 가득 차면(PIPELINE_DEPTH개 진행 중) 다음 프레임을 꺼내지 않고 대기
+    → 그동안 들어온 프레임은 슬롯에서 최신 것만 남음
+    수신이 끝나면 None을 넣어 처리 루프를 종료시킴
+
+    감지 모델은 프레임마다 session.detector를 한 번 읽어 고정 → 교체는 항상 프레임 사이에서 일어남
+    """
+    slot = session.frame_slot
+    index = 0   # 세션 프레임 번호 (광류 감지 주기 기준, 이벤트 루프에서만 증가)
+    try:
+        while True:
+            # 최신 프레임 대기 (수신 종료 시 None)
+            item = await slot.get()
+            if item is None:
+                break
+            data, received_at = item
+            prepare_start = time.time()
+
+            header, prepared = None, None
+            try:
+                # 헤더 분리 (헤더 없는 JPEG도 허용)
+                header, payload = frame_protocol.parse_frame(data)
+                prepared = await pipeline_service.run(
+                    pipeline_service.prepare_frame, payload, session.detector, session.motion_gate,
+                    session.box_flow, session.pose_frame_wanted, index
+                )
+                index += 1
+            except Exception as e:
+                print(f"[Security] 프레임 준비 오류: {e}")
+
+            # 준비 단계 시간은 큐에 넣기 전에 측정 (큐가 가득 차 기다리는 시간 제외)
+            prepare_ms = (time.time() - prepare_start) * 1000
+            await in_flight.put((header, prepared, received_at, prepare_ms))
+    finally:
+        try:
+            in_flight.put_nowait(None)
+        except asyncio.QueueFull:
+            # 처리 루프가 큐를 비우는 중 → 남은 프레임 처리 후 수신 종료로 빠져나감
+            asyncio.ensure_future(in_flight.put(None))
+
+
+async def _receive_frames(ws: WebSocket, slot):
+    """
+    프레임 수신 태스크 (디코딩 없이 슬롯에 최신 프레임만 보관)
+
+    연결이 끊기면 슬롯을 닫아 처리 루프를 종료시킴
+    """
+    try:
+        while True:
+            # Binary 데이터 수신
+            data = await ws.receive_bytes()
+            slot.put(data)
+    except Exception as e:
+        print(f"[Security] 클라이언트 연결 종료: {e}")
+    finally:
+        slot.close()
+
+
+def _dispatch_notifications(notifications):
+    """워커에서 수집한 알림을 이벤트 루프에서 비동기 전송"""
+    for kind, *args in notifications:
+        if kind == "loitering":
+            asyncio.create_task(kakao.notify_loitering(*args))
+        elif kind == "hazard":
+            asyncio.create_task(kakao.notify_hazard(*args))
+
+
+# ============================================
+# 프레임 처리 워커 풀 API
+# ============================================
+@router.get("/pipeline/settings")
+def get_pipeline_settings():
+    """프레임 처리 워커 풀 상태 조회"""
+    return pipeline_service.get_stats()
+
+
+@router.post("/pipeline/workers")
+def set_pipeline_workers(workers: int = Query(..., description="워커 수 (1~32)")):
+    """프레임 처리 워커 수 변경"""
+    return pipeline_service.set_pool_size(workers)
+
+
+@router.get("/pipeline/batching")
+def get_batching_stats():
+    """다중 카메라 배치 추론 설정 및 배치 크기/큐 대기 히스토그램"""
+    return batch_service.get_stats()
+
+
+@router.post("/pipeline/batching")
+def set_batching(
+    enabled: bool = Query(None, description="배치 추론 사용 여부"),
+    max_batch: int = Query(None, description="최대 배치 크기 (1~16)"),
+    deadline_ms: float = Query(None, description="배치 수집 데드라인 (ms)")
+):
+    """배치 추론 설정 변경 (변경 시 히스토그램 초기화)"""
+    return batch_service.configure(enabled, max_batch, deadline_ms)
+
+
+@router.get("/sessions")
+def get_sessions():
+    """연결 중인 카메라 세션 목록"""
+    sessions = session_service.list_sessions()
+    return {"count": len(sessions), "sessions": sessions}
+
+
+# ============================================
+# 움직임 게이트 API
+# ============================================
+@router.get("/motion/settings")
+def get_motion_settings():
+    """움직임 게이트 설정 + 카메라별 감지 생략 비율"""
+    sessions = session_service.get_all_sessions()
+    detected = sum(session.motion_gate.detected for session in sessions)
+    skipped = sum(session.motion_gate.skipped for session in sessions)
+    return {
+        **motion_service.get_settings(),
+        "skipRatio": round(skipped / (detected + skipped), 3) if detected + skipped else 0.0,
+        "sessions": {session.camera_id: session.motion_gate.get_stats() for session in sessions}
+    }
+
+
+@router.post("/motion/settings")
+def set_motion_settings(
+    enabled: bool = Query(None, description="움직임 게이트 사용 여부"),
+    threshold: float = Query(None, description="변화 픽셀 비율 임계값 (0~1)"),
+    keepalive: float = Query(None, description="움직임 없어도 감지하는 주기 (초, 최대 4.5)")
+):
+    """움직임 게이트 설정 변경"""
+    return motion_service.configure(enabled, threshold, keepalive)
+
+
+# ============================================
+# 광류 전파 API
+# ============================================
+@router.get("/flow/settings")
+def get_flow_settings():
+    """감지 주기 / 광류 전파 설정 + 카메라별 전파·재동기화 횟수"""
+    return {
+        **flow_service.get_settings(),
+        "sessions": {
+            session.camera_id: session.box_flow.get_stats() for session in session_service.get_all_sessions()
+        }
+    }
+
+
+@router.post("/flow/settings")
+def set_flow_settings(interval: int = Query(..., description="감지 주기 (1~10, 1 = 매 프레임 감지)")):
+    """감지 주기 변경 (사이 프레임은 광류로 박스 전파)"""
+    return flow_service.set_interval(interval)
+
+
+# ============================================
+# 외형 재연결 (ReID) API
+# ============================================
+@router.get("/reid/settings")
+def get_reid_settings():
+    """외형 재연결 설정 + 카메라별 갤러리/재연결 수"""
+    return {
+        **reid_service.get_settings(),
+        "sessions": {
+            session.camera_id: session.lost_tracks.get_stats() for session in session_service.get_all_sessions()
+        }
+    }
+
+
+@router.post("/reid/settings")
+def set_reid_settings(
+    enabled: bool = Query(None, description="외형 재연결 사용 여부"),
+    min_similarity: float = Query(None, description="재연결 최소 유사도 (0.5~1.0)")
+):
+    """외형 재연결 설정 변경"""
+    return reid_service.configure(enabled, min_similarity)
+
+
+# ============================================
+# 감지 모델 레지스트리 API
+# ============================================
+@router.get("/models")
+def get_models():
+    """감지 모델 목록 (로드 상태, 입력 크기, 메모리 사용량)"""
+    return model_registry_service.list_models()
+
+
+@router.post("/models/load")
+def load_model(name: str = Query(..., description="모델 이름 (artifacts/{이름}.xml 또는 .onnx)")):
+    """감지 모델 미리 로드 (백그라운드 컴파일, 완료 여부는 GET /models로 확인)"""
+    try:
+        future = model_registry_service.load_async(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"'{name}' 모델 파일을 찾을 수 없습니다.")
+    if not future.done():
+        return {"success": True, "model": name, "status": "loading"}
+    if future.exception() is not None:
+        return {"success": False, "model": name, "status": "failed", "message": str(future.exception())}
+    return {"success": True, "model": name, "status": "loaded"}
+
+
+@router.post("/sessions/{camera_id}/model")
+def set_session_model(camera_id: str, name: str = Query(None, description="모델 이름 (없으면 기본 모델)")):
+    """카메라 세션의 감지 모델 변경 (로드 완료 후 다음 프레임부터 적용)"""
+    session = session_service.get_session(camera_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"'{camera_id}' 세션을 찾을 수 없습니다.")
+    try:
+        return model_registry_service.select_model(session, name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"'{name}' 모델 파일을 찾을 수 없습니다.")
+
+
 # ============================================
 # MediaPipe 설정 API
 # ============================================
@@ -237,6 +396,10 @@ def get_mediapipe_settings():
     return {
         "enabled": mediapipe_service.is_enabled(),
         "frameInterval": mediapipe_service.get_frame_interval(),
+        "budgetMs": mediapipe_service.get_frame_budget_ms(),
+        "poseTimeMs": round(mediapipe_service.get_pose_time_ms(), 1),
+        "landmarkers": mediapipe_service.get_landmarker_stats(),
+        "backend": mediapipe_service.get_backend_info(),
         "available": mediapipe_service.is_available()
     }
 
@@ -249,10 +412,47 @@ def toggle_mediapipe(enabled: bool = Query(..., description="MediaPipe 활성화
 
 @router.post("/mediapipe/interval")
 def set_mediapipe_interval(interval: int = Query(..., description="호출 주기 (1~30)")):
-    """MediaPipe 호출 주기 설정 (N 프레임마다 1번)"""
+    """MediaPipe 호출 주기 설정 (트래커마다 N 프레임에 1번)"""
     return mediapipe_service.set_interval(interval)
 
 
+@router.post("/mediapipe/budget")
+def set_mediapipe_budget(ms: float = Query(..., description="카메라 프레임당 관절 추출 시간 예산 (1~200ms)")):
+    """MediaPipe 프레임당 시간 예산 설정 (예산 안에서 트래커를 돌아가며 추출)"""
+    return mediapipe_service.set_budget(ms)
+
+
+# ============================================
+# 이상행동 규칙 API
+# ============================================
+@router.get("/behavior/settings")
+def get_behavior_settings():
+    """이상행동 규칙 목록 / 판정 시간 창 / 임계값"""
+    return behavior_service.get_settings()
+
+
+@router.post("/behavior/settings")
+def set_behavior_settings(
+    window_seconds: float = Query(None, description="규칙 판정 시간 창 (0.1초~, 상한은 GET의 maxWindowSeconds)"),
+    visibility: float = Query(None, description="관절이 보인다고 볼 최소 visibility (0~1)"),
+    fall_height_px: float = Query(None, description="FALL: 코-발목 높이 차이 상한 (px)"),
+    fall_ratio: float = Query(None, description="FALL: 시간 창 안 누운 자세 샘플 비율 (0~1)"),
+    hands_up_margin_px: float = Query(None, description="HANDS_UP: 손목이 어깨보다 위에 있어야 할 거리 (px)"),
+    hands_up_ratio: float = Query(None, description="HANDS_UP: 시간 창 안 손든 자세 샘플 비율 (0~1)"),
+    fast_motion_speed: float = Query(None, description="FAST_MOTION: 손목/발목 평균 속도 (px/초)"),
+    sudden_drop_ratio: float = Query(None, description="SUDDEN_DROP: 선 키 대비 머리가 내려간 비율 (0~1)"),
+    lying_seconds: float = Query(None, description="LYING: 몸통 수평 유지 시간 (초)")
+):
+    """이상행동 규칙 시간 창/임계값 변경 (다음 관절 반영부터 적용)"""
+    return behavior_service.configure(
+        window_seconds,
+        visibility=visibility, fall_height_px=fall_height_px, fall_ratio=fall_ratio,
+        hands_up_margin_px=hands_up_margin_px, hands_up_ratio=hands_up_ratio,
+        fast_motion_speed=fast_motion_speed, sudden_drop_ratio=sudden_drop_ratio,
+        lying_seconds=lying_seconds
+    )
+
+
 # ============================================
 # 화이트리스트 관리 API
 # ============================================
@@ -262,7 +462,8 @@ def get_whitelist():
     return {
         "count": face_whitelist.get_whitelist_count(),
         "names": face_whitelist.get_whitelist_names(),
-        "folder": KNOWN_FACES_DIR
+        "folder": KNOWN_FACES_DIR,
+        "face": face_whitelist.get_settings()
     }
 
 
@@ -290,27 +491,21 @@ async def upload_face(file: UploadFile = File(...), name: str = Form(...)):
     if file_ext not in allowed_extensions:
         raise HTTPException(status_code=400, detail="지원하지 않는 파일 형식입니다. (jpg, png, bmp만 가능)")
     
-    # 파일명 생성 (이름 + 확장자)
-    safe_name = name.replace(" ", "_").replace("/", "_")
-    
-    # 동일 이름 파일이 있으면 번호 추가
-    base_path = Path(KNOWN_FACES_DIR) / f"{safe_name}{file_ext}"
-    counter = 1
-    while base_path.exists():
-        base_path = Path(KNOWN_FACES_DIR) / f"{safe_name}_{counter}{file_ext}"
-        counter += 1
+    # 파일명 생성 (이름 + 확장자, 동일 이름 파일이 있으면 번호 추가)
+    base_path = unique_image_path(Path(KNOWN_FACES_DIR), name, file_ext)
     
     # 파일 저장
     try:
         with open(base_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
         
-        # 화이트리스트 새로고침
-        face_whitelist.reload_known_faces()
+        # 새 이미지 1장만 인코딩해 갤러리에 추가 (폴더 재검사 없음, 이벤트 루프 밖에서 실행)
+        face_detected = await asyncio.to_thread(face_whitelist.add_known_face, base_path)
         
         return {
             "message": f"'{name}' 등록 완료",
             "filename": base_path.name,
+            "faceDetected": face_detected,
             "count": face_whitelist.get_whitelist_count(),
             "names": face_whitelist.get_whitelist_names()
         }
@@ -318,6 +513,32 @@ async def upload_face(file: UploadFile = File(...), name: str = Form(...)):
         raise HTTPException(status_code=500, detail=f"파일 저장 실패: {str(e)}")
 
 
+@router.post("/whitelist/bulk")
+async def bulk_upload_faces(file: UploadFile = File(..., description="얼굴 이미지 ZIP (이름/사진.jpg 또는 이름_1.jpg)")):
+    """
+    화이트리스트 대량 등록 (ZIP 1개)
+    
+    - 이미지 인코딩은 프로세스 풀에서 병렬 실행, 갤러리에는 한 번에 추가
+    - 이미지별 상태 반환 (enrolled / no_face / duplicate / ...)
+    """
+    from pathlib import Path
+    
+    if Path(file.filename or "").suffix.lower() != ".zip":
+        raise HTTPException(status_code=400, detail="ZIP 파일만 업로드할 수 있습니다.")
+    
+    try:
+        result = await asyncio.to_thread(face_whitelist.enroll_archive, file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "message": f"{result['enrolled']}장 등록 완료",
+        **result,
+        "count": face_whitelist.get_whitelist_count(),
+        "names": face_whitelist.get_whitelist_names()
+    }
+
+
 @router.delete("/whitelist/{name}")
 def delete_whitelist_user(name: str):
     """화이트리스트에서 사용자 삭제 (해당 이름의 모든 이미지 삭제)"""
@@ -331,9 +552,7 @@ def delete_whitelist_user(name: str):
             continue
         
         # 파일명에서 이름 추출
-        file_name = img_path.stem
-        if '_' in file_name and file_name.rsplit('_', 1)[-1].isdigit():
-            file_name = file_name.rsplit('_', 1)[0]
+        file_name = person_name_from_file(img_path.stem)
         
         # 이름이 일치하면 삭제
         if file_name == name:
@@ -347,8 +566,8 @@ def delete_whitelist_user(name: str):
     if deleted_count == 0:
         raise HTTPException(status_code=404, detail=f"'{name}' 사용자를 찾을 수 없습니다.")
     
-    # 화이트리스트 새로고침
-    face_whitelist.reload_known_faces()
+    # 갤러리에서 해당 이름의 임베딩만 제거 (폴더 재검사 없음)
+    face_whitelist.remove_known_name(name)
     
     return {
         "message": f"'{name}' 삭제 완료 ({deleted_count}개 이미지)",
@@ -6,7 +6,7 @@ OpenVINO를 사용한 YOLO 기반 객체 감지 서비스
 [아키텍처]
 - OpenVINO: 인텔 하드웨어(CPU/GPU)에 최적화된 추론 엔진
 - YOLO: You Only Look Once, 실시간 객체 감지 알고리즘
-- 입력: 320x320 RGB 이미지
+- 입력: 320x320 RGB 이미지 (모델마다 다를 수 있음 - 640 모델이면 640x640)
 - 출력: 바운딩 박스 + 클래스 라벨 + 신뢰도
 
 [감지 클래스]
@@ -16,13 +16,48 @@ OpenVINO를 사용한 YOLO 기반 객체 감지 서비스
 
 [처리 파이프라인]
 1. preprocess(): 이미지 리사이즈 → RGB 변환 → 정규화
-2. run_inference(): OpenVINO로 추론 실행
+   (기본: 모델 그래프 안에서 처리 → 디코딩된 u8 BGR 프레임을 복사 없이 그대로 입력)
+2. run_inference(): OpenVINO로 추론 실행 (동기)
+   submit_inference(): AsyncInferQueue로 비동기 추론 (완료 시 Future에 결과 설정)
 3. postprocess(): NMS로 중복 제거 → 결과 포맷팅
+   (기본: 신뢰도 필터/클래스별 NMS/top-k를 그래프 안에서 처리 → (1, 100, 6) 고정 크기 출력)
+
+[비동기 추론 (AsyncInferQueue)]
+- 추론 요청 객체 여러 개를 풀로 관리 → 프레임 N이 추론 중일 때 N+1을 디코딩/전처리
+- 성능 힌트: LATENCY(카메라 1~2대) / THROUGHPUT(다중 카메라, 스트림 여러 개)
+  환경변수 AI_PERFORMANCE_HINT, AI_INFER_REQUESTS로 조정
+
+[그래프 내 전처리 (PrePostProcessor)]
+- 모델 입력을 u8 NHWC BGR로 바꾸고 RGB 변환/레이아웃 변환/정규화를 그래프에 포함
+- Python에서는 cv2.imdecode 결과를 공유 메모리 Tensor로 감싸기만 함 (프레임 복사 X)
+- 브라우저가 320x320으로 보내므로 보통 리사이즈 없음 (다른 크기만 u8 상태로 리사이즈)
+- 환경변수 AI_GRAPH_PREPROCESS=0 또는 그래프 구성 실패 시 기존 CPU 전처리로 폴백
+
+[그래프 내 후처리 (MulticlassNms)]
+- (1, 7, 2100) 앵커 출력 → 박스 변환 → 클래스별 NMS → 상위 MAX_DETECTIONS개
+- 출력: (1, MAX_DETECTIONS, 6) [class_id, score, x1, y1, x2, y2], 빈 자리는 class_id = -1
+- 환경변수 AI_GRAPH_NMS=0 또는 구성 실패 시 numpy 벡터 후처리로 폴백 (배치 모델도 numpy 경로)
+
+[정밀도 변형 (AI_MODEL_PRECISION)]
+- fp16: 배포된 best.xml (FP16 압축 가중치, 디바이스 기본 추론 정밀도) - 기본값
+- fp32: 같은 IR을 f32 추론 정밀도로 강제 (정확도 기준선)
+- int8: scripts/quantize_int8.py로 만든 best_int8.xml (NNCF 사후 양자화, CPU 처리량 약 2배)
+  파일이 없으면 fp16으로 폴백
+
+[감지 모델 (Detector)]
+- 컴파일 모델/추론 요청 풀/입력 크기/클래스 매핑을 모델 1개 단위로 보관
+- 기본 모델(best.xml 변형)은 import 시 로드, 모듈 레벨 함수는 기본 모델에 위임
+- 카메라별 모델 선택/백그라운드 로딩/LRU 제거는 model_registry_service가 담당
 """
 import os
+import time
+import threading
+from concurrent.futures import Future
 import numpy as np
 import cv2
-from openvino import Core
+import openvino.opset13 as ops
+from openvino import Core, AsyncInferQueue, PartialShape, Dimension, Tensor, Type, Layout
+from openvino.preprocess import PrePostProcessor, ColorFormat
 
 from app.utils.path_utils import ARTIFACTS_DIR
 
@@ -39,66 +74,563 @@ print(f"[AIModel] 사용 가능한 디바이스: {available_devices}")
 
 
 # ==================================================
-# 모델 상태 변수 (모듈 레벨 싱글톤)
+# 설정값 (Configuration)
 # ==================================================
-_compiled_model = None   # 컴파일된 OpenVINO 모델
-_infer_request = None    # 추론 요청 객체 (재사용으로 성능 향상)
-_input_layer = None      # 입력 레이어 정보
-_output_layer = None     # 출력 레이어 정보
-_classes = ["fire", "person", "smoke"]  # 클래스 이름 매핑
+# 성능 힌트: LATENCY(지연 최소화) / THROUGHPUT(다중 카메라 처리량 최대화)
+PERFORMANCE_HINT = os.getenv("AI_PERFORMANCE_HINT", "LATENCY").upper()
+if PERFORMANCE_HINT not in ("LATENCY", "THROUGHPUT"):
+    PERFORMANCE_HINT = "LATENCY"
 
+# 비동기 추론 요청 수 (0 = 디바이스 권장값 사용, 최소 2개로 파이프라이닝)
+INFER_REQUESTS = int(os.getenv("AI_INFER_REQUESTS", "0"))
+
+# 모델 정밀도 변형: { 이름: (IR 파일 이름, 추론 정밀도 힌트) }
+MODEL_VARIANTS = {
+    "fp32": ("best", "f32"),        # FP16 가중치를 f32로 풀어 f32로 추론
+    "fp16": ("best", None),         # 디바이스 기본 정밀도 (CPU: f32/bf16, GPU: f16)
+    "int8": ("best_int8", None),    # NNCF 양자화 IR (FakeQuantize → INT8 커널)
+}
+DEFAULT_PRECISION = "fp16"
+MODEL_PRECISION = os.getenv("AI_MODEL_PRECISION", DEFAULT_PRECISION).lower()
+if MODEL_PRECISION not in MODEL_VARIANTS:
+    MODEL_PRECISION = DEFAULT_PRECISION
+
+# 그래프 내 전처리 사용 여부 (0이면 기존 CPU 전처리)
+GRAPH_PREPROCESS = os.getenv("AI_GRAPH_PREPROCESS", "1") == "1"
+
+# 그래프 내 NMS 사용 여부 (0이면 numpy 후처리)
+GRAPH_NMS = os.getenv("AI_GRAPH_NMS", "1") == "1"
+
+# 후처리 기준값 (그래프 NMS에는 컴파일 시 고정)
+CONFIDENCE_THRESHOLD = 0.4   # 최소 신뢰도
+LOW_CONFIDENCE_THRESHOLD = 0.1   # 그래프 NMS 출력 하한 (0.1~0.4 박스는 트래커 2차 매칭에만 사용)
+IOU_THRESHOLD = 0.45         # NMS IoU 임계값
+MAX_DETECTIONS = 100         # 프레임당 최대 감지 수 (그래프 출력 고정 크기)
+
+INPUT_SIZE = 320                              # 기본 모델 입력 크기 (입력 shape가 동적인 모델에 사용)
+DEFAULT_CLASSES = ["fire", "person", "smoke"]  # 모델에 클래스 정보가 없을 때의 기본 매핑
+MEMORY_OVERHEAD = 2.0                          # 컴파일 모델 메모리 ≈ 가중치 파일 크기 × 2 (추정치)
+
+# 디바이스 / 컴파일 캐시 (모든 감지 모델이 공유)
+_device = "GPU" if "GPU" in available_devices else "CPU"
+_cache_dir = os.path.join(ARTIFACTS_DIR, "model_cache")
+
+# 워커 스레드별 전처리 버퍼 ({ 입력 크기: 버퍼 })
+_thread_local = threading.local()
+
+
+# ==================================================
+# 모델 그래프 구성
+# ==================================================
+def _on_inference_done(infer_request, future):
+    """AsyncInferQueue 완료 콜백 (OpenVINO 내부 스레드에서 호출)"""
+    try:
+        future.set_result([infer_request.get_output_tensor(0).data.copy()])
+    except Exception as e:
+        future.set_exception(e)
+
+
+def _variant_path(precision):
+    """정밀도 변형의 IR 파일 경로 (xml, bin)"""
+    name, _ = MODEL_VARIANTS[precision]
 
-def _init_model():
-    """
-    OpenVINO 모델 초기화
-    
-    [동작 과정]
-    1. XML(구조) + BIN(가중치) 파일로 모델 로드
-    2. GPU 우선, 없으면 CPU로 폴백
-    3. 캐시 설정으로 재시작 시 로딩 속도 향상
-    4. LATENCY 힌트로 실시간 추론 최적화
-    """
-    global _compiled_model, _infer_request, _input_layer, _output_layer
-    
     # 모델 파일 경로 (OpenVINO IR 포맷)
-    model_xml = os.path.join(ARTIFACTS_DIR, "best.xml")  # 모델 구조
-    model_bin = os.path.join(ARTIFACTS_DIR, "best.bin")  # 모델 가중치
-    
+    model_xml = os.path.join(ARTIFACTS_DIR, f"{name}.xml")  # 모델 구조
+    model_bin = os.path.join(ARTIFACTS_DIR, f"{name}.bin")  # 모델 가중치
+    return model_xml, model_bin
+
+
+def _read_model(precision=DEFAULT_PRECISION):
+    """정밀도 변형에 해당하는 IR 모델 읽기 (파일이 없으면 None)"""
+    model_xml, model_bin = _variant_path(precision)
     if not os.path.exists(model_xml) or not os.path.exists(model_bin):
-        print(f"[AIModel] Warning: 모델 파일 없음")
-        return
-    
+        return None
+    return core.read_model(model=model_xml, weights=model_bin)
+
+
+def _variant_config(precision, config):
+    """정밀도 변형의 컴파일 설정 추가 (추론 정밀도 힌트)"""
+    _, inference_precision = MODEL_VARIANTS[precision]
+    if inference_precision:
+        config = dict(config, INFERENCE_PRECISION_HINT=inference_precision)
+    return config
+
+
+def _model_input_size(model):
+    """모델 입력 H (정사각형 입력 가정, 동적이면 INPUT_SIZE)"""
+    height = model.input(0).get_partial_shape()[2]
+    return height.get_length() if height.is_static else INPUT_SIZE
+
+
+def _model_classes(model, model_path):
+    """
+    모델의 클래스 이름 목록
+
+    1. OpenVINO IR: rt_info의 model_info/labels ("fire person smoke", Ultralytics export 형식)
+    2. ONNX: 메타데이터 names ("{0: 'person', 1: 'bicycle', ...}", onnx 패키지가 있을 때만)
+    3. 둘 다 없으면 출력 채널 수(4 + 클래스 수)에 맞춰 DEFAULT_CLASSES 또는 class0, class1, ...
+    """
     try:
+        if model.has_rt_info(["model_info", "labels"]):
+            labels = model.get_rt_info(["model_info", "labels"]).astype(str).split()
+            if labels:
+                return labels
+    except Exception:
+        pass
+
+    if model_path.endswith(".onnx"):
+        try:
+            import ast
+            import onnx
+            metadata = {prop.key: prop.value for prop in onnx.load(model_path, load_external_data=False).metadata_props}
+            if "names" in metadata:
+                names = ast.literal_eval(metadata["names"])
+                return [names[i] for i in sorted(names)]
+        except Exception:
+            pass
+
+    channels = model.output(0).get_partial_shape()[1]
+    num_classes = channels.get_length() - 4 if channels.is_static else len(DEFAULT_CLASSES)
+    if num_classes == len(DEFAULT_CLASSES):
+        return list(DEFAULT_CLASSES)
+    return [f"class{i}" for i in range(num_classes)]
+
+
+def _apply_preprocessing(model):
+    """
+    전처리를 모델 그래프에 포함 (PrePostProcessor)
+
+    [변환]
+    - 입력 텐서: u8, NHWC, BGR (cv2.imdecode 결과 그대로)
+    - 그래프 내부: f32 변환 → BGR→RGB → /255 → NCHW
+    - 입력 H/W는 모델과 같은 크기로 고정 (320x320, 640x640 모델이면 640x640)
+      (가변 H/W + 그래프 내 리사이즈는 매 프레임 shape 추론 비용 때문에 CPU에서 더 느림)
+
+    Args:
+        model: read_model()로 읽은 모델 (in-place 수정)
+
+    Returns:
+        전처리가 포함된 모델
+    """
+    ppp = PrePostProcessor(model)
+    ppp.input().tensor() \
+        .set_element_type(Type.u8) \
+        .set_layout(Layout("NHWC")) \
+        .set_color_format(ColorFormat.BGR)
+    ppp.input().preprocess() \
+        .convert_element_type(Type.f32) \
+        .convert_color(ColorFormat.RGB) \
+        .scale(255.0)
+    ppp.input().model().set_layout(Layout("NCHW"))
+    return ppp.build()
+
+
+def _apply_nms(model, conf_threshold=LOW_CONFIDENCE_THRESHOLD, iou_threshold=IOU_THRESHOLD,
+               max_detections=MAX_DETECTIONS):
+    """
+    후처리를 모델 그래프에 포함 (박스 변환 + 클래스별 NMS + top-k)
+
+    [변환]
+    - 원본 출력: (1, 4 + 클래스 수, 앵커 수) [cx, cy, w, h, 클래스 점수...] (320 모델: (1, 7, 2100))
+    - 추가 그래프: cxcywh → x1y1x2y2 → 앵커별 최고 클래스만 남김 → MulticlassNms(점수순, 상위 max_detections)
+    - 새 출력: (1, max_detections, 6) [class_id, score, x1, y1, x2, y2]
+      감지 수가 적으면 class_id = -1 행으로 채움 (고정 크기 → 출력 버퍼 재할당 없음)
+    - 점수 하한은 LOW_CONFIDENCE_THRESHOLD (트래커 2차 매칭용), 일반 결과는 detect()에서 다시 필터링
+
+    Args:
+        model: 원시 출력 모델 (배치 1)
+
+    Returns:
+        NMS가 포함된 모델 (in-place 수정)
+    """
+    result = model.get_results()[0]
+    raw = result.input_value(0)
+    num_classes = raw.get_partial_shape()[1].get_length() - 4
+
+    # (1, 4 + C, N) → 박스 (1, 4, N) + 클래스 점수 (1, C, N)
+    xywh, scores = ops.variadic_split(raw, 1, [4, num_classes]).outputs()
+    cx, cy, w, h = ops.split(xywh, 1, 4).outputs()
+    half_w = ops.multiply(w, np.float32(0.5))
+    half_h = ops.multiply(h, np.float32(0.5))
+    corners = ops.concat([
+        ops.subtract(cx, half_w), ops.subtract(cy, half_h),
+        ops.add(cx, half_w), ops.add(cy, half_h)
+    ], 1)
+    boxes = ops.transpose(corners, np.array([0, 2, 1], dtype=np.int64))   # (1, N, 4)
+
+    # 앵커마다 최고 점수 클래스 1개만 (numpy 경로의 argmax와 동일)
+    # MulticlassNms는 클래스마다 따로 거르므로 그대로 넘기면 한 앵커가 클래스 수만큼 박스로 나옴
+    # (예: 화재 0.9 + 연기 0.8 → 같은 박스 2개), stable=True → 동점이면 낮은 클래스 (np.argmax와 동일)
+    best = ops.topk(scores, 1, axis=1, mode="max", sort="value", index_element_type="i32", stable=True)
+    class_index = ops.constant(np.arange(num_classes, dtype=np.int32).reshape(1, num_classes, 1))
+    is_best = ops.equal(class_index, best.output(1))                      # (1, C, N)
+    scores = ops.select(is_best, scores, np.float32(0.0))
+
+    nms = ops.multiclass_nms(
+        boxes, scores,
+        sort_result_type="score",
+        output_type="i32",
+        iou_threshold=iou_threshold,
+        score_threshold=conf_threshold,
+        keep_top_k=max_detections,
+        normalized=True   # 픽셀 좌표 그대로 (+1 보정 없음, cv2 NMS와 동일)
+    )
+
+    # (N, 6) 가변 → (max_detections, 6) 고정: 패딩 행을 붙인 뒤 앞에서부터 자름
+    padding = np.zeros((max_detections, 6), dtype=np.float32)
+    padding[:, 0] = -1
+    padded = ops.concat([nms.output(0), ops.constant(padding)], 0)
+    fixed = ops.slice(padded, np.array([0]), np.array([max_detections]), np.array([1]), np.array([0]))
+    detections = ops.unsqueeze(fixed, np.array([0]))
+
+    # 기존 출력(Result)을 NMS 결과에 다시 연결
+    result.input(0).replace_source_output(detections.output(0))
+    model.validate_nodes_and_infer_types()
+    model.output(0).get_tensor().set_names({"detections"})
+    return model
+
+
+# ==================================================
+# 감지 모델 (Detector)
+# ==================================================
+class Detector:
+    """
+    컴파일된 감지 모델 1개
+
+    [모델별로 보관하는 것]
+    - 컴파일 모델 + 비동기 추론 요청 풀 + 스레드별 추론 요청
+    - 입력 크기 (320 / 640), 클래스 이름 매핑, 그래프 전처리/NMS 적용 여부
+
+    [수명]
+    - 파이프라인은 프레임마다 사용할 Detector를 prepare_frame 시점에 잡아둠
+      → 레지스트리에서 교체/제거되어도 진행 중인 프레임은 같은 Detector로 끝까지 처리
+      (마지막 참조가 사라지면 컴파일 모델/추론 요청도 함께 해제)
+    """
+
+    def __init__(self, name, model_path, weights_path=None, precision=None, inference_precision=None):
+        self.name = name                           # 레지스트리 이름 (파일 이름, 예: best, yolo11n)
+        self.model_path = model_path               # .xml 또는 .onnx
+        self.weights_path = weights_path           # .bin (ONNX는 None)
+        self.precision = precision                 # 정밀도 변형 이름 (fp32/fp16/int8, 기본 모델만)
+        self.inference_precision = inference_precision
+
+        self.compiled_model = None
+        self.infer_queue = None
+        self.input_size = INPUT_SIZE
+        self.classes = list(DEFAULT_CLASSES)
+        self.graph_preprocess = False
+        self.graph_nms = False
+        self.memory_bytes = 0
+        self.loaded_at = None
+        self.last_used = 0.0
+
+        # 워커 스레드별 추론 요청 객체
+        # - InferRequest는 동시에 여러 스레드에서 사용할 수 없음
+        # - 스레드마다 1개씩 만들어 재사용 → 카메라 여러 대가 병렬로 추론
+        self._thread_local = threading.local()
+
+    @classmethod
+    def from_variant(cls, precision):
+        """정밀도 변형(best.xml / best_int8.xml)으로 Detector 생성"""
+        model_xml, model_bin = _variant_path(precision)
+        name, inference_precision = MODEL_VARIANTS[precision]
+        return cls(name, model_xml, model_bin, precision=precision, inference_precision=inference_precision)
+
+    # ─────────────────────────────────────────────
+    # 로딩
+    # ─────────────────────────────────────────────
+    def _read(self):
+        """모델 읽기 (입력 shape가 동적이면 (1, 3, input_size, input_size)로 고정)"""
+        model = core.read_model(model=self.model_path, weights=self.weights_path)
+        if not model.input(0).get_partial_shape().is_static:
+            size = _model_input_size(model)
+            model.reshape({model.input(0): PartialShape([1, 3, size, size])})
+        return model
+
+    def _config(self, config):
+        """추론 정밀도 힌트 추가"""
+        if self.inference_precision:
+            config = dict(config, INFERENCE_PRECISION_HINT=self.inference_precision)
+        return config
+
+    def load(self):
+        """
+        모델 읽기 → 그래프 전처리/NMS 추가 → 컴파일 → 비동기 추론 요청 풀 생성
+
+        [동작 과정]
+        1. XML(구조) + BIN(가중치) 또는 ONNX 파일로 모델 로드
+        2. 입력 크기 / 클래스 매핑을 모델에서 읽음
+        3. 캐시 설정으로 재시작 시 로딩 속도 향상
+        4. 성능 힌트(LATENCY/THROUGHPUT)로 실시간 추론 최적화
+        5. 비동기 추론 요청 풀(AsyncInferQueue) 생성
+
+        실패 시 예외를 그대로 전파 (호출측에서 처리)
+
+        Returns:
+            self
+        """
         # 1. 모델 읽기 (아직 디바이스에 로드되지 않음)
-        model = core.read_model(model=model_xml, weights=model_bin)
-        
-        # 2. 디바이스 선택 (인텔 GPU > CPU)
-        device = "GPU" if "GPU" in available_devices else "CPU"
-        
+        model = self._read()
+
+        # 2. 모델 정보 (좌표 변환/라벨 매핑에 사용)
+        input_size = _model_input_size(model)
+        classes = _model_classes(model, self.model_path)
+
+        # 2-1. 전처리를 그래프에 포함 (실패 시 CPU 전처리 유지)
+        graph_preprocess = False
+        if GRAPH_PREPROCESS:
+            try:
+                model = _apply_preprocessing(model)
+                graph_preprocess = True
+            except Exception as e:
+                print(f"[AIModel] [{self.name}] 그래프 전처리 구성 실패 - CPU 전처리 사용: {e}")
+                model = self._read()
+
+        # 2-2. NMS를 그래프에 포함 (실패 시 numpy 후처리)
+        graph_nms = False
+        if GRAPH_NMS:
+            try:
+                model = _apply_nms(model)
+                graph_nms = True
+            except Exception as e:
+                print(f"[AIModel] [{self.name}] 그래프 NMS 구성 실패 - numpy 후처리 사용: {e}")
+
         # 3. 캐시 디렉토리 설정 (컴파일된 모델 저장 → 재시작 시 빠른 로딩)
-        cache_dir = os.path.join(ARTIFACTS_DIR, "model_cache")
-        os.makedirs(cache_dir, exist_ok=True)
-        
-        # 4. 성능 최적화 설정
-        config = {
-            "CACHE_DIR": cache_dir,           # 모델 캐싱 (5~10배 빠른 재로딩)
-            "PERFORMANCE_HINT": "LATENCY"     # 지연 시간 최소화 (실시간 추론)
+        os.makedirs(_cache_dir, exist_ok=True)
+
+        # 4. 성능 최적화 설정 + 컴파일 (디바이스에 최적화된 형태로 변환)
+        config = self._config({
+            "CACHE_DIR": _cache_dir,              # 모델 캐싱 (5~10배 빠른 재로딩)
+            "PERFORMANCE_HINT": PERFORMANCE_HINT  # LATENCY: 실시간 / THROUGHPUT: 다중 카메라
+        })
+        compiled_model = core.compile_model(model=model, device_name=_device, config=config)
+
+        # 5. 비동기 추론 요청 풀 생성
+        # - THROUGHPUT 힌트에서는 디바이스가 권장하는 요청 수(스트림 수)만큼 생성
+        # - 최소 2개: 하나가 추론 중일 때 다른 하나에 다음 프레임 입력
+        jobs = INFER_REQUESTS
+        if jobs <= 0:
+            jobs = max(2, compiled_model.get_property("OPTIMAL_NUMBER_OF_INFER_REQUESTS"))
+        infer_queue = AsyncInferQueue(compiled_model, jobs)
+        infer_queue.set_callback(_on_inference_done)
+
+        # 모든 준비가 끝난 뒤에 한 번에 공개 (로딩 중인 Detector는 사용되지 않음)
+        self.input_size = input_size
+        self.classes = classes
+        self.graph_preprocess = graph_preprocess
+        self.graph_nms = graph_nms
+        self.memory_bytes = self._estimate_memory()
+        self.compiled_model = compiled_model
+        self.infer_queue = infer_queue
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+
+        print(f"[AIModel] [{self.name}] 로드 완료 - 디바이스: {_device}, 정밀도: {self.precision or '-'}, "
+              f"추론 요청: {jobs}개")
+        print(f"[AIModel] [{self.name}] 입력: {input_size}x{input_size}, 그래프 전처리: {graph_preprocess}, "
+              f"그래프 NMS: {graph_nms}, 클래스: {len(classes)}개")
+        return self
+
+    def _estimate_memory(self):
+        """컴파일 모델 메모리 추정 (가중치 파일 크기 × MEMORY_OVERHEAD)"""
+        path = self.weights_path or self.model_path
+        try:
+            return int(os.path.getsize(path) * MEMORY_OVERHEAD)
+        except OSError:
+            return 0
+
+    @property
+    def loaded(self):
+        return self.compiled_model is not None
+
+    def touch(self):
+        """사용 시각 갱신 (LRU 제거 기준)"""
+        self.last_used = time.time()
+
+    def get_info(self):
+        """모델 정보 (모니터링용)"""
+        return {
+            "name": self.name,
+            "loaded": self.loaded,
+            "precision": self.precision,
+            "inputSize": self.input_size,
+            "classes": len(self.classes),
+            "inferRequests": len(self.infer_queue) if self.infer_queue is not None else 0,
+            "graphPreprocess": self.graph_preprocess,
+            "graphNms": self.graph_nms,
+            "memoryMB": round(self.memory_bytes / (1024 * 1024), 1),
+            "lastUsed": self.last_used
         }
-        
-        # 5. 모델 컴파일 (디바이스에 최적화된 형태로 변환)
-        _compiled_model = core.compile_model(model=model, device_name=device, config=config)
-        
-        # 6. 추론 요청 객체 생성 (재사용으로 메모리 할당 오버헤드 제거)
-        _infer_request = _compiled_model.create_infer_request()
-        
-        # 7. 입출력 레이어 정보 저장
-        _input_layer = _compiled_model.input(0)
-        _output_layer = _compiled_model.output(0)
-        
-        print(f"[AIModel] OpenVINO 로드 완료 - 디바이스: {device}")
-        print(f"[AIModel] 캐시: {cache_dir}, 성능 힌트: LATENCY")
-        print(f"[AIModel] 입력 shape: {_input_layer.shape}, 클래스: {_classes}")
-        
+
+    def compile_dynamic_batch(self, max_batch):
+        """
+        동적 배치 모델 컴파일 (다중 카메라 배치 추론용)
+
+        [변환]
+        - 원본 입력: (1, 3, S, S) 고정 (S = input_size)
+        - 변환 후: (1~max_batch, 3, S, S) → 출력도 (B, 4 + 클래스 수, 앵커 수)
+          (그래프 NMS는 배치별 고정 크기로 나눌 수 없으므로 원시 출력 유지 → numpy 후처리)
+        - 그래프 전처리 사용 시 입력은 (1~max_batch, S, S, 3) u8 BGR
+        - THROUGHPUT 힌트: 배치 1회 추론의 처리량 최대화
+
+        Args:
+            max_batch: 배치 크기 상한 (동적 차원의 upper bound)
+
+        Returns:
+            CompiledModel 또는 None (모델 없음/실패)
+        """
+        if not self.loaded:
+            return None
+
+        try:
+            model = self._read()
+            size = self.input_size
+            model.reshape({model.input(0): PartialShape([Dimension(1, max_batch), 3, size, size])})
+            if self.graph_preprocess:
+                model = _apply_preprocessing(model)
+            compiled = core.compile_model(model=model, device_name=_device, config=self._config({
+                "CACHE_DIR": _cache_dir,
+                "PERFORMANCE_HINT": "THROUGHPUT"
+            }))
+            print(f"[AIModel] [{self.name}] 동적 배치 모델 컴파일 완료 - 입력: {compiled.input(0).partial_shape}")
+            return compiled
+        except Exception as e:
+            print(f"[AIModel] [{self.name}] 동적 배치 모델 컴파일 실패: {e}")
+            return None
+
+    # ─────────────────────────────────────────────
+    # 전처리 / 추론
+    # ─────────────────────────────────────────────
+    def _get_infer_request(self):
+        """현재 스레드 전용 추론 요청 객체 반환 (없으면 생성)"""
+        infer_request = getattr(self._thread_local, "infer_request", None)
+        if infer_request is None and self.compiled_model is not None:
+            # 추론 요청 객체 생성 (재사용으로 메모리 할당 오버헤드 제거)
+            infer_request = self.compiled_model.create_infer_request()
+            self._thread_local.infer_request = infer_request
+        return infer_request
+
+    def preprocess(self, frame):
+        """
+        이미지 전처리: OpenCV BGR → 모델 입력
+
+        - 그래프 전처리 사용 시: (1, S, S, 3) u8 BGR 뷰 반환 (복사 X, 변환은 OpenVINO가 수행)
+          모델 입력 크기와 다른 프레임만 u8 상태로 리사이즈
+        - 아니면 preprocess_host()로 CPU에서 변환
+
+        Args:
+            frame: OpenCV BGR 이미지 (numpy array)
+
+        Returns:
+            모델 입력 배열
+        """
+        size = self.input_size
+        if self.graph_preprocess:
+            if frame.shape[:2] != (size, size):
+                frame = cv2.resize(frame, (size, size), interpolation=cv2.INTER_LINEAR)
+            # imdecode 결과는 연속 메모리 → np.newaxis는 복사 없이 뷰만 생성
+            return np.ascontiguousarray(frame)[np.newaxis]
+        return preprocess_host(frame, size)
+
+    def run_inference(self, input_data):
+        """
+        OpenVINO 추론 실행 (동기)
+
+        Args:
+            input_data: preprocess() 결과 (u8 (1, S, S, 3) 또는 f32 (1, 3, S, S))
+
+        Returns:
+            모델 출력 텐서 (바운딩 박스 + 클래스 확률)
+        """
+        infer_request = self._get_infer_request()
+        if infer_request is None:
+            return None
+
+        # 동기 추론 실행 (입력 인덱스 0에 데이터 전달)
+        infer_request.infer({0: _to_input_tensor(input_data)})
+
+        # 출력 텐서 반환 (인덱스 0)
+        # 주의: 같은 스레드의 다음 추론 전까지만 유효한 버퍼 (postprocess는 같은 스레드에서 바로 호출)
+        return [infer_request.get_output_tensor(0).data]
+
+    def submit_inference(self, input_data):
+        """
+        비동기 추론 시작 (AsyncInferQueue)
+
+        [동작 원리]
+        - 유휴 추론 요청이 있으면 바로 시작, 모두 사용 중이면 하나가 끝날 때까지 대기
+          → 워커 스레드에서 호출할 것 (이벤트 루프 블로킹 방지)
+        - f32 입력은 요청 객체 내부 텐서로 복사되므로 호출 직후 입력 버퍼 재사용 가능
+        - u8 프레임 입력은 공유 메모리로 연결되므로 완료 전까지 프레임을 수정하면 안 됨
+        - 완료 콜백에서 출력 텐서를 복사해 Future에 설정 (요청 객체는 곧바로 재사용됨)
+
+        Returns:
+            concurrent.futures.Future → 결과: [출력 텐서] (run_inference와 같은 형태)
+            모델이 없으면 None
+        """
+        if self.infer_queue is None:
+            return None
+
+        future = Future()
+        self.infer_queue.start_async({0: _to_input_tensor(input_data)}, future)
+        return future
+
+    # ─────────────────────────────────────────────
+    # 후처리
+    # ─────────────────────────────────────────────
+    def postprocess(self, output, conf_threshold=CONFIDENCE_THRESHOLD, iou_threshold=IOU_THRESHOLD):
+        """모델 출력 → JSON 응답용 감지 결과 (이 모델의 클래스 이름 사용)"""
+        try:
+            return to_predictions(detect(output, conf_threshold, iou_threshold), self.classes)
+        except Exception as e:
+            print(f"[AIModel] [{self.name}] postprocess 오류: {e}")
+            return []
+
+    def postprocess_with_low(self, output, conf_threshold=CONFIDENCE_THRESHOLD,
+                             low_threshold=LOW_CONFIDENCE_THRESHOLD):
+        """
+        모델 출력 → (감지 결과, 낮은 신뢰도 감지 결과)
+
+        - 감지 결과: postprocess()와 동일 (conf_threshold 초과)
+        - 낮은 신뢰도 결과: low_threshold ~ conf_threshold (화면/경보에는 쓰지 않고 트래커 2차 매칭에만 사용)
+        """
+        try:
+            detections = detect(output, low_threshold)
+            high = detections["score"] > conf_threshold
+            return to_predictions(detections[high], self.classes), to_predictions(detections[~high], self.classes)
+        except Exception as e:
+            print(f"[AIModel] [{self.name}] postprocess 오류: {e}")
+            return [], []
+
+
+# ==================================================
+# 기본 감지 모델 (모듈 레벨 싱글톤)
+# ==================================================
+_default_detector = None
+
+
+def _init_model():
+    """
+    기본 감지 모델 초기화 (AI_MODEL_PRECISION 변형, 파일이 없으면 fp16으로 폴백)
+
+    - GPU 우선, 없으면 CPU로 폴백
+    - 로드 실패 시에도 Detector 객체는 유지 (loaded=False → 추론 결과 None)
+    """
+    global _default_detector
+
+    print(f"[AIModel] 디바이스: {_device}, 캐시: {_cache_dir}, 성능 힌트: {PERFORMANCE_HINT}")
+    precision = MODEL_PRECISION
+    if precision != DEFAULT_PRECISION and not all(map(os.path.exists, _variant_path(precision))):
+        print(f"[AIModel] {precision} 모델 파일 없음 - {DEFAULT_PRECISION}로 폴백")
+        precision = DEFAULT_PRECISION
+
+    _default_detector = Detector.from_variant(precision)
+    if not all(map(os.path.exists, _variant_path(precision))):
+        print(f"[AIModel] Warning: 모델 파일 없음")
+        return
+
+    try:
+        _default_detector.load()
     except Exception as e:
         print(f"[AIModel] 로드 실패: {e}")
 
@@ -107,166 +639,241 @@ def _init_model():
 _init_model()
 
 
+def get_default_detector():
+    """기본 감지 모델 (세션에서 모델을 지정하지 않았을 때 사용)"""
+    return _default_detector
+
+
 def get_session():
     """컴파일된 모델 반환 (외부에서 모델 상태 확인용)"""
-    return _compiled_model
+    return _default_detector.compiled_model
+
+
+def get_engine_info():
+    """추론 엔진 설정 (모니터링용)"""
+    info = _default_detector.get_info()
+    return {
+        "loaded": info["loaded"],
+        "model": info["name"],
+        "precision": info["precision"],
+        "inputSize": info["inputSize"],
+        "performanceHint": PERFORMANCE_HINT,
+        "inferRequests": info["inferRequests"],
+        "graphPreprocess": info["graphPreprocess"],
+        "graphNms": info["graphNms"]
+    }
+
+
+def compile_dynamic_batch(max_batch):
+    """기본 감지 모델의 동적 배치 모델 컴파일 (Detector.compile_dynamic_batch 참고)"""
+    return _default_detector.compile_dynamic_batch(max_batch)
 
 
 def get_classes():
-    """클래스 이름 목록 반환"""
-    return _classes
+    """기본 감지 모델의 클래스 이름 목록 반환"""
+    return _default_detector.classes
 
 
 # ==================================================
 # 전처리 (Preprocessing)
 # ==================================================
-INPUT_SIZE = 320  # 모델 입력 크기 (320x320)
-
-# 전처리 버퍼 (메모리 재할당 방지로 성능 향상)
-_preprocess_buffer = np.zeros((1, 3, INPUT_SIZE, INPUT_SIZE), dtype=np.float32)
+def _get_preprocess_buffer(size=INPUT_SIZE):
+    """현재 스레드 전용 전처리 버퍼 반환 (메모리 재할당 방지로 성능 향상)"""
+    buffers = getattr(_thread_local, "preprocess_buffers", None)
+    if buffers is None:
+        buffers = _thread_local.preprocess_buffers = {}
+    buffer = buffers.get(size)
+    if buffer is None:
+        buffer = buffers[size] = np.zeros((1, 3, size, size), dtype=np.float32)
+    return buffer
 
 
 def preprocess(frame):
+    """기본 감지 모델 입력으로 전처리 (Detector.preprocess 참고)"""
+    return _default_detector.preprocess(frame)
+
+
+def preprocess_host(frame, size=None):
     """
-    이미지 전처리: OpenCV BGR → YOLO 입력 포맷
-    
+    CPU 전처리 (폴백 경로): OpenCV BGR → YOLO 입력 포맷
+
     [변환 과정]
-    1. 리사이즈: 원본 → 320x320
+    1. 리사이즈: 원본 → size x size (기본: 기본 감지 모델 입력 크기)
     2. 색공간: BGR → RGB
     3. 차원 변환: HWC → CHW (채널 우선)
     4. 정규화: 0~255 → 0.0~1.0
-    
+
     Args:
         frame: OpenCV BGR 이미지 (numpy array)
-    
+        size: 모델 입력 크기
+
     Returns:
-        (1, 3, 320, 320) 형태의 정규화된 텐서
+        (1, 3, size, size) 형태의 정규화된 텐서 (스레드별 버퍼, 다음 호출 시 덮어씀)
     """
-    global _preprocess_buffer
-    
+    size = size or get_input_size()
+    buffer = _get_preprocess_buffer(size)
+
     # 리사이즈 (INTER_LINEAR: 속도와 품질의 균형)
-    img = cv2.resize(frame, (INPUT_SIZE, INPUT_SIZE), interpolation=cv2.INTER_LINEAR)
-    
+    img = cv2.resize(frame, (size, size), interpolation=cv2.INTER_LINEAR)
+
     # BGR → RGB (OpenCV는 BGR, YOLO는 RGB 사용)
     img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    
+
     # HWC → CHW 변환 후 정규화 (0~1)
     # transpose: (H, W, C) → (C, H, W)
     # /255.0: 픽셀값 정규화
-    np.copyto(_preprocess_buffer[0], np.transpose(img, (2, 0, 1)).astype(np.float32) / 255.0)
-    
-    return _preprocess_buffer
+    np.copyto(buffer[0], np.transpose(img, (2, 0, 1)).astype(np.float32) / 255.0)
+
+    return buffer
 
 
 def get_input_size():
-    """모델 입력 크기 반환 (좌표 변환 시 사용)"""
-    return INPUT_SIZE
+    """기본 감지 모델 입력 크기 반환 (세션별 모델은 Detector.input_size 사용)"""
+    return _default_detector.input_size
+
+
+def _to_input_tensor(input_data):
+    """
+    추론 입력 변환
+
+    - u8 프레임(그래프 전처리): 공유 메모리 Tensor로 감쌈 → 추론 요청에 복사 없이 연결
+      (추론이 끝날 때까지 프레임 배열이 살아 있어야 함 - prepare_frame 결과가 참조 유지)
+    - f32 텐서(CPU 전처리): 그대로 전달 → 요청 객체 내부 텐서로 복사
+    """
+    if input_data.dtype == np.uint8:
+        return Tensor(input_data, shared_memory=True)
+    return input_data
 
 
 def run_inference(input_data):
+    """기본 감지 모델로 동기 추론 (Detector.run_inference 참고)"""
+    return _default_detector.run_inference(input_data)
+
+
+def submit_inference(input_data):
+    """기본 감지 모델로 비동기 추론 시작 (Detector.submit_inference 참고)"""
+    return _default_detector.submit_inference(input_data)
+
+
+# ==================================================
+# 후처리 (Postprocessing)
+# ==================================================
+# 감지 결과 구조화 배열 (JSON 변환 직전까지 이 형태로 유지)
+DETECTION_DTYPE = np.dtype([
+    ("box", np.int32, (4,)),   # [x1, y1, x2, y2] (모델 입력 좌표, 320 모델이면 0~320)
+    ("class_id", np.int32),
+    ("score", np.float32)
+])
+
+
+def _decode_graph_detections(detections, conf_threshold):
+    """그래프 NMS 출력 (1, K, 6) [class_id, score, x1, y1, x2, y2] → 구조화 배열"""
+    rows = detections.reshape(-1, 6)
+    rows = rows[(rows[:, 0] >= 0) & (rows[:, 1] > conf_threshold)]   # 패딩 행(class -1) 제거
+    
+    result = np.empty(len(rows), dtype=DETECTION_DTYPE)
+    result["box"] = rows[:, 2:6].astype(np.int32)
+    result["class_id"] = rows[:, 0].astype(np.int32)
+    result["score"] = rows[:, 1]
+    return result
+
+
+def _decode_raw_output(raw, conf_threshold, iou_threshold):
+    """YOLO 원시 출력 (1, 4 + 클래스 수, 앵커 수) → 신뢰도 필터 + 클래스별 NMS → 구조화 배열 (numpy 벡터 연산)"""
+    # 각 열: [cx, cy, w, h, class0_score, class1_score, ...]
+    raw = raw[0]
+    classes_scores = raw[4:]
+    class_ids = np.argmax(classes_scores, axis=0)
+    max_scores = np.max(classes_scores, axis=0)
+    
+    # 1. 신뢰도 필터링 (2100개 앵커 → 후보 수십 개)
+    mask = max_scores > conf_threshold
+    if not np.any(mask):
+        return np.empty(0, dtype=DETECTION_DTYPE)
+    
+    cx, cy, w, h = raw[:4, mask]
+    scores = max_scores[mask]
+    class_ids = class_ids[mask]
+    
+    # 2. 중심점 → 좌상단 좌표 (정수 픽셀, 기존 결과와 동일한 절삭)
+    xywh = np.stack([cx - w / 2, cy - h / 2, w, h], axis=1).astype(np.int32)
+    
+    # 3. 클래스별 NMS
+    # [학습 포인트: OpenCV 바인딩 변환 비용]
+    # - NMSBoxesBatched에 numpy 배열을 그대로 넘기면 원소 단위 변환이 일어나 리스트보다 3~4배 느림
+    # - 후보 수십~수백 개의 .tolist()는 수십 μs → NMS 호출 경계에서만 리스트로 변환
+    keep = cv2.dnn.NMSBoxesBatched(
+        xywh.tolist(), scores.tolist(), class_ids.tolist(), conf_threshold, iou_threshold
+    )
+    keep = np.asarray(keep, dtype=np.int64).reshape(-1)
+    
+    result = np.empty(len(keep), dtype=DETECTION_DTYPE)
+    kept = xywh[keep]
+    kept[:, 2:] += kept[:, :2]   # [x, y, w, h] → [x1, y1, x2, y2]
+    result["box"] = kept
+    result["class_id"] = class_ids[keep]
+    result["score"] = scores[keep]
+    return result
+
+
+def detect(output, conf_threshold=CONFIDENCE_THRESHOLD, iou_threshold=IOU_THRESHOLD):
     """
-    OpenVINO 추론 실행
+    모델 출력 → 최종 감지 결과 (구조화 배열)
+    
+    - 그래프 NMS 모델: (1, K, 6) 출력에서 패딩만 제거
+      (IoU 임계값은 그래프에 고정, conf_threshold가 더 높으면 추가 필터링)
+    - 원시 출력 모델 (CPU 폴백, 배치 모델): numpy 벡터 연산 + 클래스별 NMS
     
     Args:
-        input_data: 전처리된 이미지 텐서 (1, 3, 320, 320)
+        output: run_inference() / submit_inference() 결과 ([출력 텐서])
+        conf_threshold: 최소 신뢰도
+        iou_threshold: NMS IoU 임계값
     
     Returns:
-        모델 출력 텐서 (바운딩 박스 + 클래스 확률)
+        DETECTION_DTYPE 구조화 배열 (점수 내림차순)
     """
-    if _infer_request is None:
-        return None
+    if output is None:
+        return np.empty(0, dtype=DETECTION_DTYPE)
+    
+    tensor = output[0]
+    if tensor.shape[-1] == 6:
+        return _decode_graph_detections(tensor, conf_threshold)
+    return _decode_raw_output(tensor, conf_threshold, iou_threshold)
+
+
+def to_predictions(detections, classes=None):
+    """
+    구조화 배열 → JSON 응답용 딕셔너리 리스트
     
-    # 동기 추론 실행 (입력 인덱스 0에 데이터 전달)
-    _infer_request.infer({0: input_data})
+    Args:
+        detections: detect() 결과
+        classes: 클래스 이름 목록 (기본: 기본 감지 모델의 클래스)
     
-    # 출력 텐서 반환 (인덱스 0)
-    return [_infer_request.get_output_tensor(0).data]
+    Returns:
+        [{"box": [x1,y1,x2,y2], "label": str, "score": float}, ...]
+    """
+    classes = classes if classes is not None else get_classes()
+    return [
+        {
+            "box": box,                                                   # [좌상단x, 좌상단y, 우하단x, 우하단y]
+            "label": classes[class_id] if 0 <= class_id < len(classes) else "unknown",    # 클래스 이름
+            "score": round(score, 2)                                      # 신뢰도 (소수점 2자리)
+        }
+        for box, class_id, score in zip(
+            detections["box"].tolist(), detections["class_id"].tolist(), detections["score"].tolist()
+        )
+    ]
 
 
-# ==================================================
-# 후처리 (Postprocessing)
-# ==================================================
-def postprocess(output, conf_threshold=0.4, iou_threshold=0.45):
+def postprocess(output, conf_threshold=CONFIDENCE_THRESHOLD, iou_threshold=IOU_THRESHOLD):
     """
     YOLO 출력 후처리: 원시 출력 → 사용 가능한 감지 결과
     
     [처리 과정]
-    1. 신뢰도 필터링: conf_threshold 이하 제거
-    2. 좌표 변환: 중심점(cx,cy,w,h) → 코너점(x1,y1,x2,y2)
-    3. NMS: 겹치는 박스 중 최고 신뢰도만 유지
-    
-    Args:
-        output: 모델 출력 텐서
-        conf_threshold: 최소 신뢰도 (기본 0.4 = 40%)
-        iou_threshold: NMS IoU 임계값 (기본 0.45)
+    1. detect(): 신뢰도 필터링 + 클래스별 NMS (그래프 또는 numpy)
+    2. to_predictions(): JSON 응답 포맷으로 변환
     
     Returns:
         감지 결과 리스트: [{"box": [x1,y1,x2,y2], "label": str, "score": float}, ...]
     """
-    try:
-        # YOLO 출력 형태 변환: (1, 7, 2100) → (2100, 7)
-        # 각 행: [cx, cy, w, h, class0_score, class1_score, class2_score]
-        raw_output = output[0].squeeze().T
-        
-        # 클래스별 점수 추출 (4번 인덱스부터)
-        classes_scores = raw_output[:, 4:]
-        max_scores = np.max(classes_scores, axis=1)      # 각 박스의 최고 점수
-        class_ids_all = np.argmax(classes_scores, axis=1)  # 최고 점수 클래스
-        
-        # 1. 신뢰도 필터링
-        mask = max_scores > conf_threshold
-        if not np.any(mask):
-            return []  # 감지된 객체 없음
-        
-        filtered_output = raw_output[mask]
-        filtered_scores = max_scores[mask]
-        filtered_class_ids = class_ids_all[mask]
-        
-        # 2. 좌표 추출 (중심점 + 크기)
-        cx, cy = filtered_output[:, 0], filtered_output[:, 1]  # 중심 좌표
-        w, h = filtered_output[:, 2], filtered_output[:, 3]    # 너비, 높이
-        
-        # 중심점 → 좌상단 좌표 변환
-        x1 = (cx - w / 2).astype(np.int32)
-        y1 = (cy - h / 2).astype(np.int32)
-        w_int, h_int = w.astype(np.int32), h.astype(np.int32)
-        
-        # NMS 입력 포맷: [x, y, width, height]
-        boxes = np.stack([x1, y1, w_int, h_int], axis=1).tolist()
-        scores = filtered_scores.tolist()
-        class_ids = filtered_class_ids.tolist()
-        
-        # 3. NMS (Non-Maximum Suppression): 중복 박스 제거
-        # 겹치는 박스들 중 가장 신뢰도 높은 것만 유지
-        indices = cv2.dnn.NMSBoxes(boxes, scores, conf_threshold, iou_threshold)
-        
-        # NMS 결과 처리 (OpenCV 버전별 반환 타입 차이 대응)
-        results = []
-        if isinstance(indices, tuple):
-            indices = indices[0] if len(indices) > 0 else []
-        
-        if len(indices) > 0:
-            if isinstance(indices, np.ndarray):
-                indices = indices.flatten()
-            
-            # 최종 결과 포맷팅
-            for idx in indices:
-                if idx >= len(boxes):
-                    continue
-                    
-                box = boxes[idx]
-                x1, y1, w, h = box
-                class_idx = class_ids[idx]
-                label = _classes[class_idx] if class_idx < len(_classes) else "unknown"
-                
-                results.append({
-                    "box": [x1, y1, x1 + w, y1 + h],  # [좌상단x, 좌상단y, 우하단x, 우하단y]
-                    "label": label,                    # 클래스 이름
-                    "score": round(scores[idx], 2)     # 신뢰도 (소수점 2자리)
-                })
-        
-        return results
-        
-    except Exception as e:
-        print(f"[AIModel] postprocess 오류: {e}")
-        return []
+    return _default_detector.postprocess(output, conf_threshold, iou_threshold)
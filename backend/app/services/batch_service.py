@@ -0,0 +1,343 @@
+"""
+Batch Service - 다중 카메라 동적 마이크로 배칭
+==============================================
+여러 카메라 세션의 프레임을 모아 한 번의 배치 추론으로 처리
+
+[왜 필요한가?]
+- 카메라마다 프레임을 따로 추론하면 요청당 오버헤드가 반복됨
+- 같은 시점에 들어온 프레임을 (B, 320, 320, 3) u8로 묶으면 코어 활용률이 올라감
+
+[스케줄링 규칙]
+1. 첫 프레임이 들어오면 배치 시작
+2. BATCH_DEADLINE_MS가 지나거나 MAX_BATCH_SIZE개가 모이면 즉시 추론
+3. 출력 (B, 7, 2100)을 프레임별 (1, 7, 2100)로 나눠 각 Future에 전달
+→ 카메라 1대일 때 추가 지연은 최대 데드라인(기본 5ms)
+
+[감지 모델별 스케줄러]
+- 입력 크기/출력 형태가 다른 모델은 한 배치로 묶을 수 없음 → 모델마다 스케줄러 1개
+- 같은 모델을 쓰는 카메라끼리만 배치로 묶임
+- 레지스트리가 모델을 제거하면 release()로 스케줄러 스레드 종료
+- 동적 배치 컴파일(수 초)은 전용 컴파일 스레드에서 → 끝날 때까지 그 모델은 프레임별 추론
+  (다른 카메라/모델의 prepare 단계는 컴파일을 기다리지 않음)
+
+[튜닝 지표]
+- 배치 크기 히스토그램: 실제로 몇 개씩 묶이는지
+- 큐 대기 시간 히스토그램: 데드라인이 지연에 얼마나 기여하는지
+→ GET /security/pipeline/batching
+
+[설정]
+- AI_BATCHING=1 로 활성화 (기본 비활성: 프레임별 AsyncInferQueue 사용)
+- AI_MAX_BATCH, AI_BATCH_DEADLINE_MS 로 기본값 조정
+"""
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+from openvino import AsyncInferQueue
+
+from app.services import ai_model_service
+
+
+# ==================================================
+# 설정값 (Configuration)
+# ==================================================
+BATCHING_ENABLED = os.getenv("AI_BATCHING", "0") == "1"
+MAX_BATCH_LIMIT = 16                                  # 동적 배치 차원 상한 (컴파일 시 고정)
+MAX_BATCH_SIZE = max(1, min(MAX_BATCH_LIMIT, int(os.getenv("AI_MAX_BATCH", "8"))))
+BATCH_DEADLINE_MS = float(os.getenv("AI_BATCH_DEADLINE_MS", "5"))
+BATCH_INFER_REQUESTS = 2                              # 배치 추론 중 다음 배치 수집 가능
+
+# 큐 대기 시간 히스토그램 구간 (ms, 상한 기준)
+WAIT_BUCKETS_MS = [0.5, 1, 2, 5, 10, 20, 50]
+
+
+# ==================================================
+# 배치 스케줄러
+# ==================================================
+class BatchScheduler:
+    """프레임을 데드라인/최대 크기 기준으로 묶어 배치 추론하는 스케줄러 (전용 스레드)"""
+
+    def __init__(self, compiled_model, name="default"):
+        self._compiled_model = compiled_model
+        self._infer_queue = AsyncInferQueue(compiled_model, BATCH_INFER_REQUESTS)
+        self._infer_queue.set_callback(self._on_batch_done)
+        self._pending = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+        self._thread = threading.Thread(target=self._run, name=f"batch-scheduler-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, input_data):
+        """
+        프레임 1장 추론 요청 (워커 스레드에서 호출)
+
+        Args:
+            input_data: preprocess() 결과 (u8 (1, S, S, 3) 또는 f32 (1, 3, S, S))
+
+        Returns:
+            concurrent.futures.Future → 결과: [(1, 7, 2100) 출력]
+        """
+        future = Future()
+        self._pending.put((_batchable(input_data), future, time.perf_counter()))
+        return future
+
+    def close(self):
+        """스케줄러 종료 (이미 받은 프레임은 모두 처리한 뒤 스레드 종료)"""
+        self._pending.put(None)
+
+    # ─────────────────────────────────────────────
+    # 스케줄링 루프
+    # ─────────────────────────────────────────────
+    def _run(self):
+        closing = False
+        while not closing:
+            # 1. 첫 프레임 대기 (배치 시작, None = 종료 신호)
+            item = self._pending.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = batch[0][2] + BATCH_DEADLINE_MS / 1000.0
+
+            # 2. 데드라인 또는 최대 크기까지 수집
+            while len(batch) < MAX_BATCH_SIZE:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+
+            # 3. 배치 추론 시작 (유휴 요청이 없으면 이전 배치 완료까지 대기)
+            try:
+                self._dispatch(batch)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+
+    def _dispatch(self, batch):
+        dispatched_at = time.perf_counter()
+        inputs = np.concatenate([item[0] for item in batch], axis=0)
+        futures = [item[1] for item in batch]
+        self._record(len(batch), [(dispatched_at - item[2]) * 1000 for item in batch])
+        self._infer_queue.start_async({0: inputs}, futures)
+
+    def _on_batch_done(self, infer_request, futures):
+        """배치 추론 완료 콜백: (B, 7, 2100) → 프레임별 (1, 7, 2100)"""
+        try:
+            output = infer_request.get_output_tensor(0).data
+            for i, future in enumerate(futures):
+                future.set_result([output[i:i + 1].copy()])
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+
+    # ─────────────────────────────────────────────
+    # 통계
+    # ─────────────────────────────────────────────
+    def reset_stats(self):
+        with self._stats_lock:
+            self._batches = 0
+            self._frames = 0
+            self._size_histogram = [0] * (MAX_BATCH_LIMIT + 1)
+            self._wait_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def _record(self, batch_size, waits_ms):
+        with self._stats_lock:
+            self._batches += 1
+            self._frames += batch_size
+            self._size_histogram[batch_size] += 1
+            for wait in waits_ms:
+                bucket = len(WAIT_BUCKETS_MS)
+                for i, upper in enumerate(WAIT_BUCKETS_MS):
+                    if wait <= upper:
+                        bucket = i
+                        break
+                self._wait_histogram[bucket] += 1
+
+    def get_stats(self):
+        with self._stats_lock:
+            wait_labels = [f"<={upper}" for upper in WAIT_BUCKETS_MS] + [f">{WAIT_BUCKETS_MS[-1]}"]
+            return {
+                "batches": self._batches,
+                "frames": self._frames,
+                "avgBatchSize": round(self._frames / self._batches, 2) if self._batches else 0.0,
+                "batchSizeHistogram": {
+                    str(size): count for size, count in enumerate(self._size_histogram) if count
+                },
+                "queueWaitHistogramMs": dict(zip(wait_labels, self._wait_histogram))
+            }
+
+
+def _batchable(input_data):
+    """배치로 묶을 입력 준비"""
+    if input_data.dtype == np.uint8:
+        # 그래프 전처리 입력: 디코딩된 프레임 뷰 (프레임마다 새 배열이므로 복사 불필요)
+        return input_data
+    # CPU 전처리 버퍼는 스레드별로 재사용되므로 배치에 묶이기 전에 복사
+    return input_data.copy()
+
+
+# ==================================================
+# 스케줄러 레지스트리 (감지 모델별)
+# ==================================================
+# { 모델 이름: (Detector, BatchScheduler) }
+_schedulers = {}
+# { 모델 이름: (Detector, Future) } 동적 배치 컴파일 진행 중
+_compiling = {}
+# { 모델 이름: Detector } 동적 배치 컴파일에 실패한 모델 (프레임별 추론 유지, 다시 로드하거나 재활성화하면 재시도)
+_unbatchable = {}
+_scheduler_lock = threading.Lock()
+_compiler = None           # 동적 배치 컴파일 (단일 스레드: 컴파일이 추론 코어를 모두 차지하지 않도록 1개씩)
+
+
+def _get_compiler():
+    """동적 배치 컴파일 스레드 반환 (최초 호출 시 생성)"""
+    global _compiler
+    if _compiler is None:
+        _compiler = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch-compiler")
+    return _compiler
+
+
+def _get_scheduler(detector):
+    """
+    감지 모델의 배치 스케줄러 반환 (준비 안 됐으면 None → 프레임별 추론)
+
+    [학습 포인트: 잠금 없는 빠른 경로]
+    - 프레임마다 호출되므로 이미 있는 스케줄러는 잠금 없이 조회 (dict 읽기는 원자적)
+    - 없으면 컴파일만 예약하고 바로 None → 컴파일(수 초)이 prepare 단계를 막지 않음
+    """
+    entry = _schedulers.get(detector.name)
+    if entry is not None and entry[0] is detector:
+        return entry[1]
+    if _unbatchable.get(detector.name) is detector:
+        return None
+
+    with _scheduler_lock:
+        pending = _compiling.get(detector.name)
+        if (pending is None or pending[0] is not detector) and _unbatchable.get(detector.name) is not detector:
+            _compiling[detector.name] = (detector, _get_compiler().submit(_compile, detector))
+    return None
+
+
+def _compile(detector):
+    """동적 배치 모델 컴파일 후 스케줄러 등록 (컴파일 스레드에서 실행)"""
+    compiled = detector.compile_dynamic_batch(MAX_BATCH_LIMIT)
+
+    with _scheduler_lock:
+        pending = _compiling.get(detector.name)
+        if pending is None or pending[0] is not detector:
+            # 컴파일 중 모델이 제거/교체됨 → 결과 버림
+            return
+        del _compiling[detector.name]
+        if compiled is None:
+            # 모델 없음/컴파일 실패 → 이 모델은 프레임별 추론으로 폴백
+            _unbatchable[detector.name] = detector
+            return
+        previous = _schedulers.get(detector.name)
+        _schedulers[detector.name] = (detector, BatchScheduler(compiled, detector.name))
+
+    if previous is not None:
+        # 같은 이름으로 다시 로드된 모델 → 이전 스케줄러 종료
+        previous[1].close()
+    print(f"[Batch] [{detector.name}] 배치 스케줄러 시작 - 최대 {MAX_BATCH_SIZE}개, 데드라인 {BATCH_DEADLINE_MS}ms")
+
+
+def is_enabled():
+    """배치 추론 사용 여부"""
+    return BATCHING_ENABLED
+
+
+def submit(input_data, detector=None):
+    """
+    감지 모델의 배치 스케줄러에 추론 요청 (컴파일 중/실패 시 None → 호출측에서 단일 추론으로 폴백)
+
+    Args:
+        input_data: detector.preprocess() 결과
+        detector: 감지 모델 (없으면 기본 모델)
+
+    Returns:
+        concurrent.futures.Future 또는 None
+    """
+    detector = detector or ai_model_service.get_default_detector()
+    scheduler = _get_scheduler(detector)
+    if scheduler is None:
+        return None
+    return scheduler.submit(input_data)
+
+
+def release(detector):
+    """감지 모델 제거 시 배치 스케줄러 종료 (model_registry_service에서 호출)"""
+    with _scheduler_lock:
+        if detector.name in _compiling and _compiling[detector.name][0] is detector:
+            del _compiling[detector.name]
+        if _unbatchable.get(detector.name) is detector:
+            del _unbatchable[detector.name]
+        entry = _schedulers.get(detector.name)
+        if entry is None or entry[0] is not detector:
+            return
+        del _schedulers[detector.name]
+    entry[1].close()
+    print(f"[Batch] [{detector.name}] 배치 스케줄러 종료")
+
+
+def configure(enabled: bool = None, max_batch: int = None, deadline_ms: float = None):
+    """
+    배치 설정 변경 (API에서 호출)
+
+    Args:
+        enabled: 배치 추론 사용 여부
+        max_batch: 최대 배치 크기 (1~16)
+        deadline_ms: 배치 수집 데드라인 (0~100ms)
+
+    Returns:
+        현재 설정 + 통계
+    """
+    global BATCHING_ENABLED, MAX_BATCH_SIZE, BATCH_DEADLINE_MS
+
+    if max_batch is not None:
+        MAX_BATCH_SIZE = max(1, min(MAX_BATCH_LIMIT, max_batch))
+    if deadline_ms is not None:
+        BATCH_DEADLINE_MS = max(0.0, min(100.0, deadline_ms))
+    if enabled is not None:
+        BATCHING_ENABLED = enabled
+        if enabled:
+            # 실패했던 모델도 다시 시도 + 기본 모델은 첫 프레임 전에 미리 컴파일 시작
+            with _scheduler_lock:
+                _unbatchable.clear()
+            if _get_scheduler(ai_model_service.get_default_detector()) is None:
+                print("[Batch] 동적 배치 모델 컴파일 중 - 완료 전까지 프레임별 추론")
+
+    if max_batch is not None or deadline_ms is not None:
+        # 설정이 바뀌면 히스토그램도 새로 집계
+        for _, scheduler in list(_schedulers.values()):
+            scheduler.reset_stats()
+
+    print(f"[Batch] 설정: 사용={BATCHING_ENABLED}, 최대 {MAX_BATCH_SIZE}개, 데드라인 {BATCH_DEADLINE_MS}ms")
+    return get_stats()
+
+
+def get_stats():
+    """배치 설정 및 히스토그램 (기본 모델 통계는 최상위, 모델별 통계는 models)"""
+    stats = {
+        "enabled": BATCHING_ENABLED,
+        "maxBatch": MAX_BATCH_SIZE,
+        "deadlineMs": BATCH_DEADLINE_MS,
+        "compiling": sorted(_compiling),
+        "unbatchable": sorted(_unbatchable)
+    }
+    schedulers = {name: scheduler for name, (_, scheduler) in list(_schedulers.items())}
+    default = ai_model_service.get_default_detector()
+    if default is not None and default.name in schedulers:
+        stats.update(schedulers[default.name].get_stats())
+    stats["models"] = {name: scheduler.get_stats() for name, scheduler in schedulers.items()}
+    return stats
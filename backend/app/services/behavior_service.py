@@ -0,0 +1,231 @@
+"""
+Behavior Service - 이상행동 규칙 엔진
+=====================================
+트래커 관절 히스토리(링 버퍼)에 이상행동 규칙을 벡터 연산으로 적용
+
+[왜 필요한가?]
+- 기존: 거수자 1명마다 [x, y, visibility] 리스트를 인덱싱, 빠른 동작은 관절마다 파이썬 루프
+  → 거수자가 많으면 프레임마다 같은 계산을 사람 수만큼 반복
+- 기존 규칙은 현재 관절 + 직전 1개만 봄 → 관절이 한 번 튀면 바로 오탐, 천천히 쓰러지는 동작은 놓침
+- 변경: 관절을 받은 트래커 N명의 히스토리 (N, T, 33, 3)를 한 번에 평가 (규칙 = 배열 조건식)
+  시간 창(WINDOW_SECONDS) 안의 샘플 전체를 보고 판정
+
+[입력]
+- keypoints: (N, T, 33, 3) [x, y, visibility], 오래된 샘플 → 최근 샘플 순 (MediaPipe 레이아웃)
+- times:     (N, T) 샘플 시각 (초)
+- filled:    (N, T) 링 버퍼에 채워진 샘플 여부
+- 관절 인덱스는 joints 매핑(관절 이름 → 인덱스)으로 찾음 → 다른 레이아웃도 그대로 평가 가능
+
+[규칙] (샘플 조건은 관련 관절이 모두 보일 때만 참)
+- FALL:        코-발목 높이 차이 < fall_height_px, 최근 샘플이 참 + 창 안 샘플의 fall_ratio 이상
+- HANDS_UP:    손목이 어깨보다 hands_up_margin_px 이상 위, 최근 샘플이 참 + 창 안 샘플의 hands_up_ratio 이상
+- FAST_MOTION: 창 안 연속 샘플 사이 손목/발목 평균 속도 최대값 > fast_motion_speed (px/초)
+- SUDDEN_DROP: 창 안에서 코가 선 키(발목-코 최대값)의 sudden_drop_ratio 이상 내려감 (쓰러지는 동작)
+- LYING:       몸통(어깨 중점 → 엉덩이 중점)이 수평에 가까운 상태가 lying_seconds 이상 계속 (창과 무관)
+               링 버퍼는 샘플 수가 고정이라 시간으로는 짧음 → 수평 시작 시각(flat_since)을 트래커에 따로 보관
+
+[시간 창 상한]
+- 링 버퍼(KEYPOINT_HISTORY_LENGTH 샘플)가 최대 샘플 빈도(KEYPOINT_MAX_RATE)에서 덮는 시간까지만 (MAX_WINDOW_SECONDS)
+  → 매 프레임 추출 중인 트래커도 창 안의 샘플이 버퍼에서 밀려나지 않음
+
+[설정]
+- API: GET/POST /security/behavior/settings
+"""
+import os
+
+import numpy as np
+
+from app.services.mediapipe_service import MEDIAPIPE_JOINTS
+from app.services.track_store_service import KEYPOINT_HISTORY_LENGTH, KEYPOINT_MAX_RATE
+
+
+# ==================================================
+# 설정값 (Configuration)
+# ==================================================
+MAX_WINDOW_SECONDS = (KEYPOINT_HISTORY_LENGTH - 1) / KEYPOINT_MAX_RATE   # 링 버퍼가 덮는 시간 (초)
+WINDOW_SECONDS = min(float(os.getenv("AI_BEHAVIOR_WINDOW", "1.5")), MAX_WINDOW_SECONDS)   # 규칙 판정 시간 창 (초)
+
+# 규칙별 임계값 (configure()로 변경, 좌표 단위는 감지 모델 입력 픽셀)
+THRESHOLDS = {
+    "visibility": 0.3,            # 관절이 보인다고 볼 최소 visibility
+    "fall_height_px": 50.0,       # 코-발목 높이 차이가 이보다 작으면 누운 자세
+    "fall_ratio": 0.5,            # 창 안 샘플 중 누운 자세 비율
+    "hands_up_margin_px": 30.0,   # 손목이 어깨보다 이만큼 위
+    "hands_up_ratio": 0.5,        # 창 안 샘플 중 손든 자세 비율
+    "fast_motion_speed": 500.0,   # 손목/발목 평균 속도 (px/초)
+    "sudden_drop_ratio": 0.4,     # 선 키 대비 코가 내려간 비율
+    "lying_seconds": 2.0          # 몸통 수평 유지 시간 (초)
+}
+
+RULES = ["FALL", "HANDS_UP", "FAST_MOTION", "SUDDEN_DROP", "LYING"]
+USED_JOINTS = ("nose", "left_shoulder", "right_shoulder", "left_wrist", "right_wrist",
+               "left_hip", "right_hip", "left_ankle", "right_ankle")   # 규칙에 쓰는 관절
+COMPACT_JOINTS = {name: index for index, name in enumerate(USED_JOINTS)}   # USED_JOINTS만 모은 히스토리의 매핑
+RATIO_THRESHOLDS = ("visibility", "fall_ratio", "hands_up_ratio", "sudden_drop_ratio")   # 0~1 값
+MIN_SAMPLE_INTERVAL = 1e-3   # 속도 계산 최소 샘플 간격 (초, 같은 시각 샘플로 0 나누기 방지)
+
+
+# ==================================================
+# 규칙 평가
+# ==================================================
+def evaluate(keypoints, times, filled, joints=None, flat_since=None):
+    """
+    트래커 N명의 관절 히스토리에 규칙 적용 (벡터 연산 1번)
+
+    Args:
+        keypoints: (N, T, K, 3) 관절 히스토리 (오래된 → 최근, 마지막 샘플 = 최근 샘플)
+        times: (N, T) 샘플 시각 (초)
+        filled: (N, T) 채워진 샘플 여부 (마지막 샘플은 채워져 있어야 함)
+        joints: 관절 이름 → 인덱스 매핑 (기본: MediaPipe 레이아웃, mediapipe_service.COCO_JOINTS 등,
+                USED_JOINTS만 모은 히스토리는 COMPACT_JOINTS)
+        flat_since: (N,) 이전 호출이 돌려준 몸통 수평 시작 시각 (NaN = 수평 아님, None = 모두 NaN)
+                    히스토리의 샘플이 모두 수평이면 그보다 앞선 시작 시각으로 이어감 (링 버퍼보다 긴 누움)
+
+    Returns:
+        (flags, flat_since)
+        - flags: (N, len(RULES)) bool 배열 (열 순서 = RULES)
+        - flat_since: (N,) 갱신된 몸통 수평 시작 시각 (다음 호출에 전달, TrackStore.flat_since)
+    """
+    keypoints = np.asarray(keypoints, dtype=np.float32)
+    times = np.asarray(times, dtype=np.float64)
+    filled = np.asarray(filled, dtype=bool)
+    visibility = THRESHOLDS["visibility"]
+
+    # 규칙에 쓰는 관절만 모아 (3, J, N, T)로 → 관절마다 x/y/visibility가 연속된 (N, T) 배열
+    # (TrackStore.keypoint_windows(slots, joint_indices())로 이미 모은 히스토리면 모으기 생략)
+    columns = COMPACT_JOINTS
+    index = joint_indices(joints)
+    if index != list(range(keypoints.shape[2])):
+        keypoints = np.take(keypoints, index, axis=2)
+    planes = np.ascontiguousarray(keypoints.transpose(3, 2, 0, 1))
+    seen = filled & (planes[2] > visibility)   # (J, N, T)
+
+    def joint(name):
+        """(N, T) x, y, 보임 여부"""
+        column = columns[name]
+        return planes[0, column], planes[1, column], seen[column]
+
+    # 시간 창: 최근 샘플 기준 WINDOW_SECONDS 안의 채워진 샘플
+    latest = times[:, -1:]
+    window = filled & (times >= latest - WINDOW_SECONDS)
+    window_count = np.maximum(window.sum(axis=1), 1)
+
+    _, nose_y, nose_ok = joint("nose")
+    _, left_ankle_y, left_ankle_ok = joint("left_ankle")
+    _, right_ankle_y, right_ankle_ok = joint("right_ankle")
+    ankle_y = (left_ankle_y + right_ankle_y) / 2
+    standing = nose_ok & left_ankle_ok & right_ankle_ok   # 키 계산 가능 (코 + 두 발목)
+    height = ankle_y - nose_y                              # 발목 - 코 (서 있으면 큰 양수)
+
+    # ─────────────────────────────────────────────
+    # 1. FALL: 머리와 발목 높이가 비슷한 자세가 창 안에서 유지
+    # ─────────────────────────────────────────────
+    down = standing & (height < THRESHOLDS["fall_height_px"])
+    fall = down[:, -1] & ((down & window).sum(axis=1) >= THRESHOLDS["fall_ratio"] * window_count)
+
+    # ─────────────────────────────────────────────
+    # 2. HANDS_UP: 손목이 어깨보다 위 (좌우 중 하나)
+    # ─────────────────────────────────────────────
+    margin = THRESHOLDS["hands_up_margin_px"]
+    raised = np.zeros_like(filled)
+    for side in ("left", "right"):
+        _, wrist_y, wrist_ok = joint(f"{side}_wrist")
+        _, shoulder_y, shoulder_ok = joint(f"{side}_shoulder")
+        raised |= wrist_ok & shoulder_ok & (wrist_y < shoulder_y - margin)
+    hands_up = raised[:, -1] & ((raised & window).sum(axis=1) >= THRESHOLDS["hands_up_ratio"] * window_count)
+
+    # ─────────────────────────────────────────────
+    # 3. FAST_MOTION: 연속 샘플 사이 손목/발목 평균 속도 (창 안 최대값)
+    # ─────────────────────────────────────────────
+    limbs = [columns[name] for name in ("left_wrist", "right_wrist", "left_ankle", "right_ankle")]
+    x, y, visible = planes[0, limbs], planes[1, limbs], seen[limbs]   # (4, N, T)
+    pair_ok = visible[..., 1:] & visible[..., :-1]                   # (4, N, T-1) 두 샘플 모두 보임
+    distance = np.hypot(np.diff(x, axis=-1), np.diff(y, axis=-1))
+    pair_count = pair_ok.sum(axis=0)
+    mean_distance = np.where(pair_ok, distance, 0).sum(axis=0) / np.maximum(pair_count, 1)
+    dt = np.maximum(times[:, 1:] - times[:, :-1], MIN_SAMPLE_INTERVAL)
+    speed = np.where((pair_count > 0) & window[:, 1:] & window[:, :-1], mean_distance / dt, 0)
+    fast_motion = speed.max(axis=1, initial=0) > THRESHOLDS["fast_motion_speed"]
+
+    # ─────────────────────────────────────────────
+    # 4. SUDDEN_DROP: 창 안에서 머리가 선 키 대비 크게 내려감 (쓰러지는 중)
+    # ─────────────────────────────────────────────
+    stand_height = np.where(standing & window, height, 0).max(axis=1)
+    highest_nose = np.where(nose_ok & window, nose_y, np.inf).min(axis=1)
+    drop = np.where(nose_ok[:, -1], nose_y[:, -1] - highest_nose, 0)
+    sudden_drop = (stand_height > 0) & (drop > THRESHOLDS["sudden_drop_ratio"] * stand_height)
+
+    # ─────────────────────────────────────────────
+    # 5. LYING: 몸통이 수평인 상태가 lying_seconds 이상 계속 (최근 샘플부터 거꾸로 이어진 구간)
+    #    구간이 히스토리 맨 앞까지 이어지면 이전 호출의 시작 시각(flat_since)으로 연장
+    # ─────────────────────────────────────────────
+    torso = [joint(name) for name in ("left_shoulder", "right_shoulder", "left_hip", "right_hip")]
+    (ls_x, ls_y, ls_ok), (rs_x, rs_y, rs_ok), (lh_x, lh_y, lh_ok), (rh_x, rh_y, rh_ok) = torso
+    torso_dx = (lh_x + rh_x - ls_x - rs_x) / 2   # 어깨 중점 → 엉덩이 중점
+    torso_dy = (lh_y + rh_y - ls_y - rs_y) / 2
+    flat = ls_ok & rs_ok & lh_ok & rh_ok & (np.abs(torso_dx) > np.abs(torso_dy))
+    trailing = np.cumprod(flat[:, ::-1], axis=1)[:, ::-1].astype(bool)   # 이 샘플부터 최근까지 계속 수평
+    run_start = np.where(trailing, times, np.inf).min(axis=1)
+    if flat_since is not None:
+        whole_run = (trailing | ~filled).all(axis=1)   # 채워진 샘플이 모두 수평
+        previous = np.asarray(flat_since, dtype=np.float64)
+        run_start = np.where(whole_run & ~np.isnan(previous), np.fmin(run_start, previous), run_start)
+    lying = flat[:, -1] & (times[:, -1] - run_start >= THRESHOLDS["lying_seconds"])
+
+    flags = np.stack([fall, hands_up, fast_motion, sudden_drop, lying], axis=1)
+    return flags, np.where(flat[:, -1], run_start, np.nan)
+
+
+def joint_indices(joints=None):
+    """USED_JOINTS의 레이아웃 인덱스 (기본: MediaPipe 레이아웃) → 히스토리에서 필요한 관절만 꺼낼 때 사용"""
+    joints = joints or MEDIAPIPE_JOINTS
+    return [joints[name] for name in USED_JOINTS]
+
+
+def behaviors_of(flags):
+    """evaluate() 결과 1행 → 감지된 행동 이름 리스트 (없으면 None)"""
+    behaviors = [rule for rule, hit in zip(RULES, flags) if hit]
+    return behaviors or None
+
+
+# ==================================================
+# 설정 (API에서 호출)
+# ==================================================
+def get_settings():
+    """규칙 엔진 설정"""
+    return {
+        "windowSeconds": WINDOW_SECONDS,
+        "maxWindowSeconds": round(MAX_WINDOW_SECONDS, 2),
+        "rules": list(RULES),
+        "thresholds": dict(THRESHOLDS)
+    }
+
+
+def configure(window_seconds: float = None, **thresholds):
+    """
+    규칙 시간 창/임계값 변경
+
+    Args:
+        window_seconds: 규칙 판정 시간 창 (0.1초~MAX_WINDOW_SECONDS, 링 버퍼가 덮는 시간까지)
+        **thresholds: THRESHOLDS 키 = 값 (None은 무시, 음수는 0으로, 비율/visibility는 1 이하로)
+
+    Returns:
+        현재 설정
+
+    Raises:
+        ValueError: 알 수 없는 임계값 이름
+    """
+    global WINDOW_SECONDS
+
+    unknown = set(thresholds) - set(THRESHOLDS)
+    if unknown:
+        raise ValueError(f"알 수 없는 임계값: {', '.join(sorted(unknown))}")
+
+    if window_seconds is not None:
+        WINDOW_SECONDS = max(0.1, min(MAX_WINDOW_SECONDS, float(window_seconds)))
+    for name, value in thresholds.items():
+        if value is not None:
+            value = max(0.0, float(value))
+            THRESHOLDS[name] = min(value, 1.0) if name in RATIO_THRESHOLDS else value
+    print(f"[Behavior] 시간 창: {WINDOW_SECONDS:.1f}초, 임계값: {THRESHOLDS}")
+    return get_settings()
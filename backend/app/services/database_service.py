@@ -57,8 +57,12 @@ def save_to_database(image_path, score, track_id=0, stay_duration=0, is_loiterin
     return detection_id
 
 
-def save_snapshot(frame, score, box=None, track_id=0, stay_duration=0, is_loitering=False):
-    """감지된 영역만 크롭하여 저장"""
+def save_snapshot(frame, score, box=None, track_id=0, stay_duration=0, is_loitering=False, input_size=None):
+    """
+    감지된 영역만 크롭하여 저장
+
+    input_size: box 좌표의 기준 모델 입력 크기 (세션별 감지 모델, 없으면 기본 모델)
+    """
     now = datetime.now()
     # 파일명은 영문으로 (한글 경로 문제 방지)
     timestamp_file = now.strftime("%Y%m%d_%H%M%S")
@@ -77,7 +81,7 @@ def save_snapshot(frame, score, box=None, track_id=0, stay_duration=0, is_loiter
         h, w = frame.shape[:2]
         
         # YOLO 추론 좌표를 원본 프레임 좌표로 변환
-        input_size = ai_model_service.get_input_size()  # 320 또는 640
+        input_size = input_size or ai_model_service.get_input_size()  # 320 또는 640
         scale_x = w / input_size
         scale_y = h / input_size
         
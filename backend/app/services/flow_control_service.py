@@ -0,0 +1,113 @@
+"""
+Flow Control Service - 크레딧 기반 프레임 흐름 제어
+==================================================
+서버가 "보내도 되는 프레임 수(크레딧)"와 권장 캡처 설정을 클라이언트에 알려줌
+
+[왜 필요한가?]
+- 브라우저는 33ms마다(30FPS) 무조건 프레임을 보냄
+- 서버 처리가 느리면 대부분 드롭되는 프레임을 인코딩/전송하느라 CPU와 대역폭 낭비
+
+[프로토콜]
+1. 연결 직후 서버 → {"type": "control", "credits": INITIAL_CREDITS, ...}
+2. 클라이언트는 크레딧이 있을 때만 프레임 전송 (전송 시 크레딧 -1)
+3. 서버는 프레임을 소비(처리 또는 드롭)할 때마다 그만큼 크레딧을 돌려줌
+4. 처리 지연(EMA)에 따라 권장 FPS / 해상도 / JPEG 품질도 함께 전달
+
+[품질 단계 (QUALITY_LEVELS)]
+- 0: 320x320, 품질 0.7 (기본)
+- 단계가 올라갈수록 해상도/품질을 낮춰 디코딩 비용과 전송량 감소
+- 지연이 충분히 낮아지면 다시 한 단계씩 복구 (히스테리시스)
+"""
+
+
+# ==================================================
+# 설정값 (Configuration)
+# ==================================================
+PROTOCOL_VERSION = 1
+INITIAL_CREDITS = 2          # 연결 직후 부여할 기본 크레딧 (세션 파이프라인 깊이 + 1 권장)
+MAX_FPS = 30                 # 권장 FPS 상한 (기존 클라이언트 전송 주기)
+MIN_FPS = 2                  # 권장 FPS 하한
+LATENCY_EMA_ALPHA = 0.2      # 처리 지연 지수이동평균 가중치
+FPS_HEADROOM = 1.2           # 처리 시간 대비 여유 배율 (1.2 → 처리 능력의 ~83%로 전송)
+
+# (해상도, JPEG 품질) - 인덱스가 클수록 가벼움
+QUALITY_LEVELS = [
+    (320, 0.7),
+    (320, 0.6),
+    (288, 0.5),
+    (256, 0.5),
+]
+DEGRADE_LATENCY_MS = 120     # 처리 지연이 이보다 크면 품질 한 단계 낮춤
+RECOVER_LATENCY_MS = 50      # 처리 지연이 이보다 작으면 품질 한 단계 복구
+LEVEL_HOLD_FRAMES = 30       # 단계 변경 후 최소 유지 프레임 수 (깜빡임 방지)
+
+
+# ==================================================
+# 흐름 제어기 (세션당 1개)
+# ==================================================
+class FlowController:
+    """세션별 크레딧 발급 및 권장 캡처 설정 계산"""
+
+    def __init__(self, initial_credits=INITIAL_CREDITS):
+        self.initial_credits = initial_credits
+        self.latency_ema = None      # 프레임 1장 처리 시간 EMA (ms)
+        self.level = 0               # 현재 품질 단계 (QUALITY_LEVELS 인덱스)
+        self._frames_since_change = 0
+        self._acknowledged = 0       # 크레딧으로 돌려준 누적 프레임 수
+
+    def initial_grant(self):
+        """연결 직후 보낼 제어 메시지"""
+        return self._control_message(self.initial_credits)
+
+    def on_frame(self, pipeline_ms, consumed):
+        """
+        프레임 1장 처리 후 호출 → 제어 메시지 반환
+
+        Args:
+            pipeline_ms: 이번 프레임 처리 시간 (ms, 준비 + 완료 단계 작업 시간, 파이프라인 큐 대기 제외)
+            consumed: 지금까지 서버가 소비한 누적 프레임 수 (처리 + 드롭)
+
+        Returns:
+            {"type": "control", "credits": int, "fps": int, ...}
+        """
+        # 1. 처리 지연 EMA 갱신
+        if self.latency_ema is None:
+            self.latency_ema = pipeline_ms
+        else:
+            self.latency_ema += LATENCY_EMA_ALPHA * (pipeline_ms - self.latency_ema)
+
+        # 2. 품질 단계 조정 (히스테리시스)
+        self._frames_since_change += 1
+        if self._frames_since_change >= LEVEL_HOLD_FRAMES:
+            if self.latency_ema > DEGRADE_LATENCY_MS and self.level < len(QUALITY_LEVELS) - 1:
+                self.level += 1
+                self._frames_since_change = 0
+            elif self.latency_ema < RECOVER_LATENCY_MS and self.level > 0:
+                self.level -= 1
+                self._frames_since_change = 0
+
+        # 3. 소비한 만큼 크레딧 반환
+        credits = max(0, consumed - self._acknowledged)
+        self._acknowledged = consumed
+
+        return self._control_message(credits)
+
+    def recommended_fps(self):
+        """처리 지연 기반 권장 FPS"""
+        if not self.latency_ema:
+            return MAX_FPS
+        fps = 1000.0 / (self.latency_ema * FPS_HEADROOM)
+        return int(max(MIN_FPS, min(MAX_FPS, fps)))
+
+    def _control_message(self, credits):
+        size, quality = QUALITY_LEVELS[self.level]
+        return {
+            "type": "control",
+            "version": PROTOCOL_VERSION,
+            "credits": credits,
+            "fps": self.recommended_fps(),
+            "width": size,
+            "height": size,
+            "quality": quality,
+            "latency_ms": round(self.latency_ema or 0.0, 1)
+        }
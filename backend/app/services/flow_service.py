@@ -0,0 +1,223 @@
+"""
+Flow Service - 감지 사이 프레임의 광류 박스 전파
+================================================
+감지 모델은 N 프레임마다 1번만 실행하고, 그 사이 프레임은 희소 Lucas-Kanade 광류로
+트래커 박스를 이동시켜 결과를 이어감
+
+[왜 필요한가?]
+- 카메라당 매 프레임 YOLO 추론이 코어당 카메라 수를 제한
+- 박스 안 특징점 수십 개의 LK 광류는 추론의 수십 분의 1 비용
+  → N=3이면 추론 횟수 1/3, 클라이언트에는 매 프레임 박스가 그대로 전송
+
+[동작 과정]
+1. 감지 프레임: 추적 중인 사람 박스 안쪽(80%)에서 특징점 추출 (goodFeaturesToTrack)
+2. 전파 프레임: 이전 흑백 프레임 → 현재 프레임 LK 광류 (피라미드 2단계)
+   - 순방향 + 역방향 추적 오차(forward-backward error)가 1px 이하인 점만 사용
+   - 박스 이동량 = 살아남은 점 이동량의 중앙값 (크기는 유지)
+   - 특징점이 부족한 박스(무늬 없는 작은 박스)는 제자리 유지
+3. 재동기화: 박스의 유효 점이 MIN_POINTS 미만이거나 비율이 MIN_INLIER_RATIO 미만이면
+   다음 프레임은 주기와 관계없이 감지 실행
+
+[파이프라이닝과 상태]
+- 프레임 N+1 준비(prepare)는 프레임 N 완료(propagate/reseed) 전에 다른 워커에서 실행될 수 있음
+- 준비 단계는 읽기만 함 (wants_propagation: 프레임 번호로 감지 주기 위상 계산 → 추론 시작 여부 힌트)
+- 상태 변경(reseed/propagate)과 최종 판정(should_propagate)은 완료 단계에서만 (세션당 순서대로)
+  → 광류로 준비된 프레임이라도 완료 시점에 재동기화 요청이 있으면 그 프레임에서 바로 감지
+
+[좌표계]
+- 박스와 같은 모델 입력 좌표(320 또는 640)로 줄인 흑백 프레임에서 계산 → 변환 없이 박스에 바로 적용
+
+[설정]
+- AI_DETECT_INTERVAL=3 → 3 프레임마다 감지 (기본 1 = 매 프레임 감지, 광류 비활성)
+- API: GET/POST /security/flow/settings
+"""
+import os
+
+import numpy as np
+import cv2
+
+
+# ==================================================
+# 설정값 (Configuration)
+# ==================================================
+MAX_DETECT_INTERVAL = 10
+DETECT_INTERVAL = max(1, min(MAX_DETECT_INTERVAL, int(os.getenv("AI_DETECT_INTERVAL", "1"))))
+MAX_POINTS_PER_BOX = 20        # 박스당 최대 특징점 수
+MIN_POINTS = 4                 # 박스 이동 추정에 필요한 최소 유효 점 수
+MIN_INLIER_RATIO = 0.5         # 유효 점 비율 하한 (미만이면 재동기화)
+FB_ERROR_THRESHOLD = 1.0       # 순방향-역방향 추적 오차 허용치 (px)
+BOX_MARGIN = 0.1               # 특징점 추출 시 박스 가장자리 제외 비율 (배경 점 방지)
+
+# Lucas-Kanade 파라미터 (15x15 창, 피라미드 2단계)
+LK_PARAMS = dict(
+    winSize=(15, 15),
+    maxLevel=2,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03)
+)
+
+
+def is_enabled():
+    """광류 전파 사용 여부 (감지 주기 2 이상)"""
+    return DETECT_INTERVAL > 1
+
+
+def to_gray(frame, size):
+    """프레임 → 모델 입력 좌표계 흑백 이미지 (size x size)"""
+    if frame.shape[:2] != (size, size):
+        frame = cv2.resize(frame, (size, size), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+# ==================================================
+# 박스 광류 전파 (세션별)
+# ==================================================
+class BoxFlow:
+    """
+    카메라 1대의 광류 전파 상태 (이전 흑백 프레임 + 트래커별 특징점)
+
+    - wants_propagation(): 프레임 준비 단계에서 호출 (읽기만 함, 힌트)
+    - should_propagate() / reseed() / propagate(): 프레임 완료 단계에서 호출 (세션당 순서대로, 상태 변경은 여기서만)
+    """
+
+    def __init__(self):
+        self._prev_gray = None
+        self._points = {}              # { track_id: (K, 1, 2) float32 특징점 }
+        self._static = set()           # 특징점이 부족해 제자리 유지하는 track_id
+        self._last_detect = None       # 마지막 감지(reseed) 프레임 번호
+        self.resync = False            # 광류 신뢰도 하락 → 다음 프레임 감지 요청
+        self.propagated = 0            # 광류로 처리한 프레임 수
+        self.resyncs = 0               # 신뢰도 하락으로 앞당긴 감지 횟수
+
+    def wants_propagation(self, index):
+        """
+        준비 단계 힌트: 프레임 index를 광류로 처리할 예정인지 (False면 감지 추론 시작)
+
+        - 상태를 바꾸지 않음 (완료 단계가 다른 워커에서 동시에 갱신 중일 수 있음)
+        - 아직 완료되지 않은 앞 프레임의 감지도 주기대로라면 위상이 같음 → 마지막 감지 기준 나머지로 판정
+        - 틀려도 완료 단계의 should_propagate()가 바로잡음
+        """
+        last = self._last_detect
+        if not is_enabled() or index is None or last is None or self.resync or not self._points:
+            return False
+        return (index - last) % DETECT_INTERVAL != 0
+
+    def should_propagate(self, index):
+        """
+        완료 단계 판정: 프레임 index를 광류로 처리할지 (False면 이 프레임에서 감지 실행)
+
+        - 감지 주기 도달 / 재동기화 요청 / 추적 중인 박스 없음 → 감지
+        - 앞 프레임 완료가 모두 반영된 상태에서 호출 (세션당 순서대로)
+        """
+        last = self._last_detect
+        if not is_enabled() or index is None or last is None or self.resync or not self._points:
+            return False
+        return 0 < index - last < DETECT_INTERVAL
+
+    def reseed(self, gray, trackers, track_ids, index=None):
+        """
+        감지 프레임: 이번에 감지된 트래커 박스 안에서 특징점 다시 추출
+
+        Args:
+            gray: to_gray() 결과
+            trackers: session.trackers (TrackStore)
+            track_ids: 이번 프레임에서 갱신된 트래커 ID
+            index: 감지한 프레임 번호 (감지 주기 기준, None이면 다음 프레임도 감지)
+        """
+        size = gray.shape[0]
+        points = {}
+        for track_id, (x1, y1, x2, y2) in zip(track_ids, trackers.boxes_of(track_ids)):
+            mx, my = int((x2 - x1) * BOX_MARGIN), int((y2 - y1) * BOX_MARGIN)
+            x1, y1 = max(0, x1 + mx), max(0, y1 + my)
+            x2, y2 = min(size, x2 - mx), min(size, y2 - my)
+            corners = None
+            if x2 - x1 >= 4 and y2 - y1 >= 4:
+                corners = cv2.goodFeaturesToTrack(gray[y1:y2, x1:x2], MAX_POINTS_PER_BOX, 0.01, 3)
+            if corners is not None and len(corners) >= MIN_POINTS:
+                points[track_id] = corners + np.array([x1, y1], dtype=np.float32)
+
+        self._prev_gray = gray
+        self._points = points
+        self._static = set(track_ids) - set(points)
+        self._last_detect = index
+        self.resync = False
+
+    def propagate(self, gray):
+        """
+        전파 프레임: 특징점을 현재 프레임으로 추적해 트래커별 이동량 계산
+
+        Returns:
+            { track_id: (dx, dy) } 신뢰할 수 있는 트래커만 (나머지는 재동기화 요청)
+        """
+        if not self._points or self._prev_gray is None or self._prev_gray.shape != gray.shape:
+            self.resync = True
+            return {}
+
+        track_ids = list(self._points)
+        counts = [len(self._points[tid]) for tid in track_ids]
+        p0 = np.concatenate([self._points[tid] for tid in track_ids])
+
+        # 모든 박스의 점을 한 번에 추적 (순방향 + 역방향)
+        p1, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, p0, None, **LK_PARAMS)
+        p0_back, status_back, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, p1, None, **LK_PARAMS)
+        fb_error = np.linalg.norm((p0 - p0_back).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (status_back.ravel() == 1) & (fb_error < FB_ERROR_THRESHOLD)
+
+        shifts = {track_id: (0.0, 0.0) for track_id in self._static}
+        points = {}
+        lost = False
+        offset = 0
+        for track_id, count in zip(track_ids, counts):
+            box_good = good[offset:offset + count]
+            if box_good.sum() < MIN_POINTS or box_good.mean() < MIN_INLIER_RATIO:
+                # 가려짐/급격한 움직임 → 이 박스는 전파하지 않고 다음 프레임에 감지
+                lost = True
+            else:
+                start, end = p0[offset:offset + count][box_good], p1[offset:offset + count][box_good]
+                dx, dy = np.median((end - start).reshape(-1, 2), axis=0)
+                shifts[track_id] = (float(dx), float(dy))
+                points[track_id] = end
+            offset += count
+
+        if lost and not self.resync:
+            self.resync = True
+            self.resyncs += 1
+        self._prev_gray = gray
+        self._points = points
+        self.propagated += 1
+        return shifts
+
+    def get_stats(self):
+        return {
+            "propagated": self.propagated,
+            "resyncs": self.resyncs,
+            "tracked_boxes": len(self._points)
+        }
+
+
+# ==================================================
+# 설정 API
+# ==================================================
+def get_settings():
+    """광류 전파 설정"""
+    return {
+        "enabled": is_enabled(),
+        "detectInterval": DETECT_INTERVAL,
+        "maxPointsPerBox": MAX_POINTS_PER_BOX,
+        "minInlierRatio": MIN_INLIER_RATIO
+    }
+
+
+def set_interval(interval: int):
+    """
+    감지 주기 변경 (1 = 매 프레임 감지)
+
+    Args:
+        interval: 1~10
+
+    Returns:
+        현재 설정
+    """
+    global DETECT_INTERVAL
+    DETECT_INTERVAL = max(1, min(MAX_DETECT_INTERVAL, interval))
+    print(f"[Flow] 감지 주기: {DETECT_INTERVAL} 프레임마다 (사이 프레임은 광류 전파)")
+    return get_settings()
@@ -26,25 +26,106 @@ MediaPipe Pose를 사용하여 사람의 33개 관절 좌표 추출
 - 각 관절: [x, y, visibility]
 - x, y: 0.0 ~ 1.0 (정규화된 좌표)
 - visibility: 0.0 ~ 1.0 (보이는 정도, 높을수록 신뢰도 높음)
+
+[비동기 추출 (submit_pose)]
+- 프레임 루프는 사람 영역만 복사해 워커 스레드에 제출하고 Future만 받음 (감지 결과 전송을 막지 않음)
+- 트래커마다 VIDEO 모드 PoseLandmarker 1개 (최대 POSE_MAX_LANDMARKERS개)
+  → 이전 프레임의 관절 위치로 사람 영역을 추적해 매번 사람 탐지부터 하지 않음 (IMAGE 모드보다 가벼움)
+- 전용 인스턴스가 모자라면 공유 IMAGE 모드 인스턴스 사용 (잠금)
+- 결과는 tracker_service.apply_pose_results()가 다음 프레임들에서 트래커에 반영
+
+[Pose 백엔드 (환경변수 AI_POSE_BACKEND)]
+- mediapipe: 사람 영역(ROI)마다 PoseLandmarker 1회 (거수자가 늘면 추론도 늘어남)
+- openvino:  YOLO-pose IR(models/{AI_POSE_MODEL}.xml)을 프레임 전체에 1번 실행
+             → 사람 박스 + 관절을 한 번에 얻고 트래커 박스와 IoU로 짝지음 (거수자 수와 무관한 비용)
+             감지 모델과 같은 OpenVINO 런타임/디바이스, 감지 추론과 동시에 비동기로 실행
+- auto:      YOLO-pose IR이 있으면 openvino, 없으면 mediapipe (MediaPipe는 설치된 경우에만)
+- 관절은 백엔드 레이아웃 → MediaPipe 33개 레이아웃으로 옮겨서 반환 (COCO 17개는 없는 관절 visibility 0)
+  → 트래커 관절 히스토리/얼굴 머리 영역/프론트엔드 스켈레톤은 백엔드와 무관하게 같은 인덱스 사용
 """
 import os
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
 import cv2
+from openvino import AsyncInferQueue, PartialShape
 
 from app.utils.path_utils import MODELS_DIR
+from app.services import ai_model_service
 
 
 # ==================================================
 # 설정값 (Configuration)
 # ==================================================
 MEDIAPIPE_ENABLED = True     # MediaPipe 활성화 여부
-MEDIAPIPE_FRAME_INTERVAL = 2  # N 프레임마다 1번 호출 (성능 최적화)
-_frame_counter = 0           # 현재 프레임 카운터
+MEDIAPIPE_FRAME_INTERVAL = 2  # 트래커마다 N 프레임에 1번 호출 (성능 최적화)
+MEDIAPIPE_FRAME_BUDGET_MS = float(os.getenv("AI_POSE_BUDGET_MS", "30"))  # 카메라 프레임당 관절 추출에 쓸 시간 (ms)
+# 어떤 트래커를 이번 프레임에 추출할지는 tracker_service.schedule_pose()가 결정 (트래커별 주기 + 프레임당 시간 예산)
+
+POSE_WORKERS = int(os.getenv("AI_POSE_WORKERS", "2"))           # 관절 추출 워커 스레드 수
+POSE_MAX_LANDMARKERS = int(os.getenv("AI_POSE_LANDMARKERS", "6"))  # 트래커 전용 VIDEO 모드 인스턴스 최대 수 (인스턴스당 모델 1개)
+
+POSE_BACKEND = os.getenv("AI_POSE_BACKEND", "auto").lower()   # auto / openvino / mediapipe
+POSE_MODEL = os.getenv("AI_POSE_MODEL", "yolo11n-pose")        # models/ 아래 YOLO-pose IR 이름 (.xml + .bin)
+POSE_CONFIDENCE_THRESHOLD = 0.4   # YOLO-pose 사람 박스 최소 신뢰도
+POSE_IOU_THRESHOLD = 0.45         # YOLO-pose NMS IoU 임계값
+POSE_INPUT_SIZE = 640             # YOLO-pose 입력 크기 (입력 shape가 동적인 모델에 사용)
+
+# 관절 추출 1회 평균 시간 (ms, 지수 이동 평균) - 프레임당 예산 계산용
+_pose_time_ms = 15.0
+
+
+# ==================================================
+# 관절 레이아웃 (백엔드별 관절 인덱스)
+# ==================================================
+# 관절 이름 → MediaPipe 33개 레이아웃 인덱스 (트래커/이상행동 분석/프론트엔드가 쓰는 기준 레이아웃)
+MEDIAPIPE_JOINTS = {
+    "nose": 0,
+    "left_eye": 2, "right_eye": 5,
+    "left_ear": 7, "right_ear": 8,
+    "left_shoulder": 11, "right_shoulder": 12,
+    "left_elbow": 13, "right_elbow": 14,
+    "left_wrist": 15, "right_wrist": 16,
+    "left_hip": 23, "right_hip": 24,
+    "left_knee": 25, "right_knee": 26,
+    "left_ankle": 27, "right_ankle": 28
+}
+NUM_MEDIAPIPE_KEYPOINTS = 33
+
+# COCO 17개 관절 순서 (YOLO-pose 출력)
+COCO_JOINT_NAMES = [
+    "nose", "left_eye", "right_eye", "left_ear", "right_ear",
+    "left_shoulder", "right_shoulder", "left_elbow", "right_elbow", "left_wrist", "right_wrist",
+    "left_hip", "right_hip", "left_knee", "right_knee", "left_ankle", "right_ankle"
+]
+COCO_JOINTS = {name: index for index, name in enumerate(COCO_JOINT_NAMES)}
+
+# COCO 관절 i → MediaPipe 레이아웃 인덱스
+COCO_TO_MEDIAPIPE = np.array([MEDIAPIPE_JOINTS[name] for name in COCO_JOINT_NAMES], dtype=np.int64)
+
+
+def to_mediapipe_layout(keypoints, keypoint_map):
+    """
+    백엔드 관절 (..., K, 3) → MediaPipe 레이아웃 (..., 33, 3)
+
+    - keypoint_map[i]: 백엔드 관절 i의 MediaPipe 인덱스
+    - 백엔드에 없는 관절은 [0, 0, 0] (visibility 0 → 분석/표시에서 무시)
+    """
+    keypoints = np.asarray(keypoints, dtype=np.float32)
+    result = np.zeros(keypoints.shape[:-2] + (NUM_MEDIAPIPE_KEYPOINTS, 3), dtype=np.float32)
+    result[..., keypoint_map, :] = keypoints
+    return result
 
 
 # ==================================================
 # MediaPipe Pose Detector (모듈 레벨 싱글톤)
 # ==================================================
 _pose_detector = None
+_detector_lock = threading.Lock()  # PoseLandmarker는 스레드 안전하지 않음 (워커 풀 동시 호출 방지)
+_mp = None                 # mediapipe 모듈 (초기화 시 1번 import)
+_vision = None             # mediapipe.tasks.python.vision 모듈
+_video_options = None      # 트래커 전용 VIDEO 모드 인스턴스 생성 옵션
 
 
 def _init_mediapipe():
@@ -62,10 +143,11 @@ def _init_mediapipe():
     3. PoseLandmarkerOptions로 설정 지정
     4. PoseLandmarker 객체 생성
     """
-    global _pose_detector
+    global _pose_detector, _mp, _vision, _video_options
     
     try:
         # MediaPipe Tasks API (새로운 방식)
+        import mediapipe as mp
         from mediapipe.tasks import python as mp_python
         from mediapipe.tasks.python import vision as mp_vision
         
@@ -84,8 +166,17 @@ def _init_mediapipe():
                 output_segmentation_masks=False  # 세그멘테이션 마스크 불필요 (성능 향상)
             )
             
-            # Pose Landmarker 생성
+            # Pose Landmarker 생성 (공유 IMAGE 모드 - 전용 인스턴스가 모자랄 때 사용)
             _pose_detector = mp_vision.PoseLandmarker.create_from_options(options)
+            _mp = mp
+            _vision = mp_vision
+            
+            # 트래커 전용 인스턴스 옵션 (VIDEO 모드: 프레임 간 관절 추적)
+            _video_options = mp_vision.PoseLandmarkerOptions(
+                base_options=base_options,
+                running_mode=mp_vision.RunningMode.VIDEO,
+                output_segmentation_masks=False
+            )
             print("[MediaPipe] Pose Landmarker 초기화 완료!")
         else:
             print(f"[MediaPipe] Pose 모델 없음: {pose_model_path}")
@@ -98,16 +189,24 @@ def _init_mediapipe():
         print("[MediaPipe] YOLO 단독 모드로 실행 (관절 추출 비활성화)")
 
 
-# 모듈 import 시 자동 초기화
-_init_mediapipe()
-
-
 # ==================================================
 # 상태 조회 함수
 # ==================================================
 def is_available():
-    """MediaPipe 사용 가능 여부 (모델 로드 성공 여부)"""
-    return _pose_detector is not None
+    """관절 추출 사용 가능 여부 (Pose 백엔드 모델 로드 성공 여부)"""
+    return _backend is not None and _backend.available()
+
+
+def is_frame_pass():
+    """프레임 전체 1회 추론 백엔드 여부 (True면 트래커별 스케줄/ROI 추출 대신 submit_frame_pose 사용)"""
+    return _backend is not None and _backend.frame_pass
+
+
+def get_backend_info():
+    """Pose 백엔드 정보 (모니터링용)"""
+    if _backend is None:
+        return {"name": None, "framePass": False}
+    return _backend.get_info()
 
 
 def is_enabled():
@@ -116,10 +215,20 @@ def is_enabled():
 
 
 def get_frame_interval():
-    """현재 호출 주기 (N 프레임마다 1번)"""
+    """현재 호출 주기 (트래커마다 N 프레임에 1번)"""
     return MEDIAPIPE_FRAME_INTERVAL
 
 
+def get_frame_budget_ms():
+    """카메라 프레임당 관절 추출 시간 예산 (ms)"""
+    return MEDIAPIPE_FRAME_BUDGET_MS
+
+
+def get_pose_time_ms():
+    """관절 추출 1회 평균 시간 (ms)"""
+    return _pose_time_ms
+
+
 # ==================================================
 # 설정 변경 함수 (API에서 호출)
 # ==================================================
@@ -146,7 +255,7 @@ def toggle(enabled: bool):
 
 def set_interval(interval: int):
     """
-    호출 주기 설정 (N 프레임마다 1번)
+    호출 주기 설정 (트래커마다 N 프레임에 1번)
     
     [성능 vs 정확도 트레이드오프]
     - 1: 최고 정확도, 가장 느림
@@ -177,50 +286,46 @@ def set_interval(interval: int):
     }
 
 
-# ==================================================
-# 프레임 처리 제어
-# ==================================================
-def should_process_frame():
+def set_budget(budget_ms: float):
     """
-    현재 프레임을 처리해야 하는지 확인
+    카메라 프레임당 관절 추출 시간 예산 설정
+    
+    - 예산이 평균 추출 시간보다 작으면 여러 프레임에 걸쳐 적립 후 1명씩 추출
     
-    [동작 원리]
-    - 매 호출마다 _frame_counter 증가
-    - MEDIAPIPE_FRAME_INTERVAL에 도달하면 True 반환 후 리셋
-    - 예: interval=5 → 5번에 1번만 True
+    Args:
+        budget_ms: 1~200 사이 값 (ms)
     
     Returns:
-        True: 이 프레임 처리, False: 스킵
+        {"success": bool, "budgetMs": float, "message": str}
     """
-    global _frame_counter
-    _frame_counter += 1
+    global MEDIAPIPE_FRAME_BUDGET_MS
     
-    if _frame_counter >= MEDIAPIPE_FRAME_INTERVAL:
-        _frame_counter = 0
-        return True
-    return False
-
-
-def reset_frame_counter():
-    """프레임 카운터 초기화 (새 추적 시작 시)"""
-    global _frame_counter
-    _frame_counter = 0
+    MEDIAPIPE_FRAME_BUDGET_MS = max(1.0, min(200.0, float(budget_ms)))
+    print(f"[MediaPipe] 프레임당 예산: {MEDIAPIPE_FRAME_BUDGET_MS:.0f}ms")
+    
+    return {
+        "success": True,
+        "budgetMs": MEDIAPIPE_FRAME_BUDGET_MS,
+        "message": f"MediaPipe 프레임당 {MEDIAPIPE_FRAME_BUDGET_MS:.0f}ms 안에서 호출"
+    }
 
 
 # ==================================================
 # 관절 추출 (핵심 기능)
 # ==================================================
-def extract_pose_keypoints(frame, box):
+def extract_pose_keypoints(frame, box, input_size=None):
     """
-    사람 영역(ROI)에서 33개 관절 좌표 추출
+    사람 영역(ROI)에서 33개 관절 좌표 추출 (동기, 현재 Pose 백엔드)
     
-    [처리 과정]
+    - mediapipe: 아래 과정 (공유 IMAGE 모드 인스턴스)
+    - openvino: 프레임 전체 추론 후 box와 가장 많이 겹치는 사람의 관절 (MediaPipe 레이아웃)
+    
+    [처리 과정 (mediapipe)]
     1. YOLO 박스 좌표 → 원본 프레임 좌표로 변환
     2. ROI 크롭 (사람 영역만 추출)
-    3. 작은 ROI 리사이즈 (최소 100x100)
-    4. BGR → RGB 변환 (MediaPipe 입력 포맷)
-    5. MediaPipe Pose 추론
-    6. ROI 좌표 → 모델 입력 좌표로 역변환
+    3. BGR → RGB 변환 (MediaPipe 입력 포맷)
+    4. MediaPipe Pose 추론
+    5. ROI 좌표 → 모델 입력 좌표로 역변환
     
     [좌표 변환 설명]
     - YOLO 출력: 320x320 기준 좌표
@@ -233,62 +338,98 @@ def extract_pose_keypoints(frame, box):
     Args:
         frame: 전체 프레임 이미지 (OpenCV BGR)
         box: YOLO 바운딩 박스 [x1, y1, x2, y2] (320x320 기준)
+        input_size: box 좌표의 기준 모델 입력 크기 (세션별 감지 모델, 없으면 기본 모델)
     
     Returns:
         [[x, y, visibility], ...] 33개 관절 또는 None
     """
-    if _pose_detector is None:
+    if _backend is None:
         return None
-        
+    return _backend.extract(frame, box, input_size)
+
+
+def submit_frame_pose(frame):
+    """
+    프레임 전체 관절 추론을 비동기로 시작 (프레임 1회 백엔드만, 감지 추론과 동시에 실행)
+
+    Returns:
+        [출력 텐서]를 돌려줄 Future, 프레임 1회 백엔드가 아니면 None
+    """
+    if not (MEDIAPIPE_ENABLED and is_frame_pass() and _backend.available()):
+        return None
+    return _backend.submit_frame(frame)
+
+
+def decode_frame_pose(output, input_size):
+    """
+    submit_frame_pose() 결과 → (사람 박스 (P, 4), 관절 (P, 33, 3)), 둘 다 input_size 기준 좌표
+
+    - 관절은 MediaPipe 레이아웃으로 옮긴 결과 (to_mediapipe_layout)
+    """
+    if output is None or not is_frame_pass():
+        return np.empty((0, 4), dtype=np.float32), np.empty((0, NUM_MEDIAPIPE_KEYPOINTS, 3), dtype=np.float32)
+    return _backend.decode(output, input_size)
+
+
+def _crop_roi(frame, box, input_size):
+    """
+    YOLO 박스 → 원본 프레임 ROI 크롭 + 좌표 역변환 정보
+    
+    - MediaPipe가 내부에서 256x256으로 리사이즈하므로 작은 ROI를 미리 키우지 않음
+    
+    Returns:
+        (roi, x1, y1, scale_x, scale_y) 또는 None (빈 영역)
+    """
+    if input_size is None:
+        input_size = ai_model_service.get_input_size()  # 320 또는 640
+    
+    # 좌표 변환: YOLO(320) → 프레임(실제 해상도)
+    h, w = frame.shape[:2]
+    scale_x = w / input_size  # 예: 640/320 = 2.0
+    scale_y = h / input_size  # 예: 480/320 = 1.5
+    
+    x1 = int(max(0, box[0] * scale_x))
+    y1 = int(max(0, box[1] * scale_y))
+    x2 = int(min(w, box[2] * scale_x))
+    y2 = int(min(h, box[3] * scale_y))
+    
+    roi = frame[y1:y2, x1:x2]
+    if roi.size == 0:
+        return None
+    return roi, x1, y1, scale_x, scale_y
+
+
+def _run_pose(entry, crop, timestamp_ms):
+    """
+    Pose 추론 + 좌표 역변환 (ROI → 모델 입력 좌표)
+    
+    Args:
+        entry: 트래커 전용 VIDEO 모드 인스턴스 (None이면 공유 IMAGE 모드)
+        crop: _crop_roi() 결과
+        timestamp_ms: 프레임 시각 (VIDEO 모드는 인스턴스마다 증가해야 함)
+    """
+    global _pose_time_ms
+    
     try:
-        import mediapipe as mp
-        from app.services import ai_model_service
-        
-        # 프레임 크기
-        h, w = frame.shape[:2]
-        
-        # ─────────────────────────────────────────
-        # 1. 좌표 변환: YOLO(320) → 프레임(실제 해상도)
-        # ─────────────────────────────────────────
-        input_size = ai_model_service.get_input_size()  # 320
-        scale_x = w / input_size  # 예: 640/320 = 2.0
-        scale_y = h / input_size  # 예: 480/320 = 1.5
-        
-        # 박스 좌표 스케일 변환
-        x1 = int(max(0, box[0] * scale_x))
-        y1 = int(max(0, box[1] * scale_y))
-        x2 = int(min(w, box[2] * scale_x))
-        y2 = int(min(h, box[3] * scale_y))
-        
-        # ─────────────────────────────────────────
-        # 2. ROI 크롭 (사람 영역만)
-        # ─────────────────────────────────────────
-        roi = frame[y1:y2, x1:x2]
-        if roi.size == 0:
-            return None
-        
-        # ─────────────────────────────────────────
-        # 3. 작은 ROI 리사이즈 (MediaPipe 정확도 향상)
-        # ─────────────────────────────────────────
+        roi, x1, y1, scale_x, scale_y = crop
         roi_h, roi_w = roi.shape[:2]
-        if roi_h < 100 or roi_w < 100:
-            roi = cv2.resize(roi, (max(100, roi_w), max(100, roi_h)))
-            roi_h, roi_w = roi.shape[:2]
         
-        # ─────────────────────────────────────────
-        # 4. MediaPipe 입력 준비 (BGR → RGB)
-        # ─────────────────────────────────────────
+        # MediaPipe 입력 준비 (BGR → RGB)
         rgb_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_roi)
+        mp_image = _mp.Image(image_format=_mp.ImageFormat.SRGB, data=rgb_roi)
         
-        # ─────────────────────────────────────────
-        # 5. Pose 추론
-        # ─────────────────────────────────────────
-        results = _pose_detector.detect(mp_image)
+        # Pose 추론
+        started = time.perf_counter()
+        if entry is None:
+            with _detector_lock:
+                results = _pose_detector.detect(mp_image)
+        else:
+            with entry.lock:
+                entry.timestamp_ms = max(entry.timestamp_ms + 1, timestamp_ms)
+                results = entry.landmarker.detect_for_video(mp_image, entry.timestamp_ms)
+        _pose_time_ms = 0.8 * _pose_time_ms + 0.2 * (time.perf_counter() - started) * 1000
         
-        # ─────────────────────────────────────────
-        # 6. 결과 좌표 변환 (ROI → 모델 입력 좌표)
-        # ─────────────────────────────────────────
+        # 결과 좌표 변환 (ROI → 모델 입력 좌표)
         if results.pose_landmarks and len(results.pose_landmarks) > 0:
             keypoints = []
             
@@ -306,7 +447,318 @@ def extract_pose_keypoints(frame, box):
         
     except Exception as e:
         # 에러 로그 중복 방지 (첫 번째만 출력)
-        if not hasattr(extract_pose_keypoints, '_error_logged'):
+        if not hasattr(_run_pose, '_error_logged'):
             print(f"[MediaPipe] 관절 추출 오류: {e}")
-            extract_pose_keypoints._error_logged = True
+            _run_pose._error_logged = True
         return None
+
+
+# ==================================================
+# 비동기 관절 추출 (트래커별 VIDEO 모드 인스턴스)
+# ==================================================
+# [학습 포인트: VIDEO 모드]
+# - IMAGE 모드: 매 호출마다 사람 탐지 → 관절 추정 (2단계)
+# - VIDEO 모드: 직전 결과의 관절 위치로 사람 영역을 추적, 놓쳤을 때만 다시 탐지
+#   → 같은 사람을 연속으로 넣어야 효과가 있으므로 트래커마다 인스턴스를 따로 둠
+# - 타임스탬프는 인스턴스마다 증가해야 함 (프레임 시각 ms, 같으면 +1)
+class _Landmarker:
+    """트래커 전용 VIDEO 모드 인스턴스 (다른 트래커에 넘겨 재사용할 수 있어 잠금 포함)"""
+    
+    def __init__(self, landmarker):
+        self.landmarker = landmarker
+        self.timestamp_ms = 0
+        self.lock = threading.Lock()
+
+
+_landmarkers = {}          # { (세션 번호, track_id): _Landmarker }
+_idle_landmarkers = []     # 트래커가 끝나 반납된 인스턴스 (다음 트래커가 재사용)
+_landmarkers_created = 0
+_landmarkers_lock = threading.Lock()
+_pose_executor = ThreadPoolExecutor(max_workers=POSE_WORKERS, thread_name_prefix="pose")
+
+
+def _acquire_landmarker(key):
+    """트래커 전용 인스턴스 (없으면 반납된 것 재사용 → 새로 생성, 한도 초과/생성 실패 시 None)"""
+    global _landmarkers_created, _video_options
+    
+    with _landmarkers_lock:
+        entry = _landmarkers.get(key)
+        if entry is not None:
+            return entry
+        if _idle_landmarkers:
+            entry = _idle_landmarkers.pop()
+        elif _video_options is not None and _landmarkers_created < POSE_MAX_LANDMARKERS:
+            try:
+                entry = _Landmarker(_vision.PoseLandmarker.create_from_options(_video_options))
+            except Exception as e:
+                # 생성이 안 되면 이후로도 안 됨 → VIDEO 모드 끄고 공유 IMAGE 모드만 사용
+                print(f"[MediaPipe] [WARN] VIDEO 모드 인스턴스 생성 실패 (IMAGE 모드 사용): {e}")
+                _video_options = None
+                return None
+            _landmarkers_created += 1
+        else:
+            return None
+        _landmarkers[key] = entry
+        return entry
+
+
+def submit_pose(key, frame, box, input_size, timestamp):
+    """
+    관절 추출을 워커 스레드에 제출 (프레임 루프를 막지 않음)
+    
+    - 사람 영역만 복사해서 넘김 → 다음 프레임이 디코딩되어도 안전
+    
+    Args:
+        key: (session.token, track_id) - 트래커 전용 인스턴스 키
+             (camera_id는 세션이 끝나면 재사용되므로 세션마다 고유한 번호 사용)
+        frame: 원본 프레임 (BGR)
+        box: YOLO 바운딩 박스 (input_size 기준)
+        input_size: box 좌표의 기준 모델 입력 크기
+        timestamp: 프레임 시각 (초)
+    
+    Returns:
+        관절 좌표 리스트(또는 None)를 돌려줄 Future, 추출할 수 없으면 None (MediaPipe 백엔드가 아님)
+    """
+    if _pose_detector is None or is_frame_pass():
+        return None
+    crop = _crop_roi(frame, box, input_size)
+    if crop is None:
+        return None
+    roi, x1, y1, scale_x, scale_y = crop
+    crop = (roi.copy(), x1, y1, scale_x, scale_y)
+    used = []
+    future = _pose_executor.submit(_pose_job, key, crop, int(timestamp * 1000), used)
+    future.landmarker = used   # 작업이 잡은 인스턴스 (미뤄진 반납이 같은 인스턴스인지 확인용)
+    return future
+
+
+def _pose_job(key, crop, timestamp_ms, used):
+    """워커 스레드 작업: 전용 인스턴스(없으면 공유 IMAGE 모드)로 추론"""
+    entry = _acquire_landmarker(key)
+    used.append(entry)
+    return _run_pose(entry, crop, timestamp_ms)
+
+
+def release_landmarker(key, job=None):
+    """
+    트래커 종료 → 전용 인스턴스 반납 (다음 트래커가 재사용)
+
+    Args:
+        key: (session.token, track_id)
+        job: 트래커의 진행 중인 추출 Future (있으면 취소, 이미 실행 중이면 끝난 뒤 반납)
+
+    Returns:
+        바로 반납했으면 True, 실행 중인 추출이 끝난 뒤로 미뤘으면 False
+    """
+    # 실행 중인 작업은 취소가 안 됨 → 지금 반납하면 작업이 _acquire_landmarker()로 다시 잡아
+    # 끝난 트래커 키에 인스턴스가 남음 (세션이 끝날 때까지 반납 안 됨 → 한도가 줄어 결국 IMAGE 모드만)
+    # 끝난 뒤에는 작업이 쓴 인스턴스가 아직 그 키에 있을 때만 반납
+    # (ReID로 같은 track_id가 다시 이어져 새 인스턴스를 잡았으면 그대로 둠)
+    if job is not None and not job.cancel():
+        job.add_done_callback(lambda done: _release_job_entry(key, done))
+        return False
+    _release_entry(key)
+    return True
+
+
+def _release_entry(key, entry=None):
+    """키의 전용 인스턴스 반납 (entry: 이 인스턴스일 때만 반납, None이면 무조건)"""
+    with _landmarkers_lock:
+        current = _landmarkers.get(key)
+        if current is None or (entry is not None and current is not entry):
+            return
+        _idle_landmarkers.append(_landmarkers.pop(key))
+
+
+def _release_job_entry(key, job):
+    """끝난 추출 작업이 쓴 전용 인스턴스 반납 (공유 IMAGE 모드로 실행했으면 반납할 것 없음)"""
+    entry = job.landmarker[0] if job.landmarker else None
+    if entry is not None:
+        _release_entry(key, entry)
+
+
+def release_session(token, keep=()):
+    """카메라 세션 초기화 → 해당 세션의 전용 인스턴스 모두 반납 (keep: 실행 중인 추출이 끝난 뒤 반납할 키)"""
+    with _landmarkers_lock:
+        for key in [key for key in _landmarkers if key[0] == token and key not in keep]:
+            _idle_landmarkers.append(_landmarkers.pop(key))
+
+
+def get_landmarker_stats():
+    """전용 인스턴스 사용 현황"""
+    with _landmarkers_lock:
+        return {
+            "active": len(_landmarkers),
+            "idle": len(_idle_landmarkers),
+            "created": _landmarkers_created,
+            "max": POSE_MAX_LANDMARKERS
+        }
+
+
+
+# ==================================================
+# Pose 백엔드
+# ==================================================
+class MediaPipePoseBackend:
+    """MediaPipe PoseLandmarker (사람 영역마다 추론, 트래커별 VIDEO 모드 인스턴스는 submit_pose 참고)"""
+    
+    name = "mediapipe"
+    frame_pass = False
+    
+    def available(self):
+        return _pose_detector is not None
+    
+    def extract(self, frame, box, input_size):
+        if _pose_detector is None:
+            return None
+        crop = _crop_roi(frame, box, input_size)
+        if crop is None:
+            return None
+        return _run_pose(None, crop, 0)
+    
+    def get_info(self):
+        return {"name": self.name, "framePass": self.frame_pass, "landmarkers": get_landmarker_stats()}
+
+
+def _on_pose_done(infer_request, userdata):
+    """AsyncInferQueue 완료 콜백 (userdata = (Future, 입력 배열) - 입력은 추론이 끝날 때까지 참조 유지)"""
+    future, _ = userdata
+    try:
+        future.set_result([infer_request.get_output_tensor(0).data.copy()])
+    except Exception as e:
+        future.set_exception(e)
+
+
+class OpenVinoPoseBackend:
+    """
+    YOLO-pose OpenVINO IR (프레임 전체 1회 추론 → 사람 박스 + COCO 17개 관절)
+    
+    [출력]
+    - (1, 5 + 17 × 3, 앵커 수): [cx, cy, w, h, 사람 점수, (x, y, visibility) × 17]
+      (Ultralytics export 형식, 좌표는 모델 입력 픽셀, visibility는 sigmoid 적용 후 0~1)
+    """
+    
+    name = "openvino"
+    frame_pass = True
+    
+    def __init__(self, model_xml, model_bin):
+        self.model_name = os.path.splitext(os.path.basename(model_xml))[0]
+        self.model_xml, self.model_bin = model_xml, model_bin
+        model = self._read()
+        size = model.input(0).get_partial_shape()[2].get_length()
+        
+        channels = model.output(0).get_partial_shape()[1].get_length()
+        num_keypoints = (channels - 5) // 3
+        if num_keypoints != len(COCO_JOINT_NAMES):
+            raise ValueError(f"COCO 17개 관절 모델이 아님 (출력 채널 {channels})")
+        self.keypoint_map = COCO_TO_MEDIAPIPE
+        self.input_size = size
+        
+        # 전처리는 감지 모델과 같은 방식으로 그래프에 포함 (실패 시 CPU 전처리)
+        self.graph_preprocess = False
+        try:
+            model = ai_model_service._apply_preprocessing(model)
+            self.graph_preprocess = True
+        except Exception as e:
+            print(f"[Pose] 그래프 전처리 구성 실패 - CPU 전처리 사용: {e}")
+            model = self._read()
+        
+        compiled = ai_model_service.core.compile_model(
+            model=model, device_name=ai_model_service._device,
+            config={"CACHE_DIR": ai_model_service._cache_dir, "PERFORMANCE_HINT": "LATENCY"}
+        )
+        self.infer_queue = AsyncInferQueue(compiled, 2)
+        self.infer_queue.set_callback(_on_pose_done)
+        print(f"[Pose] OpenVINO YOLO-pose 로드 완료 - {self.model_name}, 입력: {size}x{size}, "
+              f"디바이스: {ai_model_service._device}")
+    
+    def _read(self):
+        """모델 읽기 (입력 shape가 동적이면 (1, 3, POSE_INPUT_SIZE, POSE_INPUT_SIZE)로 고정)"""
+        model = ai_model_service.core.read_model(model=self.model_xml, weights=self.model_bin)
+        if not model.input(0).get_partial_shape().is_static:
+            model.reshape({model.input(0): PartialShape([1, 3, POSE_INPUT_SIZE, POSE_INPUT_SIZE])})
+        return model
+    
+    def available(self):
+        return True
+    
+    def submit_frame(self, frame):
+        """프레임 전체 비동기 추론 시작 → Future (결과: [출력 텐서])"""
+        size = self.input_size
+        if self.graph_preprocess:
+            if frame.shape[:2] != (size, size):
+                frame = cv2.resize(frame, (size, size), interpolation=cv2.INTER_LINEAR)
+            input_data = np.ascontiguousarray(frame)[np.newaxis]
+        else:
+            input_data = ai_model_service.preprocess_host(frame, size)
+        
+        future = Future()
+        self.infer_queue.start_async({0: ai_model_service._to_input_tensor(input_data)}, (future, input_data))
+        return future
+    
+    def decode(self, output, input_size):
+        """출력 → 신뢰도 필터 + NMS → (사람 박스 (P, 4), MediaPipe 레이아웃 관절 (P, 33, 3)), input_size 기준"""
+        raw = output[0][0]
+        scores = raw[4]
+        mask = scores > POSE_CONFIDENCE_THRESHOLD
+        if not np.any(mask):
+            return np.empty((0, 4), dtype=np.float32), np.empty((0, NUM_MEDIAPIPE_KEYPOINTS, 3), dtype=np.float32)
+        
+        cx, cy, w, h = raw[:4, mask]
+        keypoints = raw[5:, mask].T.reshape(-1, len(self.keypoint_map), 3)
+        xywh = np.stack([cx - w / 2, cy - h / 2, w, h], axis=1)
+        keep = cv2.dnn.NMSBoxes(xywh.tolist(), scores[mask].tolist(), POSE_CONFIDENCE_THRESHOLD, POSE_IOU_THRESHOLD)
+        keep = np.asarray(keep, dtype=np.int64).reshape(-1)
+        
+        # 포즈 모델 입력 좌표 → 감지 모델 입력 좌표 (둘 다 프레임 전체를 정사각형으로 리사이즈한 좌표)
+        scale = input_size / self.input_size
+        boxes = xywh[keep].copy()
+        boxes[:, 2:] += boxes[:, :2]
+        boxes *= scale
+        keypoints = keypoints[keep].copy()
+        keypoints[..., :2] *= scale
+        return boxes, to_mediapipe_layout(keypoints, self.keypoint_map)
+    
+    def extract(self, frame, box, input_size):
+        if input_size is None:
+            input_size = ai_model_service.get_input_size()
+        boxes, keypoints = self.decode(self.submit_frame(frame).result(), input_size)
+        if len(boxes) == 0:
+            return None
+        
+        # box와 IoU가 가장 큰 사람
+        x1 = np.maximum(boxes[:, 0], box[0])
+        y1 = np.maximum(boxes[:, 1], box[1])
+        x2 = np.minimum(boxes[:, 2], box[2])
+        y2 = np.minimum(boxes[:, 3], box[3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        union = ((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+                 + (box[2] - box[0]) * (box[3] - box[1]) - inter)
+        iou = inter / np.maximum(union, 1e-6)
+        best = int(np.argmax(iou))
+        return keypoints[best].tolist() if iou[best] > 0 else None
+    
+    def get_info(self):
+        return {"name": self.name, "framePass": self.frame_pass, "model": self.model_name,
+                "inputSize": self.input_size}
+
+
+def _create_pose_backend():
+    """AI_POSE_BACKEND 설정에 맞는 Pose 백엔드 생성 (YOLO-pose IR이 없거나 로드 실패 시 MediaPipe로 폴백)"""
+    if POSE_BACKEND in ("auto", "openvino"):
+        model_xml = os.path.join(MODELS_DIR, f"{POSE_MODEL}.xml")
+        model_bin = os.path.join(MODELS_DIR, f"{POSE_MODEL}.bin")
+        if os.path.exists(model_xml) and os.path.exists(model_bin):
+            try:
+                return OpenVinoPoseBackend(model_xml, model_bin)
+            except Exception as e:
+                print(f"[Pose] OpenVINO YOLO-pose 로드 실패 - MediaPipe 사용: {e}")
+        elif POSE_BACKEND == "openvino":
+            print(f"[Pose] YOLO-pose 모델 없음: {model_xml} - MediaPipe 사용")
+    
+    _init_mediapipe()
+    return MediaPipePoseBackend()
+
+
+# 모듈 import 시 자동 초기화
+_backend = _create_pose_backend()
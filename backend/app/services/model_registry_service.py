@@ -0,0 +1,321 @@
+"""
+Model Registry Service - 감지 모델 레지스트리
+==============================================
+여러 감지 모델을 백그라운드에서 로드/컴파일하고 카메라 세션마다 선택
+
+[왜 필요한가?]
+- 기본 모델(best.xml, 320)만 쓰면 카메라마다 다른 모델(예: yolo11n 640, COCO 80 클래스)을 쓸 수 없음
+- 모델 컴파일은 수백 ms~수 초 → 요청 스레드/처리 루프에서 하면 그동안 프레임이 멈춤
+
+[모델 교체 (프레임 드롭 없음)]
+1. select_model(): 이미 로드된 모델이면 즉시 교체, 아니면 로더 스레드에서 로드 시작
+   (로딩 중에도 세션은 기존 모델로 계속 처리)
+2. 로드 완료 콜백에서 session.detector만 바꿈 (참조 대입 1번 = 원자적)
+3. 처리 루프는 프레임마다 session.detector를 한 번 읽어 prepare_frame에 넘김
+   → 이미 진행 중인 프레임은 이전 모델로 끝까지 처리, 다음 프레임부터 새 모델
+4. 입력 크기가 바뀌면 finish_frame에서 트래커 좌표를 새 크기로 변환
+
+[메모리 상한 (LRU)]
+- 로드된 모델의 추정 메모리 합이 MODEL_MEMORY_LIMIT_MB를 넘으면
+  가장 오래 사용되지 않은 모델부터 제거
+- 기본 모델과 세션이 사용 중/요청 중인 모델은 제거하지 않음
+- 제거는 레지스트리에서 참조만 끊음 → 진행 중인 프레임이 끝나면 메모리 해제
+
+[모델 파일]
+- artifacts/{이름}.xml + {이름}.bin (OpenVINO IR) 또는 artifacts/{이름}.onnx
+- 같은 이름이면 IR 우선
+"""
+import os
+import glob
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from app.utils.path_utils import ARTIFACTS_DIR
+from app.services import ai_model_service
+from app.services import batch_service
+from app.services import session_service
+
+
+# ==================================================
+# 설정값 (Configuration)
+# ==================================================
+MODEL_MEMORY_LIMIT_MB = float(os.getenv("MODEL_MEMORY_LIMIT_MB", "1024"))   # 로드된 모델 메모리 상한
+
+
+# ==================================================
+# 레지스트리 상태 (모듈 레벨 싱글톤)
+# ==================================================
+_detectors = {}      # { 이름: Detector } 로드 완료된 모델
+_loading = {}        # { 이름: Future } 로딩 중인 모델
+_failed = {}         # { 이름: 오류 메시지 } 마지막 로드 실패
+_lock = threading.Lock()
+_loader = None       # 모델 로더 (단일 스레드: 컴파일이 추론 코어를 모두 차지하지 않도록 1개씩)
+
+
+def _get_loader():
+    """모델 로더 반환 (최초 호출 시 생성)"""
+    global _loader
+    if _loader is None:
+        _loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+    return _loader
+
+
+def _register_default():
+    """import 시 로드된 기본 모델 등록"""
+    default = ai_model_service.get_default_detector()
+    if default is not None and default.loaded:
+        _detectors[default.name] = default
+
+
+_register_default()
+
+
+# ==================================================
+# 모델 목록
+# ==================================================
+def _scan_models():
+    """
+    artifacts/ 폴더의 모델 파일
+
+    Returns:
+        { 이름: (모델 경로, 가중치 경로 또는 None) }
+    """
+    models = {}
+    for path in glob.glob(os.path.join(ARTIFACTS_DIR, "*.onnx")):
+        models[os.path.splitext(os.path.basename(path))[0]] = (path, None)
+    for path in glob.glob(os.path.join(ARTIFACTS_DIR, "*.xml")):
+        weights = os.path.splitext(path)[0] + ".bin"
+        if os.path.exists(weights):
+            models[os.path.splitext(os.path.basename(path))[0]] = (path, weights)
+    return models
+
+
+def _models_in_use():
+    """세션이 사용 중이거나 로드를 요청한 모델 이름"""
+    names = set()
+    for session in session_service.get_all_sessions():
+        if session.detector is not None:
+            names.add(session.detector.name)
+        if session.requested_model:
+            names.add(session.requested_model)
+    return names
+
+
+def _memory_used():
+    return sum(detector.memory_bytes for detector in _detectors.values())
+
+
+def list_models():
+    """
+    모델 목록 + 상태 (모니터링 API용)
+
+    status: loaded / loading / failed / available
+    """
+    available = _scan_models()
+    default = ai_model_service.get_default_detector()
+    sessions = session_service.get_all_sessions()
+
+    with _lock:
+        names = sorted(set(available) | set(_detectors))
+        models = []
+        for name in names:
+            detector = _detectors.get(name)
+            if detector is not None:
+                status = "loaded"
+            elif name in _loading:
+                status = "loading"
+            elif name in _failed:
+                status = "failed"
+            else:
+                status = "available"
+
+            entry = detector.get_info() if detector is not None else {"name": name}
+            entry.update({
+                "status": status,
+                "default": default is not None and name == default.name,
+                "sessions": sum(1 for s in sessions if s.detector is not None and s.detector.name == name)
+            })
+            if status == "failed":
+                entry["error"] = _failed[name]
+            models.append(entry)
+        memory_used = _memory_used()
+
+    return {
+        "models": models,
+        "memoryMB": round(memory_used / (1024 * 1024), 1),
+        "memoryLimitMB": MODEL_MEMORY_LIMIT_MB
+    }
+
+
+def get_detector(name):
+    """로드된 모델 반환 (없거나 로딩 중이면 None)"""
+    with _lock:
+        return _detectors.get(name)
+
+
+# ==================================================
+# 백그라운드 로딩
+# ==================================================
+def load_async(name):
+    """
+    모델 로드 시작 (이미 로드됐거나 로딩 중이면 기존 결과 재사용)
+
+    Args:
+        name: 모델 이름 (artifacts/{이름}.xml 또는 .onnx)
+
+    Returns:
+        concurrent.futures.Future → 결과: Detector (실패 시 예외)
+
+    Raises:
+        KeyError: 모델 파일 없음
+    """
+    paths = _scan_models().get(name)
+
+    with _lock:
+        detector = _detectors.get(name)
+        if detector is not None:
+            future = Future()
+            future.set_result(detector)
+            return future
+        if name in _loading:
+            return _loading[name]
+        if paths is None:
+            raise KeyError(name)
+
+        _failed.pop(name, None)
+        future = _get_loader().submit(_load, name, *paths)
+        _loading[name] = future
+
+    print(f"[ModelRegistry] 모델 로드 시작: {name}")
+    return future
+
+
+def _load(name, model_path, weights_path):
+    """로더 스레드: Detector 로드 → 등록 → 메모리 상한 초과분 제거"""
+    detector = ai_model_service.Detector(name, model_path, weights_path)
+    try:
+        detector.load()
+    except Exception as e:
+        with _lock:
+            _loading.pop(name, None)
+            _failed[name] = str(e)
+        print(f"[ModelRegistry] 모델 로드 실패: {name} - {e}")
+        raise
+
+    with _lock:
+        _detectors[name] = detector
+        _loading.pop(name, None)
+    _evict(keep=detector)
+    return detector
+
+
+def _evict(keep=None):
+    """
+    메모리 상한 초과 시 LRU 순서로 모델 제거
+
+    Args:
+        keep: 방금 로드한 모델 (제거 대상에서 제외)
+    """
+    limit = MODEL_MEMORY_LIMIT_MB * 1024 * 1024
+    default = ai_model_service.get_default_detector()
+    in_use = _models_in_use()
+
+    evicted = []
+    with _lock:
+        used = _memory_used()
+        candidates = sorted(
+            (d for d in _detectors.values() if d is not default and d is not keep and d.name not in in_use),
+            key=lambda d: d.last_used
+        )
+        for detector in candidates:
+            if used <= limit:
+                break
+            del _detectors[detector.name]
+            used -= detector.memory_bytes
+            evicted.append(detector)
+
+    for detector in evicted:
+        batch_service.release(detector)
+        print(f"[ModelRegistry] 모델 제거 (LRU): {detector.name} - {detector.memory_bytes / (1024 * 1024):.1f}MB")
+    if used > limit:
+        print(f"[ModelRegistry] Warning: 제거할 수 없는 모델(기본/사용 중/방금 로드)만으로 메모리 상한 초과 "
+              f"({used / (1024 * 1024):.1f}MB > {MODEL_MEMORY_LIMIT_MB}MB)")
+
+
+# ==================================================
+# 세션별 모델 선택
+# ==================================================
+def _swap(session, detector):
+    """세션의 감지 모델 교체 (다음 프레임부터 적용)"""
+    detector.touch()
+    session.detector = detector
+    session.requested_model = None
+    print(f"[ModelRegistry] [{session.camera_id}] 감지 모델 교체: {detector.name} ({detector.input_size}x{detector.input_size})")
+
+
+def _on_loaded(session, name, future):
+    """로드 완료 콜백 (로더 스레드): 세션이 아직 이 모델을 기다리고 있으면 교체"""
+    if session.requested_model != name or session_service.get_session(session.camera_id) is not session:
+        return
+    if future.exception() is not None:
+        # 로드 실패 → 기존 모델 유지
+        session.requested_model = None
+        return
+    _swap(session, future.result())
+
+
+def select_model(session, name=None):
+    """
+    카메라 세션의 감지 모델 선택
+
+    - name이 없거나 기본 모델 이름이면 기본 모델로 복귀
+    - 로드된 모델이면 즉시 교체, 아니면 백그라운드 로드 후 교체 (그동안 기존 모델 유지)
+
+    Args:
+        session: 카메라 세션 (CameraSession)
+        name: 모델 이름
+
+    Returns:
+        {"success": bool, "camera_id": str, "model": str, "status": "active"/"loading", "message": str}
+
+    Raises:
+        KeyError: 모델 파일 없음
+    """
+    default = ai_model_service.get_default_detector()
+    if not name or name == default.name:
+        session.requested_model = None
+        session.detector = None
+        return {
+            "success": True,
+            "camera_id": session.camera_id,
+            "model": default.name,
+            "status": "active",
+            "message": "기본 모델 사용"
+        }
+
+    session.requested_model = name
+    future = load_async(name)
+
+    if future.done() and future.exception() is not None:
+        session.requested_model = None
+        return {
+            "success": False,
+            "camera_id": session.camera_id,
+            "model": name,
+            "status": "failed",
+            "message": f"{name} 모델 로드 실패: {future.exception()}"
+        }
+    if future.done():
+        _swap(session, future.result())
+        status, message = "active", f"{name} 모델로 교체"
+    else:
+        future.add_done_callback(lambda f: _on_loaded(session, name, f))
+        status, message = "loading", f"{name} 모델 로딩 중 (완료 후 교체)"
+
+    return {
+        "success": True,
+        "camera_id": session.camera_id,
+        "model": name,
+        "status": status,
+        "message": message
+    }
@@ -0,0 +1,156 @@
+"""
+Motion Service - 움직임 게이트 (정지 장면 추론 생략)
+====================================================
+축소한 흑백 프레임의 배경 차분으로 움직임을 측정해 감지 모델 실행 여부를 결정
+
+[왜 필요한가?]
+- 야간 실내 카메라는 몇 시간 동안 빈 방만 보여줌
+- 그래도 매 프레임 YOLO 추론(전처리 + 추론 + NMS)을 돌리면 카메라당 코어 1개를 계속 사용
+- 64px 흑백 배경 차분은 프레임당 수십 μs → 움직임이 있을 때만 감지 모델 실행
+
+[판정 규칙]
+1. 프레임을 MOTION_WIDTH(64px) 폭으로 축소 → 흑백 → 블러 (노이즈 제거)
+2. 누적 평균 배경과의 차이가 PIXEL_THRESHOLD 이상인 픽셀 비율 = 움직임 양
+3. 움직임 양 >= MOTION_THRESHOLD → 감지 실행
+4. 마지막 감지 후 KEEPALIVE_SECONDS가 지나면 움직임이 없어도 감지 실행 (keep-alive)
+   → 움직임 없는 화재/연기, 가만히 서 있는 사람도 주기적으로 확인
+   → TRACKER_TIMEOUT(5초)보다 짧아야 정지한 사람의 트래커가 만료되지 않음
+
+[생략된 프레임]
+- 추론 없이 직전 감지 결과를 그대로 전송 (정지 장면이므로 결과도 동일)
+- cleanup_old_trackers는 계속 호출 → 트래커 만료는 시간 기준으로 정상 진행
+- 화재/연기 지속 중이면 직전 감지 점수로 지속 시간 계속 갱신 (skip_frame)
+  → keep-alive 감지를 기다리지 않고 감지 5초 시점에 알림
+
+[설정]
+- AI_MOTION_GATE=0 으로 비활성화 (모든 프레임 감지)
+- API: GET/POST /security/motion/settings
+"""
+import os
+import time
+
+import numpy as np
+import cv2
+
+
+# ==================================================
+# 설정값 (Configuration)
+# ==================================================
+MOTION_GATE_ENABLED = os.getenv("AI_MOTION_GATE", "1") == "1"
+MOTION_WIDTH = 64              # 움직임 측정용 축소 폭 (px)
+PIXEL_THRESHOLD = 25           # 픽셀 밝기 변화 임계값 (0~255)
+MOTION_THRESHOLD = float(os.getenv("AI_MOTION_THRESHOLD", "0.01"))      # 변화 픽셀 비율 임계값 (1%)
+MAX_KEEPALIVE_SECONDS = 4.5    # keep-alive 상한 (tracker_service.TRACKER_TIMEOUT 5초보다 짧게)
+KEEPALIVE_SECONDS = min(MAX_KEEPALIVE_SECONDS, float(os.getenv("AI_MOTION_KEEPALIVE", "1.0")))  # 움직임 없어도 감지하는 주기 (초)
+BACKGROUND_ALPHA = 0.05        # 배경 누적 평균 갱신 비율 (작을수록 천천히 적응)
+
+
+# ==================================================
+# 움직임 게이트 (세션별)
+# ==================================================
+class MotionGate:
+    """
+    카메라 1대의 움직임 게이트 (배경 모델 + 감지/생략 통계)
+
+    - should_detect()는 프레임 준비 단계에서 세션당 한 번에 하나씩 호출되므로 잠금 불필요
+    """
+
+    def __init__(self):
+        self._background = None      # 누적 평균 배경 (float32, 축소 흑백)
+        self._last_detect = 0.0      # 마지막 감지 실행 시각
+        self.detected = 0            # 감지를 실행한 프레임 수
+        self.skipped = 0             # 감지를 생략한 프레임 수
+        self.last_motion = 0.0       # 마지막 프레임의 움직임 양 (변화 픽셀 비율)
+
+    def measure(self, frame):
+        """
+        움직임 양 측정 + 배경 갱신
+
+        Returns:
+            변화 픽셀 비율 (0.0~1.0, 첫 프레임/해상도 변경 시 1.0)
+        """
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (MOTION_WIDTH, max(1, h * MOTION_WIDTH // w)), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray.astype(np.float32)
+            return 1.0
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        motion = np.count_nonzero(diff > PIXEL_THRESHOLD) / diff.size
+        cv2.accumulateWeighted(gray, self._background, BACKGROUND_ALPHA)
+        return motion
+
+    def should_detect(self, frame):
+        """
+        이번 프레임에 감지 모델을 실행할지 판정
+
+        Returns:
+            True: 감지 실행 (움직임 있음 / keep-alive / 게이트 비활성)
+            False: 생략 (정지 장면)
+        """
+        now = time.time()
+        if MOTION_GATE_ENABLED:
+            self.last_motion = self.measure(frame)
+            detect = self.last_motion >= MOTION_THRESHOLD or now - self._last_detect >= KEEPALIVE_SECONDS
+        else:
+            detect = True
+
+        if detect:
+            self._last_detect = now
+            self.detected += 1
+        else:
+            self.skipped += 1
+        return detect
+
+    @property
+    def skip_ratio(self):
+        total = self.detected + self.skipped
+        return self.skipped / total if total else 0.0
+
+    def get_stats(self):
+        return {
+            "detected": self.detected,
+            "skipped": self.skipped,
+            "skip_ratio": round(self.skip_ratio, 3),
+            "motion": round(self.last_motion, 4)
+        }
+
+
+# ==================================================
+# 설정 API
+# ==================================================
+def get_settings():
+    """움직임 게이트 설정"""
+    return {
+        "enabled": MOTION_GATE_ENABLED,
+        "threshold": MOTION_THRESHOLD,
+        "keepaliveSeconds": KEEPALIVE_SECONDS,
+        "width": MOTION_WIDTH
+    }
+
+
+def configure(enabled: bool = None, threshold: float = None, keepalive_seconds: float = None):
+    """
+    움직임 게이트 설정 변경 (API에서 호출)
+
+    Args:
+        enabled: 게이트 사용 여부 (False면 모든 프레임 감지)
+        threshold: 변화 픽셀 비율 임계값 (0~1)
+        keepalive_seconds: keep-alive 감지 주기 (0.1~4.5초, 트래커 만료 시간보다 짧게)
+
+    Returns:
+        현재 설정
+    """
+    global MOTION_GATE_ENABLED, MOTION_THRESHOLD, KEEPALIVE_SECONDS
+
+    if enabled is not None:
+        MOTION_GATE_ENABLED = enabled
+    if threshold is not None:
+        MOTION_THRESHOLD = max(0.0, min(1.0, threshold))
+    if keepalive_seconds is not None:
+        KEEPALIVE_SECONDS = max(0.1, min(MAX_KEEPALIVE_SECONDS, keepalive_seconds))
+
+    print(f"[Motion] 설정: 사용={MOTION_GATE_ENABLED}, 임계값 {MOTION_THRESHOLD}, keep-alive {KEEPALIVE_SECONDS}초")
+    return get_settings()
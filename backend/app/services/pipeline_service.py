@@ -0,0 +1,658 @@
+"""
+Pipeline Service - 프레임 처리 실행 계층
+========================================
+WebSocket 이벤트 루프 밖(워커 스레드 풀)에서 프레임 분석을 실행
+
+[왜 필요한가?]
+- websocket_endpoint는 async 함수 → 이벤트 루프 스레드 1개에서 동작
+- imdecode, OpenVINO 추론, Haar 얼굴 탐지, MediaPipe, JPEG 인코딩, MySQL INSERT는
+  모두 블로킹 작업 → 루프에서 직접 실행하면 다른 카메라/HTTP 요청이 전부 멈춤
+- OpenCV/OpenVINO/NumPy는 연산 중 GIL을 놓기 때문에 스레드 풀로도 코어 수만큼 확장됨
+
+[실행 모델]
+- 고정 크기 ThreadPoolExecutor (PIPELINE_WORKERS개)
+- 세션(WebSocket 연결)마다 프레임을 1개씩 await → 세션 내 처리 순서 보장
+- 여러 세션은 서로 다른 워커에서 동시에 처리됨
+
+[처리 파이프라인]
+1. decode: JPEG bytes → OpenCV BGR 이미지
+2. detect: preprocess → run_inference → postprocess
+3. track: 사람 추적 + 거수자/이상행동 판정
+4. hazard: 화재/연기 지속 시간 체크
+→ 알림(카카오)은 이벤트 루프에서 보내야 하므로 notifications 목록으로 반환
+
+[비동기 파이프라이닝]
+- prepare_frame(): decode + preprocess + 비동기 추론 시작 (워커 풀)
+- complete_frame(): 추론 완료 대기 → postprocess + track + hazard (워커 풀)
+- 세션당 최대 PIPELINE_DEPTH개 프레임이 동시에 진행
+  → 프레임 N이 추론 중일 때 N+1을 디코딩/전처리, 결과는 FIFO 순서로 완료
+
+[감지 모델 교체]
+- prepare_frame()이 사용할 Detector를 결과에 담아 complete_frame()까지 전달
+  → 세션 모델이 바뀌어도 진행 중인 프레임은 같은 모델로 후처리 (프레임 드롭 없음)
+- 입력 크기가 바뀐 첫 프레임에서 트래커 좌표를 새 크기로 변환
+
+[프레임 1회 Pose (YOLO-pose 백엔드)]
+- 추출 주기가 된 거수자가 있으면 prepare_frame()이 감지 추론과 함께 Pose 추론도 비동기로 시작
+- complete_frame()이 두 결과를 기다려 finish_frame()에 넘김 → 같은 프레임에서 트래커에 관절 반영
+
+[움직임 게이트]
+- prepare_frame()에서 디코딩 직후 움직임 판정 → 정지 장면이면 전처리/추론 생략
+- complete_frame()은 생략된 프레임에 직전 감지 결과를 돌려주고 트래커 만료만 처리
+
+[사람 추적 2단계 매칭]
+- 1차: 신뢰도 0.6 이상 사람 박스 ↔ 트래커 칼만 예측 박스 (실패 시 새 ID)
+- 2차: 신뢰도 0.1~0.6 사람 박스 ↔ 1차에서 짝 없는 트래커 (IoU만, 새 ID 없음)
+- 0.4 미만 박스는 기존 트랙을 이어갈 때만 결과에 포함
+
+[광류 전파 (감지 주기 N)]
+- 감지 사이 프레임은 추론 없이 LK 광류로 사람 박스를 이동 → 같은 track_id로 거수자 판정 계속
+- 광류 신뢰도가 떨어지면 다음 프레임은 주기와 관계없이 감지 (flow_service 참고)
+- prepare_frame()은 광류 상태를 읽기만 함 (힌트), 판정/갱신은 complete_frame()에서
+  → 광류로 준비된 프레임도 완료 시점에 재동기화 요청이 있으면 그 자리에서 감지 (detect_now)
+"""
+import os
+import time
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import cv2
+
+from app.services import ai_model_service
+from app.services import batch_service
+from app.services import motion_service
+from app.services import flow_service
+from app.services import tracker_service
+from app.services import mediapipe_service
+from app.services.database_service import save_snapshot
+
+
+# ==================================================
+# 설정값 (Configuration)
+# ==================================================
+MIN_WORKERS = 1
+MAX_WORKERS = 32
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)  # 코어 수 기준 (최대 8)
+PIPELINE_WORKERS = max(MIN_WORKERS, min(MAX_WORKERS, int(os.getenv("PIPELINE_WORKERS", DEFAULT_WORKERS))))
+
+# 세션당 동시에 진행할 프레임 수 (1 = 순차 처리, 2 = 디코딩/추론 겹치기)
+PIPELINE_DEPTH = max(1, int(os.getenv("PIPELINE_DEPTH", "2")))
+
+HAZARD_ALERT_SECONDS = 5.0   # 화재/연기 알림 기준 지속 시간 (초)
+PERSON_MIN_SCORE = 0.6       # 추적 대상 사람 최소 신뢰도
+HAZARD_MIN_SCORE = 0.5       # 화재/연기 지속 판정 최소 신뢰도
+
+
+# ==================================================
+# 워커 풀 (모듈 레벨 싱글톤)
+# ==================================================
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = 0               # 현재 풀에서 처리 중인 작업 수
+
+
+def _get_executor():
+    """워커 풀 반환 (최초 호출 시 생성)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=PIPELINE_WORKERS,
+                thread_name_prefix="pipeline"
+            )
+            print(f"[Pipeline] 워커 풀 생성: {PIPELINE_WORKERS}개")
+        return _executor
+
+
+async def run(func, *args, **kwargs):
+    """
+    블로킹 함수를 워커 풀에서 실행하고 결과를 await
+
+    Args:
+        func: 실행할 동기 함수
+        *args, **kwargs: 함수 인자
+
+    Returns:
+        func의 반환값 (예외도 그대로 전파)
+    """
+    global _in_flight
+    loop = asyncio.get_running_loop()
+    _in_flight += 1
+    try:
+        return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+    finally:
+        _in_flight -= 1
+
+
+def get_pool_size():
+    """현재 워커 수"""
+    return PIPELINE_WORKERS
+
+
+def set_pool_size(workers: int):
+    """
+    워커 수 변경
+
+    기존 풀은 진행 중인 작업을 마친 뒤 종료되고, 이후 작업부터 새 풀에서 실행
+
+    Args:
+        workers: 1~32 사이 값
+
+    Returns:
+        {"success": bool, "workers": int, "message": str}
+    """
+    global _executor, PIPELINE_WORKERS
+
+    workers = max(MIN_WORKERS, min(MAX_WORKERS, workers))
+
+    with _executor_lock:
+        old_executor = _executor
+        PIPELINE_WORKERS = workers
+        _executor = None
+
+    if old_executor is not None:
+        old_executor.shutdown(wait=False)
+
+    print(f"[Pipeline] 워커 수 변경: {workers}개")
+    return {
+        "success": True,
+        "workers": PIPELINE_WORKERS,
+        "message": f"프레임 처리 워커 {workers}개"
+    }
+
+
+def get_stats():
+    """워커 풀 상태 (모니터링용)"""
+    return {
+        "workers": PIPELINE_WORKERS,
+        "inFlight": _in_flight,
+        "cpuCount": os.cpu_count(),
+        "depth": PIPELINE_DEPTH,
+        "engine": ai_model_service.get_engine_info(),
+        "motion": motion_service.get_settings(),
+        "flow": flow_service.get_settings(),
+        "batching": batch_service.get_stats()
+    }
+
+
+# ==================================================
+# 프레임 처리 (워커 스레드에서 실행)
+# ==================================================
+def decode_frame(data):
+    """JPEG bytes → OpenCV BGR 이미지 (실패 시 None)"""
+    # Bytes -> numpy 배열 -> OpenCV 이미지
+    nparr = np.frombuffer(data, np.uint8)
+    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+    if frame is None:
+        print("Frame decode failed")
+    return frame
+
+
+def prepare_frame(data, detector=None, motion_gate=None, box_flow=None, pose=False, index=None):
+    """
+    파이프라인 앞단: decode → 움직임 판정 → preprocess → 비동기 추론 시작 (블로킹 - run()으로 호출)
+
+    Args:
+        data: JPEG bytes
+        detector: 세션 감지 모델 (없으면 기본 모델)
+        motion_gate: 세션 움직임 게이트 (없으면 항상 감지)
+        box_flow: 세션 광류 전파 상태 (없으면 항상 감지, 읽기만 함)
+        pose: 프레임 1회 Pose 추론도 같이 시작 (session.pose_frame_wanted, YOLO-pose 백엔드만)
+        index: 세션 프레임 번호 (수신 순서, 광류 감지 주기 기준)
+
+    Returns:
+        {"frame": 이미지, "detector": Detector, "inference": Future 또는 None, "pose": Future 또는 None,
+         "started_at": float, "mode": "detect" / "skip" (정지 장면) / "flow" (광류 전파), "index": int}
+        디코딩 실패 시 None
+    """
+    frame = decode_frame(data)
+    if frame is None:
+        return None
+
+    detector = detector or ai_model_service.get_default_detector()
+    detector.touch()
+
+    # 정지 장면 → 전처리/추론 생략 (keep-alive 주기마다는 감지 실행)
+    # 감지 주기 사이 → 광류로 박스만 이동
+    mode = "detect"
+    if motion_gate is not None and not motion_gate.should_detect(frame):
+        mode = "skip"
+    elif box_flow is not None and box_flow.wants_propagation(index):
+        mode = "flow"
+    if mode != "detect":
+        return {
+            "frame": frame,
+            "detector": detector,
+            "inference": None,
+            "pose": None,
+            "started_at": time.time(),
+            "mode": mode,
+            "index": index
+        }
+
+    started_at = time.time()
+    input_data = detector.preprocess(frame)
+
+    # 다중 카메라 배치 추론 (활성화 시) → 실패하면 프레임별 비동기 추론
+    inference = None
+    if batch_service.is_enabled():
+        inference = batch_service.submit(input_data, detector)
+    if inference is None:
+        inference = detector.submit_inference(input_data)
+
+    # 거수자 관절: 감지 추론과 동시에 프레임 전체 Pose 추론 (사람 수와 무관하게 1번)
+    pose_inference = mediapipe_service.submit_frame_pose(frame) if pose else None
+
+    return {
+        "frame": frame,
+        "detector": detector,  # 모델이 교체되어도 이 프레임은 같은 모델로 후처리
+        "input": input_data,   # 공유 메모리 입력 → 추론 완료까지 참조 유지
+        "inference": inference,
+        "pose": pose_inference,
+        "started_at": started_at,
+        "mode": mode,
+        "index": index
+    }
+
+
+async def complete_frame(session, prepared, face_whitelist):
+    """
+    파이프라인 뒷단: 추론 완료 대기 → postprocess + track + hazard
+
+    세션의 프레임은 prepare 순서대로 이 함수를 거쳐야 함 (트래커 상태 순서 보장)
+    """
+    if prepared["mode"] == "skip":
+        # 추론 없음 → 워커 풀을 거치지 않고 바로 처리 (트래커 정리만 수행)
+        # 화재/연기 지속 중이면 알림 스냅샷(파일/DB 저장)이 생길 수 있으므로 워커 풀에서
+        if hazard_active(session):
+            return await run(skip_frame, session, prepared["detector"], prepared["frame"])
+        return skip_frame(session, prepared["detector"])
+    if prepared["mode"] == "flow":
+        # 준비 이후 앞 프레임이 재동기화를 요청했으면 (박스를 놓침) 전파하지 않고 이 프레임에서 감지
+        if session.box_flow.should_propagate(prepared["index"]):
+            return await run(propagate_frame, session, prepared["frame"], prepared["started_at"], face_whitelist,
+                             prepared["detector"])
+        return await run(detect_now, session, prepared, face_whitelist)
+
+    outputs = None
+    if prepared["inference"] is not None:
+        outputs = await asyncio.wrap_future(prepared["inference"])
+    pose_outputs = None
+    if prepared.get("pose") is not None:
+        try:
+            pose_outputs = await asyncio.wrap_future(prepared["pose"])
+        except Exception as e:
+            print(f"[Pipeline] Pose 추론 오류: {e}")
+    return await run(finish_frame, session, prepared["frame"], outputs, prepared["started_at"], face_whitelist,
+                     prepared["detector"], pose_outputs, prepared.get("index"))
+
+
+def detect_now(session, prepared, face_whitelist):
+    """
+    광류로 준비된 프레임을 완료 단계에서 감지로 처리 (블로킹 - run()으로 호출)
+
+    - 준비 단계의 힌트가 늦은 경우 (앞 프레임이 재동기화 요청 / 추적 박스 없음)
+    - 추론을 미리 시작하지 않았으므로 이 프레임만 파이프라이닝 없이 동기 추론
+    """
+    detector = prepared["detector"]
+    inference_start = time.time()
+    outputs = detector.run_inference(detector.preprocess(prepared["frame"]))
+    return finish_frame(session, prepared["frame"], outputs, inference_start, face_whitelist, detector,
+                        index=prepared.get("index"))
+
+
+def finish_frame(session, frame, outputs, inference_start, face_whitelist, detector=None, pose_outputs=None,
+                 index=None):
+    """
+    후처리 → 추적 → 위험 상태 갱신 (블로킹 - run()으로 호출)
+
+    - pose_outputs: prepare_frame()에서 같이 시작한 프레임 1회 Pose 추론 결과 (없으면 None)
+    - index: 세션 프레임 번호 (광류 감지 주기 기준, 없으면 다음 프레임도 감지)
+
+    Returns:
+        {
+            "predictions": [...],        # 감지 결과 (프론트엔드 전송용)
+            "alerts": [...],             # 경보 목록
+            "notifications": [...],      # 이벤트 루프에서 보낼 카카오 알림
+            "inference_time": float,     # 감지 단계 소요 시간 (ms)
+            "model": str,                # 사용한 감지 모델 이름
+            "input_size": int,           # 박스 좌표 기준 입력 크기 (320 / 640)
+            "skipped": False,            # 움직임 게이트로 감지를 생략한 프레임인지 (skip_frame)
+            "propagated": False          # 광류로 박스만 옮긴 프레임인지 (propagate_frame)
+        }
+    """
+    detector = detector or ai_model_service.get_default_detector()
+    _sync_input_size(session, detector.input_size)
+
+    # 낮은 신뢰도 박스는 트래커 2차 매칭에만 사용
+    predictions, low_predictions = detector.postprocess_with_low(outputs)
+
+    inference_time = (time.time() - inference_start) * 1000
+
+    alerts = []
+    notifications = []
+
+    detected_hazards = _track_predictions(session, predictions, frame, face_whitelist, alerts, notifications,
+                                          low_predictions, pose_outputs)
+
+    # 광류 전파 기준점 갱신 (이번에 감지된 사람 박스)
+    if flow_service.is_enabled():
+        session.box_flow.reseed(
+            flow_service.to_gray(frame, detector.input_size),
+            session.trackers,
+            [pred["track_id"] for pred in predictions if "track_id" in pred],
+            index
+        )
+
+    # 오래된 트래커 정리
+    tracker_service.cleanup_old_trackers(session)
+
+    _update_hazards(session.hazard_states, detected_hazards, frame, notifications)
+
+    # 움직임이 없는 다음 프레임들에 그대로 보낼 결과 (화재/연기 점수는 지속 시간 계산용)
+    session.last_predictions = predictions
+    session.last_hazards = detected_hazards
+
+    return {
+        "predictions": predictions,
+        "alerts": alerts,
+        "notifications": notifications,
+        "inference_time": inference_time,
+        "model": detector.name,
+        "input_size": detector.input_size,
+        "skipped": False,
+        "propagated": False
+    }
+
+
+def skip_frame(session, detector, frame=None):
+    """
+    움직임 게이트가 감지를 생략한 프레임 처리
+
+    - 직전 감지 결과를 재사용 (만료된 트래커의 사람 박스는 제외)
+    - 트래커는 계속 시간 기준으로 만료 (last_seen은 감지된 프레임에서만 갱신)
+    - 화재/연기 지속 중이면 직전 감지 점수로 지속 시간 갱신 (장면이 그대로 → 같은 상태)
+      → keep-alive 감지까지 기다리지 않고 5초 시점에 알림 (frame: 알림 스냅샷용)
+    - 사람 알림/스냅샷 없음
+
+    Returns:
+        finish_frame()과 같은 결과 딕셔너리 (skipped=True)
+    """
+    tracker_service.cleanup_old_trackers(session)
+
+    predictions = [
+        pred for pred in session.last_predictions
+        if pred.get("track_id") is None or pred["track_id"] in session.trackers
+    ]
+    session.last_predictions = predictions
+
+    notifications = []
+    if frame is not None and hazard_active(session):
+        _update_hazards(session.hazard_states, session.last_hazards, frame, notifications)
+
+    return {
+        "predictions": predictions,
+        "alerts": [],
+        "notifications": notifications,
+        "inference_time": 0.0,
+        "model": detector.name,
+        "input_size": session.input_size or detector.input_size,
+        "skipped": True,
+        "propagated": False
+    }
+
+
+def propagate_frame(session, frame, inference_start, face_whitelist, detector):
+    """
+    감지 주기 사이 프레임 처리 (블로킹 - run()으로 호출)
+
+    - 직전 결과의 사람 박스를 광류 이동량만큼 옮김 (신뢰도 낮은 박스는 제외 → 다음 프레임 감지)
+    - 옮긴 박스로 check_loitering 호출 → 체류 시간/캡처/이상행동 판정이 끊기지 않음
+    - 광류를 놓친 트래커는 칼만 예측 박스로 결과에 유지 (직전 배회자 플래그 그대로, 트래커 갱신 없음)
+      → 광류가 resync를 요청하므로 다음 감지 프레임에서 위치 보정, 트래커에서 사라진 사람만 제외
+    - 화재/연기는 직전 결과를 그대로 표시 (지속 시간/알림은 감지 프레임에서만 갱신)
+
+    Returns:
+        finish_frame()과 같은 결과 딕셔너리 (propagated=True)
+    """
+    size = session.input_size or detector.input_size
+    shifts = session.box_flow.propagate(flow_service.to_gray(frame, size))
+
+    people = []
+    predictions = []
+    held = []
+    for pred in session.last_predictions:
+        track_id = pred.get("track_id")
+        if track_id is None:
+            predictions.append(pred)
+            continue
+        if track_id not in session.trackers:
+            continue
+        if track_id not in shifts:
+            held.append(pred)
+            continue
+        dx, dy = shifts[track_id]
+        x1, y1, x2, y2 = pred["box"]
+        moved = {
+            "box": [int(round(x1 + dx)), int(round(y1 + dy)), int(round(x2 + dx)), int(round(y2 + dy))],
+            "label": pred["label"],
+            "score": pred["score"],
+            "track_id": track_id,   # 매칭 없이 같은 트래커로 갱신
+            "propagated": True
+        }
+        people.append(moved)
+        predictions.append(moved)
+
+    alerts = []
+    notifications = []
+    _track_predictions(session, people, frame, face_whitelist, alerts, notifications)
+    tracker_service.cleanup_old_trackers(session)
+
+    # 광류를 놓친 사람: 측정값이 없으므로 트래커는 건드리지 않고 예측 위치만 표시
+    held = [pred for pred in held if pred["track_id"] in session.trackers]
+    if held:
+        store = session.trackers
+        boxes = tracker_service.predicted_boxes(store, [store.slot(pred["track_id"]) for pred in held], time.time())
+        for pred, box in zip(held, boxes):
+            predictions.append({**pred, "box": [int(round(v)) for v in box], "propagated": True})
+
+    session.last_predictions = predictions
+
+    return {
+        "predictions": predictions,
+        "alerts": alerts,
+        "notifications": notifications,
+        "inference_time": (time.time() - inference_start) * 1000,
+        "model": detector.name,
+        "input_size": size,
+        "skipped": False,
+        "propagated": True
+    }
+
+
+def _sync_input_size(session, input_size):
+    """감지 모델 교체로 입력 크기가 바뀌면 트래커 좌표를 새 크기로 변환"""
+    if session.input_size is not None and session.input_size != input_size:
+        tracker_service.rescale_trackers(session, input_size / session.input_size)
+        print(f"[Pipeline] [{session.camera_id}] 입력 크기 변경: {session.input_size} → {input_size}, 트래커 좌표 변환")
+    session.input_size = input_size
+
+
+def _track_predictions(session, predictions, frame, face_whitelist, alerts, notifications, low_predictions=(),
+                       pose_outputs=None):
+    """
+    클래스별 조건 분기 처리 (사람 추적 / 화재·연기 경보)
+
+    Args:
+        predictions: 감지 결과 (2차 매칭된 낮은 신뢰도 사람 박스가 뒤에 추가됨)
+        low_predictions: 낮은 신뢰도 감지 결과 (트래커 2차 매칭에만 사용)
+
+    Returns:
+        이번 프레임의 위험 요소 {label: max_score}
+    """
+    detected_hazards = {}
+    now = time.time()
+
+    # 끝난 얼굴 검사/관절 추출 결과 반영 (이전 프레임들에서 워커에 제출한 작업)
+    tracker_service.apply_face_checks(session)
+    tracker_service.apply_pose_results(session)
+
+    # 사람 박스 전체를 한 번에 매칭 → track_id 추가 (프론트엔드에서 구분)
+    # (1:1 할당, 광류 전파 박스는 이미 track_id가 정해져 있음)
+    people = [pred for pred in predictions if pred['label'] == 'person' and pred.get("track_id") is None]
+    confident = [pred for pred in people if pred['score'] >= PERSON_MIN_SCORE]
+    track_ids = tracker_service.match_detections(session, [pred['box'] for pred in confident], now, allocate=False)
+    for pred, track_id in zip(confident, track_ids):
+        pred["track_id"] = track_id
+
+    # 2차 매칭: 신뢰도 낮은 사람 박스는 짝 없는 기존 트래커를 이어갈 때만 사용
+    uncertain = [pred for pred in people if pred['score'] < PERSON_MIN_SCORE]
+    low_people = [pred for pred in low_predictions if pred['label'] == 'person']
+    used = {pred["track_id"] for pred in predictions if pred.get("track_id") is not None}
+    low_ids = tracker_service.match_low_score(session, [pred['box'] for pred in uncertain + low_people], used, now)
+    for index, (pred, track_id) in enumerate(zip(uncertain + low_people, low_ids)):
+        if track_id is None:
+            continue
+        pred["track_id"] = track_id
+        if index >= len(uncertain):
+            predictions.append(pred)   # 트랙을 이어간 낮은 신뢰도 박스도 결과에 포함
+
+    # 3차: 위치로 못 이은 사람 → 놓친 트래커/갤러리와 외형 비교, 그래도 없으면 새 ID
+    unmatched = [pred for pred in confident if pred["track_id"] is None]
+    if unmatched:
+        used = {pred["track_id"] for pred in predictions if pred.get("track_id") is not None}
+        relinked = tracker_service.relink_lost_tracks(session, frame, [pred['box'] for pred in unmatched], used, now)
+        for pred, track_id in zip(unmatched, relinked):
+            pred["track_id"] = track_id if track_id is not None else session.allocate_track_id()
+
+    # 기존 트래커 위치/칼만 상태 일괄 갱신 (새 ID는 check_loitering()에서 생성)
+    tracked = [pred for pred in predictions if pred['label'] == 'person' and pred.get("track_id") is not None]
+    tracker_service.update_tracks(session, [pred["track_id"] for pred in tracked],
+                                  [pred["box"] for pred in tracked], now)
+    tracker_service.refresh_embeddings(session, frame, [pred["track_id"] for pred in tracked],
+                                       [pred["box"] for pred in tracked], now)
+
+    # 프레임 1회 Pose 백엔드(YOLO-pose): 같이 추론한 관절을 거수자에게 바로 반영
+    tracker_service.apply_frame_pose(session, [pred["track_id"] for pred in tracked],
+                                     [pred["box"] for pred in tracked], pose_outputs, now)
+
+    # 이번 프레임에 관절을 추출할 거수자 선택 (트래커별 주기 + 프레임당 시간 예산, 추출은 워커에서)
+    pose_tracks = tracker_service.schedule_pose(session, [pred["track_id"] for pred in tracked], now)
+
+    for pred in predictions:
+        label = pred['label']
+        score = pred['score']
+        box = pred['box']
+
+        if label == 'person' and pred.get("track_id") is not None:
+            # 사람만 얼굴 인식 + 배회자 추적 + 이상행동 감지
+            track_id = pred["track_id"]
+            loiter_result = tracker_service.check_loitering(
+                session, track_id, box, frame, score, face_whitelist, run_pose=track_id in pose_tracks
+            )
+
+            # 배회자이면 관절 정보 및 배회자 플래그 추가
+            if loiter_result:
+                pred["is_loitering"] = True  # 배회자 플래그
+
+                if loiter_result.get("keypoints"):
+                    pred["keypoints"] = loiter_result["keypoints"]
+                    # 관절을 추출한 뒤 지난 시간 (0 = 이번 프레임에 추출, 클수록 오래된 관절)
+                    pred["keypoints_age_ms"] = round((loiter_result.get("keypoints_age") or 0.0) * 1000)
+
+                if loiter_result["type"] == "abnormal":
+                    alerts.append({
+                        "type": "abnormal",
+                        "track_id": track_id,
+                        "behaviors": loiter_result["behaviors"],
+                        "box": box
+                    })
+                    notifications.append(("loitering", track_id, loiter_result.get("elapsed", 0.0)))
+
+                elif loiter_result["type"] == "loitering":
+                    alerts.append({
+                        "type": "loitering",
+                        "track_id": track_id,
+                        "box": box
+                    })
+                    notifications.append(("loitering", track_id, loiter_result.get("elapsed", 0.0)))
+            else:
+                pred["is_loitering"] = False  # 일반인
+        elif label in ['fire', 'smoke']:
+            # 화재/연기는 즉시 경보
+            print(f"[DANGER] 위험 감지: {label} (Score: {score:.2f})")
+            alerts.append({
+                "type": label,
+                "box": box,
+                "score": score
+            })
+
+            # 지속적인 화재 감지를 위해 기록 (신뢰도 50% 이상)
+            # [학습 포인트: 오탐 방지]
+            # - 신뢰도(score)가 0.5(50%) 이상인 경우만 위험 상황으로 간주합니다.
+            # - 너무 낮은 신뢰도는 쓰레기통, 노란 옷 등을 불로 착각할 수 있기 때문입니다.
+            if score >= HAZARD_MIN_SCORE:
+                if label not in detected_hazards or score > detected_hazards[label]:
+                    detected_hazards[label] = score
+
+    # 화이트리스트가 아닌 사람 얼굴 재검사 (N 프레임마다, 프레임당 시간 예산 안에서 스레드풀에 제출)
+    tracker_service.schedule_face_rechecks(session, frame, [pred["track_id"] for pred in tracked],
+                                           [pred["box"] for pred in tracked], face_whitelist)
+
+    return detected_hazards
+
+
+def hazard_active(session):
+    """화재/연기 지속 시간을 재는 중인지 (감지 시작 후 상황 종료 전)"""
+    return any(state["start_time"] is not None for state in session.hazard_states.values())
+
+
+def _update_hazards(hazard_states, detected_hazards, frame, notifications):
+    """
+    화재/연기 지속 시간 체크 (5초 이상)
+
+    [학습 포인트: 지속 시간 체크 로직]
+    1. 이번 프레임에 감지됨 -> 시작 시간이 없으면 현재 시간 기록 (start_time = now)
+    2. 이번 프레임에 감지됨 -> 시작 시간이 있으면 경과 시간(elapsed) 계산
+    3. 경과 시간이 5초 넘음 + 아직 알림 안 보냄 -> 카카오 알림 전송!
+    4. 감지 안 됨 -> 시작 시간 초기화 (가짜 화재였거나 상황 종료)
+    """
+    now = time.time()
+    for h_type in ["fire", "smoke"]:
+        if h_type in detected_hazards:
+            # 처음 감지된 경우 시간 기록
+            if hazard_states[h_type]["start_time"] is None:
+                hazard_states[h_type]["start_time"] = now
+                print(f"[Hazard] {h_type} 감지 시작... (Score: {detected_hazards[h_type]:.2f})")
+
+            # 지속 시간 계산
+            elapsed_hazard = now - hazard_states[h_type]["start_time"]
+
+            # 5초 이상이고 아직 알림 안 보냈으면 전송
+            if elapsed_hazard >= HAZARD_ALERT_SECONDS and not hazard_states[h_type]["notified"]:
+                print(f"[ALERT] {h_type} 5초 이상 지속됨! 카카오 알림 전송")
+                notifications.append(("hazard", h_type, detected_hazards[h_type], elapsed_hazard))
+                hazard_states[h_type]["notified"] = True
+
+                # 스냅샷 저장 (화재)
+                try:
+                    save_snapshot(
+                        frame,
+                        detected_hazards[h_type],
+                        [0, 0, 0, 0],  # 박스 정보는 임의로 처리 (전체 화면 위험)
+                        stay_duration=elapsed_hazard,
+                        is_loitering=True  # 위험 상황으로 저장
+                    )
+                except Exception as e:
+                    print(f"스냅샷 저장 실패: {e}")
+
+        else:
+            # 감지 안 됨 -> 상태 초기화
+            if hazard_states[h_type]["start_time"] is not None:
+                print(f"[Hazard] {h_type} 상황 종료.")
+            hazard_states[h_type]["start_time"] = None
+            hazard_states[h_type]["notified"] = False
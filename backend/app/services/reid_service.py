@@ -0,0 +1,199 @@
+"""
+ReID Service - 외형 임베딩 + 놓친 트래커 갤러리 (가려진 뒤 ID 재연결)
+======================================================================
+사람 박스의 색 히스토그램을 외형 임베딩으로 사용해, 잠깐 사라졌다 나타난 사람에게
+이전 track_id와 상태(체류 시작 시각, 화이트리스트, 캡처 횟수)를 다시 연결
+
+[왜 필요한가?]
+- 가구 뒤로 TRACKER_TIMEOUT(5초)보다 오래 가려지거나 IoU/거리 범위 밖으로 벗어나면 새 track_id 발급
+  → 체류 타이머 초기화(거수자 판정 지연), 얼굴 재검사, 캡처 3장 + DB 저장이 다시 발생
+- 위치로 못 잇는 경우만 외형으로 한 번 더 확인
+
+[임베딩]
+- 박스를 상체/하체로 나눠 HSV 색 히스토그램 (H 16칸 x S 4칸) → 제곱근 → L2 정규화
+  → 두 임베딩의 내적 = Bhattacharyya 계수 (0~1, 같은 옷이면 1에 가까움)
+- 크롭을 32x64로 축소한 뒤 계산 → 사람 1명당 수십 μs
+- 트래커마다 REID_REFRESH_SECONDS 간격으로 지수 이동 평균 갱신 (TrackStore.embedding)
+
+[갤러리]
+- 만료된 트래커의 상태 + 임베딩을 최근 REID_GALLERY_SIZE개만 보관 (가득 차면 가장 오래된 항목 교체)
+- REID_MAX_AGE초가 지난 항목은 매칭 후보에서 제외
+- 매칭: 새 ID가 될 감지 x (아직 살아 있지만 놓친 트래커 + 갤러리) 유사도 행렬 → 1:1 할당
+
+[설정]
+- AI_REID=0 으로 비활성화
+- AI_REID_MIN_SIMILARITY: 재연결 최소 유사도 (기본 0.9)
+"""
+import os
+
+import numpy as np
+import cv2
+
+
+# ==================================================
+# 설정값 (Configuration)
+# ==================================================
+REID_ENABLED = os.getenv("AI_REID", "1") == "1"
+REID_MIN_SIMILARITY = float(os.getenv("AI_REID_MIN_SIMILARITY", "0.9"))  # 재연결 최소 유사도 (0~1)
+REID_GALLERY_SIZE = 32         # 세션당 보관하는 놓친 트래커 수
+REID_MAX_AGE = 30.0            # 갤러리 항목 유효 시간 (초)
+REID_MIN_LOST_SECONDS = 0.5    # 살아 있는 트래커를 재연결 후보로 보는 최소 미검출 시간 (초)
+REID_REFRESH_SECONDS = 0.5     # 트래커 임베딩 갱신 주기 (초)
+REID_MOMENTUM = 0.8            # 임베딩 지수 이동 평균 비율 (기존 임베딩 비중)
+
+HUE_BINS = 16
+SATURATION_BINS = 4
+CROP_SIZE = (32, 64)           # 히스토그램 계산용 크롭 크기 (w, h)
+BOX_MARGIN = 0.15              # 박스 좌우 여백 제외 비율 (배경 섞임 감소)
+EMBEDDING_DIM = 2 * HUE_BINS * SATURATION_BINS   # 상체 + 하체
+
+
+# ==================================================
+# 외형 임베딩
+# ==================================================
+def is_enabled():
+    return REID_ENABLED
+
+
+def extract_embeddings(frame, boxes, input_size):
+    """
+    사람 박스들의 외형 임베딩
+
+    Args:
+        frame: 원본 프레임 (BGR)
+        boxes: 모델 입력 좌표 박스 리스트 [[x1, y1, x2, y2], ...]
+        input_size: 박스 좌표의 기준 모델 입력 크기
+
+    Returns:
+        (임베딩 (N, EMBEDDING_DIM) float32, 유효 여부 (N,) bool)
+        → 프레임 밖/너무 작은 박스는 유효하지 않음 (임베딩 0)
+    """
+    embeddings = np.zeros((len(boxes), EMBEDDING_DIM), dtype=np.float32)
+    valid = np.zeros(len(boxes), dtype=bool)
+    if frame is None or not len(boxes):
+        return embeddings, valid
+
+    h, w = frame.shape[:2]
+    scale_x, scale_y = w / input_size, h / input_size
+    for index, (x1, y1, x2, y2) in enumerate(boxes):
+        margin = (x2 - x1) * BOX_MARGIN
+        left, right = int(max(0, (x1 + margin) * scale_x)), int(min(w, (x2 - margin) * scale_x))
+        top, bottom = int(max(0, y1 * scale_y)), int(min(h, y2 * scale_y))
+        if right - left < 4 or bottom - top < 8:
+            continue
+
+        crop = cv2.resize(frame[top:bottom, left:right], CROP_SIZE, interpolation=cv2.INTER_AREA)
+        hsv = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
+        half = CROP_SIZE[1] // 2
+        parts = [
+            cv2.calcHist([part], [0, 1], None, [HUE_BINS, SATURATION_BINS], [0, 180, 0, 256]).ravel()
+            for part in (hsv[:half], hsv[half:])
+        ]
+        # 상체/하체 각각 정규화 → 제곱근 → 전체 L2 정규화 (내적 = Bhattacharyya 계수 평균)
+        vector = np.sqrt(np.concatenate([part / max(part.sum(), 1.0) for part in parts]))
+        embeddings[index] = vector / np.sqrt(2)
+        valid[index] = True
+    return embeddings, valid
+
+
+def blend_embeddings(old, new, fresh):
+    """
+    트래커 임베딩 갱신 (지수 이동 평균 후 다시 L2 정규화)
+
+    Args:
+        old: 기존 임베딩 (N, D)
+        new: 이번 임베딩 (N, D)
+        fresh: 기존 임베딩이 없는 행 (N,) bool → 이번 임베딩 그대로 사용
+    """
+    blended = np.where(fresh[:, None], new, REID_MOMENTUM * old + (1 - REID_MOMENTUM) * new)
+    norms = np.linalg.norm(blended, axis=1, keepdims=True)
+    return blended / np.maximum(norms, 1e-6)
+
+
+# ==================================================
+# 놓친 트래커 갤러리 (세션별)
+# ==================================================
+class LostTrackGallery:
+    """
+    최근 만료된 트래커 (상태 레코드 + 임베딩), 크기 고정
+
+    - 레코드 = TrackStore.export() 결과 (track_id, start_time, 화이트리스트, 캡처 상태 ...)
+    - 세션의 프레임은 한 번에 하나씩 처리되므로 잠금 없음
+    """
+
+    def __init__(self, size=REID_GALLERY_SIZE):
+        self.embeddings = np.zeros((size, EMBEDDING_DIM), dtype=np.float32)
+        self.lost_at = np.zeros(size, dtype=np.float64)
+        self.records = [None] * size
+        self.added = 0          # 갤러리에 들어간 트래커 수
+        self.relinked = 0       # 재연결된 트래커 수 (갤러리 + 살아 있는 트래커)
+
+    def add(self, record, embedding, now):
+        """만료된 트래커 보관 (빈 칸, 없으면 가장 오래된 항목 교체)"""
+        empty = [index for index, item in enumerate(self.records) if item is None]
+        index = empty[0] if empty else int(np.argmin(self.lost_at))
+        self.records[index] = record
+        self.embeddings[index] = embedding
+        self.lost_at[index] = now
+        self.added += 1
+
+    def candidates(self, now):
+        """매칭 후보 인덱스 배열 (REID_MAX_AGE 이내)"""
+        occupied = np.array([item is not None for item in self.records])
+        return np.flatnonzero(occupied & (now - self.lost_at <= REID_MAX_AGE))
+
+    def pop(self, index):
+        """재연결된 항목 꺼내기"""
+        record = self.records[index]
+        self.records[index] = None
+        self.relinked += 1
+        return record
+
+    def clear(self):
+        self.records = [None] * len(self.records)
+
+    def __len__(self):
+        return sum(item is not None for item in self.records)
+
+    def get_stats(self):
+        return {
+            "lost": len(self),
+            "added": self.added,
+            "relinked": self.relinked
+        }
+
+
+# ==================================================
+# 설정 API
+# ==================================================
+def get_settings():
+    """외형 재연결 설정"""
+    return {
+        "enabled": REID_ENABLED,
+        "minSimilarity": REID_MIN_SIMILARITY,
+        "gallerySize": REID_GALLERY_SIZE,
+        "maxAgeSeconds": REID_MAX_AGE,
+        "embeddingDim": EMBEDDING_DIM
+    }
+
+
+def configure(enabled: bool = None, min_similarity: float = None):
+    """
+    외형 재연결 설정 변경 (API에서 호출)
+
+    Args:
+        enabled: 재연결 사용 여부
+        min_similarity: 재연결 최소 유사도 (0.5~1.0, 낮을수록 다른 사람을 잘못 이을 위험)
+
+    Returns:
+        현재 설정
+    """
+    global REID_ENABLED, REID_MIN_SIMILARITY
+
+    if enabled is not None:
+        REID_ENABLED = enabled
+    if min_similarity is not None:
+        REID_MIN_SIMILARITY = max(0.5, min(1.0, min_similarity))
+
+    print(f"[ReID] 설정: 사용={REID_ENABLED}, 최소 유사도 {REID_MIN_SIMILARITY}")
+    return get_settings()
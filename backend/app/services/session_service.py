@@ -0,0 +1,320 @@
+"""
+Session Service - 카메라별 분석 상태 관리
+==========================================
+카메라(WebSocket 연결) 1대마다 독립적인 추적/위험 감지 상태를 보관
+
+[왜 필요한가?]
+- 트래커 테이블, ID 카운터, MediaPipe 프레임 카운터가 모듈 전역이면
+  카메라 A의 연결 종료가 카메라 B의 트래커까지 지워버림
+- 카메라마다 CameraSession 1개 → 여러 카메라를 한 프로세스에서 동시에 처리
+
+[세션 수명]
+- WebSocket 연결 시 create_session() → 연결 종료 시 close_session()
+- camera_id를 지정하면 이름으로 조회 가능 (같은 이름이 이미 연결 중이면 번호 추가)
+- 조회/정리 모두 딕셔너리 기반 O(1)
+
+[프레임 수신 (latest-frame-wins)]
+- 수신 태스크는 프레임을 LatestFrameSlot에 넣기만 함 (디코딩 X)
+- 처리 루프가 아직 이전 프레임을 분석 중이면 새 프레임이 기존 프레임을 덮어씀
+- 덮어쓴 프레임은 dropped로 집계 → 과부하에서도 지연은 추론 1회 시간 이내로 유지
+"""
+import time
+import asyncio
+import itertools
+import threading
+from collections import OrderedDict
+
+from app.services.motion_service import MotionGate
+from app.services.flow_service import BoxFlow
+from app.services.track_store_service import TrackStore
+from app.services.reid_service import LostTrackGallery
+from app.services import mediapipe_service
+
+
+# ==================================================
+# 설정값 (Configuration)
+# ==================================================
+WHITELIST_CACHE_SIZE = 256   # 세션당 얼굴 검사 결과 캐시 크기 (track_id 기준)
+
+# 세션 고유 번호 (camera_id는 세션이 끝나면 재사용되고 track_id는 세션마다 0부터 → 관절 추출 인스턴스 키에 사용)
+_session_tokens = itertools.count(1)
+
+
+# ==================================================
+# 최신 프레임 슬롯
+# ==================================================
+class LatestFrameSlot:
+    """
+    최신 프레임 1장만 보관하는 수신 슬롯
+
+    - put(): 수신 태스크가 호출 (처리 안 된 프레임이 있으면 버리고 교체)
+    - get(): 처리 루프가 호출 (새 프레임이 올 때까지 대기)
+    - 둘 다 이벤트 루프 스레드에서만 호출되므로 잠금 불필요
+    """
+
+    def __init__(self):
+        self._data = None            # 아직 처리 안 된 최신 프레임 (JPEG bytes)
+        self._received_at = 0.0      # 최신 프레임 수신 시각
+        self._event = asyncio.Event()
+        self.closed = False
+        self.received = 0            # 수신한 프레임 수
+        self.dropped = 0             # 처리 전에 덮어써진 프레임 수
+
+    def put(self, data):
+        """새 프레임 저장 (이전 프레임이 남아 있으면 버림)"""
+        if self._data is not None:
+            self.dropped += 1
+        self._data = data
+        self._received_at = time.time()
+        self.received += 1
+        self._event.set()
+
+    async def get(self):
+        """
+        최신 프레임 꺼내기 (없으면 대기)
+
+        Returns:
+            (data, received_at) 또는 슬롯이 닫혔으면 None
+        """
+        while self._data is None:
+            if self.closed:
+                return None
+            self._event.clear()
+            await self._event.wait()
+
+        data, received_at = self._data, self._received_at
+        self._data = None
+        return data, received_at
+
+    @property
+    def pending(self):
+        """아직 꺼내가지 않은 프레임 수 (0 또는 1)"""
+        return 0 if self._data is None else 1
+
+    @property
+    def consumed(self):
+        """서버가 소비한 누적 프레임 수 (처리를 위해 꺼냄 + 드롭)"""
+        return self.received - self.pending
+
+    def close(self):
+        """수신 종료 (대기 중인 get()을 깨움)"""
+        self.closed = True
+        self._event.set()
+
+
+# ==================================================
+# 카메라 세션
+# ==================================================
+class CameraSession:
+    """카메라 1대의 분석 상태 (트래커, ID 할당, 위험 상태, 포즈 스케줄링)"""
+
+    def __init__(self, camera_id: str):
+        self.camera_id = camera_id
+        self.created_at = time.time()
+        self.token = next(_session_tokens)
+
+        # 트래커 테이블: TrackStore (track_id → 슬롯, 필드별 numpy 배열)
+        self.trackers = TrackStore()
+
+        # 다음에 할당할 트래커 ID (자동 증가, 세션 내에서만 고유)
+        self.next_track_id = 0
+
+        # 화재/연기 지속 시간 상태 (5초 이상 지속 시 알림)
+        self.hazard_states = {
+            "fire": {"start_time": None, "notified": False},
+            "smoke": {"start_time": None, "notified": False}
+        }
+
+        # 관절 추출 시간 예산 (ms, 토큰 버킷) + 추출/예산 부족으로 미룬 횟수 (tracker_service.schedule_pose)
+        self.pose_credit = 0.0
+        self.pose_runs = 0
+        self.pose_deferred = 0
+
+        # 진행 중인 관절 추출: { track_id: (Future, 제출 프레임 시각) } + 워커 결과의 이상행동 { track_id: [행동] }
+        self.pose_jobs = {}
+        self.pose_events = {}
+
+        # 프레임 1회 Pose 백엔드: 다음 프레임에 Pose 추론 필요 여부 (추출 주기가 된 거수자가 있음)
+        self.pose_frame_wanted = False
+
+        # 얼굴 검사 결과 캐시: { track_id: (is_whitelisted, name) }
+        # 트래커가 만료되어도 일정 개수까지 유지 (같은 ID 재검사 방지)
+        self.whitelist_cache = OrderedDict()
+
+        # 진행 중인 얼굴 검사: { track_id: (Future, 첫 등장 검사 여부) } + 재검사 시간 예산 (ms, 토큰 버킷)
+        self.face_checks = {}
+        self.face_checks_submitted = 0
+        self.face_check_credit = 0.0
+        self.face_check_hits = 0        # 화이트리스트로 확인된 검사 수
+        self.face_checks_skipped = 0    # 머리 영역 품질이 낮아 건너뛴 검사 수
+
+        # 첫 얼굴 검사 후보: { track_id: (최고 품질, 머리 영역 크롭, 비교한 프레임 수) }
+        self.face_candidates = {}
+
+        # 감지 모델 (None = 기본 모델) / 로딩 중인 요청 모델 이름
+        # - 처리 루프가 프레임마다 detector를 한 번 읽으므로 교체는 프레임 사이에서만 일어남
+        # - input_size: 트래커 좌표의 기준 입력 크기 (모델 교체 시 트래커 좌표 변환)
+        self.detector = None
+        self.requested_model = None
+        self.input_size = None
+
+        # 움직임 게이트 (정지 장면이면 감지 생략) + 생략 프레임에 보낼 직전 감지 결과 / 직전 화재·연기 점수
+        self.motion_gate = MotionGate()
+        self.last_predictions = []
+        self.last_hazards = {}
+
+        # 광류 전파 상태 (감지 주기 사이 프레임의 박스 이동)
+        self.box_flow = BoxFlow()
+
+        # 최근 만료된 트래커 (외형으로 같은 ID 재연결)
+        self.lost_tracks = LostTrackGallery()
+
+        # 프레임 수신 슬롯 + 처리 통계
+        self.frame_slot = LatestFrameSlot()
+        self.processed_frames = 0
+        self.last_latency_ms = 0.0   # 수신 → 결과 전송까지 걸린 시간
+
+    def allocate_track_id(self):
+        """새 트래커 ID 발급"""
+        track_id = self.next_track_id
+        self.next_track_id += 1
+        return track_id
+
+    def cache_whitelist_result(self, track_id, is_whitelisted, name):
+        """얼굴 검사 결과 저장 (오래된 항목부터 제거)"""
+        self.whitelist_cache[track_id] = (is_whitelisted, name)
+        self.whitelist_cache.move_to_end(track_id)
+        while len(self.whitelist_cache) > WHITELIST_CACHE_SIZE:
+            self.whitelist_cache.popitem(last=False)
+
+    def get_frame_stats(self):
+        """프레임 수신/처리/드롭 통계"""
+        return {
+            "received": self.frame_slot.received,
+            "processed": self.processed_frames,
+            "dropped": self.frame_slot.dropped,
+            "latency_ms": round(self.last_latency_ms, 1),
+            "skipped": self.motion_gate.skipped,              # 움직임 없어 감지를 생략한 프레임 수
+            "skip_ratio": round(self.motion_gate.skip_ratio, 3),
+            "propagated": self.box_flow.propagated,           # 광류 전파로 처리한 프레임 수
+            "track_ids": self.next_track_id                   # 발급한 트래커 ID 수 (ID 교체가 많으면 증가)
+        }
+
+    def clear(self):
+        """세션 상태 초기화, 정리된 트래커 수 반환"""
+        count = self.trackers.clear()
+        self.whitelist_cache = OrderedDict()
+        for future, _ in self.face_checks.values():
+            future.cancel()
+        self.face_checks = {}
+        self.face_candidates = {}
+        self.pose_credit = 0.0
+        running = set()   # 취소하지 못한(실행 중인) 추출 → 끝난 뒤 반납
+        for track_id, (future, _) in self.pose_jobs.items():
+            key = (self.token, track_id)
+            if not mediapipe_service.release_landmarker(key, future):
+                running.add(key)
+        self.pose_jobs = {}
+        self.pose_events = {}
+        self.pose_frame_wanted = False
+        mediapipe_service.release_session(self.token, keep=running)
+        self.last_predictions = []
+        self.last_hazards = {}
+        self.box_flow = BoxFlow()
+        self.lost_tracks.clear()
+        return count
+
+    def to_dict(self):
+        """세션 요약 (모니터링 API용)"""
+        return {
+            "camera_id": self.camera_id,
+            "active_trackers": len(self.trackers),
+            "tracker_store": self.trackers.get_stats(),
+            "reid": self.lost_tracks.get_stats(),
+            "face_checks": {
+                "pending": len(self.face_checks),
+                "collecting": len(self.face_candidates),
+                "submitted": self.face_checks_submitted,
+                "hits": self.face_check_hits,
+                "skipped": self.face_checks_skipped
+            },
+            "pose": {"pending": len(self.pose_jobs), "runs": self.pose_runs, "deferred": self.pose_deferred},
+            "next_track_id": self.next_track_id,
+            "uptime": round(time.time() - self.created_at, 1),
+            "model": self.detector.name if self.detector is not None else None,
+            "requested_model": self.requested_model,
+            "frames": self.get_frame_stats()
+        }
+
+
+# ==================================================
+# 세션 레지스트리 (모듈 레벨 싱글톤)
+# ==================================================
+# { camera_id: CameraSession }
+_sessions = {}
+_sessions_lock = threading.Lock()
+_anonymous_ids = itertools.count(1)
+
+
+def create_session(camera_id: str = None):
+    """
+    새 카메라 세션 생성 및 등록
+
+    Args:
+        camera_id: 카메라 이름 (없으면 cam-1, cam-2, ... 자동 부여)
+
+    Returns:
+        CameraSession
+    """
+    with _sessions_lock:
+        if not camera_id:
+            camera_id = f"cam-{next(_anonymous_ids)}"
+            while camera_id in _sessions:
+                camera_id = f"cam-{next(_anonymous_ids)}"
+        elif camera_id in _sessions:
+            # 같은 이름이 이미 연결 중 → 번호 추가
+            base_id = camera_id
+            suffix = 2
+            while f"{base_id}#{suffix}" in _sessions:
+                suffix += 1
+            camera_id = f"{base_id}#{suffix}"
+
+        session = CameraSession(camera_id)
+        _sessions[camera_id] = session
+
+    print(f"[Session] 세션 생성: {camera_id} (활성 세션 {len(_sessions)}개)")
+    return session
+
+
+def get_session(camera_id: str):
+    """카메라 세션 조회 (없으면 None)"""
+    return _sessions.get(camera_id)
+
+
+def close_session(camera_id: str):
+    """
+    카메라 세션 종료 및 상태 정리
+
+    Returns:
+        정리된 트래커 수 (세션이 없으면 0)
+    """
+    with _sessions_lock:
+        session = _sessions.pop(camera_id, None)
+
+    if session is None:
+        return 0
+
+    session.frame_slot.close()
+    cleared = session.clear()
+    print(f"[Session] 세션 종료: {camera_id} (활성 세션 {len(_sessions)}개)")
+    return cleared
+
+
+def list_sessions():
+    """활성 세션 요약 목록"""
+    return [session.to_dict() for session in get_all_sessions()]
+
+
+def get_all_sessions():
+    """활성 세션 객체 목록 (스냅샷)"""
+    return list(_sessions.values())
@@ -0,0 +1,308 @@
+"""
+Track Store Service - 배열 기반 트래커 테이블
+=============================================
+카메라 세션의 트래커 상태를 슬롯 단위 numpy 배열(struct-of-arrays)로 보관
+
+[왜 필요한가?]
+- 기존: 트래커 1개 = 키 12개짜리 딕셔너리 + 관절 히스토리(33x3 중첩 리스트 x 10, pop(0)로 자름)
+  → 사람이 많은 장면에서 트래커당 수십 KB, 만료 검사/예측/매칭이 모두 파이썬 순회
+- 변경: 필드마다 (용량, ...) 배열 1개, 트래커 = 슬롯 번호
+  → 만료 검사는 비교 1번, 칼만 예측/매칭 기준 박스는 슬라이스 1번
+
+[구조]
+- 슬롯 배열: track_id(-1 = 빈 슬롯), box, 시각, 플래그, 캡처 시각, 칼만 상태, 외형 임베딩
+- 관절 히스토리: 슬롯마다 고정 크기 float32 링 버퍼 (KEYPOINT_HISTORY_LENGTH, 33, 3) + 샘플 시각
+  → 추가는 head 위치에 덮어쓰기 1번 (pop(0) 없음), 실제로 추출한 프레임의 관절만 보관
+  → 여러 트래커의 히스토리를 (N, T, 33, 3) 시간 순서로 한 번에 꺼냄 (behavior_service 규칙 평가)
+- 관절 추출 스케줄 상태: 마지막 추출 시각/프레임, 이상행동 징후 (tracker_service.schedule_pose)
+- 빈 슬롯 목록(free list): 만료된 슬롯을 재사용, 모자라면 용량 2배로 확장
+- track_id → 슬롯 딕셔너리: `track_id in store`, `len(store)`, `for track_id in store` 지원
+
+[스레드 안전성]
+- 세션의 프레임은 한 번에 하나씩 처리되므로 잠금 없음 (CameraSession 참고)
+"""
+import numpy as np
+
+from app.services.reid_service import EMBEDDING_DIM
+
+
+# ==================================================
+# 설정값 (Configuration)
+# ==================================================
+INITIAL_CAPACITY = 16          # 초기 슬롯 수 (부족하면 2배씩 확장)
+NUM_KEYPOINTS = 33             # MediaPipe Pose 관절 수
+KEYPOINT_MAX_RATE = 30         # 관절 샘플 최대 빈도 (초당, 이상 징후 트래커는 매 프레임 추출 + 클라이언트 최대 30fps)
+KEYPOINT_HISTORY_LENGTH = 48   # 관절 히스토리 보관 샘플 수 (링 버퍼, 최대 빈도에서 1.6초 = 규칙 시간 창 상한)
+MAX_CAPTURES = 3               # 트래커당 캡처 시각 보관 수
+KALMAN_DIM = 8                 # 칼만 상태 [cx, cy, w, h, vx, vy, vw, vh]
+
+
+class TrackStore:
+    """
+    세션 1개의 트래커 테이블 (슬롯 배열 + 빈 슬롯 목록)
+
+    - 필드 접근: store.box[slot], store.last_seen[slot] ... (slot = store.slot(track_id))
+    - 여러 트래커: store.active_slots() → 배열 인덱싱
+    """
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self.capacity = 0
+        self._slots = {}     # { track_id: 슬롯 번호 }
+        self._free = []      # 빈 슬롯 번호 (스택: 최근에 비운 슬롯부터 재사용)
+        self._allocate(capacity)
+
+    # ─────────────────────────────────────────────
+    # 슬롯 배열
+    # ─────────────────────────────────────────────
+    def _allocate(self, capacity):
+        """슬롯 배열 생성/확장 (기존 내용 유지)"""
+        old = self.capacity
+
+        def grow(array, fill=0):
+            new = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+            new[:old] = array[:old]
+            return new
+
+        if old == 0:
+            self.track_id = np.full(capacity, -1, dtype=np.int64)
+            self.box = np.zeros((capacity, 4), dtype=np.int32)
+            self.start_time = np.zeros(capacity, dtype=np.float64)
+            self.last_seen = np.zeros(capacity, dtype=np.float64)
+            self.notified = np.zeros(capacity, dtype=bool)            # 거수자 알림 발송 여부
+            self.abnormal_notified = np.zeros(capacity, dtype=bool)   # 이상행동 알림 발송 여부
+            self.is_whitelisted = np.zeros(capacity, dtype=bool)      # 화이트리스트 여부
+            self.face_pending = np.zeros(capacity, dtype=bool)        # 첫 얼굴 검사 결과 대기 중
+            self.face_checked_frame = np.zeros(capacity, dtype=np.int64)  # 마지막 얼굴 검사 제출 프레임 번호
+            self.capture_count = np.zeros(capacity, dtype=np.int8)    # ID 캡처 횟수
+            self.capture_times = np.zeros((capacity, MAX_CAPTURES), dtype=np.float64)
+            self.kalman_mean = np.zeros((capacity, KALMAN_DIM), dtype=np.float64)
+            self.kalman_covariance = np.zeros((capacity, KALMAN_DIM, KALMAN_DIM), dtype=np.float64)
+            self.kalman_time = np.zeros(capacity, dtype=np.float64)
+            self.keypoints = np.zeros((capacity, KEYPOINT_HISTORY_LENGTH, NUM_KEYPOINTS, 3), dtype=np.float32)
+            self.keypoint_count = np.zeros(capacity, dtype=np.int16)  # 링 버퍼에 채워진 프레임 수
+            self.keypoint_head = np.zeros(capacity, dtype=np.int16)   # 다음에 쓸 위치
+            self.keypoint_times = np.zeros((capacity, KEYPOINT_HISTORY_LENGTH), dtype=np.float64)  # 샘플별 프레임 시각
+            self.pose_time = np.zeros(capacity, dtype=np.float64)      # 마지막 관절 추출 성공 시각 (0 = 없음)
+            self.pose_frame = np.zeros(capacity, dtype=np.int64)       # 마지막 관절 추출 예약 프레임 번호 (-1 = 없음)
+            self.pose_alert = np.zeros(capacity, dtype=bool)           # 마지막 관절에서 이상행동 징후
+            self.flat_since = np.full(capacity, np.nan, dtype=np.float64)  # 몸통 수평 상태 시작 시각 (NaN = 수평 아님)
+            self.embedding = np.zeros((capacity, EMBEDDING_DIM), dtype=np.float32)   # 외형 임베딩 (reid_service)
+            self.embedding_time = np.zeros(capacity, dtype=np.float64)              # 임베딩 갱신 시각 (0 = 없음)
+            self.whitelist_name = [""] * capacity
+        else:
+            self.track_id = grow(self.track_id, -1)
+            self.box = grow(self.box)
+            self.start_time = grow(self.start_time)
+            self.last_seen = grow(self.last_seen)
+            self.notified = grow(self.notified)
+            self.abnormal_notified = grow(self.abnormal_notified)
+            self.is_whitelisted = grow(self.is_whitelisted)
+            self.face_pending = grow(self.face_pending)
+            self.face_checked_frame = grow(self.face_checked_frame)
+            self.capture_count = grow(self.capture_count)
+            self.capture_times = grow(self.capture_times)
+            self.kalman_mean = grow(self.kalman_mean)
+            self.kalman_covariance = grow(self.kalman_covariance)
+            self.kalman_time = grow(self.kalman_time)
+            self.keypoints = grow(self.keypoints)
+            self.keypoint_count = grow(self.keypoint_count)
+            self.keypoint_head = grow(self.keypoint_head)
+            self.keypoint_times = grow(self.keypoint_times)
+            self.pose_time = grow(self.pose_time)
+            self.pose_frame = grow(self.pose_frame)
+            self.pose_alert = grow(self.pose_alert)
+            self.flat_since = grow(self.flat_since, np.nan)
+            self.embedding = grow(self.embedding)
+            self.embedding_time = grow(self.embedding_time)
+            self.whitelist_name = self.whitelist_name + [""] * (capacity - old)
+
+        # 낮은 번호 슬롯부터 쓰도록 역순으로 쌓음
+        self._free.extend(range(capacity - 1, old - 1, -1))
+        self.capacity = capacity
+
+    # ─────────────────────────────────────────────
+    # 트래커 추가 / 조회 / 삭제
+    # ─────────────────────────────────────────────
+    def add(self, track_id, box, now, is_whitelisted=False, whitelist_name=""):
+        """
+        새 트래커 등록 (빈 슬롯 재사용, 없으면 확장)
+
+        Returns:
+            슬롯 번호
+        """
+        if not self._free:
+            self._allocate(self.capacity * 2)
+        slot = self._free.pop()
+
+        self.track_id[slot] = track_id
+        self.box[slot] = box
+        self.start_time[slot] = now
+        self.last_seen[slot] = now
+        self.notified[slot] = False
+        self.abnormal_notified[slot] = False
+        self.is_whitelisted[slot] = is_whitelisted
+        self.face_pending[slot] = False
+        self.face_checked_frame[slot] = 0
+        self.capture_count[slot] = 0
+        self.keypoint_count[slot] = 0
+        self.keypoint_head[slot] = 0
+        self.pose_time[slot] = 0.0
+        self.pose_frame[slot] = -1
+        self.pose_alert[slot] = False
+        self.flat_since[slot] = np.nan
+        self.embedding_time[slot] = 0.0
+        self.whitelist_name[slot] = whitelist_name or ""
+        self._slots[track_id] = slot
+        return slot
+
+    def slot(self, track_id):
+        """track_id의 슬롯 번호 (없으면 None)"""
+        return self._slots.get(track_id)
+
+    def active_slots(self):
+        """사용 중인 슬롯 번호 배열 (track_id 발급 순서와 무관)"""
+        return np.fromiter(self._slots.values(), dtype=np.int64, count=len(self._slots))
+
+    def remove_slots(self, slots):
+        """슬롯 비우기 (빈 슬롯 목록으로 반환)"""
+        for slot in slots:
+            del self._slots[int(self.track_id[slot])]
+            self.track_id[slot] = -1
+            self.whitelist_name[slot] = ""
+            self._free.append(int(slot))
+
+    def expired_slots(self, now, timeout):
+        """last_seen이 timeout보다 오래된 슬롯 (배열 비교 1번)"""
+        return np.flatnonzero((self.track_id >= 0) & (now - self.last_seen > timeout))
+
+    def clear(self):
+        """모든 트래커 삭제, 삭제한 수 반환"""
+        count = len(self._slots)
+        self.remove_slots(list(self._slots.values()))
+        return count
+
+    def export(self, slot):
+        """
+        트래커 상태 레코드 (갤러리 보관용, 슬롯을 비운 뒤에도 유지)
+
+        - 위치/칼만/관절 히스토리는 제외 (다시 나타난 위치에서 새로 시작)
+        """
+        return {
+            "track_id": int(self.track_id[slot]),
+            "start_time": float(self.start_time[slot]),
+            "notified": bool(self.notified[slot]),
+            "abnormal_notified": bool(self.abnormal_notified[slot]),
+            "is_whitelisted": bool(self.is_whitelisted[slot]),
+            "whitelist_name": self.whitelist_name[slot],
+            "capture_count": int(self.capture_count[slot]),
+            "capture_times": self.capture_times[slot].copy()
+        }
+
+    def restore(self, record, box, now, embedding=None):
+        """
+        export()한 트래커를 새 박스 위치로 다시 등록 (같은 track_id, 체류/캡처 상태 유지)
+
+        Returns:
+            슬롯 번호
+        """
+        slot = self.add(record["track_id"], box, now, record["is_whitelisted"], record["whitelist_name"])
+        self.start_time[slot] = record["start_time"]
+        self.notified[slot] = record["notified"]
+        self.abnormal_notified[slot] = record["abnormal_notified"]
+        self.capture_count[slot] = record["capture_count"]
+        self.capture_times[slot] = record["capture_times"]
+        if embedding is not None:
+            self.embedding[slot] = embedding
+            self.embedding_time[slot] = now
+        return slot
+
+    def __contains__(self, track_id):
+        return track_id in self._slots
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __iter__(self):
+        return iter(list(self._slots))
+
+    def boxes_of(self, track_ids):
+        """track_id 순서대로 박스 리스트"""
+        return [self.box[self._slots[track_id]].tolist() for track_id in track_ids]
+
+    # ─────────────────────────────────────────────
+    # 관절 히스토리 (링 버퍼)
+    # ─────────────────────────────────────────────
+    def push_keypoints(self, slot, keypoints, at=0.0):
+        """
+        관절 좌표 1샘플 추가 (가장 오래된 샘플 위에 덮어씀)
+
+        - slot이 배열이면 여러 트래커에 한 번에 추가 (keypoints: (N, 33, 3), at: 스칼라 또는 (N,), 슬롯 중복 없음)
+        """
+        head = self.keypoint_head[slot]
+        self.keypoints[slot, head] = keypoints
+        self.keypoint_times[slot, head] = at
+        self.keypoint_head[slot] = (head + 1) % KEYPOINT_HISTORY_LENGTH
+        self.keypoint_count[slot] = np.minimum(self.keypoint_count[slot] + 1, KEYPOINT_HISTORY_LENGTH)
+
+    def keypoint_history(self, slot):
+        """관절 히스토리 (count, 33, 3), 오래된 프레임 → 최근 프레임 순"""
+        count = int(self.keypoint_count[slot])
+        head = int(self.keypoint_head[slot])
+        order = (np.arange(head - count, head)) % KEYPOINT_HISTORY_LENGTH
+        return self.keypoints[slot, order]
+
+    def keypoint_windows(self, slots, joints=None):
+        """
+        여러 트래커의 관절 히스토리 (시간 순서, 마지막 샘플 = 최근 샘플)
+
+        Args:
+            slots: 슬롯 번호 배열 (N,)
+            joints: 꺼낼 관절 인덱스 리스트 (None이면 33개 전체, 규칙에 쓰는 관절만 꺼내면 복사량 감소)
+
+        Returns:
+            (keypoints (N, T, J, 3), times (N, T), filled (N, T)) - 덜 채운 링 버퍼는 앞쪽이 빈 샘플
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        steps = np.arange(KEYPOINT_HISTORY_LENGTH)
+        order = (self.keypoint_head[slots, None] + steps) % KEYPOINT_HISTORY_LENGTH   # head = 가장 오래된 위치
+        filled = steps >= KEYPOINT_HISTORY_LENGTH - self.keypoint_count[slots, None]
+        times = self.keypoint_times[slots[:, None], order]
+        if joints is None:
+            return self.keypoints[slots[:, None], order], times, filled
+
+        # 샘플 = (33 * 3) 행으로 보고 행 → 열 순서로 np.take (3축 팬시 인덱싱보다 3배 이상 빠름)
+        rows = (slots[:, None] * KEYPOINT_HISTORY_LENGTH + order).ravel()
+        columns = (np.asarray(joints, dtype=np.int64)[:, None] * 3 + np.arange(3)).ravel()
+        samples = self.keypoints.reshape(-1, NUM_KEYPOINTS * 3)
+        keypoints = np.take(np.take(samples, rows, axis=0), columns, axis=1)
+        return keypoints.reshape(len(slots), KEYPOINT_HISTORY_LENGTH, -1, 3), times, filled
+
+    def last_keypoints(self, slot):
+        """가장 최근 관절 좌표 (33, 3), 없으면 None"""
+        if self.keypoint_count[slot] == 0:
+            return None
+        return self.keypoints[slot, (self.keypoint_head[slot] - 1) % KEYPOINT_HISTORY_LENGTH]
+
+    # ─────────────────────────────────────────────
+    # 좌표 변환 / 통계
+    # ─────────────────────────────────────────────
+    def rescale(self, ratio):
+        """박스/칼만 상태/관절 좌표를 ratio배 (감지 모델 입력 크기 변경 시)"""
+        self.box[:] = (self.box * ratio).astype(np.int32)
+        self.kalman_mean *= ratio
+        self.kalman_covariance *= ratio ** 2
+        self.keypoints[..., :2] *= ratio
+
+    def memory_bytes(self):
+        """슬롯 배열 전체 메모리 (bytes)"""
+        return sum(
+            value.nbytes for value in vars(self).values() if isinstance(value, np.ndarray)
+        )
+
+    def get_stats(self):
+        return {
+            "tracks": len(self._slots),
+            "capacity": self.capacity,
+            "memoryKB": round(self.memory_bytes() / 1024, 1),
+            "bytesPerSlot": self.memory_bytes() // max(self.capacity, 1)
+        }
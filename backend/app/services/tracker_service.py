@@ -14,17 +14,49 @@ YOLO로 감지된 사람을 프레임 간 추적하고 거수자/이상행동을
 
 3. 이상행동 감지 (Abnormal Behavior Detection)
    - MediaPipe Pose로 관절 좌표 추출
-   - 넘어짐, 손들기, 빠른 동작 등 감지
+   - 넘어짐, 손들기, 빠른 동작, 급격한 자세 하강, 누운 자세 감지
+   - 관절을 받은 트래커 전체를 behavior_service 규칙 엔진으로 한 번에 평가 (시간 창 기반)
 
 [알고리즘: IoU (Intersection over Union)]
 - 두 박스의 겹침 정도를 0~1로 표현
 - IoU = 교집합 영역 / 합집합 영역
 - 0: 전혀 안 겹침, 1: 완전히 겹침
+
+[알고리즘: 전역 할당 (match_detections)]
+- 프레임의 모든 감지 × 모든 트래커 점수 행렬을 numpy로 한 번에 계산
+- 1:1 할당 (헝가리안 알고리즘, scipy 없으면 점수 높은 순 greedy)
+  → 한 프레임의 두 사람이 같은 track_id를 받지 않음
+
+[알고리즘: 칼만 필터 + 낮은 신뢰도 2차 매칭 (ByteTrack 방식)]
+- 트래커마다 등속 칼만 필터 (박스 중심/크기 + 속도) → 마지막 박스와 예측 박스 중 더 잘 맞는 쪽으로 매칭
+  → 빠르게 걷는 사람, 잠깐 가려졌다 나온 사람도 같은 ID 유지
+- 1차: 신뢰도 높은 사람 박스 ↔ 전체 트래커 (매칭 실패 시 새 ID)
+- 2차: 신뢰도 낮은 사람 박스(0.1~0.6) ↔ 1차에서 짝 없는 트래커 (IoU만, 새 ID 없음)
+  → 가려짐/흐림으로 점수가 잠깐 떨어진 사람의 트랙이 끊기지 않음
+- 3차: 1차/2차에서 남은 사람 박스 ↔ 놓친 트래커 + 만료된 트래커 갤러리 (외형 임베딩, reid_service)
+  → 오래 가려졌다 나온 사람도 같은 ID + 체류 시작 시각/화이트리스트/캡처 상태 유지
+- 새 ID마다 얼굴 검사 + 캡처 3장(JPEG 인코딩, DB 저장)이 발생 → ID 교체가 줄면 I/O도 함께 줄어듦
+
+[트래커 테이블]
+- session.trackers = TrackStore (track_store_service): 필드별 numpy 배열 + 슬롯 번호
+- 만료 검사/칼만 예측/매칭 기준 박스는 배열 연산 1번, 관절 히스토리는 링 버퍼
 """
+import os
 import time
 
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None   # greedy 할당으로 대체
+
+from app.services import behavior_service
 from app.services import mediapipe_service
+from app.services import track_store_service
+from app.services import reid_service
 from app.services.database_service import save_snapshot
+from app.utils.face_recognition_module import face_quality
 
 
 # ==================================================
@@ -38,43 +70,59 @@ TRACKER_TIMEOUT = 5.0      # 트래커 만료 시간 (초) - 이 시간 동안 
 # ID 캡처 설정 (모든 감지된 사람 캡처)
 MAX_CAPTURES_PER_ID = 3                   # ID당 최대 캡처 수
 CAPTURE_INTERVALS = [0.0, 1.0, 2.0]       # 캡처 간격 (초): 즉시, 1초 후, 2초 후
-FACE_CHECK_INTERVAL = 30   # 얼굴 재검사 프레임 간격
-
-# 이상행동 감지 설정
-ABNORMAL_VELOCITY_THRESHOLD = 50  # 빠른 동작 임계값 (픽셀/프레임)
-FALL_DETECTION_RATIO = 0.3        # 넘어짐 감지 비율 (사용 안 함)
-KEYPOINT_HISTORY_LENGTH = 10      # 관절 히스토리 보관 프레임 수
+FACE_CHECK_INTERVAL = 30   # 화이트리스트가 아닌 트래커 얼굴 재검사 간격 (프레임)
+FACE_CHECK_BUDGET_MS = float(os.getenv("AI_FACE_CHECK_BUDGET_MS", "10"))  # 프레임당 재검사에 쓸 얼굴 검사 시간 (ms)
+FACE_QUALITY_FRAMES = 5    # 첫 얼굴 검사 전에 머리 영역 품질을 비교할 프레임 수 (가장 좋은 프레임으로 검사)
+FACE_QUALITY_GOOD = 0.5    # 이 품질 이상이면 기다리지 않고 바로 검사
+FACE_QUALITY_MIN = 0.15    # 검사 최소 품질 (흔들림/뒷모습/너무 작은 머리는 탐지해도 실패 → 건너뜀)
 
+# 이상행동 감지 설정 (규칙 임계값/시간 창은 behavior_service)
+KEYPOINT_HISTORY_LENGTH = track_store_service.KEYPOINT_HISTORY_LENGTH  # 관절 히스토리 보관 샘플 수 (링 버퍼)
 
-# ==================================================
-# 트래커 상태 (모듈 레벨 싱글톤)
-# ==================================================
-# 딕셔너리 구조: { track_id: { start_time, last_seen, box, ... }, ... }
-_active_trackers = {}
+# 매칭 설정
+MATCH_MAX_DISTANCE = 100   # 중심점 거리 점수가 0이 되는 거리 (픽셀, 예측 박스 기준)
+MATCH_MIN_SCORE = 0.25     # 최소 복합 점수 (이하면 매칭 안 함 → 새 ID)
+LOW_MATCH_MIN_IOU = 0.5    # 2차 매칭(낮은 신뢰도 박스) 최소 IoU
+POSE_MATCH_MIN_IOU = 0.3   # YOLO-pose 사람 박스 ↔ 트래커 박스 최소 IoU (프레임 1회 Pose 백엔드)
 
-# 다음에 할당할 트래커 ID (자동 증가)
-_next_track_id = 0
+# 칼만 필터 설정 (상태 = [cx, cy, w, h, vx, vy, vw, vh], 속도 단위 px/초)
+KALMAN_POSITION_STD = 1 / 20   # 위치/크기 잡음 (박스 높이 대비)
+KALMAN_VELOCITY_STD = 1 / 10   # 속도 잡음 (박스 높이 대비, 초당)
+MAX_PREDICT_SECONDS = 1.0      # 예측 외삽 상한 (오래 가려진 트래커가 멀리 날아가지 않도록)
 
 
 # ==================================================
 # 트래커 관리 함수
 # ==================================================
-def get_active_trackers():
-    """현재 활성화된 모든 트래커 반환"""
-    return _active_trackers
+# 트래커 상태는 카메라별 CameraSession(session_service)이 보관
+# 테이블 구조: session.trackers = TrackStore (track_id → 슬롯, 필드별 배열)
+def get_active_trackers(session):
+    """세션의 트래커 테이블 반환 (TrackStore)"""
+    return session.trackers
 
 
-def get_active_tracker_count():
-    """현재 추적 중인 사람 수 반환"""
-    return len(_active_trackers)
+def get_active_tracker_count(session):
+    """세션에서 추적 중인 사람 수 반환"""
+    return len(session.trackers)
 
 
-def clear_trackers():
-    """모든 트래커 초기화 (연결 종료 시 호출)"""
-    global _active_trackers
-    count = len(_active_trackers)
-    _active_trackers.clear()
-    return count
+def clear_trackers(session):
+    """세션의 모든 트래커 초기화 (연결 종료 시 호출)"""
+    return session.clear()
+
+
+def rescale_trackers(session, ratio):
+    """
+    트래커 좌표를 새 모델 입력 크기로 변환 (감지 모델 교체 시 호출)
+
+    - 박스/관절 좌표는 모델 입력 좌표(320 또는 640 기준)로 저장됨
+    - 320 → 640 모델로 바뀌면 ratio = 2.0 → IoU 매칭과 이상행동 분석이 끊기지 않음
+
+    Args:
+        session: 카메라 세션 (CameraSession)
+        ratio: 새 입력 크기 / 이전 입력 크기
+    """
+    session.trackers.rescale(ratio)
 
 
 # ==================================================
@@ -136,167 +184,407 @@ def calculate_iou(box1, box2):
     return intersection / union if union > 0 else 0
 
 
+# ==================================================
+# 칼만 필터 (등속 모델)
+# ==================================================
+def _box_to_measurement(box):
+    """[x1, y1, x2, y2] → [cx, cy, w, h]"""
+    x1, y1, x2, y2 = box
+    return np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1], dtype=np.float64)
+
+
+def init_track_motion(store, slot, box, now):
+    """
+    새 트래커의 칼만 상태 (속도 0, 속도 불확실성 크게 → 다음 관측에서 바로 속도 추정)
+
+    Args:
+        store: 트래커 테이블 (TrackStore)
+        slot: 새 트래커 슬롯
+        box: 첫 박스
+        now: 현재 시각
+    """
+    measurement = _box_to_measurement(box)
+    height = max(measurement[3], 1.0)
+    std = np.r_[[2 * KALMAN_POSITION_STD * height] * 4, [10 * KALMAN_VELOCITY_STD * height] * 4]
+    store.kalman_mean[slot] = np.r_[measurement, np.zeros(4)]
+    store.kalman_covariance[slot] = np.diag(std ** 2)
+    store.kalman_time[slot] = now
+
+
+def update_tracks_motion(store, slots, boxes, now):
+    """
+    매칭된 박스로 트래커 위치 일괄 갱신 (칼만 예측 → 관측 보정, 트래커 축으로 배열 연산)
+
+    [학습 포인트: 배치 칼만]
+    - 트래커마다 8x8 행렬 곱을 따로 하면 사람 수만큼 파이썬 호출이 반복됨
+    - (N, 8, 8) 배열로 쌓아 한 번에 곱하고 np.linalg.solve도 배치로 호출
+
+    Args:
+        store: 트래커 테이블 (TrackStore)
+        slots: 갱신할 슬롯 배열 (중복 없음)
+        boxes: 슬롯별 이번 프레임 박스 [[x1, y1, x2, y2], ...]
+        now: 현재 시각
+    """
+    slots = np.asarray(slots, dtype=np.int64)
+    if len(slots) == 0:
+        return
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    store.box[slots] = boxes
+    store.last_seen[slots] = now
+
+    # 예측: 마지막 갱신 시각 → now 까지 등속 이동
+    mean = store.kalman_mean[slots]
+    covariance = store.kalman_covariance[slots]
+    dt = np.clip(now - store.kalman_time[slots], 0.0, MAX_PREDICT_SECONDS)
+    transition = np.tile(np.eye(8), (len(slots), 1, 1))
+    transition[:, :4, 4:] = np.eye(4) * dt[:, None, None]
+
+    height = np.maximum(mean[:, 3], 1.0)[:, None]
+    std = np.r_[[KALMAN_POSITION_STD] * 4, [KALMAN_VELOCITY_STD] * 4]
+    noise = (std * height) ** 2 * np.maximum(dt, 1e-3)[:, None]
+    mean = np.einsum("nij,nj->ni", transition, mean)
+    covariance = transition @ covariance @ transition.transpose(0, 2, 1) + noise[:, :, None] * np.eye(8)
+
+    # 보정: 관측 [cx, cy, w, h] (H = 앞 4개 성분 선택)
+    height = np.maximum(mean[:, 3], 1.0)
+    projected = covariance[:, :4, :4] + ((KALMAN_POSITION_STD * height) ** 2)[:, None, None] * np.eye(4)
+    gain = np.linalg.solve(projected, covariance[:, :4, :]).transpose(0, 2, 1)   # (N, 8, 4)
+    measurement = np.stack([
+        (boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2,
+        boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]
+    ], axis=1)
+    store.kalman_mean[slots] = mean + np.einsum("nij,nj->ni", gain, measurement - mean[:, :4])
+    store.kalman_covariance[slots] = covariance - gain @ projected @ gain.transpose(0, 2, 1)
+    store.kalman_time[slots] = now
+
+
+def update_tracks(session, track_ids, boxes, now=None):
+    """
+    이번 프레임에 매칭된 기존 트래커의 박스/last_seen/칼만 상태 갱신 (프레임당 1번)
+
+    - 트래커에 없는 ID(새 사람)는 건너뜀 → check_loitering()에서 생성
+
+    Args:
+        session: 카메라 세션 (CameraSession)
+        track_ids: 매칭된 track_id 리스트
+        boxes: track_id별 박스 리스트
+        now: 현재 시각 (기본값: time.time())
+    """
+    store = session.trackers
+    known = [(store.slot(track_id), box) for track_id, box in zip(track_ids, boxes) if track_id in store]
+    if known:
+        slots, known_boxes = zip(*known)
+        update_tracks_motion(store, slots, known_boxes, now if now is not None else time.time())
+
+
+def predicted_boxes(store, slots, now):
+    """
+    트래커들의 now 시점 예측 박스 (평균만 배열 연산으로 외삽)
+
+    Returns:
+        (M, 4) [x1, y1, x2, y2]
+    """
+    means = store.kalman_mean[slots]
+    dt = np.clip(now - store.kalman_time[slots], 0.0, MAX_PREDICT_SECONDS)[:, None]
+    cx, cy, w, h = (means[:, :4] + means[:, 4:] * dt).T
+    return np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+
 # ==================================================
 # 객체 매칭 (핵심 알고리즘)
 # ==================================================
-def match_detection_to_tracker(box):
+def iou_matrix(boxes, tracker_boxes):
+    """감지 N개 × 트래커 M개 IoU 행렬 (numpy 브로드캐스팅)"""
+    a = np.asarray(boxes, dtype=np.float32).reshape(-1, 1, 4)
+    b = np.asarray(tracker_boxes, dtype=np.float32).reshape(1, -1, 4)
+
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    intersection = inter_w * inter_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def score_matrix(boxes, tracker_boxes):
     """
-    새로 감지된 박스를 기존 트래커와 매칭
-    
-    [하이브리드 매칭 알고리즘]
+    감지 N개 × 트래커 M개 복합 점수 행렬 (numpy 브로드캐스팅으로 한 번에 계산)
+
+    [하이브리드 점수]
     1. IoU 점수: 박스 겹침 정도 (크기 변화에 강함)
     2. 중심점 거리 점수: 위치 유사도 (빠른 이동에 강함)
     3. 복합 점수 = IoU × 0.5 + 거리점수 × 0.5
-    
+
     [왜 하이브리드?]
     - IoU만 사용: 사람이 빠르게 움직이면 겹침이 적어서 새 ID 부여
     - 거리만 사용: 크기 변화나 여러 사람이 가까이 있으면 혼동
     - 둘 다 사용: 각각의 단점 보완
-    
+
+    Args:
+        boxes: (N, 4) 감지 박스 [x1, y1, x2, y2]
+        tracker_boxes: (M, 4) 트래커 박스 (예측 박스)
+
+    Returns:
+        (N, M) float32 점수 (0 ~ 1)
+    """
+    a = np.asarray(boxes, dtype=np.float32).reshape(-1, 1, 4)
+    b = np.asarray(tracker_boxes, dtype=np.float32).reshape(1, -1, 4)
+
+    # 1. IoU (교집합 / 합집합)
+    iou = iou_matrix(boxes, tracker_boxes)
+
+    # 2. 중심점 거리 → 점수 (가까울수록 1, MATCH_MAX_DISTANCE 이상이면 0)
+    dx = (a[..., 0] + a[..., 2] - b[..., 0] - b[..., 2]) / 2
+    dy = (a[..., 1] + a[..., 3] - b[..., 1] - b[..., 3]) / 2
+    dist_score = np.clip(1 - np.hypot(dx, dy) / MATCH_MAX_DISTANCE, 0, None)
+
+    # 3. 복합 점수 (50:50 가중치)
+    return iou * 0.5 + dist_score * 0.5
+
+
+def _reference_boxes(store, slots, now):
+    """
+    매칭 기준 박스: (칼만 예측 박스, 마지막 박스)
+
+    - 점수는 두 박스 중 더 잘 맞는 쪽을 사용
+      → 갑자기 멈추거나 방향을 바꾼 사람은 예측이 빗나가도 마지막 박스로 매칭
+    """
+    return predicted_boxes(store, slots, now), store.box[slots]
+
+
+def _assign_greedy(scores, min_score):
+    """점수 높은 쌍부터 1:1 할당 (scipy 없을 때)"""
+    rows, cols = np.nonzero(scores > min_score)
+    order = np.argsort(-scores[rows, cols], kind="stable")
+    used_rows, used_cols = set(), set()
+    pairs = []
+    for i in order:
+        row, col = int(rows[i]), int(cols[i])
+        if row in used_rows or col in used_cols:
+            continue
+        used_rows.add(row)
+        used_cols.add(col)
+        pairs.append((row, col))
+    return pairs
+
+
+def _assign_hungarian(scores, min_score):
+    """점수 합이 최대인 1:1 할당 (헝가리안 알고리즘)"""
+    valid = scores > min_score
+    # 임계값 이하 쌍은 선택돼도 버리므로 점수 0으로 → 유효한 쌍 수가 줄지 않음
+    rows, cols = linear_sum_assignment(np.where(valid, scores, 0.0), maximize=True)
+    return [(int(r), int(c)) for r, c in zip(rows, cols) if valid[r, c]]
+
+
+def _assign(scores, min_score):
+    if linear_sum_assignment is not None:
+        return _assign_hungarian(scores, min_score)
+    return _assign_greedy(scores, min_score)
+
+
+def match_detections(session, boxes, now=None, allocate=True):
+    """
+    한 프레임의 감지 박스 전체를 기존 트래커와 한 번에 매칭 (1차 매칭)
+
+    - 감지 1개당 트래커 전체를 파이썬으로 순회하던 방식 대신 점수 행렬 1번 계산
+    - 트래커의 마지막 박스뿐 아니라 칼만 예측 박스와도 비교 (더 잘 맞는 쪽 점수 사용)
+    - 1:1 할당 → 같은 프레임에서 한 트래커에 감지 2개가 붙지 않음
+
+    Args:
+        session: 카메라 세션 (CameraSession)
+        boxes: [[x1, y1, x2, y2], ...] 새로 감지된 박스
+        now: 현재 시각 (기본: time.time())
+        allocate: False면 매칭 실패한 박스를 None으로 반환 (외형 재연결 후 새 ID 발급)
+
+    Returns:
+        박스 순서대로 track_id 리스트 (매칭 실패한 박스는 새 ID 또는 None)
+    """
+    store = session.trackers
+    track_ids = [None] * len(boxes)
+    if boxes and len(store):
+        now = now if now is not None else time.time()
+        slots = store.active_slots()
+        predicted, last = _reference_boxes(store, slots, now)
+        scores = np.maximum(score_matrix(boxes, predicted), score_matrix(boxes, last))
+        for row, col in _assign(scores, MATCH_MIN_SCORE):
+            track_ids[row] = int(store.track_id[slots[col]])
+
+    # 매칭 실패 → 새 트래커 ID
+    if not allocate:
+        return track_ids
+    return [tid if tid is not None else session.allocate_track_id() for tid in track_ids]
+
+
+def match_low_score(session, boxes, exclude=(), now=None):
+    """
+    신뢰도 낮은 감지 박스 ↔ 1차에서 짝을 못 찾은 트래커 (2차 매칭, ByteTrack 방식)
+
+    - 낮은 신뢰도 박스는 오탐일 수 있으므로 IoU만 사용 (예측/마지막 박스와 LOW_MATCH_MIN_IOU 이상 겹쳐야 함)
+    - 매칭 실패해도 새 ID를 만들지 않음
+
+    Args:
+        session: 카메라 세션 (CameraSession)
+        boxes: 낮은 신뢰도 박스 리스트
+        exclude: 1차 매칭에서 이미 사용된 track_id
+        now: 현재 시각 (기본: time.time())
+
+    Returns:
+        박스 순서대로 track_id 또는 None
+    """
+    store = session.trackers
+    track_ids = [None] * len(boxes)
+    if boxes and len(store):
+        slots = store.active_slots()
+        slots = slots[~np.isin(store.track_id[slots], list(exclude))]
+        if len(slots):
+            now = now if now is not None else time.time()
+            predicted, last = _reference_boxes(store, slots, now)
+            iou = np.maximum(iou_matrix(boxes, predicted), iou_matrix(boxes, last))
+            for row, col in _assign(iou, LOW_MATCH_MIN_IOU):
+                track_ids[row] = int(store.track_id[slots[col]])
+    return track_ids
+
+
+def relink_lost_tracks(session, frame, boxes, exclude=(), now=None):
+    """
+    위치로 짝을 못 찾은 감지 ↔ 최근에 놓친 트래커 (외형 재연결, 3차 매칭)
+
+    - 후보: 이번 프레임에 매칭되지 않고 REID_MIN_LOST_SECONDS 이상 안 보인 트래커 + 갤러리(만료된 트래커)
+    - 유사도 = 외형 임베딩 내적, REID_MIN_SIMILARITY 이상만 1:1 할당
+    - 갤러리 항목은 같은 track_id로 복원 (체류 시작 시각, 화이트리스트, 캡처 상태 유지)
+    - 위치가 튀었으므로 칼만 상태는 새 박스에서 다시 시작
+
+    Args:
+        session: 카메라 세션 (CameraSession)
+        frame: 원본 프레임 (BGR)
+        boxes: 1차/2차 매칭에 실패한 사람 박스 리스트
+        exclude: 이번 프레임에 이미 사용된 track_id
+        now: 현재 시각 (기본: time.time())
+
+    Returns:
+        박스 순서대로 track_id 또는 None (None → 새 ID 발급)
+    """
+    track_ids = [None] * len(boxes)
+    if not boxes or not reid_service.is_enabled():
+        return track_ids
+
+    now = now if now is not None else time.time()
+    store = session.trackers
+    gallery = session.lost_tracks
+    live = store.active_slots()
+    live = live[
+        ~np.isin(store.track_id[live], list(exclude))
+        & (now - store.last_seen[live] >= reid_service.REID_MIN_LOST_SECONDS)
+        & (store.embedding_time[live] > 0)
+    ]
+    lost = gallery.candidates(now)
+    if len(live) == 0 and len(lost) == 0:
+        return track_ids
+
+    embeddings, valid = reid_service.extract_embeddings(frame, boxes, session.input_size)
+    references = np.vstack([store.embedding[live], gallery.embeddings[lost]])
+    similarity = embeddings @ references.T
+    similarity[~valid] = 0.0
+
+    for row, col in _assign(similarity, reid_service.REID_MIN_SIMILARITY):
+        if col < len(live):
+            slot = live[col]
+            gallery.relinked += 1
+        else:
+            slot = store.restore(gallery.pop(lost[col - len(live)]), boxes[row], now, embeddings[row])
+        init_track_motion(store, slot, boxes[row], now)
+        track_ids[row] = int(store.track_id[slot])
+        print(f"[ReID] ID {track_ids[row]} 재연결 (유사도 {similarity[row, col]:.2f})")
+    return track_ids
+
+
+def refresh_embeddings(session, frame, track_ids, boxes, now=None):
+    """
+    매칭된 트래커의 외형 임베딩 갱신 (REID_REFRESH_SECONDS 간격, 지수 이동 평균)
+
+    Args:
+        session: 카메라 세션 (CameraSession)
+        frame: 원본 프레임 (BGR)
+        track_ids: 이번 프레임에 매칭된 track_id 리스트
+        boxes: track_id별 박스 리스트
+        now: 현재 시각 (기본: time.time())
+    """
+    if not reid_service.is_enabled():
+        return
+    now = now if now is not None else time.time()
+    store = session.trackers
+    due = [
+        (store.slot(track_id), box) for track_id, box in zip(track_ids, boxes)
+        if track_id in store and now - store.embedding_time[store.slot(track_id)] >= reid_service.REID_REFRESH_SECONDS
+    ]
+    if not due:
+        return
+
+    slots, due_boxes = zip(*due)
+    slots = np.array(slots)
+    embeddings, valid = reid_service.extract_embeddings(frame, due_boxes, session.input_size)
+    slots, embeddings = slots[valid], embeddings[valid]
+    fresh = store.embedding_time[slots] == 0
+    store.embedding[slots] = reid_service.blend_embeddings(store.embedding[slots], embeddings, fresh)
+    store.embedding_time[slots] = now
+
+
+def match_detection_to_tracker(session, box):
+    """
+    감지 박스 1개를 기존 트래커와 매칭 (match_detections의 단일 박스 버전)
+
     Args:
+        session: 카메라 세션 (CameraSession)
         box: [x1, y1, x2, y2] 새로 감지된 박스
-    
+
     Returns:
         매칭된 track_id (없으면 새 ID 생성)
     """
-    global _next_track_id
-    
-    # 기존 트래커가 없으면 새로 생성
-    if not _active_trackers:
-        new_id = _next_track_id
-        _next_track_id += 1
-        return new_id
-    
-    best_match_id = None
-    best_score = 0
-    
-    # 현재 박스의 중심점
-    curr_center = get_box_center(box)
-    
-    # 모든 기존 트래커와 비교
-    for track_id, tracker in _active_trackers.items():
-        prev_box = tracker["box"]
-        prev_center = get_box_center(prev_box)
-        
-        # 1. IoU 점수 (0 ~ 1)
-        iou = calculate_iou(box, prev_box)
-        
-        # 2. 중심점 거리 점수
-        # 유클리드 거리 계산: sqrt((x1-x2)² + (y1-y2)²)
-        dist = ((curr_center[0] - prev_center[0])**2 + 
-                (curr_center[1] - prev_center[1])**2) ** 0.5
-        
-        # 거리 → 점수 변환 (가까울수록 1, 100픽셀 이상이면 0)
-        max_dist = 100  # 최대 허용 거리
-        dist_score = max(0, 1 - dist / max_dist)
-        
-        # 3. 복합 점수 계산 (50:50 가중치)
-        combined_score = iou * 0.5 + dist_score * 0.5
-        
-        # 최소 임계값 체크 (너무 다르면 매칭 안 함)
-        min_threshold = 0.25
-        if combined_score > min_threshold and combined_score > best_score:
-            best_score = combined_score
-            best_match_id = track_id
-    
-    if best_match_id is not None:
-        return best_match_id
-    else:
-        # 매칭 실패 → 새 트래커 생성
-        new_id = _next_track_id
-        _next_track_id += 1
-        return new_id
+    return match_detections(session, [box])[0]
 
 
 # ==================================================
 # 이상행동 감지
 # ==================================================
-def analyze_abnormal_behavior(keypoints, keypoints_history):
+# [학습 포인트: 규칙 엔진 (behavior_service)]
+# - 기존: 관절을 받은 트래커마다 analyze_abnormal_behavior() 1번 (현재 관절 + 직전 1개, 관절마다 파이썬 루프)
+# - 변경: 이번 프레임에 관절을 받은 트래커를 모아 링 버퍼 히스토리 (N, T, 33, 3)를 꺼내고
+#   behavior_service.evaluate() 1번으로 모든 규칙 판정 (시간 창 안의 샘플 전체 사용)
+# - 규칙/임계값/시간 창은 behavior_service에서 관리 (API로 변경)
+def _record_poses(session, track_ids, slots, keypoints, times):
     """
-    MediaPipe 관절 좌표로 이상행동 분석
-    
-    [MediaPipe Pose 33개 관절]
-    0: 코, 11-12: 어깨, 13-14: 팔꿈치, 15-16: 손목
-    23-24: 엉덩이, 25-26: 무릎, 27-28: 발목
-    
-    [감지 행동]
-    1. FALL: 넘어짐 (머리와 발목 높이 차이가 작음)
-    2. HANDS_UP: 손들기/위협 (손목이 어깨보다 위)
-    3. FAST_MOTION: 빠른 동작 (관절 이동 속도 임계값 초과)
-    
+    추출된 관절 반영: 히스토리 추가 → 규칙 평가 1번 (이상행동은 session.pose_events에 보관)
+
     Args:
-        keypoints: 현재 프레임 관절 좌표 [[x, y, confidence], ...]
-        keypoints_history: 이전 프레임들의 관절 좌표 리스트
-    
-    Returns:
-        감지된 행동 리스트 ["FALL", "HANDS_UP"] 또는 None
+        session: 카메라 세션 (CameraSession)
+        track_ids: 관절을 받은 track_id 리스트 (중복 없음)
+        slots: track_ids와 같은 순서의 TrackStore 슬롯
+        keypoints: (N, 33, 3) 관절 좌표 (MediaPipe 레이아웃)
+        times: (N,) 관절 프레임 시각
     """
-    if not keypoints or len(keypoints) < 25:
-        return None
-    
-    behaviors = []
-    
-    # ─────────────────────────────────────────────
-    # 1. 넘어짐 감지 (FALL)
-    # ─────────────────────────────────────────────
-    # 정상: 머리가 위, 발이 아래 (y 차이 큼)
-    # 넘어짐: 머리와 발 높이가 비슷 (y 차이 작음)
-    nose_y = keypoints[0][1]       # 코 y좌표
-    ankle_y = (keypoints[27][1] + keypoints[28][1]) / 2  # 발목 평균 y좌표
-    
-    height_diff = ankle_y - nose_y  # 발목 - 코 (정상이면 양수, 큰 값)
-    if height_diff < 50:  # 50픽셀 미만이면 수평 자세 → 넘어짐
-        behaviors.append("FALL")
-    
-    # ─────────────────────────────────────────────
-    # 2. 손들기/위협 감지 (HANDS_UP)
-    # ─────────────────────────────────────────────
-    # 손목 y좌표 < 어깨 y좌표 → 손이 어깨보다 위
-    # (좌표계: 위쪽이 0, 아래쪽이 큰 값)
-    left_wrist_y = keypoints[15][1]
-    right_wrist_y = keypoints[16][1]
-    left_shoulder_y = keypoints[11][1]
-    right_shoulder_y = keypoints[12][1]
-    
-    # 손목이 어깨보다 30픽셀 이상 위에 있으면
-    if (left_wrist_y < left_shoulder_y - 30 or 
-        right_wrist_y < right_shoulder_y - 30):
-        # 신뢰도 체크 (오탐 방지)
-        if keypoints[15][2] > 0.3 or keypoints[16][2] > 0.3:
-            behaviors.append("HANDS_UP")
-    
-    # ─────────────────────────────────────────────
-    # 3. 빠른 동작 감지 (FAST_MOTION)
-    # ─────────────────────────────────────────────
-    # 이전 프레임과 현재 프레임의 관절 이동 거리 계산
-    if len(keypoints_history) >= 2:
-        prev_kpts = keypoints_history[-1]  # 바로 이전 프레임
-        
-        if prev_kpts and len(prev_kpts) >= 25:
-            total_velocity = 0
-            count = 0
-            
-            # 손목(15,16)과 발목(27,28)의 이동 속도 측정
-            for i in [15, 16, 27, 28]:
-                # 신뢰도가 충분한 경우만 계산
-                if keypoints[i][2] > 0.3 and prev_kpts[i][2] > 0.3:
-                    dx = keypoints[i][0] - prev_kpts[i][0]
-                    dy = keypoints[i][1] - prev_kpts[i][1]
-                    velocity = (dx**2 + dy**2) ** 0.5  # 유클리드 거리
-                    total_velocity += velocity
-                    count += 1
-            
-            # 평균 속도가 임계값 초과하면 빠른 동작
-            if count > 0 and (total_velocity / count) > ABNORMAL_VELOCITY_THRESHOLD:
-                behaviors.append("FAST_MOTION")
-    
-    return behaviors if behaviors else None
+    if not track_ids:
+        return
+    store = session.trackers
+    slots = np.asarray(slots, dtype=np.int64)
+    times = np.asarray(times, dtype=np.float64)
+    store.push_keypoints(slots, np.asarray(keypoints, dtype=np.float32), times)
+    store.pose_time[slots] = times
+
+    flags, store.flat_since[slots] = behavior_service.evaluate(
+        *store.keypoint_windows(slots, behavior_service.joint_indices()),
+        joints=behavior_service.COMPACT_JOINTS, flat_since=store.flat_since[slots])
+    store.pose_alert[slots] = flags.any(axis=1)
+    for track_id, row in zip(track_ids, flags):
+        abnormal = behavior_service.behaviors_of(row)
+        if abnormal:
+            session.pose_events[track_id] = abnormal
 
 
 # ==================================================
 # 거수자 판정 (메인 로직)
 # ==================================================
-def check_loitering(track_id, box, frame, score, face_whitelist):
+def check_loitering(session, track_id, box, frame, score, face_whitelist, run_pose=False):
     """
     거수자 판정 및 이상행동 감지
     
@@ -307,146 +595,473 @@ def check_loitering(track_id, box, frame, score, face_whitelist):
     4. 이상행동 감지 → 추가 알림
     
     Args:
+        session: 카메라 세션 (CameraSession)
         track_id: 추적 ID
         box: 바운딩 박스 [x1, y1, x2, y2]
         frame: 현재 프레임 이미지
         score: YOLO 신뢰도
         face_whitelist: 얼굴 인식 화이트리스트 객체
+        run_pose: 이번 프레임에 관절을 추출할지 (schedule_pose()가 선택한 트래커)
     
     Returns:
-        {"type": "loitering"/"abnormal"/"tracking", "keypoints": [...]} 또는 None
+        {"type": "loitering"/"abnormal"/"tracking", "keypoints": [...], "keypoints_age": 초} 또는 None
+        (keypoints_age: 관절을 추출한 뒤 지난 시간, 이번 프레임에 추출했으면 0)
     """
     now = time.time()
+    store = session.trackers
+    slot = store.slot(track_id)
     
     # ─────────────────────────────────────────────
     # 새로운 사람 감지 (트래커에 없는 ID)
     # ─────────────────────────────────────────────
-    if track_id not in _active_trackers:
-        # 얼굴 인식으로 화이트리스트 체크
-        is_whitelisted, whitelist_name = face_whitelist.check_face_in_box(frame, box)
+    if slot is None:
+        # 화이트리스트 체크 (세션 캐시에 있으면 재사용, 없으면 얼굴 검사를 스레드풀에 제출)
+        cached = session.whitelist_cache.get(track_id)
+        is_whitelisted, whitelist_name = cached if cached is not None else (False, None)
         
-        # 새 트래커 생성
-        _active_trackers[track_id] = {
-            "start_time": now,           # 첫 감지 시간
-            "last_seen": now,            # 마지막 감지 시간
-            "notified": False,           # 거수자 알림 발송 여부
-            "box": box,                  # 현재 바운딩 박스
-            "is_whitelisted": is_whitelisted,     # 화이트리스트 여부
-            "whitelist_name": whitelist_name or "",  # 등록된 이름
-            "face_checked": True,        # 얼굴 검사 완료 여부
-            "keypoints_history": [],     # 관절 좌표 히스토리
-            "abnormal_notified": False,  # 이상행동 알림 발송 여부
-            "last_keypoints": None,      # 마지막 관절 좌표 (캐싱)
-            "capture_count": 0,          # ID 캡처 횟수 (최대 3장)
-            "capture_times": []          # 캡처 시점 기록
-        }
+        # 새 트래커 생성 (빈 슬롯 재사용) + 등속 칼만 상태 (매칭용 예측 박스)
+        slot = store.add(track_id, box, now, is_whitelisted, whitelist_name)
+        init_track_motion(store, slot, box, now)
+        if cached is None:
+            collect_face_candidate(session, track_id, box, frame, face_whitelist)
         
-        # 첫 번째 캡처 (즉시 - 화이트리스트 제외)
-        if not is_whitelisted:
+        # 첫 번째 캡처 (즉시 - 화이트리스트/얼굴 검사 대기 중 제외 → 결과가 나온 프레임에 캡처)
+        if store.face_pending[slot]:
+            print(f"[Track] 새로운 사람 감지 (ID: {track_id}) - 얼굴 검사 중")
+        elif not is_whitelisted:
             save_snapshot(frame, score, box, track_id=track_id, 
-                         stay_duration=0, is_loitering=False)
-            _active_trackers[track_id]["capture_count"] = 1
-            _active_trackers[track_id]["capture_times"].append(now)
+                         stay_duration=0, is_loitering=False,
+                         input_size=session.input_size)
+            store.capture_times[slot, 0] = now
+            store.capture_count[slot] = 1
             print(f"[Capture] ID {track_id} - 1/{MAX_CAPTURES_PER_ID}장 캡처 완료")
         
         if is_whitelisted:
             print(f"[Whitelist] 등록된 사용자 감지: {whitelist_name} (ID: {track_id})")
-        else:
+        elif not store.face_pending[slot]:
             print(f"[Track] 새로운 사람 감지 (ID: {track_id})")
     
     # ─────────────────────────────────────────────
     # 기존 트래커 업데이트
     # ─────────────────────────────────────────────
+    # (박스/last_seen/칼만 상태는 update_tracks()에서 프레임 단위로 일괄 갱신)
     else:
-        tracker = _active_trackers[track_id]
-        tracker["last_seen"] = now
-        tracker["box"] = box
+        # 첫 얼굴 검사 프레임 고르는 중 → 이번 프레임 머리 영역도 후보로 비교
+        if track_id in session.face_candidates:
+            collect_face_candidate(session, track_id, box, frame, face_whitelist)
         
-        # 화이트리스트 사용자는 거수자 판정 및 캡처 스킵
-        if tracker.get("is_whitelisted"):
+        # 화이트리스트 사용자(또는 첫 얼굴 검사 대기 중)는 거수자 판정 및 캡처 스킵
+        if store.is_whitelisted[slot] or store.face_pending[slot]:
             return None
         
         # 체류 시간 계산
-        elapsed = now - tracker["start_time"]
+        elapsed = now - store.start_time[slot]
         
         # ─────────────────────────────────────────
         # ID 캡처 (3장까지 - 0초, 1초, 2초 간격)
         # ─────────────────────────────────────────
-        capture_count = tracker.get("capture_count", 0)
+        capture_count = int(store.capture_count[slot])
         if capture_count < MAX_CAPTURES_PER_ID:
             next_capture_time = CAPTURE_INTERVALS[capture_count]
             if elapsed >= next_capture_time:
                 save_snapshot(frame, score, box, track_id=track_id, 
-                             stay_duration=elapsed, is_loitering=False)
-                tracker["capture_count"] = capture_count + 1
-                tracker["capture_times"].append(now)
+                             stay_duration=elapsed, is_loitering=False,
+                             input_size=session.input_size)
+                store.capture_times[slot, capture_count] = now
+                store.capture_count[slot] = capture_count + 1
                 print(f"[Capture] ID {track_id} - {capture_count + 1}/{MAX_CAPTURES_PER_ID}장 캡처 완료")
         
         # ─────────────────────────────────────────
         # 거수자(5초+)에게 MediaPipe 적용
         # ─────────────────────────────────────────
         keypoints = None
+        keypoints_age = None
         if elapsed >= LOITERING_TIME and mediapipe_service.is_enabled():
-            # 프레임 간격에 따라 MediaPipe 호출 (성능 최적화)
-            if mediapipe_service.should_process_frame():
-                keypoints = mediapipe_service.extract_pose_keypoints(frame, box)
-            elif tracker.get("last_keypoints"):
-                # 이전 프레임 관절 재사용 (스킵된 프레임)
-                keypoints = tracker["last_keypoints"]
+            # 스케줄러가 고른 트래커만 관절 추출 제출 (워커 스레드, 결과는 apply_pose_results()에서 반영)
+            if run_pose:
+                submit_pose_job(session, track_id, box, frame, now)
+            
+            # 화면 표시용: 마지막으로 추출된 관절 (keypoints_age = 그 관절의 프레임 이후 지난 시간)
+            last_keypoints = store.last_keypoints(slot)
+            if last_keypoints is not None:
+                keypoints = last_keypoints.tolist()
+                keypoints_age = now - store.pose_time[slot]
             
-            if keypoints:
-                # 관절 히스토리 저장 (이상행동 분석용)
-                tracker["keypoints_history"].append(keypoints)
-                if len(tracker["keypoints_history"]) > KEYPOINT_HISTORY_LENGTH:
-                    tracker["keypoints_history"].pop(0)  # 오래된 것 삭제
-                tracker["last_keypoints"] = keypoints
-                
-                # 이상행동 분석
-                abnormal = analyze_abnormal_behavior(keypoints, tracker["keypoints_history"])
-                if abnormal and not tracker.get("abnormal_notified"):
-                    print(f"[DANGER] 이상행동 감지! ID: {track_id} - {', '.join(abnormal)}")
-                    save_snapshot(frame, score, box, track_id=track_id, 
-                                stay_duration=elapsed, is_loitering=True)
-                    tracker["abnormal_notified"] = True
-                    return {"type": "abnormal", "behaviors": abnormal, "keypoints": keypoints}
+            # 워커 결과에서 이상행동이 나왔으면 이번 프레임에 알림
+            abnormal = session.pose_events.pop(track_id, None)
+            if abnormal and not store.abnormal_notified[slot]:
+                print(f"[DANGER] 이상행동 감지! ID: {track_id} - {', '.join(abnormal)}")
+                save_snapshot(frame, score, box, track_id=track_id, 
+                            stay_duration=elapsed, is_loitering=True,
+                            input_size=session.input_size)
+                store.abnormal_notified[slot] = True
+                return {"type": "abnormal", "behaviors": abnormal, "keypoints": keypoints,
+                        "keypoints_age": keypoints_age}
         
         # ─────────────────────────────────────────
         # 첫 거수자 판정 (5초 경과)
         # ─────────────────────────────────────────
-        if not tracker["notified"] and elapsed >= LOITERING_TIME:
+        if not store.notified[slot] and elapsed >= LOITERING_TIME:
             print(f"[ALERT] 거수자 감지 ID: {track_id} - {elapsed:.1f}초 체류!")
             save_snapshot(frame, score, box, track_id=track_id, 
-                         stay_duration=elapsed, is_loitering=True)
-            tracker["notified"] = True
-            return {"type": "loitering", "keypoints": keypoints, "elapsed": elapsed}
+                         stay_duration=elapsed, is_loitering=True,
+                         input_size=session.input_size)
+            store.notified[slot] = True
+            return {"type": "loitering", "keypoints": keypoints, "keypoints_age": keypoints_age, "elapsed": elapsed}
         
         # 이미 거수자로 판정된 경우 → 관절 정보만 반환
-        if tracker["notified"] and keypoints:
-            return {"type": "tracking", "keypoints": keypoints}
+        if store.notified[slot] and keypoints:
+            return {"type": "tracking", "keypoints": keypoints, "keypoints_age": keypoints_age}
     
     return None
 
 
+# ==================================================
+# 관절 추출 스케줄 (트래커별)
+# ==================================================
+# [학습 포인트: 트래커별 라운드 로빈 + 시간 예산]
+# - 기존: 세션 카운터 1개를 거수자마다 증가 → 거수자가 여러 명이면 누가 언제 추출될지 들쭉날쭉,
+#   한 프레임에 Pose 추론이 여러 번 몰리기도 함
+# - 변경: 프레임마다 추출할 트래커를 먼저 고름
+#   · 트래커마다 MEDIAPIPE_FRAME_INTERVAL 프레임에 1번 (마지막 관절에 이상 징후가 있으면 매 프레임 후보)
+#   · 이상 징후 → 가장 오래 추출 안 한 트래커 순 (라운드 로빈)
+#   · 프레임당 예산만큼 적립한 시간 안에서만 실행 (토큰 버킷, 평균 추출 시간으로 계산)
+def _pose_due(session, track_ids, now, frame_index=None):
+    """
+    관절 추출 주기가 된 트래커 [(이상 징후 없음, 마지막 추출 프레임, track_id, slot), ...]
+
+    - 후보: LOITERING_TIME 이상 머문 트래커 (화이트리스트/첫 얼굴 검사 대기/추출 진행 중 제외)
+    - 트래커마다 MEDIAPIPE_FRAME_INTERVAL 프레임에 1번 (이상 징후가 있으면 매 프레임)
+    - frame_index: 기준 프레임 번호 (기본: 이번 프레임)
+    """
+    store = session.trackers
+    frame_index = session.processed_frames if frame_index is None else frame_index
+    interval = mediapipe_service.get_frame_interval()
+
+    due = []
+    for track_id in track_ids:
+        slot = store.slot(track_id)
+        if (slot is None or store.is_whitelisted[slot] or store.face_pending[slot]
+                or now - store.start_time[slot] < LOITERING_TIME or track_id in session.pose_jobs):
+            continue
+        last = store.pose_frame[slot]
+        if store.pose_alert[slot] or last < 0 or frame_index - last >= interval:
+            due.append((not store.pose_alert[slot], last, track_id, slot))
+    return due
+
+
+def schedule_pose(session, track_ids, now=None):
+    """
+    이번 프레임에 관절을 추출할 트래커 선택
+
+    - 후보: LOITERING_TIME 이상 머문 트래커 (화이트리스트/첫 얼굴 검사 대기 제외)
+
+    Args:
+        session: 카메라 세션 (CameraSession)
+        track_ids: 이번 프레임에 보인 track_id 리스트
+        now: 현재 시각 (없으면 time.time())
+
+    Returns:
+        관절을 추출할 track_id 집합
+    """
+    if not (mediapipe_service.is_enabled() and mediapipe_service.is_available()) or mediapipe_service.is_frame_pass():
+        return set()
+    now = time.time() if now is None else now
+    store = session.trackers
+    frame_index = session.processed_frames
+
+    due = _pose_due(session, track_ids, now)
+    if not due:
+        return set()
+
+    budget = mediapipe_service.get_frame_budget_ms()
+    cost = max(mediapipe_service.get_pose_time_ms(), 0.1)
+    session.pose_credit = min(session.pose_credit + budget, max(budget, cost))
+
+    selected = set()
+    due.sort(key=lambda item: item[:2])
+    for _, _, track_id, slot in due:
+        if session.pose_credit < cost:
+            session.pose_deferred += len(due) - len(selected)
+            break
+        session.pose_credit -= cost
+        store.pose_frame[slot] = frame_index
+        selected.add(track_id)
+    session.pose_runs += len(selected)
+    return selected
+
+
+def submit_pose_job(session, track_id, box, frame, now):
+    """트래커 1개의 관절 추출 제출 (트래커 전용 VIDEO 모드 인스턴스, 진행 중인 작업은 트래커당 1개)"""
+    future = mediapipe_service.submit_pose((session.token, track_id), frame, box, session.input_size, now)
+    if future is not None:
+        session.pose_jobs[track_id] = (future, now)
+
+
+def apply_pose_results(session):
+    """
+    끝난 관절 추출 결과를 트래커에 반영 (프레임마다 1번)
+
+    - 끝난 결과를 모아 관절 히스토리에 추가 + 규칙 평가 1번 (_record_poses)
+    - 관절 시각 = 추출을 제출한 프레임 시각 (keypoints_age, 규칙 시간 창 기준)
+    - 이상행동은 session.pose_events에 보관 → 다음 check_loitering()에서 알림/캡처
+    """
+    store = session.trackers
+    done_ids, slots, results, times = [], [], [], []
+    for track_id, (future, submitted_at) in list(session.pose_jobs.items()):
+        if not future.done():
+            continue
+        del session.pose_jobs[track_id]
+        try:
+            keypoints = future.result()
+        except Exception as e:
+            print(f"[Pose] ID {track_id} 관절 추출 실패: {e}")
+            keypoints = None
+
+        slot = store.slot(track_id)
+        if slot is None or not keypoints or len(keypoints) != track_store_service.NUM_KEYPOINTS:
+            continue
+        done_ids.append(track_id)
+        slots.append(slot)
+        results.append(keypoints)
+        times.append(submitted_at)
+    _record_poses(session, done_ids, slots, results, times)
+
+
+# [학습 포인트: 프레임 1회 Pose 백엔드 (YOLO-pose)]
+# - MediaPipe: 거수자마다 ROI 추론 → 거수자가 늘면 추론 횟수/시간도 늘어남 (그래서 스케줄러/예산이 필요)
+# - YOLO-pose: 프레임 전체 1번 추론으로 모든 사람의 박스 + 관절 → 사람 수와 무관한 비용
+#   · prepare_frame()이 감지 추론과 같이 비동기로 시작 (session.pose_frame_wanted가 True일 때만)
+#   · 결과 사람 박스 ↔ 트래커 박스를 IoU로 1:1 매칭 → 추출 주기가 된 거수자만 관절 반영
+#   · 같은 프레임에서 반영되므로 이상행동 알림도 그 프레임의 check_loitering()에서 바로 발생
+def apply_frame_pose(session, track_ids, boxes, pose_outputs, now=None):
+    """
+    프레임 1회 Pose 결과를 트래커에 반영 + 다음 프레임에 Pose 추론이 필요한지 표시
+
+    Args:
+        session: 카메라 세션 (CameraSession)
+        track_ids: 이번 프레임에 보인 track_id 리스트
+        boxes: track_ids와 같은 순서의 사람 박스
+        pose_outputs: prepare_frame()에서 시작한 Pose 추론 결과 (없으면 None)
+        now: 현재 시각 (없으면 time.time())
+    """
+    if not mediapipe_service.is_frame_pass():
+        return
+    if not (mediapipe_service.is_enabled() and mediapipe_service.is_available()):
+        session.pose_frame_wanted = False
+        return
+    now = time.time() if now is None else now
+    store = session.trackers
+
+    due = _pose_due(session, track_ids, now)
+    if due and pose_outputs is not None:
+        # 짝을 못 찾은 거수자도 주기만큼 기다림 (관절이 안 잡히는 사람 때문에 매 프레임 Pose 추론하지 않도록)
+        for _, _, _, slot in due:
+            store.pose_frame[slot] = session.processed_frames
+        session.pose_runs += 1
+
+        pose_boxes, pose_keypoints = mediapipe_service.decode_frame_pose(pose_outputs, session.input_size)
+        if len(pose_boxes):
+            box_index = {track_id: index for index, track_id in enumerate(track_ids)}
+            due_ids = [track_id for _, _, track_id, _ in due]
+            due_boxes = [boxes[box_index[track_id]] for track_id in due_ids]
+            pairs = _assign(iou_matrix(pose_boxes, due_boxes), POSE_MATCH_MIN_IOU)
+            matched_ids = [due_ids[col] for _, col in pairs]
+            _record_poses(session, matched_ids, [store.slot(track_id) for track_id in matched_ids],
+                          pose_keypoints[[row for row, _ in pairs]], [now] * len(pairs))
+
+    # 다음 프레임: 추출 주기가 된 거수자가 있을 때만 Pose 추론 (이번 프레임에 반영한 트래커는 주기만큼 제외)
+    session.pose_frame_wanted = bool(_pose_due(session, track_ids, now, session.processed_frames + 1))
+
+
+# ==================================================
+# 얼굴 검사 (비동기)
+# ==================================================
+# [학습 포인트: Future 폴링]
+# - Haar 얼굴 탐지는 사람 영역 크기에 따라 수 ms~수십 ms → 프레임 루프에서 돌리면 첫 등장 프레임 지연이 튐
+# - 사람 영역만 복사해 FaceRecognitionWhitelist의 스레드풀에 제출하고 Future를 세션에 보관
+# - 결과 반영은 다음 프레임들의 apply_face_checks()에서 (세션 프레임 처리 스레드만 트래커를 수정 → 잠금 불필요)
+#
+# [학습 포인트: 검사할 프레임 고르기]
+# - 첫 등장 프레임은 흔들리거나 옆/뒷모습인 경우가 많음 → 탐지 실패 후 재검사가 반복됨
+# - 처음 FACE_QUALITY_FRAMES 프레임 동안 머리 영역 품질(선명도 x 크기 x 정면 정도)만 계산하고
+#   가장 좋은 크롭 1장으로 검사 (품질이 충분하면 바로) → 트래커당 탐지 횟수 감소, 인식률 증가
+def _head_and_quality(session, slot, box, frame, face_whitelist):
+    """트래커의 현재 머리 영역 크롭 + 품질 (관절이 있으면 얼굴 관절 기준)"""
+    keypoints = session.trackers.last_keypoints(slot)
+    head = face_whitelist.crop_head(frame, box, session.input_size, keypoints)
+    return head, face_quality(head, keypoints)
+
+
+def collect_face_candidate(session, track_id, box, frame, face_whitelist):
+    """
+    첫 얼굴 검사 후보 프레임 비교 (새 트래커 생성 시 + 이후 후보 수집 중인 프레임마다)
+
+    - 수집 중에는 face_pending → 캡처/거수자 판정 보류 (기존 첫 검사 대기와 같음)
+    - FACE_QUALITY_FRAMES 프레임째 또는 품질이 FACE_QUALITY_GOOD 이상이면 가장 좋은 크롭으로 검사 제출
+    - 끝까지 FACE_QUALITY_MIN 미만이면 검사하지 않고 재검사(schedule_face_rechecks)로 넘김
+    """
+    store = session.trackers
+    slot = store.slot(track_id)
+    if len(face_whitelist.known_names) == 0:
+        session.face_candidates.pop(track_id, None)
+        store.face_pending[slot] = False
+        return
+
+    head, quality = _head_and_quality(session, slot, box, frame, face_whitelist)
+    best_quality, best_head, frames = session.face_candidates.get(track_id, (-1.0, None, 0))
+    if quality > best_quality:
+        best_quality, best_head = quality, head.copy()
+    frames += 1
+
+    if frames < FACE_QUALITY_FRAMES and best_quality < FACE_QUALITY_GOOD:
+        session.face_candidates[track_id] = (best_quality, best_head, frames)
+        store.face_pending[slot] = True
+        return
+
+    session.face_candidates.pop(track_id, None)
+    store.face_checked_frame[slot] = session.processed_frames
+    if best_quality < FACE_QUALITY_MIN:
+        session.face_checks_skipped += 1
+        store.face_pending[slot] = False
+        return
+    if not submit_face_check(session, track_id, best_head, face_whitelist, first=True):
+        store.face_pending[slot] = False
+
+
+def submit_face_check(session, track_id, head, face_whitelist, first=False):
+    """
+    트래커 1개의 얼굴 검사 제출
+
+    Args:
+        head: 머리 영역 크롭 (face_whitelist.crop_head)
+        first: 첫 등장 검사 여부 (True면 결과가 나올 때까지 캡처/거수자 판정 보류)
+
+    Returns:
+        제출 여부 (등록된 얼굴이 없으면 제출 안 함 → 화이트리스트 아님으로 확정)
+    """
+    store = session.trackers
+    slot = store.slot(track_id)
+    store.face_checked_frame[slot] = session.processed_frames
+    future = face_whitelist.submit_head_check(head)
+    if future is None:
+        return False
+
+    session.face_checks[track_id] = (future, first)
+    session.face_checks_submitted += 1
+    store.face_pending[slot] = first
+    return True
+
+
+def apply_face_checks(session):
+    """
+    끝난 얼굴 검사 결과를 트래커에 반영 (프레임마다 1번)
+
+    - 결과는 세션 캐시에도 저장 (같은 ID 재등장 시 재사용)
+    - 이미 만료된 트래커의 결과는 캐시에만 저장
+    """
+    store = session.trackers
+    for track_id, (future, first) in list(session.face_checks.items()):
+        if not future.done():
+            continue
+        del session.face_checks[track_id]
+        try:
+            is_whitelisted, whitelist_name = future.result()
+        except Exception as e:
+            print(f"[FaceCheck] ID {track_id} 얼굴 검사 실패: {e}")
+            is_whitelisted, whitelist_name = False, None
+        session.cache_whitelist_result(track_id, is_whitelisted, whitelist_name)
+        if is_whitelisted:
+            session.face_check_hits += 1
+
+        slot = store.slot(track_id)
+        if slot is None:
+            continue
+        if first:
+            store.face_pending[slot] = False
+        if is_whitelisted and not store.is_whitelisted[slot]:
+            store.is_whitelisted[slot] = True
+            store.whitelist_name[slot] = whitelist_name
+            print(f"[Whitelist] 등록된 사용자 감지: {whitelist_name} (ID: {track_id})")
+
+
+def schedule_face_rechecks(session, frame, track_ids, boxes, face_whitelist):
+    """
+    화이트리스트가 아닌 트래커 얼굴 재검사 (FACE_CHECK_INTERVAL 프레임마다, 프레임당 시간 예산 안에서)
+
+    - 첫 검사에서 얼굴이 안 보였던 사람(뒤돌아 있음 등)도 나중에 화이트리스트로 확인
+    - 예산: 프레임마다 FACE_CHECK_BUDGET_MS씩 적립, 평균 검사 시간만큼 쓰고 제출 (토큰 버킷)
+      → 사람이 많아도 프레임당 얼굴 검사 시간이 예산을 넘지 않음 (오래 검사 안 한 트래커부터)
+    - 진행 중인 검사가 워커 수 x 2 이상이면 제출 안 함 (큐가 쌓이지 않도록)
+    - 머리 영역 품질이 FACE_QUALITY_MIN 미만인 프레임은 건너뜀 (다음 프레임에 다시 확인)
+
+    Args:
+        session: 카메라 세션 (CameraSession)
+        frame: 원본 프레임 (BGR)
+        track_ids: 이번 프레임에 보인 track_id 리스트
+        boxes: track_id별 박스 리스트
+        face_whitelist: 얼굴 인식 화이트리스트 객체
+    """
+    cost = max(face_whitelist.check_time_ms, 0.1)
+    session.face_check_credit = min(session.face_check_credit + FACE_CHECK_BUDGET_MS,
+                                    max(FACE_CHECK_BUDGET_MS, cost))
+    if session.face_check_credit < cost:
+        return
+
+    store = session.trackers
+    frame_index = session.processed_frames
+    due = []
+    for track_id, box in zip(track_ids, boxes):
+        slot = store.slot(track_id)
+        if (slot is None or store.is_whitelisted[slot] or track_id in session.face_checks
+                or track_id in session.face_candidates):
+            continue
+        if frame_index - store.face_checked_frame[slot] >= FACE_CHECK_INTERVAL:
+            due.append((store.face_checked_frame[slot], track_id, box))
+    due.sort(key=lambda item: item[:2])
+    for _, track_id, box in due:
+        if session.face_check_credit < cost or len(session.face_checks) >= face_whitelist.max_workers * 2:
+            break
+        head, quality = _head_and_quality(session, store.slot(track_id), box, frame, face_whitelist)
+        if quality < FACE_QUALITY_MIN:
+            session.face_checks_skipped += 1
+            continue
+        if submit_face_check(session, track_id, head, face_whitelist):
+            session.face_check_credit -= cost
+
+
 # ==================================================
 # 트래커 정리
 # ==================================================
-def cleanup_old_trackers():
+def cleanup_old_trackers(session):
     """
     오래된 트래커 정리 (매 프레임 호출)
     
     TRACKER_TIMEOUT 시간 동안 감지되지 않은 트래커 삭제
     → 사람이 화면에서 사라졌거나 감지 실패한 경우
+    → 외형 임베딩이 있으면 상태를 갤러리에 보관 (다시 나타나면 같은 ID로 재연결)
+    
+    Args:
+        session: 카메라 세션 (CameraSession)
     """
+    store = session.trackers
     now = time.time()
     
-    # 만료된 트래커 ID 수집
-    expired = [
-        tid for tid, t in _active_trackers.items() 
-        if now - t["last_seen"] > TRACKER_TIMEOUT
-    ]
+    # 만료된 슬롯 수집 (last_seen 배열 비교 1번)
+    expired = store.expired_slots(now, TRACKER_TIMEOUT)
+    if len(expired) == 0:
+        return
     
-    # 삭제 및 로그 출력
-    for tid in expired:
-        elapsed = _active_trackers[tid]["last_seen"] - _active_trackers[tid]["start_time"]
-        print(f"[Leave] ID: {tid} - 총 체류시간: {elapsed:.1f}초")
-        del _active_trackers[tid]
+    # 로그 출력, 갤러리 보관 및 슬롯 반환
+    for slot in expired:
+        track_id = int(store.track_id[slot])
+        elapsed = store.last_seen[slot] - store.start_time[slot]
+        print(f"[Leave] ID: {track_id} - 총 체류시간: {elapsed:.1f}초")
+        session.face_candidates.pop(track_id, None)
+        session.pose_events.pop(track_id, None)
+        # 아직 시작 안 한 추출은 취소, 실행 중이면 끝난 뒤 전용 인스턴스 반납 (작업이 다시 잡지 않도록)
+        job = session.pose_jobs.pop(track_id, None)
+        mediapipe_service.release_landmarker((session.token, track_id), job[0] if job else None)
+        if store.embedding_time[slot] > 0:
+            session.lost_tracks.add(store.export(slot), store.embedding[slot], now)
+    store.remove_slots(expired)
@@ -1,40 +1,370 @@
 """
-얼굴 인식 화이트리스트 모듈 (OpenCV DNN 기반)
+얼굴 인식 화이트리스트 모듈 (OpenCV 기반)
 
-- 서버 시작 시 known_faces/ 폴더의 얼굴 인코딩 로드
+- 서버 시작 시 known_faces/ 폴더의 얼굴 임베딩 로드
 - YOLO 바운딩 박스 내 얼굴 탐지 및 매칭 수행
-- OpenCV DNN FaceNet 기반 가벼운 얼굴 인식
+- submit_face_check(): 머리 영역만 복사해 스레드풀에서 검사 (프레임 루프는 Future만 받음)
+
+[머리 영역 + 품질]
+- 얼굴 탐지는 사람 박스 전체가 아니라 머리 영역에서만 (관절이 있으면 얼굴 관절 주변, 없으면 박스 위쪽 1/3)
+  → 다리/배경을 훑지 않아 탐지 시간 감소, 작은 머리는 확대해 먼 사람 얼굴도 탐지
+- face_quality(): 선명도(라플라시안 분산) x 크기 x 정면 정도(관절) → 트래커가 검사할 프레임 선택에 사용
+
+[얼굴 백엔드 (환경변수 AI_FACE_BACKEND)]
+- yunet: OpenCV YuNet 얼굴 탐지 + SFace 얼굴 인식 (128차원 임베딩, 눈/코/입 랜드마크로 정렬)
+  → models/face/에 face_detection_yunet_2023mar.onnx, face_recognition_sface_2021dec.onnx 필요
+- haar: Haar Cascade 탐지 + 히스토그램/픽셀 인코딩 (모델 파일 불필요, 가벼움)
+- auto (기본): yunet 모델 파일이 있으면 yunet, 없으면 haar
+
+[매칭 (벡터화)]
+- 등록 얼굴 임베딩을 L2 정규화해 (N, D) 연속 행렬 1개로 보관
+- 검사 = 행렬 x 임베딩 1번 + argmax → 등록 인원이 수백 명이어도 프레임당 비용 거의 일정
+- 백엔드마다 코사인 유사도 임계값이 다름 (match_threshold)
+
+[임베딩 캐시 (known_faces/.embeddings/)]
+- 백엔드 버전별 {version}.json (파일명/내용 해시/이름/행 번호) + 임베딩 행렬 .npy
+- 시작/새로고침: 파일 내용 해시가 캐시에 있으면 디코딩/탐지/인코딩 생략, 바뀐 게 없으면 .npy를 메모리 매핑
+- 업로드는 임베딩 1개 추가, 삭제는 이름으로 행 제거 (폴더 재검사 없음)
+- 얼굴이 없는 이미지도 해시로 기억 → 매번 다시 탐지하지 않음
+
+[대량 등록 (enroll_archive)]
+- ZIP 1개 (이름/사진.jpg 또는 이름_1.jpg) → 프로세스 풀에서 디코딩 → 탐지 → 인코딩 (GIL 없이 코어 수만큼 병렬)
+- 결과를 갤러리에 한 번에 추가 (캐시 저장 1번 + 갤러리 튜플 교체 1번), 이미지별 상태 반환
 """
 
+import os
+import json
+import time
+import hashlib
+import threading
+import zipfile
+import multiprocessing
 import cv2
 import numpy as np
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Tuple, Optional, List, Union
 
 
+FACE_BACKEND = os.getenv("AI_FACE_BACKEND", "auto").lower()   # auto / yunet / haar
+YUNET_MODEL = "face_detection_yunet_2023mar.onnx"
+SFACE_MODEL = "face_recognition_sface_2021dec.onnx"
+EMBEDDING_CACHE_DIR = ".embeddings"    # known_faces/ 아래 임베딩 캐시 폴더
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+
+# 대량 등록 설정
+ENROLL_WORKERS = int(os.getenv("AI_FACE_ENROLL_WORKERS", "0"))   # 0: CPU 코어 수 (최대 8)
+ENROLL_POOL_MIN_IMAGES = 8            # 이보다 적으면 프로세스 풀 없이 바로 인코딩 (풀 시작 비용이 더 큼)
+ENROLL_MAX_IMAGES = 1000              # ZIP 1개당 최대 이미지 수
+ENROLL_MAX_IMAGE_BYTES = 10 * 1024 * 1024   # 이미지 1장 최대 크기 (압축 해제 기준)
+
+# 머리 영역 / 얼굴 품질 설정
+HEAD_TOP_RATIO = 1 / 3                # 관절이 없을 때 머리 영역 = 박스 위쪽 비율
+HEAD_MIN_HEIGHT = 96                  # 이보다 작은 머리 영역은 확대 후 탐지 (Haar 최소 얼굴 크기 보장)
+QUALITY_SHARPNESS_REF = 300.0         # 라플라시안 분산(높이 64px 기준)이 이 값 이상이면 선명도 1
+QUALITY_SIZE_REF = 96                 # 머리 영역 높이(px)가 이 값 이상이면 크기 점수 1
+QUALITY_UNKNOWN_FRONTAL = 0.6         # 관절이 없을 때 정면 정도 (알 수 없음)
+
+
+def person_name_from_file(stem: str) -> str:
+    """파일명에서 사용자 이름 추출 (확장자 제거, _숫자 제거) 예: 홍길동_1 -> 홍길동"""
+    if '_' in stem and stem.rsplit('_', 1)[-1].isdigit():
+        return stem.rsplit('_', 1)[0]
+    return stem
+
+
+def unique_image_path(folder: Path, name: str, ext: str) -> Path:
+    """등록 이미지 저장 경로 (이름 + 확장자, 같은 파일이 있으면 _1, _2 ... 추가)"""
+    safe_name = name.replace(" ", "_").replace("/", "_").replace("\\", "_")
+    path = folder / f"{safe_name}{ext}"
+    counter = 1
+    while path.exists():
+        path = folder / f"{safe_name}_{counter}{ext}"
+        counter += 1
+    return path
+
+
+# ==================================================
+# 얼굴 백엔드
+# ==================================================
+# 공통 인터페이스
+# - detect_largest(image, min_size) → 가장 큰 얼굴 (백엔드별 얼굴 정보) 또는 None
+# - embed(image, face) → L2 정규화된 임베딩 (float32, D)
+# - match_threshold: 같은 사람으로 보는 최소 코사인 유사도
+class HaarFaceBackend:
+    """Haar Cascade 탐지 + 히스토그램/픽셀 인코딩 (기존 방식)"""
+    
+    name = "haar"
+    version = "haar-v1"            # 임베딩 캐시 키 (인코딩 방식이 바뀌면 올림)
+    match_threshold = 1 - 0.48     # 기존 코사인 거리 임계값 0.48 (낮을수록 엄격)
+    
+    def __init__(self):
+        # OpenCV의 기본 Haar Cascade 사용 (가장 가벼움)
+        cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        self.face_cascade = cv2.CascadeClassifier(cascade_path)
+        
+        if self.face_cascade.empty():
+            print("[FaceRecognition] [ERROR] 얼굴 탐지 모델 로드 실패")
+        else:
+            print("[FaceRecognition] 얼굴 탐지기 초기화 완료 (Haar Cascade)")
+    
+    def detect_largest(self, image: np.ndarray, min_size: int):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        faces = self.face_cascade.detectMultiScale(
+            gray, scaleFactor=1.1, minNeighbors=5, minSize=(min_size, min_size)
+        )
+        if len(faces) == 0:
+            return None
+        # 가장 큰 얼굴 선택
+        return max(faces, key=lambda f: f[2] * f[3])
+    
+    def embed(self, image: np.ndarray, face) -> Optional[np.ndarray]:
+        """
+        얼굴 이미지에서 특징 벡터(인코딩) 추출
+        - OpenCV 히스토그램 + 리사이즈 기반 간단한 인코딩
+        """
+        x, y, w, h = face
+        face_img = image[y:y+h, x:x+w]
+        if face_img.size == 0:
+            return None
+        
+        # 얼굴 이미지를 고정 크기로 리사이즈 (128x128로 디테일 강화)
+        face_resized = cv2.resize(face_img, (128, 128))
+        
+        # 그레이스케일 변환
+        if len(face_resized.shape) == 3:
+            gray = cv2.cvtColor(face_resized, cv2.COLOR_BGR2GRAY)
+        else:
+            gray = face_resized
+        
+        # 히스토그램 기반 간단한 인코딩
+        hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
+        hist = cv2.normalize(hist, hist).flatten()
+        
+        # 추가: 평탄화된 픽셀 값도 포함
+        flattened = gray.flatten().astype(np.float32) / 255.0
+        
+        # 히스토그램 + 리사이즈된 특징 결합 (128x128 대응)
+        return _normalize(np.concatenate([hist, flattened[:512]]))
+
+
+class YuNetFaceBackend:
+    """OpenCV YuNet 얼굴 탐지 + SFace 얼굴 인식 (DNN, 랜드마크 정렬)"""
+    
+    name = "yunet"
+    version = "yunet-2023mar-sface-2021dec"
+    match_threshold = 0.363        # SFace 코사인 유사도 권장 임계값 (OpenCV 문서)
+    
+    def __init__(self, models_dir: Path, score_threshold: float):
+        self.detector = cv2.FaceDetectorYN.create(
+            str(models_dir / YUNET_MODEL), "", (320, 320), score_threshold
+        )
+        self.recognizer = cv2.FaceRecognizerSF.create(str(models_dir / SFACE_MODEL), "")
+        # DNN 네트워크는 입력 크기를 바꿔 가며 쓰므로 스레드풀 워커 간 공유 시 잠금 필요
+        self._lock = threading.Lock()
+        print("[FaceRecognition] 얼굴 탐지기 초기화 완료 (YuNet + SFace)")
+    
+    @staticmethod
+    def available(models_dir: Path) -> bool:
+        return (
+            hasattr(cv2, "FaceDetectorYN")
+            and (models_dir / YUNET_MODEL).exists()
+            and (models_dir / SFACE_MODEL).exists()
+        )
+    
+    def detect_largest(self, image: np.ndarray, min_size: int):
+        h, w = image.shape[:2]
+        with self._lock:
+            self.detector.setInputSize((w, h))
+            _, faces = self.detector.detect(image)
+        if faces is None:
+            return None
+        faces = faces[(faces[:, 2] >= min_size) & (faces[:, 3] >= min_size)]
+        if len(faces) == 0:
+            return None
+        # 가장 큰 얼굴 선택 (x, y, w, h, 랜드마크 10개, 점수)
+        return faces[np.argmax(faces[:, 2] * faces[:, 3])]
+    
+    def embed(self, image: np.ndarray, face) -> Optional[np.ndarray]:
+        with self._lock:
+            aligned = self.recognizer.alignCrop(image, face)
+            feature = self.recognizer.feature(aligned)
+        return _normalize(feature.ravel())
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    vector = vector.astype(np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def create_face_backend(models_dir: Path, score_threshold: float):
+    """AI_FACE_BACKEND 설정에 맞는 얼굴 백엔드 생성 (yunet 모델이 없으면 haar로 폴백)"""
+    if FACE_BACKEND in ("auto", "yunet"):
+        if YuNetFaceBackend.available(models_dir):
+            try:
+                return YuNetFaceBackend(models_dir, score_threshold)
+            except cv2.error as e:
+                print(f"[FaceRecognition] [WARN] YuNet/SFace 로드 실패: {e}")
+        elif FACE_BACKEND == "yunet":
+            print(f"[FaceRecognition] [WARN] YuNet/SFace 모델 없음 ({models_dir}) → Haar Cascade 사용")
+    return HaarFaceBackend()
+
+
+def encode_image_bytes(backend, data: bytes) -> Tuple[str, Optional[np.ndarray]]:
+    """
+    이미지 바이트 → (상태, 가장 큰 얼굴의 정규화 임베딩)
+    
+    상태: "enrolled" / "no_face" / "decode_failed" / "error"
+    """
+    try:
+        # cv2.imread()는 한글 경로를 지원하지 않으므로 바이트에서 디코딩
+        img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            return "decode_failed", None
+        
+        face = backend.detect_largest(img, 30)
+        if face is None:
+            return "no_face", None
+        encoding = backend.embed(img, face)
+        return ("enrolled", encoding) if encoding is not None else ("no_face", None)
+    except Exception as e:
+        print(f"[FaceRecognition] [ERROR] 인코딩 실패: {e}")
+        return "error", None
+
+
+# ─────────────────────────────────────────────
+# 머리 영역 + 얼굴 품질
+# ─────────────────────────────────────────────
+def head_box(box, keypoints=None) -> List[float]:
+    """
+    사람 박스 → 머리 영역 박스 (같은 좌표계)
+    
+    - 얼굴 관절 (MediaPipe 0~10: 코, 눈, 귀, 입)이 3개 이상 보이면 그 주변
+    - 아니면 박스 위쪽 HEAD_TOP_RATIO
+    """
+    x1, y1, x2, y2 = box
+    if keypoints is not None:
+        face_points = np.asarray(keypoints, dtype=np.float32)[:11]
+        visible = face_points[face_points[:, 2] >= 0.5, :2]
+        if len(visible) >= 3:
+            cx, cy = visible.mean(axis=0)
+            if not (x1 <= cx <= x2 and y1 <= cy <= y2):
+                # 오래된 관절 (사람이 이미 이동) → 박스 위쪽 사용
+                return [x1, y1, x2, y1 + (y2 - y1) * HEAD_TOP_RATIO]
+            half = max(float(np.ptp(visible, axis=0).max()) * 0.8, (x2 - x1) * 0.12)
+            # 이마/머리카락이 들어가도록 위쪽을 조금 더 포함
+            return [max(x1, cx - half), max(y1, cy - half * 1.3), min(x2, cx + half), min(y2, cy + half)]
+    return [x1, y1, x2, y1 + (y2 - y1) * HEAD_TOP_RATIO]
+
+
+def _frontalness(keypoints) -> float:
+    """정면 정도 (0~1): 코가 두 눈 가운데 있으면 1, 옆/뒷모습이면 0"""
+    if keypoints is None:
+        return QUALITY_UNKNOWN_FRONTAL
+    points = np.asarray(keypoints, dtype=np.float32)
+    nose, left_eye, right_eye = points[0], points[2], points[5]
+    if min(nose[2], left_eye[2], right_eye[2]) < 0.5:
+        return 0.0
+    eye_distance = abs(left_eye[0] - right_eye[0])
+    offset = abs(nose[0] - (left_eye[0] + right_eye[0]) / 2)
+    return float(max(0.0, 1 - 2 * offset / max(eye_distance, 1e-3)))
+
+
+def face_quality(head: np.ndarray, keypoints=None) -> float:
+    """
+    머리 영역 크롭의 얼굴 검사 품질 (0~1, 탐지 없이 계산 - 수십 μs)
+    
+    = 선명도 (흔들림/초점) x 크기 x 정면 정도
+    """
+    if head.size == 0:
+        return 0.0
+    h, w = head.shape[:2]
+    gray = cv2.cvtColor(head, cv2.COLOR_BGR2GRAY)
+    if h > 64:
+        # 선명도는 같은 높이로 줄여서 비교 (해상도에 따라 분산이 달라지지 않도록)
+        gray = cv2.resize(gray, (max(1, round(w * 64 / h)), 64), interpolation=cv2.INTER_AREA)
+    sharpness = min(1.0, float(cv2.Laplacian(gray, cv2.CV_32F).var()) / QUALITY_SHARPNESS_REF)
+    size = min(1.0, h / QUALITY_SIZE_REF)
+    return sharpness * size * _frontalness(keypoints)
+
+
+# ─────────────────────────────────────────────
+# 대량 등록 프로세스 풀 워커
+# ─────────────────────────────────────────────
+# [학습 포인트: 프로세스 풀]
+# - Haar/YuNet 탐지와 인코딩은 CPU 연산 → 스레드로는 GIL/백엔드 잠금 때문에 거의 병렬화되지 않음
+# - 워커 프로세스마다 백엔드를 1번 만들어 두고 (initializer) 이미지 바이트만 주고받음
+# - spawn 방식: 서버 프로세스의 스레드/모델 상태를 복제하지 않음 (Windows와 동일하게 동작)
+_worker_backend = None
+
+
+def _init_enroll_worker(backend_name: str, models_dir: str, score_threshold: float):
+    """워커 프로세스 시작 시 1번: 서버와 같은 얼굴 백엔드 생성 (임베딩 호환)"""
+    global _worker_backend
+    if backend_name == YuNetFaceBackend.name:
+        _worker_backend = YuNetFaceBackend(Path(models_dir), score_threshold)
+    else:
+        _worker_backend = HaarFaceBackend()
+
+
+def _enroll_worker_encode(data: bytes) -> Tuple[str, Optional[np.ndarray]]:
+    return encode_image_bytes(_worker_backend, data)
+
+
+def _enroll_worker_count() -> int:
+    return ENROLL_WORKERS if ENROLL_WORKERS > 0 else min(8, os.cpu_count() or 1)
+
+
+def _archive_member_name(info: zipfile.ZipInfo) -> str:
+    """ZIP 항목 이름 (Windows 탐색기로 만든 ZIP의 한글 파일명은 cp949)"""
+    if info.flag_bits & 0x800:
+        return info.filename
+    try:
+        return info.filename.encode("cp437").decode("cp949")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return info.filename
+
+
+# ==================================================
+# 화이트리스트
+# ==================================================
 class FaceRecognitionWhitelist:
-    """OpenCV DNN 기반 얼굴 인식 화이트리스트 시스템"""
+    """얼굴 인식 화이트리스트 시스템 (백엔드 교체 가능, 행렬 매칭)"""
     
     # 얼굴 인식 설정
-    FACE_DETECTION_CONFIDENCE = 0.5  # 얼굴 탐지 최소 신뢰도
-    FACE_MATCH_THRESHOLD = 0.48      # 얼굴 매칭 임계값 (낮을수록 엄격, 오탐 감소)
+    FACE_DETECTION_CONFIDENCE = 0.5  # 얼굴 탐지 최소 신뢰도 (YuNet)
     
     def __init__(self, known_faces_dir: str, models_dir: Union[str, Path, None] = None):
         """
         Args:
             known_faces_dir: 등록된 얼굴 이미지 폴더 경로
-            models_dir: OpenCV DNN 모델 파일 경로 (없으면 자동 생성)
+            models_dir: 얼굴 모델 파일 경로 (없으면 자동 생성)
         """
         self.known_faces_dir = Path(known_faces_dir)
         self.known_faces_dir.mkdir(exist_ok=True)
         
-        # 등록된 얼굴 인코딩 저장
-        self.known_encodings: List[np.ndarray] = []
-        self.known_names: List[str] = []
+        # 등록된 얼굴 갤러리: ((N, D) 정규화 임베딩 행렬, 행별 이름)
+        # - 변경 시 튜플을 통째로 교체 → 스레드풀 워커가 항상 일관된 행렬/이름 쌍을 봄
+        # - _entries: 행별 {file, hash, name}, _skipped: 얼굴 없는 이미지 {hash: file}
+        self._gallery: Tuple[np.ndarray, List[str]] = (np.zeros((0, 0), dtype=np.float32), [])
+        self._entries: List[dict] = []
+        self._skipped: dict = {}
+        self._cache_generation = 0
+        self._update_lock = threading.Lock()   # 업로드/삭제/새로고침 동시 실행 방지
+        self.last_load_ms = 0.0
+        
+        # 비동기 처리용 스레드풀 (submit_face_check)
+        self.max_workers = 2
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="face-check")
         
-        # 비동기 처리용 스레드풀
-        self.executor = ThreadPoolExecutor(max_workers=2)
+        # 대량 등록용 프로세스 풀 (첫 대량 등록 때 생성 후 재사용 → 요청마다 인터프리터를 띄우지 않음)
+        self._enroll_pool: Optional[ProcessPoolExecutor] = None
+        self._enroll_pool_lock = threading.Lock()
+        
+        # 얼굴 검사 1회 평균 시간 (ms, 지수 이동 평균) - 프레임당 재검사 예산 계산용
+        self.check_time_ms = 20.0
         
         # 모델 디렉토리 설정
         if models_dir is None:
@@ -43,192 +373,454 @@ class FaceRecognitionWhitelist:
             self.models_dir = Path(models_dir)
         self.models_dir.mkdir(parents=True, exist_ok=True)
         
-        # OpenCV DNN 얼굴 탐지기 초기화
-        self._init_face_detector()
+        # 얼굴 탐지/인식 백엔드 초기화
+        self.backend = create_face_backend(self.models_dir, self.FACE_DETECTION_CONFIDENCE)
         
         # 등록된 얼굴 로드
         self._load_known_faces()
     
-    def _init_face_detector(self):
-        """OpenCV DNN 기반 얼굴 탐지기 초기화"""
-        # OpenCV의 기본 Haar Cascade 사용 (가장 가벼움)
-        cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        self.face_cascade = cv2.CascadeClassifier(cascade_path)
-        
-        if self.face_cascade.empty():
-            print("[FaceRecognition] [ERROR] 얼굴 탐지 모델 로드 실패")
-        else:
-            print("[FaceRecognition] 얼굴 탐지기 초기화 완료 (Haar Cascade)")
+    @property
+    def known_names(self) -> List[str]:
+        return self._gallery[1]
     
     def _load_known_faces(self):
-        """서버 시작 시 known_faces/ 폴더의 얼굴 인코딩 로드"""
-        self.known_encodings.clear()
-        self.known_names.clear()
+        """
+        known_faces/ 폴더 ↔ 임베딩 캐시 동기화 (시작/새로고침)
         
+        - 내용 해시가 캐시에 있는 파일은 저장된 임베딩 재사용, 새 파일만 인코딩
+        - 바뀐 게 없으면 캐시 .npy를 메모리 매핑한 행렬을 그대로 사용
+        """
+        started = time.perf_counter()
         if not self.known_faces_dir.exists():
             print(f"[FaceRecognition] 화이트리스트 폴더 없음: {self.known_faces_dir}")
             return
         
-        # 지원 이미지 확장자
-        image_extensions = {'.jpg', '.jpeg', '.png', '.bmp'}
-        
-        for img_path in self.known_faces_dir.iterdir():
-            if img_path.suffix.lower() not in image_extensions:
-                continue
+        with self._update_lock:
+            if self._entries or self._skipped:
+                cached_matrix, cached_entries, cached_skipped = self._gallery[0], self._entries, self._skipped
+            else:
+                cached_matrix, cached_entries, cached_skipped = self._read_cache()
+            cached_rows = {entry["hash"]: row for row, entry in enumerate(cached_entries)}
             
-            try:
-                # 이미지 로드 (한글 경로 지원)
-                # cv2.imread()는 한글 경로를 지원하지 않으므로 numpy로 읽음
-                with open(img_path, 'rb') as f:
-                    img_data = np.frombuffer(f.read(), np.uint8)
-                img = cv2.imdecode(img_data, cv2.IMREAD_COLOR)
-                
-                if img is None:
-                    print(f"[FaceRecognition] [WARN] 이미지 로드 실패: {img_path.name}")
+            rows, entries, skipped = [], [], {}
+            encoded = 0
+            for img_path in sorted(self.known_faces_dir.iterdir()):
+                if img_path.suffix.lower() not in IMAGE_EXTENSIONS:
                     continue
-                
-                # 얼굴 탐지
-                gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-                faces = self.face_cascade.detectMultiScale(
-                    gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30)
-                )
-                
-                if len(faces) == 0:
-                    print(f"[FaceRecognition] [WARN] 얼굴 없음: {img_path.name}")
+                try:
+                    data = img_path.read_bytes()
+                except OSError as e:
+                    print(f"[FaceRecognition] [ERROR] 처리 실패 {img_path.name}: {e}")
                     continue
+                digest = hashlib.sha1(data).hexdigest()
+                entry = {"file": img_path.name, "hash": digest, "name": person_name_from_file(img_path.stem)}
                 
-                # 가장 큰 얼굴 선택
-                x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
-                face_roi = img[y:y+h, x:x+w]
-                
-                # 얼굴 인코딩 생성 (간단한 히스토그램 기반)
-                encoding = self._get_face_encoding(face_roi)
-                
-                # 파일명에서 사용자 이름 추출 (확장자 제거, _숫자 제거)
-                name = img_path.stem
-                # 예: "홍길동_1" -> "홍길동"
-                if '_' in name and name.rsplit('_', 1)[-1].isdigit():
-                    name = name.rsplit('_', 1)[0]
-                
-                self.known_encodings.append(encoding)
-                self.known_names.append(name)
-                
-                print(f"[FaceRecognition] 등록: {name} ({img_path.name})")
+                if digest in cached_rows:
+                    rows.append(cached_matrix[cached_rows[digest]])
+                    entries.append(entry)
+                    continue
+                if digest in cached_skipped:
+                    skipped[digest] = img_path.name
+                    continue
                 
-            except Exception as e:
-                print(f"[FaceRecognition] [ERROR] 처리 실패 {img_path.name}: {e}")
+                # 캐시에 없는 파일만 디코딩 → 탐지 → 인코딩
+                encoded += 1
+                encoding = self._encode_image(data, img_path.name)
+                if encoding is None:
+                    skipped[digest] = img_path.name
+                    continue
+                rows.append(encoding)
+                entries.append(entry)
+                print(f"[FaceRecognition] 등록: {entry['name']} ({img_path.name})")
+            
+            if entries == cached_entries and skipped == cached_skipped:
+                matrix = cached_matrix        # 변경 없음 → 메모리 매핑 행렬 그대로
+            else:
+                matrix = np.ascontiguousarray(np.vstack(rows), dtype=np.float32) if rows else self._empty_matrix()
+                self._write_cache(matrix, entries, skipped)
+            self._set_gallery(matrix, entries, skipped)
         
-        print(f"[FaceRecognition] {len(self.known_names)}명의 화이트리스트 사용자 로드 완료")
+        self.last_load_ms = (time.perf_counter() - started) * 1000
+        print(f"[FaceRecognition] {len(entries)}명의 화이트리스트 사용자 로드 완료 "
+              f"({self.backend.name}, {self.last_load_ms:.0f}ms, 새로 인코딩 {encoded}개)")
     
-    def _get_face_encoding(self, face_img: np.ndarray) -> np.ndarray:
+    def add_known_face(self, img_path: Union[str, Path]) -> bool:
         """
-        얼굴 이미지에서 특징 벡터(인코딩) 추출
-        - OpenCV 히스토그램 + 리사이즈 기반 간단한 인코딩
+        업로드된 이미지 1장을 갤러리에 추가 (폴더 재검사 없음)
+        
+        Returns:
+            얼굴이 감지되어 등록되었는지 여부
         """
-        # 얼굴 이미지를 고정 크기로 리사이즈 (128x128로 디테일 강화)
-        face_resized = cv2.resize(face_img, (128, 128))
+        img_path = Path(img_path)
+        data = img_path.read_bytes()
+        digest = hashlib.sha1(data).hexdigest()
+        encoding = self._encode_image(data, img_path.name)
         
-        # 그레이스케일 변환
-        if len(face_resized.shape) == 3:
-            gray = cv2.cvtColor(face_resized, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = face_resized
+        with self._update_lock:
+            matrix, _ = self._gallery
+            entries, skipped = list(self._entries), dict(self._skipped)
+            if encoding is None:
+                skipped[digest] = img_path.name
+            else:
+                entries.append({"file": img_path.name, "hash": digest, "name": person_name_from_file(img_path.stem)})
+                matrix = np.vstack([matrix, encoding[None]]) if len(matrix) else encoding[None].copy()
+                print(f"[FaceRecognition] 등록: {entries[-1]['name']} ({img_path.name})")
+            self._write_cache(matrix, entries, skipped)
+            self._set_gallery(matrix, entries, skipped)
+        return encoding is not None
+    
+    def remove_known_name(self, name: str) -> int:
+        """
+        이름으로 등록 얼굴 제거 (폴더 재검사 없음)
         
-        # LBP (Local Binary Pattern) 유사 특징 추출
-        # 히스토그램 기반 간단한 인코딩
-        hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
-        hist = cv2.normalize(hist, hist).flatten()
+        Returns:
+            제거된 임베딩 수
+        """
+        with self._update_lock:
+            matrix, _ = self._gallery
+            keep = [row for row, entry in enumerate(self._entries) if entry["name"] != name]
+            removed = len(self._entries) - len(keep)
+            skipped = {
+                digest: file for digest, file in self._skipped.items()
+                if person_name_from_file(Path(file).stem) != name
+            }
+            if removed == 0 and skipped == self._skipped:
+                return 0
+            entries = [self._entries[row] for row in keep]
+            matrix = np.ascontiguousarray(matrix[keep]) if keep else self._empty_matrix()
+            self._write_cache(matrix, entries, skipped)
+            self._set_gallery(matrix, entries, skipped)
+        return removed
+    
+    def enroll_archive(self, fileobj) -> dict:
+        """
+        ZIP 안의 얼굴 이미지 대량 등록
         
-        # 추가: 평탄화된 픽셀 값도 포함
-        flattened = gray.flatten().astype(np.float32) / 255.0
+        - 이름: 폴더 안의 이미지는 폴더 이름 (홍길동/1.jpg), 아니면 파일명 (홍길동_1.jpg)
+        - 인코딩은 프로세스 풀에서 병렬 실행, 갤러리 추가/캐시 저장은 마지막에 1번
+        - 얼굴이 감지된 이미지만 known_faces/에 저장
         
-        # 히스토그램 + 리사이즈된 특징 결합 (128x128 대응)
-        encoding = np.concatenate([hist, flattened[:512]])
+        Args:
+            fileobj: ZIP 파일 객체 (seek 가능)
+        
+        Returns:
+            {"enrolled": 등록 수, "elapsedMs": 소요 시간, "results": 이미지별 {file, name, status, filename}}
+            status: enrolled / no_face / decode_failed / error / duplicate / unsupported / too_large
+        
+        Raises:
+            ValueError: ZIP이 아니거나 이미지가 너무 많음
+        """
+        started = time.perf_counter()
+        try:
+            archive = zipfile.ZipFile(fileobj)
+        except zipfile.BadZipFile as e:
+            raise ValueError(f"ZIP 파일이 아닙니다: {e}")
+        
+        # 1) ZIP 항목 → (결과 레코드, 이미지 바이트)
+        results, blobs, pending = [], [], []
+        with archive:
+            members = [
+                info for info in archive.infolist()
+                if not info.is_dir() and not any(
+                    part.startswith(".") or part == "__MACOSX"
+                    for part in Path(_archive_member_name(info)).parts
+                )
+            ]
+            if len(members) > ENROLL_MAX_IMAGES:
+                raise ValueError(f"이미지가 너무 많습니다 ({len(members)}장, 최대 {ENROLL_MAX_IMAGES}장)")
+            
+            for info in members:
+                member = Path(_archive_member_name(info))
+                parent = member.parent.name
+                result = {
+                    "file": member.as_posix(),
+                    "name": parent if parent else person_name_from_file(member.stem),
+                    "status": None,
+                    "filename": None
+                }
+                results.append(result)
+                if member.suffix.lower() not in IMAGE_EXTENSIONS:
+                    result["status"] = "unsupported"
+                elif info.file_size > ENROLL_MAX_IMAGE_BYTES:
+                    result["status"] = "too_large"
+                else:
+                    pending.append(result)
+                    blobs.append(archive.read(info))
+        
+        # 2) 이미 등록된 이미지 / ZIP 안 중복 제외 (내용 해시)
+        known = {entry["hash"] for entry in self._entries} | set(self._skipped)
+        digests, encode_rows = [], []
+        for index, (result, data) in enumerate(zip(pending, blobs)):
+            digest = hashlib.sha1(data).hexdigest()
+            digests.append(digest)
+            if digest in known:
+                result["status"] = "duplicate"
+            else:
+                known.add(digest)
+                encode_rows.append(index)
+        
+        # 3) 디코딩 → 탐지 → 인코딩 (프로세스 풀)
+        encoded = self._encode_many([blobs[index] for index in encode_rows])
+        
+        # 4) 저장 + 갤러리에 한 번에 추가
+        with self._update_lock:
+            matrix, _ = self._gallery
+            entries, skipped = list(self._entries), dict(self._skipped)
+            rows = []
+            for index, (status, encoding) in zip(encode_rows, encoded):
+                result = pending[index]
+                result["status"] = status
+                if encoding is None:
+                    continue
+                path = unique_image_path(self.known_faces_dir, result["name"], Path(result["file"]).suffix.lower())
+                try:
+                    path.write_bytes(blobs[index])
+                except OSError as e:
+                    print(f"[FaceRecognition] [ERROR] 저장 실패 {path.name}: {e}")
+                    result["status"] = "error"
+                    continue
+                result["filename"] = path.name
+                result["name"] = person_name_from_file(path.stem)
+                entries.append({"file": path.name, "hash": digests[index], "name": result["name"]})
+                rows.append(encoding)
+            
+            if rows:
+                new_rows = np.vstack(rows).astype(np.float32)
+                matrix = np.vstack([matrix, new_rows]) if len(matrix) else new_rows
+                self._write_cache(matrix, entries, skipped)
+                self._set_gallery(matrix, entries, skipped)
+        
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"[FaceRecognition] 대량 등록: {len(rows)}/{len(results)}장 ({elapsed_ms:.0f}ms)")
+        return {"enrolled": len(rows), "elapsedMs": round(elapsed_ms, 1), "results": results}
+    
+    def _encode_many(self, blobs: List[bytes]) -> List[Tuple[str, Optional[np.ndarray]]]:
+        """이미지 바이트 여러 개 인코딩 (많으면 프로세스 풀, 적으면 현재 백엔드로 바로)"""
+        workers = min(_enroll_worker_count(), len(blobs))
+        if len(blobs) < ENROLL_POOL_MIN_IMAGES or workers < 2:
+            return [encode_image_bytes(self.backend, data) for data in blobs]
+        
+        # chunksize: 작업을 몇 장씩 묶어 보내 프로세스 간 통신 횟수 감소
+        chunksize = max(1, len(blobs) // (workers * 4))
+        try:
+            return list(self._get_enroll_pool().map(_enroll_worker_encode, blobs, chunksize=chunksize))
+        except BrokenProcessPool:
+            # 워커 프로세스가 죽음 → 풀을 버리고 다음 등록 때 새로 생성
+            print("[FaceRecognition] [WARN] 등록 프로세스 풀 중단 - 현재 백엔드로 인코딩")
+            with self._enroll_pool_lock:
+                self._enroll_pool = None
+            return [encode_image_bytes(self.backend, data) for data in blobs]
+    
+    def _get_enroll_pool(self) -> ProcessPoolExecutor:
+        """
+        대량 등록용 프로세스 풀 반환 (최초 호출 시 생성)
         
+        [학습 포인트: spawn 워커와 엔트리포인트]
+        - spawn 워커는 새 인터프리터에서 메인 모듈을 다시 import
+        - main.py의 __main__ 가드 + freeze_support()가 없으면 워커마다 서버가 다시 시작됨
+        """
+        with self._enroll_pool_lock:
+            if self._enroll_pool is None:
+                self._enroll_pool = ProcessPoolExecutor(
+                    max_workers=_enroll_worker_count(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_enroll_worker,
+                    initargs=(self.backend.name, str(self.models_dir), self.FACE_DETECTION_CONFIDENCE)
+                )
+            return self._enroll_pool
+    
+    def _encode_image(self, data: bytes, file_name: str) -> Optional[np.ndarray]:
+        """이미지 바이트 → 가장 큰 얼굴의 정규화 임베딩 (실패/얼굴 없음 → None)"""
+        status, encoding = encode_image_bytes(self.backend, data)
+        if status == "decode_failed":
+            print(f"[FaceRecognition] [WARN] 이미지 로드 실패: {file_name}")
+        elif status == "no_face":
+            print(f"[FaceRecognition] [WARN] 얼굴 없음: {file_name}")
         return encoding
     
-    def _compare_faces(self, encoding1: np.ndarray, encoding2: np.ndarray) -> float:
-        """두 얼굴 인코딩 비교 (유사도 반환, 0~1, 낮을수록 유사)"""
-        # 코사인 유사도 기반 거리
-        norm1 = np.linalg.norm(encoding1)
-        norm2 = np.linalg.norm(encoding2)
+    def _empty_matrix(self) -> np.ndarray:
+        return np.zeros((0, 0), dtype=np.float32)
+    
+    def _set_gallery(self, matrix: np.ndarray, entries: List[dict], skipped: dict):
+        self._entries = entries
+        self._skipped = skipped
+        self._gallery = (matrix, [entry["name"] for entry in entries])
+    
+    # ─────────────────────────────────────────────
+    # 임베딩 캐시 (디스크)
+    # ─────────────────────────────────────────────
+    def _cache_dir(self) -> Path:
+        return self.known_faces_dir / EMBEDDING_CACHE_DIR
+    
+    def _read_cache(self):
+        """
+        캐시 인덱스 + 임베딩 행렬 (메모리 매핑) 읽기
         
-        if norm1 == 0 or norm2 == 0:
-            return 1.0
+        Returns:
+            (행렬, 행별 entries, skipped) - 캐시가 없거나 깨졌으면 빈 값
+        """
+        index_path = self._cache_dir() / f"{self.backend.version}.json"
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            entries, skipped = index["entries"], index["skipped"]
+            matrix = self._empty_matrix()
+            if entries:
+                matrix = np.load(self._cache_dir() / index["matrix"], mmap_mode="r")
+                if matrix.shape[0] != len(entries):
+                    raise ValueError("행 수 불일치")
+            self._cache_generation = index.get("generation", 0)
+            return matrix, entries, skipped
+        except FileNotFoundError:
+            return self._empty_matrix(), [], {}
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[FaceRecognition] [WARN] 임베딩 캐시 무시 (다시 인코딩): {e}")
+            return self._empty_matrix(), [], {}
+    
+    def _write_cache(self, matrix: np.ndarray, entries: List[dict], skipped: dict):
+        """
+        캐시 저장 (새 세대 파일명으로 .npy 저장 → 인덱스 원자적 교체)
         
-        similarity = np.dot(encoding1, encoding2) / (norm1 * norm2)
-        distance = 1 - similarity
+        - 메모리 매핑 중인 이전 .npy를 덮어쓰지 않음 (Windows는 매핑된 파일 교체 불가)
+        - 이전 세대 .npy는 지울 수 있을 때 정리
+        """
+        cache_dir = self._cache_dir()
+        try:
+            cache_dir.mkdir(exist_ok=True)
+            self._cache_generation += 1
+            matrix_name = f"{self.backend.version}.{self._cache_generation}.npy"
+            if entries:
+                np.save(cache_dir / matrix_name, np.asarray(matrix, dtype=np.float32))
+            index = {
+                "version": self.backend.version,
+                "generation": self._cache_generation,
+                "matrix": matrix_name,
+                "entries": entries,
+                "skipped": skipped
+            }
+            tmp_path = cache_dir / f"{self.backend.version}.json.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f, ensure_ascii=False)
+            os.replace(tmp_path, cache_dir / f"{self.backend.version}.json")
+            
+            for old in cache_dir.glob(f"{self.backend.version}.*.npy"):
+                if old.name != matrix_name:
+                    try:
+                        old.unlink()
+                    except OSError:
+                        pass   # 아직 매핑 중 → 다음 저장 때 정리
+        except OSError as e:
+            print(f"[FaceRecognition] [WARN] 임베딩 캐시 저장 실패: {e}")
+    
+    def match_embedding(self, encoding: np.ndarray) -> Tuple[bool, Optional[str], float]:
+        """
+        정규화 임베딩 1개 ↔ 등록 얼굴 전체 (행렬 곱 1번 + argmax)
+        
+        Returns:
+            (is_whitelisted, person_name, 최고 코사인 유사도)
+        """
+        matrix, names = self._gallery
+        if len(names) == 0:
+            return False, None, 0.0
         
-        return distance
+        similarity = matrix @ encoding
+        best = int(np.argmax(similarity))
+        if similarity[best] >= self.backend.match_threshold:
+            return True, names[best], float(similarity[best])
+        return False, None, float(similarity[best])
     
-    def check_face_in_box(self, frame: np.ndarray, box: List[int]) -> Tuple[bool, Optional[str]]:
+    def check_face_in_box(self, frame: np.ndarray, box: List[int],
+                          input_size: int = 640, keypoints=None) -> Tuple[bool, Optional[str]]:
         """
         바운딩 박스 내 얼굴이 화이트리스트에 있는지 확인
         
         Args:
             frame: 원본 프레임
-            box: YOLO 바운딩 박스 [x1, y1, x2, y2] (640x640 기준)
+            box: YOLO 바운딩 박스 [x1, y1, x2, y2] (input_size x input_size 기준)
+            input_size: 감지 모델 입력 크기 (320 / 640)
+            keypoints: 포즈 관절 (있으면 얼굴 관절 주변만 탐색)
         
         Returns:
             (is_whitelisted, person_name) - 화이트리스트 여부와 인식된 이름
         """
-        if len(self.known_encodings) == 0:
+        if len(self.known_names) == 0:
             return False, None
         
+        return self._check_face_in_roi(self.crop_head(frame, box, input_size, keypoints))
+    
+    def crop_head(self, frame: np.ndarray, box: List[int], input_size: int = 640, keypoints=None) -> np.ndarray:
+        """머리 영역 크롭 (원본 프레임의 뷰 - 보관하려면 복사)"""
+        return self._crop_person(frame, head_box(box, keypoints), input_size)
+    
+    def submit_face_check(self, frame: np.ndarray, box: List[int],
+                          input_size: int = 640, keypoints=None) -> Optional[Future]:
+        """
+        check_face_in_box()를 스레드풀에서 실행 (프레임 루프를 막지 않음)
+        
+        Returns:
+            (is_whitelisted, person_name)을 돌려줄 Future
+            (등록된 얼굴이 없거나 영역이 비어 있으면 None → 검사할 필요 없음)
+        """
+        return self.submit_head_check(self.crop_head(frame, box, input_size, keypoints))
+    
+    def submit_head_check(self, head: Optional[np.ndarray]) -> Optional[Future]:
+        """
+        머리 영역 크롭의 얼굴 검사를 스레드풀에 제출
+        
+        - 크롭을 복사해서 넘김 → 다음 프레임이 디코딩되어도 안전
+        """
+        if len(self.known_names) == 0 or head is None or head.size == 0:
+            return None
+        return self.executor.submit(self._timed_check, head.copy())
+    
+    def _timed_check(self, head: np.ndarray) -> Tuple[bool, Optional[str]]:
+        """스레드풀 작업: 얼굴 검사 + 평균 소요 시간 갱신"""
+        started = time.perf_counter()
+        if head.shape[0] < HEAD_MIN_HEIGHT:
+            # 먼 사람의 작은 머리 영역 확대 (머리 영역만이라 확대해도 탐지 비용이 작음)
+            scale = HEAD_MIN_HEIGHT / head.shape[0]
+            head = cv2.resize(head, (max(1, round(head.shape[1] * scale)), HEAD_MIN_HEIGHT),
+                              interpolation=cv2.INTER_LINEAR)
+        result = self._check_face_in_roi(head)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.check_time_ms = 0.8 * self.check_time_ms + 0.2 * elapsed_ms
+        return result
+    
+    def _crop_person(self, frame: np.ndarray, box: List[int], input_size: int) -> np.ndarray:
+        """바운딩 박스 좌표 (모델 입력 좌표 -> 원본 스케일 변환) 영역 크롭"""
+        x1, y1, x2, y2 = box
+        h, w = frame.shape[:2]
+        
+        scale_x = w / input_size
+        scale_y = h / input_size
+        
+        x1 = int(max(0, x1 * scale_x))
+        y1 = int(max(0, y1 * scale_y))
+        x2 = int(min(w, x2 * scale_x))
+        y2 = int(min(h, y2 * scale_y))
+        
+        return frame[y1:y2, x1:x2]
+    
+    def _check_face_in_roi(self, person_roi: np.ndarray) -> Tuple[bool, Optional[str]]:
+        """사람 영역에서 얼굴 탐지 → 임베딩 → 등록 얼굴 행렬과 비교"""
         try:
-            # 바운딩 박스 좌표 추출 (640x640 -> 원본 스케일 변환)
-            x1, y1, x2, y2 = box
-            h, w = frame.shape[:2]
-            
-            scale_x = w / 640
-            scale_y = h / 640
-            
-            x1 = int(max(0, x1 * scale_x))
-            y1 = int(max(0, y1 * scale_y))
-            x2 = int(min(w, x2 * scale_x))
-            y2 = int(min(h, y2 * scale_y))
-            
-            # 사람 영역 크롭
-            person_roi = frame[y1:y2, x1:x2]
-            
             if person_roi.size == 0:
                 return False, None
             
-            # 크롭된 영역에서 얼굴 탐지
-            gray = cv2.cvtColor(person_roi, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(
-                gray, scaleFactor=1.1, minNeighbors=5, minSize=(20, 20)
-            )
-            
-            if len(faces) == 0:
+            # 크롭된 영역에서 얼굴 탐지 (가장 큰 얼굴)
+            face = self.backend.detect_largest(person_roi, 20)
+            if face is None:
                 return False, None
             
-            # 가장 큰 얼굴 선택
-            fx, fy, fw, fh = max(faces, key=lambda f: f[2] * f[3])
-            face_roi = person_roi[fy:fy+fh, fx:fx+fw]
-            
-            if face_roi.size == 0:
+            # 얼굴 임베딩 생성
+            encoding = self.backend.embed(person_roi, face)
+            if encoding is None:
                 return False, None
             
-            # 얼굴 인코딩 생성
-            encoding = self._get_face_encoding(face_roi)
-            
-            # 등록된 얼굴과 비교
-            best_match_idx = -1
-            best_distance = self.FACE_MATCH_THRESHOLD
-            
-            for idx, known_enc in enumerate(self.known_encodings):
-                distance = self._compare_faces(encoding, known_enc)
-                if distance < best_distance:
-                    best_distance = distance
-                    best_match_idx = idx
-            
-            if best_match_idx >= 0:
-                matched_name = self.known_names[best_match_idx]
-                return True, matched_name
-            
-            return False, None
-            
+            # 등록된 얼굴과 비교 (행렬 곱 1번)
+            is_whitelisted, name, _ = self.match_embedding(encoding)
+            return is_whitelisted, name
+        
         except Exception as e:
             print(f"[FaceRecognition] 얼굴 인식 오류: {e}")
             return False, None
@@ -245,3 +837,14 @@ class FaceRecognitionWhitelist:
     def get_whitelist_names(self) -> List[str]:
         """등록된 화이트리스트 사용자 이름 목록"""
         return list(set(self.known_names))
+    
+    def get_settings(self) -> dict:
+        """얼굴 백엔드/갤러리 정보"""
+        matrix, names = self._gallery
+        return {
+            "backend": self.backend.name,
+            "matchThreshold": self.backend.match_threshold,
+            "enrolled": len(names),
+            "embeddingDim": int(matrix.shape[1]) if len(names) else 0,
+            "checkTimeMs": round(self.check_time_ms, 1)
+        }
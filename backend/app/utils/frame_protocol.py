@@ -0,0 +1,107 @@
+"""
+Frame Protocol - CCTV 프레임 바이너리 헤더
+==========================================
+클라이언트 → 서버 프레임 메시지 포맷 (WebSocket binary)
+
+[헤더 v1] (little-endian, 17바이트 + 카메라 ID)
+  offset  size  필드
+  0       2     magic        b"GH" (Guardian Home)
+  2       1     version      1
+  3       1     header_len   헤더 전체 길이 (카메라 ID 포함, JPEG 시작 위치)
+  4       4     seq          프레임 순번 (uint32, 응답에 그대로 돌려줌)
+  8       8     capture_ts   캡처 시각 (float64, ms, 클라이언트 시계)
+  16      1     cam_len      카메라 ID 길이 (바이트, header_len이 1바이트라 최대 255 - 17 = 238)
+  17      N     camera_id    카메라 ID (UTF-8, 길면 문자 단위로 잘라 238바이트 이하)
+  17+N    ...   JPEG payload
+
+[하위 호환]
+- 헤더 없이 JPEG만 보내는 기존 클라이언트도 지원 (0xFFD8로 시작하면 헤더 없음으로 처리)
+- header_len 필드 덕분에 이후 버전에서 필드가 늘어나도 JPEG 위치를 찾을 수 있음
+"""
+import struct
+from collections import namedtuple
+
+
+# ==================================================
+# 상수
+# ==================================================
+MAGIC = b"GH"
+VERSION = 1
+JPEG_SOI = b"\xff\xd8"
+
+_HEADER = struct.Struct("<2sBBIdB")   # magic, version, header_len, seq, capture_ts, cam_len
+HEADER_SIZE = _HEADER.size            # 17
+MAX_CAMERA_ID_BYTES = 255 - HEADER_SIZE   # header_len(1바이트)에 카메라 ID까지 들어가야 함 → 238
+
+
+# 파싱된 헤더 (헤더 없는 프레임은 None)
+FrameHeader = namedtuple("FrameHeader", ["version", "seq", "capture_ts", "camera_id"])
+
+
+class FrameProtocolError(ValueError):
+    """잘못된 프레임 헤더"""
+
+
+# ==================================================
+# 인코딩 / 디코딩
+# ==================================================
+def parse_frame(data):
+    """
+    수신 메시지를 헤더와 JPEG payload로 분리
+
+    Args:
+        data: WebSocket binary 메시지 (bytes)
+
+    Returns:
+        (FrameHeader 또는 None, JPEG payload memoryview)
+
+    Raises:
+        FrameProtocolError: magic/버전/길이가 맞지 않는 경우
+    """
+    view = memoryview(data)
+
+    # 기존 클라이언트: JPEG만 전송
+    if view[:2] == JPEG_SOI:
+        return None, view
+
+    if len(view) < HEADER_SIZE:
+        raise FrameProtocolError(f"헤더 길이 부족: {len(view)}바이트")
+
+    magic, version, header_len, seq, capture_ts, cam_len = _HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise FrameProtocolError(f"알 수 없는 magic: {bytes(magic)!r}")
+    if version < 1:
+        raise FrameProtocolError(f"지원하지 않는 버전: {version}")
+    if header_len < HEADER_SIZE + cam_len or header_len > len(view):
+        raise FrameProtocolError(f"잘못된 header_len: {header_len}")
+
+    camera_id = bytes(view[HEADER_SIZE:HEADER_SIZE + cam_len]).decode("utf-8", errors="replace")
+    header = FrameHeader(version, seq, capture_ts, camera_id)
+    return header, view[header_len:]
+
+
+def build_frame(payload, seq, capture_ts, camera_id=""):
+    """
+    헤더 + JPEG payload 메시지 생성 (테스트/도구용, 브라우저 구현과 동일 포맷)
+
+    Args:
+        payload: JPEG bytes
+        seq: 프레임 순번
+        capture_ts: 캡처 시각 (ms)
+        camera_id: 카메라 ID
+
+    Returns:
+        bytes
+    """
+    cam_bytes = truncate_camera_id(camera_id)
+    header_len = HEADER_SIZE + len(cam_bytes)
+    header = _HEADER.pack(MAGIC, VERSION, header_len, seq & 0xFFFFFFFF, float(capture_ts), len(cam_bytes))
+    return header + cam_bytes + bytes(payload)
+
+
+def truncate_camera_id(camera_id):
+    """카메라 ID → 헤더에 넣을 UTF-8 bytes (MAX_CAMERA_ID_BYTES 이하, 문자 중간에서 자르지 않음)"""
+    cam_bytes = camera_id.encode("utf-8")
+    if len(cam_bytes) <= MAX_CAMERA_ID_BYTES:
+        return cam_bytes
+    return cam_bytes[:MAX_CAMERA_ID_BYTES].decode("utf-8", errors="ignore").encode("utf-8")
@@ -93,6 +93,11 @@ def get_captures():
 # PyInstaller 빌드용 엔트리포인트
 # ============================================
 if __name__ == "__main__":
+    # 얼굴 대량 등록 프로세스 풀(spawn) 워커가 실행 파일을 다시 실행할 때
+    # 서버를 또 띄우지 않고 워커로 동작하도록 (PyInstaller 빌드에서 필수, 다른 코드보다 먼저)
+    import multiprocessing
+    multiprocessing.freeze_support()
+
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=8000)
 
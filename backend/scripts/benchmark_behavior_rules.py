@@ -0,0 +1,109 @@
+"""
+이상행동 규칙 벤치마크 - 트래커별 파이썬 분석 vs 벡터화 규칙 엔진
+================================================================
+관절을 받은 트래커 수를 늘려 가며 프레임당 이상행동 판정 시간을 비교
+
+[측정 경로]
+- legacy: 기존 analyze_abnormal_behavior() (트래커마다 현재 관절 + 직전 1개, 관절마다 파이썬 루프)
+- vector: tracker_service._record_poses()와 같은 경로
+          (링 버퍼에 한 번에 추가 → keypoint_windows()로 규칙 관절만 꺼냄 → behavior_service.evaluate() 1번)
+
+[합성 관절]
+- 트래커마다 서 있는 사람 관절 (MediaPipe 33개 레이아웃) + 프레임마다 작은 흔들림
+- 규칙 판정 결과가 아닌 시간만 비교 (두 경로 모두 같은 입력)
+
+[실행]
+    cd backend
+    python -m scripts.benchmark_behavior_rules --tracks 1 4 16 64 --frames 300
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services import behavior_service, track_store_service
+from app.services.mediapipe_service import MEDIAPIPE_JOINTS, NUM_MEDIAPIPE_KEYPOINTS
+
+
+def legacy_analyze(keypoints, history):
+    """기존 analyze_abnormal_behavior() (MediaPipe 레이아웃, 임계값 그대로)"""
+    joints = MEDIAPIPE_JOINTS
+    behaviors = []
+    nose_y = keypoints[joints["nose"]][1]
+    ankle_y = (keypoints[joints["left_ankle"]][1] + keypoints[joints["right_ankle"]][1]) / 2
+    if ankle_y - nose_y < 50:
+        behaviors.append("FALL")
+    if (keypoints[joints["left_wrist"]][1] < keypoints[joints["left_shoulder"]][1] - 30 or
+            keypoints[joints["right_wrist"]][1] < keypoints[joints["right_shoulder"]][1] - 30):
+        if keypoints[joints["left_wrist"]][2] > 0.3 or keypoints[joints["right_wrist"]][2] > 0.3:
+            behaviors.append("HANDS_UP")
+    if len(history) >= 1:
+        prev = history[-1]
+        total, count = 0, 0
+        for name in ("left_wrist", "right_wrist", "left_ankle", "right_ankle"):
+            i = joints[name]
+            if keypoints[i][2] > 0.3 and prev[i][2] > 0.3:
+                total += ((keypoints[i][0] - prev[i][0]) ** 2 + (keypoints[i][1] - prev[i][1]) ** 2) ** 0.5
+                count += 1
+        if count > 0 and total / count > 50:
+            behaviors.append("FAST_MOTION")
+    return behaviors or None
+
+
+def make_pose(rng, tracks):
+    """서 있는 사람 관절 (tracks, 33, 3)"""
+    pose = np.zeros((tracks, NUM_MEDIAPIPE_KEYPOINTS, 3), dtype=np.float32)
+    pose[..., 2] = 0.9
+    base_x = rng.uniform(50, 550, tracks)[:, None]
+    heights = {"nose": 0, "left_shoulder": 40, "right_shoulder": 40, "left_wrist": 110, "right_wrist": 110,
+               "left_hip": 120, "right_hip": 120, "left_ankle": 220, "right_ankle": 220}
+    for name, dy in heights.items():
+        side = -15 if name.startswith("left") else 15 if name.startswith("right") else 0
+        pose[:, MEDIAPIPE_JOINTS[name], 0] = (base_x + side)[:, 0]
+        pose[:, MEDIAPIPE_JOINTS[name], 1] = 100 + dy
+    return pose
+
+
+def run_legacy(store, slots, poses, times):
+    start = time.perf_counter()
+    for slot, pose, at in zip(slots, poses, times):
+        legacy_analyze(pose.tolist(), store.keypoint_history(slot))
+        store.push_keypoints(slot, pose, at)
+    return time.perf_counter() - start
+
+
+def run_vector(store, slots, poses, times):
+    start = time.perf_counter()
+    store.push_keypoints(slots, poses, times)
+    _, store.flat_since[slots] = behavior_service.evaluate(
+        *store.keypoint_windows(slots, behavior_service.joint_indices()),
+        joints=behavior_service.COMPACT_JOINTS, flat_since=store.flat_since[slots])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="트래커별 이상행동 분석 vs 벡터화 규칙 엔진 시간 비교")
+    parser.add_argument("--tracks", nargs="+", type=int, default=[1, 4, 16, 64], help="관절을 받은 트래커 수")
+    parser.add_argument("--frames", type=int, default=300, help="측정 프레임 수")
+    args = parser.parse_args()
+
+    print(f"history={track_store_service.KEYPOINT_HISTORY_LENGTH}, window={behavior_service.WINDOW_SECONDS}s")
+    print(f"{'tracks':>6} {'path':>6} | {'ms/frame':>8} {'us/track':>8}")
+    for tracks in args.tracks:
+        rng = np.random.default_rng(0)
+        base = make_pose(rng, tracks)
+        jitter = rng.normal(0, 2, (args.frames, *base.shape)).astype(np.float32)
+        jitter[..., 2] = 0
+        for name, run in (("legacy", run_legacy), ("vector", run_vector)):
+            store = track_store_service.TrackStore()
+            slots = np.array([store.add(track_id, [0, 0, 10, 30], 0.0) for track_id in range(tracks)])
+            elapsed = 0.0
+            for index in range(args.frames):
+                times = np.full(tracks, index / 15)   # 15fps로 추출
+                elapsed += run(store, slots, base + jitter[index], times)
+            ms = elapsed * 1000 / args.frames
+            print(f"{tracks:>6} {name:>6} | {ms:8.3f} {ms * 1000 / tracks:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+화이트리스트 대량 등록 벤치마크 - 이미지별 업로드 vs ZIP 대량 등록 (프로세스 풀)
+================================================================================
+같은 이미지 N장을 두 방식으로 등록하는 시간을 비교
+
+[측정 경로]
+- serial: 업로드 API와 같은 경로 (파일 저장 → add_known_face, 1장씩 인코딩 + 캐시 저장)
+- bulk:   enroll_archive (ZIP 해제 → 프로세스 풀 인코딩 → 갤러리/캐시 1번 갱신)
+          프로세스 풀 시작 비용 포함
+
+[입력]
+- --image: 얼굴이 있는 사진 1장 → 밝기를 조금씩 바꿔 N장 생성 (파일 내용이 모두 다름)
+
+[실행]
+    cd backend
+    python -m scripts.benchmark_bulk_enroll --image <얼굴 사진> --sizes 50 200 500 --workers 4
+"""
+import argparse
+import contextlib
+import io
+import shutil
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+import cv2
+
+from app.utils import face_recognition_module
+from app.utils.face_recognition_module import FaceRecognitionWhitelist, unique_image_path
+
+
+def make_images(image, count):
+    """밝기를 조금씩 바꾼 JPEG 바이트 count개 (사용자 이름 = person{i})"""
+    images = []
+    for index in range(count):
+        variant = cv2.convertScaleAbs(image, alpha=1.0 - (index // 40) * 0.01, beta=index % 40 - 20)
+        images.append((f"person{index}", cv2.imencode(".jpg", variant)[1].tobytes()))
+    return images
+
+
+def serial_enroll(folder, images):
+    whitelist = FaceRecognitionWhitelist(folder, folder / "models")
+    start = time.perf_counter()
+    for name, data in images:
+        path = unique_image_path(folder, name, ".jpg")
+        path.write_bytes(data)
+        whitelist.add_known_face(path)
+    return (time.perf_counter() - start) * 1000, len(whitelist.known_names)
+
+
+def bulk_enroll(folder, images):
+    whitelist = FaceRecognitionWhitelist(folder, folder / "models")
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        for name, data in images:
+            archive.writestr(f"{name}.jpg", data)
+    buffer.seek(0)
+    start = time.perf_counter()
+    whitelist.enroll_archive(buffer)
+    return (time.perf_counter() - start) * 1000, len(whitelist.known_names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="이미지별 업로드 vs ZIP 대량 등록 시간 비교")
+    parser.add_argument("--image", required=True, help="얼굴이 있는 사진")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[50, 200, 500], help="등록 이미지 수")
+    parser.add_argument("--workers", type=int, default=0, help="프로세스 풀 크기 (0: CPU 코어 수)")
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image)
+    if image is None:
+        raise SystemExit(f"이미지를 읽을 수 없음: {args.image}")
+    face_recognition_module.ENROLL_WORKERS = args.workers
+
+    print(f"{'images':>6} {'path':>6} | {'total ms':>9} {'ms/image':>8} | {'enrolled':>8}")
+    for size in args.sizes:
+        images = make_images(image, size)
+        for name, enroll in (("serial", serial_enroll), ("bulk", bulk_enroll)):
+            folder = Path(tempfile.mkdtemp(prefix="faces_"))
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    elapsed, enrolled = enroll(folder, images)
+                print(f"{size:>6} {name:>6} | {elapsed:9.0f} {elapsed / size:8.1f} | {enrolled:>8}")
+            finally:
+                shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+화이트리스트 로드 벤치마크 - 전체 재인코딩 vs 임베딩 캐시
+==========================================================
+등록 이미지 수를 늘려 가며 시작/새로고침/업로드/삭제 시간을 비교
+
+[측정 항목]
+- cold:   캐시 없이 시작 (모든 이미지 디코딩 + 얼굴 탐지 + 인코딩 = 기존 reload_known_faces 비용)
+- warm:   캐시가 있는 상태로 시작 (파일 해시만 계산, 임베딩 행렬은 메모리 매핑)
+- reload: 변경 없는 상태에서 새로고침
+- add:    업로드 1장 (기존: 전체 재로드 = cold)
+- delete: 이름 1개 삭제 (기존: 전체 재로드)
+
+[입력]
+- --image: 얼굴이 있는 사진 1장 → 밝기를 조금씩 바꿔 N장 생성 (파일 내용이 모두 다름)
+
+[실행]
+    cd backend
+    python -m scripts.benchmark_face_gallery --image <얼굴 사진> --sizes 10 50 200
+"""
+import argparse
+import contextlib
+import io
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+
+from app.utils.face_recognition_module import FaceRecognitionWhitelist
+
+
+def make_gallery(image, folder, count):
+    """밝기를 조금씩 바꾼 이미지 count장 저장 (사용자 이름 = person{i})"""
+    for index in range(count):
+        variant = cv2.convertScaleAbs(image, alpha=1.0, beta=index % 40 - 20)
+        cv2.imwrite(str(folder / f"person{index}.jpg"), variant)
+
+
+def timed(func, *args):
+    """출력 숨기고 실행 시간 (ms)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(*args)
+        return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="화이트리스트 임베딩 캐시 효과 측정")
+    parser.add_argument("--image", required=True, help="얼굴이 있는 사진")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 50, 200], help="등록 이미지 수")
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image)
+    if image is None:
+        raise SystemExit(f"이미지를 읽을 수 없음: {args.image}")
+
+    print(f"{'faces':>6} {'backend':>7} | {'cold ms':>8} {'warm ms':>8} {'reload':>8} | {'add ms':>7} {'delete':>7}")
+    for size in args.sizes:
+        folder = Path(tempfile.mkdtemp(prefix="faces_"))
+        try:
+            make_gallery(image, folder, size)
+            models = folder / "models"
+
+            cold, whitelist = timed(FaceRecognitionWhitelist, folder, models)
+            warm, whitelist = timed(FaceRecognitionWhitelist, folder, models)
+            reload, _ = timed(whitelist.reload_known_faces)
+
+            new_file = folder / "newcomer.jpg"
+            cv2.imwrite(str(new_file), cv2.flip(image, 1))
+            add, _ = timed(whitelist.add_known_face, new_file)
+            new_file.unlink()
+            delete, _ = timed(whitelist.remove_known_name, "newcomer")
+
+            enrolled = len(whitelist.known_names)
+            print(f"{enrolled:>6} {whitelist.backend.name:>7} | {cold:8.1f} {warm:8.1f} {reload:8.1f} | {add:7.1f} {delete:7.1f}")
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
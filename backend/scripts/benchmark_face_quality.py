@@ -0,0 +1,169 @@
+"""
+얼굴 검사 벤치마크 - 첫 프레임 + 사람 박스 전체 vs 머리 영역 + 품질로 고른 프레임
+==============================================================================
+합성 트랙(사람 박스 안에 얼굴 사진을 붙인 프레임 시퀀스)으로 트랙당 얼굴 탐지 횟수,
+탐지 1회 시간, 화이트리스트 인식률을 비교
+
+[합성 트랙]
+- 등록된 사람: 처음 몇 프레임은 걸어 들어오며 흔들림(모션 블러), 일부는 잠깐 뒤돌아 있음(머리 흐림)
+- 뒤돌아 선 사람: 끝까지 얼굴이 보이지 않음 (등록 여부와 무관, 재검사만 반복되는 경우)
+
+[측정 경로]
+- legacy:  첫 등장 프레임에서 사람 박스 전체 검사 → 실패하면 FACE_CHECK_INTERVAL 프레임마다 재검사
+- quality: tracker_service의 실제 경로 (collect_face_candidate → 머리 영역 최고 품질 프레임 검사,
+           schedule_face_rechecks → 품질 낮은 프레임 건너뜀), 검사 결과는 매 프레임 기다려서 반영
+
+[입력]
+- --image: 얼굴이 있는 사진 1장 (등록 + 합성 트랙의 얼굴로 사용)
+
+[실행]
+    cd backend
+    python -m scripts.benchmark_face_quality --image <얼굴 사진> --tracks 40 --frames 90
+"""
+import argparse
+import contextlib
+import io
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from app.services import tracker_service
+from app.services.session_service import CameraSession
+from app.utils.face_recognition_module import FaceRecognitionWhitelist
+
+
+FRAME_SIZE = 640   # 프레임 = 모델 입력 크기 (박스 좌표 = 픽셀 좌표)
+
+
+def make_scenario(rng, frames, facing_away):
+    """트랙 1개의 프레임별 상태 (박스, 모션 블러 길이, 뒤돌아 있음)"""
+    height = int(rng.integers(300, 480))
+    width = height // 3
+    x, y = int(rng.integers(0, FRAME_SIZE - width - 80)), int(rng.integers(0, FRAME_SIZE - height))
+    walk_in = int(rng.integers(0, 8))
+    turned = int(rng.integers(0, 20)) if rng.random() < 0.3 else 0
+    states = []
+    for index in range(frames):
+        left = x + min(index, walk_in) * 10
+        blur = 25 if index < walk_in else int(rng.choice([0, 0, 0, 5]))
+        away = facing_away or walk_in <= index < walk_in + turned
+        states.append(([left, y, left + width, y + height], blur, away))
+    return states
+
+
+def render(face, background, box, blur, away):
+    """사람 박스(몸 + 머리) 프레임 합성"""
+    frame = background.copy()
+    x1, y1, x2, y2 = box
+    frame[y1:y2, x1:x2] = frame[y1:y2, x1:x2] // 2 + (30, 40, 60)   # 옷/다리 (무늬 있음)
+    head_w = int((x2 - x1) * 0.7)
+    head_h = int(head_w * face.shape[0] / face.shape[1])
+    head = cv2.resize(face, (head_w, head_h))
+    if away:
+        head = cv2.GaussianBlur(head, (0, 0), 12)   # 뒷모습: 얼굴 윤곽 없음
+    hx = x1 + ((x2 - x1) - head_w) // 2
+    frame[y1:y1 + head_h, hx:hx + head_w] = head
+    if blur:
+        kernel = np.zeros((blur, blur), np.float32)
+        kernel[blur // 2] = 1.0 / blur
+        frame[y1:y2, x1:x2] = cv2.filter2D(frame[y1:y2, x1:x2], -1, kernel)
+    return frame
+
+
+def run_legacy(whitelist, frames_of):
+    calls, elapsed, hit_frame = 0, 0.0, None
+    checked = None
+    for index, frame, box in frames_of():
+        if checked is not None and index - checked < tracker_service.FACE_CHECK_INTERVAL:
+            continue
+        checked = index
+        start = time.perf_counter()
+        matched, _ = whitelist._check_face_in_roi(whitelist._crop_person(frame, box, FRAME_SIZE))
+        elapsed += time.perf_counter() - start
+        calls += 1
+        if matched:
+            hit_frame = index
+            break
+    return calls, elapsed, hit_frame
+
+
+def run_quality(whitelist, frames_of):
+    session = CameraSession("bench")
+    session.input_size = FRAME_SIZE
+    track_id, store = 0, session.trackers
+    calls, elapsed, hit_frame = 0, 0.0, None
+    for index, frame, box in frames_of():
+        session.processed_frames = index
+        tracker_service.apply_face_checks(session)
+        if store.slot(track_id) is None:
+            store.add(track_id, box, 0.0)
+            tracker_service.collect_face_candidate(session, track_id, box, frame, whitelist)
+        elif track_id in session.face_candidates:
+            tracker_service.collect_face_candidate(session, track_id, box, frame, whitelist)
+        else:
+            tracker_service.schedule_face_rechecks(session, frame, [track_id], [box], whitelist)
+        for future, _ in list(session.face_checks.values()):
+            start = time.perf_counter()
+            future.result()
+            elapsed += time.perf_counter() - start
+            calls += 1
+        tracker_service.apply_face_checks(session)
+        if store.is_whitelisted[store.slot(track_id)]:
+            hit_frame = index
+            break
+    return calls, elapsed, hit_frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description="얼굴 검사 프레임/영역 선택 방식별 탐지 횟수와 인식률 비교")
+    parser.add_argument("--image", required=True, help="얼굴이 있는 사진")
+    parser.add_argument("--tracks", type=int, default=40, help="합성 트랙 수 (등록된 사람)")
+    parser.add_argument("--frames", type=int, default=90, help="트랙당 프레임 수")
+    args = parser.parse_args()
+
+    face = cv2.imread(args.image)
+    if face is None:
+        raise SystemExit(f"이미지를 읽을 수 없음: {args.image}")
+
+    folder = Path(tempfile.mkdtemp(prefix="faces_"))
+    try:
+        cv2.imwrite(str(folder / "member.png"), face)
+        with contextlib.redirect_stdout(io.StringIO()):
+            whitelist = FaceRecognitionWhitelist(folder, folder / "models")
+
+        rng = np.random.default_rng(0)
+        background = rng.integers(0, 255, (FRAME_SIZE, FRAME_SIZE, 3), dtype=np.uint8)
+        background = cv2.GaussianBlur(background, (0, 0), 3)
+        groups = {
+            "member": [make_scenario(rng, args.frames, False) for _ in range(args.tracks)],
+            "away": [make_scenario(rng, args.frames, True) for _ in range(args.tracks // 4)]
+        }
+
+        print(f"{'tracks':>6} {'path':>7} | {'calls/track':>11} {'ms/call':>7} | {'hit rate':>8} {'hit frame':>9}")
+        for group, scenarios in groups.items():
+            for name, run in (("legacy", run_legacy), ("quality", run_quality)):
+                calls, elapsed, hits = 0, 0.0, []
+                for states in scenarios:
+                    def frames_of(states=states):
+                        for index, (box, blur, away) in enumerate(states):
+                            yield index, render(face, background, box, blur, away), box
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        track_calls, track_elapsed, hit_frame = run(whitelist, frames_of)
+                    calls += track_calls
+                    elapsed += track_elapsed
+                    if hit_frame is not None:
+                        hits.append(hit_frame)
+                hit_rate = len(hits) / len(scenarios)
+                hit_frame = f"{np.mean(hits):9.1f}" if hits else f"{'-':>9}"
+                print(f"{group:>6} {name:>7} | {calls / len(scenarios):11.2f} "
+                      f"{elapsed * 1000 / max(calls, 1):7.2f} | {hit_rate:8.0%} {hit_frame}")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
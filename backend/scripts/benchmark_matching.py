@@ -0,0 +1,120 @@
+"""
+트래커 매칭 벤치마크 - 감지별 greedy 순회 vs 점수 행렬 전역 할당
+================================================================
+프레임당 사람 수(트래커 수 = 감지 수)를 늘려 가며 프레임당 매칭 시간과 ID 중복을 비교
+
+[측정 경로]
+- legacy:    기존 방식 (감지마다 트래커 전체를 파이썬으로 순회, calculate_iou + 거리 점수)
+- greedy:    점수 행렬 + 점수 높은 순 1:1 할당 (scipy 없을 때 경로)
+- hungarian: 점수 행렬 + 헝가리안 1:1 할당 (기본 경로)
+
+[측정 항목]
+- mean / p95 ms: 프레임당 매칭 시간
+- dup: 같은 track_id를 받은 감지 수 (legacy만 발생 가능)
+- switch: 이전 프레임과 다른 ID로 매칭된 감지 수 (사람마다 조금씩 이동한 프레임 기준)
+
+[실행]
+    cd backend
+    python -m scripts.benchmark_matching --people 1 10 50 100 200 --frames 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services import tracker_service
+from app.services.session_service import CameraSession
+
+
+def legacy_match(session, box):
+    """기존 match_detection_to_tracker (비교 기준)"""
+    if not session.trackers:
+        return session.allocate_track_id()
+
+    best_match_id = None
+    best_score = 0
+    curr_center = tracker_service.get_box_center(box)
+    store = session.trackers
+    for track_id in store:
+        prev_box = store.box[store.slot(track_id)].tolist()
+        prev_center = tracker_service.get_box_center(prev_box)
+        iou = tracker_service.calculate_iou(box, prev_box)
+        dist = ((curr_center[0] - prev_center[0])**2 + (curr_center[1] - prev_center[1])**2) ** 0.5
+        dist_score = max(0, 1 - dist / 100)
+        combined_score = iou * 0.5 + dist_score * 0.5
+        if combined_score > 0.25 and combined_score > best_score:
+            best_score = combined_score
+            best_match_id = track_id
+
+    return best_match_id if best_match_id is not None else session.allocate_track_id()
+
+
+def make_scene(people, rng, size=640):
+    """
+    사람 people명의 트래커 박스 + 다음 프레임 감지 박스 (사람마다 몇 px 이동, 순서 섞음)
+
+    Returns:
+        (트래커 박스 리스트, 감지 박스 리스트, 감지별 정답 트래커 인덱스)
+    """
+    w = rng.uniform(20, 60, people)
+    h = rng.uniform(60, 160, people)
+    x1 = rng.uniform(0, size - w)
+    y1 = rng.uniform(0, size - h)
+    prev = np.stack([x1, y1, x1 + w, y1 + h], axis=1)
+    curr = prev + rng.normal(0, 3, (people, 1)) * [1, 0, 1, 0] + rng.normal(0, 3, (people, 1)) * [0, 1, 0, 1]
+
+    order = rng.permutation(people)
+    return prev.astype(int).tolist(), curr[order].astype(int).tolist(), order
+
+
+def _session(prev_boxes):
+    session = CameraSession("benchmark")
+    for box in prev_boxes:
+        slot = session.trackers.add(session.allocate_track_id(), box, 0.0)
+        tracker_service.init_track_motion(session.trackers, slot, box, 0.0)
+    return session
+
+
+def main():
+    parser = argparse.ArgumentParser(description="트래커 매칭 방식별 프레임당 시간 비교")
+    parser.add_argument("--people", nargs="+", type=int, default=[1, 10, 50, 100, 200], help="프레임당 사람 수")
+    parser.add_argument("--frames", type=int, default=200, help="방식별 측정 횟수")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    hungarian = tracker_service.linear_sum_assignment
+
+    def run_legacy(session, boxes):
+        return [legacy_match(session, box) for box in boxes]
+
+    def run_greedy(session, boxes):
+        tracker_service.linear_sum_assignment = None
+        try:
+            return tracker_service.match_detections(session, boxes)
+        finally:
+            tracker_service.linear_sum_assignment = hungarian
+
+    paths = {"legacy": run_legacy, "greedy": run_greedy}
+    if hungarian is not None:
+        paths["hungarian"] = tracker_service.match_detections
+    else:
+        print("[Benchmark] scipy 없음 → hungarian 경로 생략")
+
+    print(f"{'people':>6} {'path':>9} | {'mean ms':>8} {'p95 ms':>8} | {'dup':>4} {'switch':>6}")
+    for people in args.people:
+        prev_boxes, boxes, truth = make_scene(people, rng)
+        for name, func in paths.items():
+            times = []
+            for _ in range(args.frames):
+                session = _session(prev_boxes)
+                start = time.perf_counter()
+                ids = func(session, boxes)
+                times.append((time.perf_counter() - start) * 1000)
+            times = np.array(times)
+            dup = len(ids) - len(set(ids))
+            switch = int(np.sum(np.array(ids) != truth))
+            print(f"{people:>6} {name:>9} | {times.mean():8.3f} {np.percentile(times, 95):8.3f} | {dup:>4} {switch:>6}")
+
+
+if __name__ == "__main__":
+    main()
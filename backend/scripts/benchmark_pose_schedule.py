@@ -0,0 +1,87 @@
+"""
+관절 추출 스케줄 벤치마크 - 세션 카운터 1개 vs 트래커별 스케줄러 (프레임당 시간 예산)
+=====================================================================================
+거수자 수를 늘려 가며 트래커별 관절 추출 간격과 프레임당 Pose 추론 시간을 비교
+
+[측정 경로]
+- legacy:   기존 should_process_frame() (거수자마다 세션 카운터 증가, MEDIAPIPE_FRAME_INTERVAL에 도달하면 추출)
+- schedule: tracker_service.schedule_pose() (트래커별 주기 + 라운드 로빈 + 프레임당 예산)
+
+[시뮬레이션]
+- MediaPipe 추론 대신 추출 1회 = --pose-ms로 계산 (스케줄 결과만 비교, 실제 추론 없음)
+- 감지 결과 순서는 프레임마다 섞음 (YOLO 출력 순서는 신뢰도 순이라 프레임마다 바뀜)
+
+[측정 항목]
+- gap mean / max: 트래커별 연속 추출 사이 프레임 수 (max가 크면 특정 거수자가 오래 굶음)
+- pose ms mean / max: 프레임당 Pose 추론 시간 합
+
+[실행]
+    cd backend
+    python -m scripts.benchmark_pose_schedule --loiterers 1 2 3 6 --frames 300 --pose-ms 15
+"""
+import argparse
+
+import numpy as np
+
+from app.services import mediapipe_service, tracker_service
+from app.services.session_service import CameraSession
+
+
+def run_legacy(loiterers, frames, rng):
+    """기존: 세션 카운터 1개를 거수자 호출마다 증가"""
+    counter, runs = 0, []
+    for _ in range(frames):
+        order = rng.permutation(loiterers)
+        selected = set()
+        for track_id in order:
+            counter += 1
+            if counter >= mediapipe_service.get_frame_interval():
+                counter = 0
+                selected.add(int(track_id))
+        runs.append(selected)
+    return runs
+
+
+def run_schedule(loiterers, frames, rng):
+    """tracker_service.schedule_pose() (실제 스케줄러)"""
+    session = CameraSession("bench")
+    for track_id in range(loiterers):
+        session.trackers.add(track_id, [0, 0, 10, 30], 0.0)
+    runs = []
+    for index in range(frames):
+        session.processed_frames = index
+        order = [int(track_id) for track_id in rng.permutation(loiterers)]
+        runs.append(tracker_service.schedule_pose(session, order, now=1000.0))
+    return runs
+
+
+def summarize(runs, loiterers, pose_ms):
+    gaps = []
+    for track_id in range(loiterers):
+        frames = [index for index, selected in enumerate(runs) if track_id in selected]
+        gaps.extend(np.diff(frames) if len(frames) > 1 else [len(runs)])
+    per_frame = np.array([len(selected) * pose_ms for selected in runs])
+    return np.mean(gaps), np.max(gaps), per_frame.mean(), per_frame.max()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="관절 추출 스케줄 방식별 트래커 간격/프레임당 추론 시간 비교")
+    parser.add_argument("--loiterers", nargs="+", type=int, default=[1, 2, 3, 6], help="거수자 수")
+    parser.add_argument("--frames", type=int, default=300, help="측정 프레임 수")
+    parser.add_argument("--pose-ms", type=float, default=15.0, help="Pose 추론 1회 시간 (ms, 시뮬레이션)")
+    args = parser.parse_args()
+
+    # 추론 없이 스케줄만 비교 (MediaPipe 설치 여부와 무관)
+    mediapipe_service.is_available = lambda: True
+    mediapipe_service._pose_time_ms = args.pose_ms
+    print(f"interval={mediapipe_service.get_frame_interval()}, budget={mediapipe_service.get_frame_budget_ms():.0f}ms")
+    print(f"{'tracks':>6} {'path':>8} | {'gap mean':>8} {'gap max':>7} | {'pose ms mean':>12} {'max':>5}")
+    for loiterers in args.loiterers:
+        for name, run in (("legacy", run_legacy), ("schedule", run_schedule)):
+            runs = run(loiterers, args.frames, np.random.default_rng(0))
+            gap_mean, gap_max, ms_mean, ms_max = summarize(runs, loiterers, args.pose_ms)
+            print(f"{loiterers:>6} {name:>8} | {gap_mean:8.2f} {gap_max:7d} | {ms_mean:12.1f} {ms_max:5.0f}")
+
+
+if __name__ == "__main__":
+    main()
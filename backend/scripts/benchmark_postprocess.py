@@ -0,0 +1,156 @@
+"""
+후처리 경로 벤치마크 - 기존 구현 vs numpy 벡터화 vs 그래프 내 NMS
+=================================================================
+사람이 많은 프레임을 흉내 낸 (1, 7, 2100) 출력으로 프레임당 후처리 시간을 비교
+
+[측정 경로]
+- legacy: 기존 postprocess (전치 → .tolist() → cv2.dnn.NMSBoxes → 딕셔너리 1개씩 생성)
+- numpy:  ai_model_service.detect() 원시 출력 경로 (구조화 배열) + to_predictions()
+- graph:  NMS 그래프만 컴파일해 실행 (입력 = 원시 출력) + detect() + to_predictions()
+
+[클래스가 여러 개 반응하는 앵커]
+- --mixed 비율만큼 사람 앵커에 다른 클래스 점수도 임계값 이상으로 넣음 (실제 화재/연기/사람 점수는 one-hot이 아님)
+- 세 경로 모두 앵커당 최고 클래스 1개만 남겨야 함 → dets가 같아야 정상
+
+[실행]
+    cd backend
+    python -m scripts.benchmark_postprocess --people 0 10 50 150 --frames 500 --mixed 0.5
+"""
+import argparse
+import time
+
+import numpy as np
+import cv2
+import openvino.opset13 as ops
+from openvino import Model
+
+from app.services import ai_model_service
+
+
+NUM_ANCHORS = 2100
+PERSON_CLASS = 1
+
+
+def legacy_postprocess(output, conf_threshold=0.4, iou_threshold=0.45):
+    """기존 구현 (비교 기준)"""
+    classes = ai_model_service.get_classes()
+    raw_output = output[0].squeeze().T
+    classes_scores = raw_output[:, 4:]
+    max_scores = np.max(classes_scores, axis=1)
+    class_ids_all = np.argmax(classes_scores, axis=1)
+
+    mask = max_scores > conf_threshold
+    if not np.any(mask):
+        return []
+
+    filtered_output = raw_output[mask]
+    filtered_scores = max_scores[mask]
+    filtered_class_ids = class_ids_all[mask]
+
+    cx, cy = filtered_output[:, 0], filtered_output[:, 1]
+    w, h = filtered_output[:, 2], filtered_output[:, 3]
+    x1 = (cx - w / 2).astype(np.int32)
+    y1 = (cy - h / 2).astype(np.int32)
+    w_int, h_int = w.astype(np.int32), h.astype(np.int32)
+
+    boxes = np.stack([x1, y1, w_int, h_int], axis=1).tolist()
+    scores = filtered_scores.tolist()
+    class_ids = filtered_class_ids.tolist()
+
+    indices = cv2.dnn.NMSBoxes(boxes, scores, conf_threshold, iou_threshold)
+    results = []
+    if isinstance(indices, tuple):
+        indices = indices[0] if len(indices) > 0 else []
+    if len(indices) > 0:
+        if isinstance(indices, np.ndarray):
+            indices = indices.flatten()
+        for idx in indices:
+            x1, y1, w, h = boxes[idx]
+            class_idx = class_ids[idx]
+            label = classes[class_idx] if class_idx < len(classes) else "unknown"
+            results.append({"box": [x1, y1, x1 + w, y1 + h], "label": label, "score": round(scores[idx], 2)})
+    return results
+
+
+def make_crowded_output(people, rng, anchors_per_person=6, mixed=0.0):
+    """
+    사람 people명이 있는 프레임의 YOLO 원시 출력 생성
+
+    - 사람마다 주변 앵커 여러 개가 비슷한 박스/점수로 반응 (NMS가 지워야 할 중복)
+    - mixed 비율의 사람은 다른 클래스 점수도 사람 점수보다 조금 낮게 반응 (앵커당 클래스 여러 개)
+    - 나머지 앵커는 임계값 이하 배경 점수
+    """
+    output = np.zeros((1, 7, NUM_ANCHORS), dtype=np.float32)
+    output[0, 0:2] = rng.uniform(0, 320, (2, NUM_ANCHORS))
+    output[0, 2:4] = rng.uniform(8, 64, (2, NUM_ANCHORS))
+    output[0, 4:] = rng.uniform(0, 0.3, (3, NUM_ANCHORS))
+
+    anchor = 0
+    for _ in range(people):
+        cx, cy = rng.uniform(16, 304, 2)
+        w, h = rng.uniform(12, 40), rng.uniform(30, 120)
+        score = rng.uniform(0.5, 0.95)
+        other = (PERSON_CLASS + 1) % 3 if rng.random() < mixed else None
+        for _ in range(anchors_per_person):
+            if anchor >= NUM_ANCHORS:
+                break
+            output[0, :4, anchor] = [cx + rng.normal(0, 1.5), cy + rng.normal(0, 1.5),
+                                     w * rng.uniform(0.95, 1.05), h * rng.uniform(0.95, 1.05)]
+            output[0, 4 + PERSON_CLASS, anchor] = score * rng.uniform(0.9, 1.0)
+            if other is not None:
+                output[0, 4 + other, anchor] = output[0, 4 + PERSON_CLASS, anchor] * 0.9
+            anchor += 1
+    return output
+
+
+def compile_nms_only():
+    """원시 출력 (1, 7, 2100)을 입력으로 받는 NMS 그래프만 컴파일"""
+    raw = ops.parameter([1, 7, NUM_ANCHORS], np.float32, name="raw")
+    identity = Model([ops.convert(raw, "f32")], [raw], "raw_output")
+    nms_model = ai_model_service._apply_nms(identity, ai_model_service.CONFIDENCE_THRESHOLD)
+    return ai_model_service.core.compile_model(nms_model, "CPU", {"PERFORMANCE_HINT": "LATENCY"})
+
+
+def _timeit(func, frames, warmup=20):
+    times = []
+    for i in range(warmup + frames):
+        start = time.perf_counter()
+        func()
+        if i >= warmup:
+            times.append((time.perf_counter() - start) * 1000)
+    times = np.array(times)
+    return times.mean(), np.percentile(times, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YOLO 후처리 경로별 프레임당 시간 비교")
+    parser.add_argument("--people", nargs="+", type=int, default=[0, 10, 50, 150], help="프레임당 사람 수")
+    parser.add_argument("--frames", type=int, default=500, help="경로별 측정 횟수")
+    parser.add_argument("--mixed", type=float, default=0.0, help="다른 클래스도 반응하는 사람 비율 (0~1)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    infer_request = compile_nms_only().create_infer_request()
+
+    def run_graph(output):
+        infer_request.infer({0: output})
+        detections = [infer_request.get_output_tensor(0).data]
+        return ai_model_service.to_predictions(ai_model_service.detect(detections))
+
+    paths = {
+        "legacy": legacy_postprocess,
+        "numpy": lambda output: ai_model_service.to_predictions(ai_model_service.detect([output])),
+        "graph": run_graph,
+    }
+
+    print(f"{'people':>6} {'path':>7} | {'mean ms':>8} {'p95 ms':>8} | {'dets':>5}")
+    for people in args.people:
+        output = make_crowded_output(people, rng, mixed=args.mixed)
+        for name, func in paths.items():
+            call = (lambda: func([output])) if name == "legacy" else (lambda: func(output))
+            mean, p95 = _timeit(call, args.frames)
+            print(f"{people:>6} {name:>7} | {mean:8.3f} {p95:8.3f} | {len(call()):>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+전처리 경로 벤치마크 - CPU 전처리 vs 그래프 내 전처리
+=====================================================
+프레임 1장당 (전처리 + 동기 추론) 시간을 두 경로로 측정해 비교
+
+[측정 경로]
+- host:  cv2.resize → cvtColor → transpose → float32 → /255 → (1, 3, 320, 320) 입력
+- graph: imdecode 결과 u8 BGR 프레임을 공유 메모리 Tensor로 그대로 입력
+         (색변환/레이아웃 변환/정규화는 PrePostProcessor가 그래프 안에서 수행,
+          320x320이 아닌 프레임은 u8 상태로 리사이즈)
+
+[실행]
+    cd backend
+    python -m scripts.benchmark_preprocess --frames 300 --sizes 320x320 640x480
+"""
+import argparse
+import time
+
+import numpy as np
+import cv2
+
+from app.services import ai_model_service
+
+
+def _make_frame(width, height):
+    """JPEG 인코딩/디코딩을 거친 테스트 프레임 (실제 수신 프레임과 같은 메모리 배치)"""
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 70])
+    return cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+
+
+def _graph_input(frame):
+    """ai_model_service.preprocess()의 그래프 전처리 경로와 동일"""
+    size = ai_model_service.get_input_size()
+    if frame.shape[:2] != (size, size):
+        frame = cv2.resize(frame, (size, size), interpolation=cv2.INTER_LINEAR)
+    return np.ascontiguousarray(frame)[np.newaxis]
+
+
+def _measure(preprocess, infer_request, to_input, frame, frames, warmup=20):
+    """프레임당 (전처리 ms, 전처리 + 추론 ms) 목록"""
+    pre_times, total_times = [], []
+    for i in range(warmup + frames):
+        start = time.perf_counter()
+        input_data = preprocess(frame)
+        pre_done = time.perf_counter()
+        infer_request.infer({0: to_input(input_data)})
+        end = time.perf_counter()
+        if i >= warmup:
+            pre_times.append((pre_done - start) * 1000)
+            total_times.append((end - start) * 1000)
+    return np.array(pre_times), np.array(total_times)
+
+
+def _summary(values):
+    return f"{values.mean():7.3f} {np.percentile(values, 50):7.3f} {np.percentile(values, 95):7.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU 전처리 vs 그래프 내 전처리 프레임당 시간 비교")
+    parser.add_argument("--frames", type=int, default=300, help="경로/해상도별 측정 프레임 수")
+    parser.add_argument("--sizes", nargs="+", default=["320x320", "640x480"], help="입력 프레임 해상도 (WxH)")
+    args = parser.parse_args()
+
+    model = ai_model_service._read_model()
+    if model is None:
+        print("[Benchmark] 모델 파일 없음 (artifacts/best.xml, best.bin)")
+        return
+
+    device = ai_model_service._device or "CPU"
+    config = {"PERFORMANCE_HINT": "LATENCY"}
+    host_model = ai_model_service.core.compile_model(model, device, config)
+    graph_model = ai_model_service.core.compile_model(
+        ai_model_service._apply_preprocessing(ai_model_service._read_model()), device, config
+    )
+
+    paths = {
+        "host": (ai_model_service.preprocess_host, host_model.create_infer_request(),
+                 lambda data: data),
+        "graph": (_graph_input, graph_model.create_infer_request(), ai_model_service._to_input_tensor),
+    }
+
+    print(f"[Benchmark] 디바이스: {device}, 프레임 수: {args.frames}")
+    print(f"{'size':>9} {'path':>6} | {'pre mean':>7} {'p50':>7} {'p95':>7} | {'total':>7} {'p50':>7} {'p95':>7}")
+    for size in args.sizes:
+        width, height = (int(v) for v in size.lower().split("x"))
+        frame = _make_frame(width, height)
+        results = {}
+        for name, (preprocess, infer_request, to_input) in paths.items():
+            pre, total = _measure(preprocess, infer_request, to_input, frame, args.frames)
+            results[name] = total.mean()
+            print(f"{size:>9} {name:>6} | {_summary(pre)} | {_summary(total)}")
+        saved = results["host"] - results["graph"]
+        print(f"{size:>9} {'diff':>6} | 프레임당 {saved:+.3f}ms ({saved / results['host'] * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
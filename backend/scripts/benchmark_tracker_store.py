@@ -0,0 +1,154 @@
+"""
+트래커 테이블 벤치마크 - 딕셔너리 트래커 vs 배열 기반 TrackStore
+================================================================
+추적 중인 사람 수를 늘려 가며 트래커 1개당 메모리와 프레임당 테이블 갱신 비용을 비교
+
+[측정 경로]
+- legacy: 기존 방식 (트래커 = 키 12개 딕셔너리, 관절 히스토리 = 중첩 리스트 + pop(0),
+          매칭 기준 박스 = 딕셔너리 순회, 칼만 보정 = 트래커마다, 만료 검사 = 파이썬 순회)
+- store:  TrackStore (슬롯 배열, 관절 링 버퍼, 매칭 기준 박스 = 슬라이스,
+          칼만 보정 = 배치 1번, 만료 검사 = 배열 비교)
+
+[측정 항목]
+- KB/track: 관절 히스토리가 가득 찬 트래커 1개의 메모리 (legacy = tracemalloc, store = 배열 nbytes / 슬롯 수)
+- mean / p95 ms: 프레임당 (매칭 기준 박스 수집 + 박스/시각/칼만 갱신 + 관절 추가 + 만료 검사)
+  관절은 모든 트래커에 매 프레임 추가 (최악의 경우: 전원 거수자 + POSE_FRAME_INTERVAL=1)
+
+[실행]
+    cd backend
+    python -m scripts.benchmark_tracker_store --tracks 1 10 50 200 --frames 300
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.services import track_store_service, tracker_service
+from app.services.track_store_service import TrackStore
+
+
+HISTORY = track_store_service.KEYPOINT_HISTORY_LENGTH
+TIMEOUT = 3.0  # tracker_service.TRACKER_TIMEOUT
+
+
+def _keypoints(rng):
+    return rng.random((track_store_service.NUM_KEYPOINTS, 3)).tolist()
+
+
+def legacy_update_motion(kalman, box, now):
+    """기존 update_track_motion (트래커 1개씩 8x8 행렬 연산)"""
+    dt = min(max(now - kalman["time"], 0.0), tracker_service.MAX_PREDICT_SECONDS)
+    transition = np.eye(8)
+    transition[:4, 4:] = np.eye(4) * dt
+    std = np.r_[[tracker_service.KALMAN_POSITION_STD] * 4, [tracker_service.KALMAN_VELOCITY_STD] * 4]
+    mean, covariance = kalman["mean"], kalman["covariance"]
+    noise = (std * max(mean[3], 1.0)) ** 2 * max(dt, 1e-3)
+    mean = transition @ mean
+    covariance = transition @ covariance @ transition.T + np.diag(noise)
+
+    h = np.eye(4, 8)
+    projected = h @ covariance @ h.T + np.diag(np.full(4, (tracker_service.KALMAN_POSITION_STD * max(mean[3], 1.0)) ** 2))
+    gain = np.linalg.solve(projected, h @ covariance).T
+    x1, y1, x2, y2 = box
+    measurement = np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1], dtype=np.float64)
+    kalman["mean"] = mean + gain @ (measurement - h @ mean)
+    kalman["covariance"] = covariance - gain @ projected @ gain.T
+    kalman["time"] = now
+
+
+def legacy_table(tracks, rng, now=0.0):
+    """기존 check_loitering이 만드는 딕셔너리 트래커 (관절 히스토리 가득 참)"""
+    table = {}
+    for track_id in range(tracks):
+        table[track_id] = {
+            "start_time": now, "last_seen": now, "box": [10, 20, 60, 160],
+            "notified": False, "capture_count": 3, "capture_times": [now, now + 1, now + 2],
+            "face_checked": True, "is_whitelisted": False, "whitelist_name": None,
+            "keypoints_history": [_keypoints(rng) for _ in range(HISTORY)],
+            "abnormal_notified": False,
+            "kalman": {"mean": np.array([35.0, 90, 50, 140, 0, 0, 0, 0]), "covariance": np.eye(8) * 100, "time": now}
+        }
+    return table
+
+
+def store_table(tracks, rng, now=0.0):
+    store = TrackStore()
+    for track_id in range(tracks):
+        slot = store.add(track_id, [10, 20, 60, 160], now)
+        tracker_service.init_track_motion(store, slot, [10, 20, 60, 160], now)
+        for _ in range(HISTORY):
+            store.push_keypoints(slot, _keypoints(rng))
+    return store
+
+
+def legacy_frame(table, boxes, keypoints, now):
+    """기존 방식 프레임 1회: 기준 박스 수집 → 트래커 갱신 → 만료 검사"""
+    np.array([tracker["box"] for tracker in table.values()], dtype=np.float64)
+    for track_id, tracker in table.items():
+        tracker["box"] = boxes[track_id]
+        tracker["last_seen"] = now
+        legacy_update_motion(tracker["kalman"], boxes[track_id], now)
+        tracker["keypoints_history"].append(keypoints)
+        if len(tracker["keypoints_history"]) > HISTORY:
+            tracker["keypoints_history"].pop(0)
+    expired = [tid for tid, tracker in table.items() if now - tracker["last_seen"] > TIMEOUT]
+    for track_id in expired:
+        del table[track_id]
+
+
+def store_frame(store, boxes, keypoints, now):
+    """TrackStore 프레임 1회: 기준 박스 수집 → 트래커 갱신 → 만료 검사"""
+    slots = store.active_slots()
+    store.box[slots].astype(np.float64)
+    tracker_service.update_tracks_motion(store, slots, [boxes[tid] for tid in store.track_id[slots]], now)
+    for slot in slots:
+        store.push_keypoints(slot, keypoints)
+    store.remove_slots(store.expired_slots(now, TIMEOUT))
+
+
+def legacy_memory(tracks, rng):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    table = legacy_table(tracks, rng)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del table
+    return used / tracks
+
+
+def store_memory(tracks, rng):
+    store = store_table(tracks, rng)
+    return store.memory_bytes() / store.capacity
+
+
+def main():
+    parser = argparse.ArgumentParser(description="트래커 테이블 방식별 메모리/프레임당 갱신 비용 비교")
+    parser.add_argument("--tracks", nargs="+", type=int, default=[1, 10, 50, 200], help="추적 중인 사람 수")
+    parser.add_argument("--frames", type=int, default=300, help="방식별 측정 프레임 수")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'tracks':>6} {'path':>6} | {'KB/track':>8} | {'mean ms':>8} {'p95 ms':>8}")
+    for tracks in args.tracks:
+        corners = rng.integers(0, 500, (tracks, 2))
+        boxes = np.hstack([corners, corners + [40, 120]]).tolist()
+        keypoints = _keypoints(rng)
+        paths = {
+            "legacy": (legacy_memory, legacy_table, legacy_frame),
+            "store": (store_memory, store_table, store_frame)
+        }
+        for name, (memory, build, frame) in paths.items():
+            per_track = memory(tracks, rng)
+            table = build(tracks, rng)
+            times = []
+            for index in range(args.frames):
+                start = time.perf_counter()
+                frame(table, boxes, keypoints, index / 15)
+                times.append((time.perf_counter() - start) * 1000)
+            times = np.array(times)
+            print(f"{tracks:>6} {name:>6} | {per_track / 1024:8.1f} | {times.mean():8.3f} {np.percentile(times, 95):8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+트래커 ID 교체 평가 - 마지막 박스 매칭 vs 칼만 예측 vs 칼만 + 낮은 신뢰도 2차 매칭
+=================================================================================
+빠르게 걷는 사람, 잠깐 가려지는 사람, 점수가 잠깐 떨어지는 사람을 합성한 감지 결과로
+경로별 ID 발급 수 / ID 교체 수 / 캡처(스냅샷 + DB 저장) 수를 비교
+
+[측정 경로]
+- legacy:     감지별 순회 매칭 + 마지막 박스 비교, 신뢰도 0.6 미만 버림 (기존 방식)
+- kalman:     전역 할당 + 칼만 예측 박스 비교, 신뢰도 0.6 미만 버림
+- kalman+low: kalman + 신뢰도 0.1~0.6 박스 2차 매칭 (기본 경로)
+
+[측정 항목]
+- ids: 발급한 track_id 수 (새 ID마다 얼굴 검사 1회)
+- switches: 같은 사람의 track_id가 바뀐 횟수
+- captures: ID별 캡처 수 합계 (0초/1초/2초 시점, ID당 최대 3장 → JPEG 인코딩 + DB 저장)
+
+[실행]
+    cd backend
+    python -m scripts.evaluate_tracking --people 8 --frames 600 --fps 15
+"""
+import argparse
+
+import numpy as np
+
+from app.services import tracker_service
+from app.services.session_service import CameraSession
+from scripts.benchmark_matching import legacy_match
+
+
+PERSON_MIN_SCORE = 0.6    # pipeline_service.PERSON_MIN_SCORE
+LOW_SCORE = 0.1           # ai_model_service.LOW_CONFIDENCE_THRESHOLD
+
+
+def simulate(people, frames, rng, max_speed=15, occlusion=0.02, dips=0.05, size=640):
+    """
+    사람별 감지 결과 합성
+
+    - 속도 2~max_speed px/프레임 (벽에서 반사), 박스 30~50 x 90~150
+    - 프레임당 occlusion 확률로 3~10 프레임 가려짐 (감지 없음)
+    - 프레임당 dips 확률로 3~8 프레임 점수 하락 (0.15~0.55)
+
+    Returns:
+        프레임별 [(사람 번호, 박스, 점수), ...]
+    """
+    w = rng.uniform(30, 50, people)
+    h = rng.uniform(90, 150, people)
+    x = rng.uniform(0, size - w)
+    y = rng.uniform(0, size - h)
+    vx = rng.uniform(2, max_speed, people) * rng.choice([-1, 1], people)
+    vy = rng.uniform(-3, 3, people)
+    hidden = np.zeros(people, dtype=int)
+    dimmed = np.zeros(people, dtype=int)
+
+    scenes = []
+    for _ in range(frames):
+        x += vx
+        y += vy
+        bounce_x = (x < 0) | (x > size - w)
+        bounce_y = (y < 0) | (y > size - h)
+        vx[bounce_x] *= -1
+        vy[bounce_y] *= -1
+        x = np.clip(x, 0, size - w)
+        y = np.clip(y, 0, size - h)
+
+        hidden = np.where((hidden == 0) & (rng.random(people) < occlusion), rng.integers(3, 11, people), hidden)
+        dimmed = np.where((dimmed == 0) & (rng.random(people) < dips), rng.integers(3, 9, people), dimmed)
+
+        detections = []
+        for i in range(people):
+            if hidden[i] > 0:
+                continue
+            score = rng.uniform(0.15, 0.55) if dimmed[i] > 0 else rng.uniform(0.65, 0.95)
+            jitter = rng.normal(0, 2, 4)
+            box = [int(v) for v in np.array([x[i], y[i], x[i] + w[i], y[i] + h[i]]) + jitter]
+            detections.append((i, box, score))
+        hidden = np.maximum(hidden - 1, 0)
+        dimmed = np.maximum(dimmed - 1, 0)
+        scenes.append(detections)
+    return scenes
+
+
+def run(path, scenes, fps):
+    """한 경로로 전체 프레임 추적 → (ids, switches, captures)"""
+    session = CameraSession("evaluate")
+    last_id = {}
+    switches = 0
+    lifetimes = {}
+
+    for frame_index, detections in enumerate(scenes):
+        now = frame_index / fps
+        high = [(person, box) for person, box, score in detections if score >= PERSON_MIN_SCORE]
+        low = [(person, box) for person, box, score in detections if LOW_SCORE <= score < PERSON_MIN_SCORE]
+
+        if path == "legacy":
+            ids = [legacy_match(session, box) for _, box in high]
+            matched = list(zip(high, ids))
+        else:
+            ids = tracker_service.match_detections(session, [box for _, box in high], now)
+            matched = list(zip(high, ids))
+            if path == "kalman+low":
+                low_ids = tracker_service.match_low_score(session, [box for _, box in low], set(ids), now)
+                matched += [(det, tid) for det, tid in zip(low, low_ids) if tid is not None]
+
+        store = session.trackers
+        if path == "legacy":
+            for (_, box), track_id in matched:
+                if track_id in store:
+                    store.box[store.slot(track_id)] = box
+                    store.last_seen[store.slot(track_id)] = now
+        else:
+            tracker_service.update_tracks(session, [tid for _, tid in matched], [box for (_, box), _ in matched], now)
+
+        for (person, box), track_id in matched:
+            slot = store.slot(track_id)
+            if slot is None:
+                slot = store.add(track_id, box, now)
+                tracker_service.init_track_motion(store, slot, box, now)
+
+            if person in last_id and last_id[person] != track_id:
+                switches += 1
+            last_id[person] = track_id
+            lifetimes[track_id] = now - store.start_time[slot]
+
+        # 만료 (tracker_service.cleanup_old_trackers와 동일 기준, 시뮬레이션 시각 사용)
+        store.remove_slots(store.expired_slots(now, tracker_service.TRACKER_TIMEOUT))
+
+    captures = sum(
+        sum(1 for t in tracker_service.CAPTURE_INTERVALS if lifetime >= t) for lifetime in lifetimes.values()
+    )
+    return session.next_track_id, switches, captures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="트래커 매칭 방식별 ID 교체/캡처 수 비교")
+    parser.add_argument("--people", type=int, default=8, help="화면 속 사람 수")
+    parser.add_argument("--frames", type=int, default=600, help="프레임 수")
+    parser.add_argument("--fps", type=float, default=15, help="처리 FPS")
+    parser.add_argument("--max-speed", type=float, default=15, help="최대 이동 속도 (px/프레임)")
+    parser.add_argument("--occlusion", type=float, default=0.02, help="프레임당 가려짐 시작 확률")
+    parser.add_argument("--dips", type=float, default=0.05, help="프레임당 점수 하락 시작 확률")
+    parser.add_argument("--seeds", type=int, default=5, help="반복 횟수 (시드별 장면)")
+    args = parser.parse_args()
+
+    paths = ["legacy", "kalman", "kalman+low"]
+    totals = {path: np.zeros(3) for path in paths}
+    for seed in range(args.seeds):
+        scenes = simulate(args.people, args.frames, np.random.default_rng(seed),
+                          args.max_speed, args.occlusion, args.dips)
+        for path in paths:
+            totals[path] += run(path, scenes, args.fps)
+
+    print(f"{args.people}명, {args.frames} 프레임 @ {args.fps:g} FPS, 시드 {args.seeds}개 평균")
+    print(f"{'path':>10} | {'ids':>6} {'switches':>8} {'captures':>8}")
+    for path in paths:
+        ids, switches, captures = totals[path] / args.seeds
+        print(f"{path:>10} | {ids:6.1f} {switches:8.1f} {captures:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+정밀도 변형 비교 - FP32 / FP16 / INT8 정확도(mAP)와 프레임당 지연
+=================================================================
+같은 녹화 프레임으로 변형별 클래스 AP와 지연 시간을 측정
+
+[정답 데이터]
+- --labels 폴더가 있으면 YOLO 형식 라벨 사용 (이미지와 같은 이름의 .txt, "class cx cy w h" 0~1 정규화)
+- 없으면 fp32 변형의 감지 결과를 기준으로 사용 (→ fp32 대비 일치도, 양자화 손실 확인용)
+
+[지표]
+- AP50: IoU 0.5 기준 AP (클래스별: fire / person / smoke)
+- AP50-95: IoU 0.5~0.95 (0.05 간격) 평균 AP
+- 지연: 프레임당 전처리 + 동기 추론 + 후처리 (ms, 평균 / p95)
+
+[실행]
+    cd backend
+    python -m scripts.evaluate_variants --frames captures --labels labels --limit 500
+"""
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+import cv2
+
+from app.services import ai_model_service
+from app.utils.path_utils import CAPTURE_DIR
+
+
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+EVAL_CONFIDENCE = 0.001   # AP 계산용: 낮은 점수까지 모두 포함 (정밀도-재현율 곡선 전체)
+
+
+# ==================================================
+# 데이터 로드
+# ==================================================
+def load_frames(frame_dir, limit):
+    """녹화 프레임 경로 목록 (이름순)"""
+    paths = []
+    for pattern in ("*.jpg", "*.jpeg", "*.png"):
+        paths.extend(glob.glob(os.path.join(frame_dir, pattern)))
+    return sorted(paths)[:limit]
+
+
+def load_labels(label_dir, path):
+    """YOLO 형식 라벨 → 구조화 배열 (320x320 모델 좌표)"""
+    size = ai_model_service.get_input_size()
+    label_path = os.path.join(label_dir, os.path.splitext(os.path.basename(path))[0] + ".txt")
+    rows = np.loadtxt(label_path, ndmin=2) if os.path.exists(label_path) else np.empty((0, 5))
+
+    labels = np.empty(len(rows), dtype=ai_model_service.DETECTION_DTYPE)
+    cx, cy, w, h = (rows[:, 1:5] * size).T
+    labels["box"] = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    labels["class_id"] = rows[:, 0]
+    labels["score"] = 1.0
+    return labels
+
+
+# ==================================================
+# 변형별 실행
+# ==================================================
+def run_variant(precision, frames, device):
+    """
+    변형 1개로 모든 프레임 추론
+
+    Returns:
+        (프레임별 감지 결과 리스트, 프레임당 지연 ms 배열) 또는 모델 파일이 없으면 None
+    """
+    model = ai_model_service._read_model(precision)
+    if model is None:
+        return None
+
+    config = ai_model_service._variant_config(precision, {"PERFORMANCE_HINT": "LATENCY"})
+    infer_request = ai_model_service.core.compile_model(model, device, config).create_infer_request()
+
+    # 워밍업 (첫 추론의 메모리 할당/커널 선택 제외)
+    for frame in frames[:5]:
+        infer_request.infer({0: ai_model_service.preprocess_host(frame)})
+
+    detections, latencies = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        infer_request.infer({0: ai_model_service.preprocess_host(frame)})
+        output = [infer_request.get_output_tensor(0).data]
+        result = ai_model_service.detect(output, conf_threshold=EVAL_CONFIDENCE)
+        latencies.append((time.perf_counter() - start) * 1000)
+        detections.append(result)
+    return detections, np.array(latencies)
+
+
+# ==================================================
+# mAP 계산
+# ==================================================
+def box_iou(boxes_a, boxes_b):
+    """(N, 4) x (M, 4) → (N, M) IoU"""
+    boxes_a = boxes_a.astype(np.float32)
+    boxes_b = boxes_b.astype(np.float32)
+    lt = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    rb = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=2)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def average_precision(recall, precision):
+    """COCO 방식 101점 보간 AP"""
+    precision = np.concatenate([[1.0], precision, [0.0]])
+    recall = np.concatenate([[0.0], recall, [1.0]])
+    precision = np.flip(np.maximum.accumulate(np.flip(precision)))
+    points = np.linspace(0, 1, 101)
+    return float(np.mean(precision[np.searchsorted(recall, points, side="left").clip(max=len(precision) - 1)]))
+
+
+def class_ap(predictions, ground_truths, class_id):
+    """
+    클래스 1개의 IoU 임계값별 AP
+
+    Returns:
+        (10,) 배열 (IoU 0.5 ~ 0.95), 정답이 없으면 None
+    """
+    num_gt = sum(int(np.sum(gt["class_id"] == class_id)) for gt in ground_truths)
+    if num_gt == 0:
+        return None
+
+    scores, matched = [], []   # matched: (예측 수, 10) IoU 임계값별 TP 여부
+    for pred, gt in zip(predictions, ground_truths):
+        pred = pred[pred["class_id"] == class_id]
+        gt = gt[gt["class_id"] == class_id]
+        if len(pred) == 0:
+            continue
+        pred = pred[np.argsort(-pred["score"], kind="stable")]
+        tp = np.zeros((len(pred), len(IOU_THRESHOLDS)), dtype=bool)
+        if len(gt):
+            ious = box_iou(pred["box"], gt["box"])
+            for t, threshold in enumerate(IOU_THRESHOLDS):
+                used = np.zeros(len(gt), dtype=bool)
+                for i in range(len(pred)):
+                    candidates = np.where(~used & (ious[i] >= threshold))[0]
+                    if len(candidates):
+                        best = candidates[np.argmax(ious[i, candidates])]
+                        used[best] = True
+                        tp[i, t] = True
+        scores.append(pred["score"])
+        matched.append(tp)
+
+    if not scores:
+        return np.zeros(len(IOU_THRESHOLDS))
+
+    order = np.argsort(-np.concatenate(scores), kind="stable")
+    tp = np.concatenate(matched)[order]
+    tp_cum = np.cumsum(tp, axis=0)
+    fp_cum = np.cumsum(~tp, axis=0)
+    recall = tp_cum / num_gt
+    precision = tp_cum / np.maximum(tp_cum + fp_cum, 1e-9)
+    return np.array([average_precision(recall[:, t], precision[:, t]) for t in range(len(IOU_THRESHOLDS))])
+
+
+def reference_from(detections):
+    """기준 변형 감지 결과 → 정답으로 사용 (서비스 신뢰도 기준 이상만)"""
+    return [det[det["score"] > ai_model_service.CONFIDENCE_THRESHOLD] for det in detections]
+
+
+# ==================================================
+# 실행
+# ==================================================
+def main():
+    parser = argparse.ArgumentParser(description="FP32/FP16/INT8 감지 모델 mAP · 지연 비교")
+    parser.add_argument("--frames", default=CAPTURE_DIR, help="녹화 프레임 폴더 (기본: captures/)")
+    parser.add_argument("--labels", default=None, help="YOLO 형식 라벨 폴더 (없으면 fp32 결과 기준)")
+    parser.add_argument("--variants", nargs="+", default=list(ai_model_service.MODEL_VARIANTS),
+                        choices=list(ai_model_service.MODEL_VARIANTS))
+    parser.add_argument("--limit", type=int, default=500, help="최대 프레임 수")
+    parser.add_argument("--device", default="CPU")
+    args = parser.parse_args()
+
+    paths = load_frames(args.frames, args.limit)
+    frames = [frame for frame in (cv2.imread(path, cv2.IMREAD_COLOR) for path in paths) if frame is not None]
+    if not frames:
+        print(f"[Evaluate] 프레임 없음: {args.frames}")
+        return
+    print(f"[Evaluate] 프레임 {len(frames)}장, 디바이스: {args.device}")
+
+    results = {}
+    for precision in args.variants:
+        result = run_variant(precision, frames, args.device)
+        if result is None:
+            print(f"[Evaluate] {precision}: 모델 파일 없음 - 건너뜀")
+            continue
+        results[precision] = result
+
+    if args.labels:
+        ground_truths = [load_labels(args.labels, path) for path in paths[:len(frames)]]
+        reference = "labels"
+    elif "fp32" in results:
+        ground_truths = reference_from(results["fp32"][0])
+        reference = "fp32"
+    else:
+        print("[Evaluate] 정답 기준 없음 (--labels 또는 fp32 변형 필요)")
+        return
+
+    classes = ai_model_service.get_classes()
+    header = " ".join(f"{name + ' AP50':>12}" for name in classes)
+    print(f"\n기준: {reference}")
+    print(f"{'variant':>8} | {header} | {'mAP50':>6} {'mAP50-95':>8} | {'mean ms':>8} {'p95 ms':>7}")
+    for precision, (detections, latencies) in results.items():
+        per_class = [class_ap(detections, ground_truths, class_id) for class_id in range(len(classes))]
+        valid = [ap for ap in per_class if ap is not None]
+        cells = " ".join(f"{ap[0]:12.3f}" if ap is not None else f"{'-':>12}" for ap in per_class)
+        map50 = np.mean([ap[0] for ap in valid]) if valid else 0.0
+        map50_95 = np.mean([ap.mean() for ap in valid]) if valid else 0.0
+        print(f"{precision:>8} | {cells} | {map50:6.3f} {map50_95:8.3f} | "
+              f"{latencies.mean():8.2f} {np.percentile(latencies, 95):7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+INT8 모델 생성 - NNCF 사후 양자화 (Post-Training Quantization)
+==============================================================
+배포된 best.xml을 캡처 이미지로 보정(calibration)해 best_int8.xml / best_int8.bin 생성
+
+[왜 필요한가?]
+- CPU 전용 엣지 장비에서 INT8 커널(VNNI/AMX)은 FP32 대비 코어당 처리량이 약 2배
+- 재학습 없이 수백 장의 실제 프레임으로 활성값 범위만 측정해 양자화
+
+[보정 데이터]
+- 기본: captures/ 폴더의 저장된 캡처 이미지 (실제 설치 환경의 조명/화각)
+- 서비스와 같은 CPU 전처리(preprocess_host)를 거친 (1, 3, 320, 320) 텐서 사용
+
+[검출 헤드 제외]
+- 마지막 Detect 모듈의 박스 디코딩(Add/Sub/Mul/Div, DFL)과 Sigmoid는 양자화하면 좌표 오차가 커짐
+  → ignored_scope로 FP 정밀도 유지 (Ultralytics OpenVINO INT8 export와 같은 방식)
+- 백본/넥의 Add(잔차 연결)는 그대로 양자화 대상
+
+[실행]
+    pip install nncf
+    cd backend
+    python -m scripts.quantize_int8 --subset 300
+    AI_MODEL_PRECISION=int8 uvicorn main:app ...
+"""
+import argparse
+import glob
+import os
+import re
+
+import cv2
+from openvino import save_model
+
+from app.services import ai_model_service
+from app.utils.path_utils import ARTIFACTS_DIR, CAPTURE_DIR
+
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png")
+MODEL_NAME_INT8 = ai_model_service.MODEL_VARIANTS["int8"][0]
+
+
+def load_calibration_images(image_dir, limit):
+    """보정용 이미지 경로 목록 (최신 캡처 우선)"""
+    paths = []
+    for pattern in IMAGE_PATTERNS:
+        paths.extend(glob.glob(os.path.join(image_dir, "**", pattern), recursive=True))
+    paths.sort(key=os.path.getmtime, reverse=True)
+    return paths[:limit]
+
+
+def detect_head_name(model):
+    """마지막 모듈 이름 (YOLO Detect 헤드, 예: __module.model.23)"""
+    indices = [
+        int(match.group(1))
+        for op in model.get_ops()
+        for match in [re.match(r"__module\.model\.(\d+)", op.get_friendly_name())]
+        if match
+    ]
+    return f"__module.model.{max(indices)}" if indices else None
+
+
+def build_ignored_scope(nncf, model):
+    """검출 헤드의 박스 디코딩 / 점수 연산을 양자화 대상에서 제외"""
+    head = detect_head_name(model)
+    if head is None:
+        return nncf.IgnoredScope(types=["Sigmoid"])
+    head = re.escape(head)
+    return nncf.IgnoredScope(
+        patterns=[
+            f".*{head}/.*/Add",
+            f".*{head}/.*/Sub.*",
+            f".*{head}/.*/Mul.*",
+            f".*{head}/.*/Div.*",
+            f".*{head}\\.dfl.*",
+        ],
+        types=["Sigmoid"],
+        validate=False,
+    )
+
+
+def transform(path):
+    """이미지 경로 → 모델 입력 텐서 (서비스 CPU 전처리와 동일)"""
+    frame = cv2.imread(path, cv2.IMREAD_COLOR)
+    # preprocess_host는 스레드별 버퍼를 재사용하므로 복사해서 반환
+    return ai_model_service.preprocess_host(frame).copy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NNCF 사후 양자화로 INT8 감지 모델 생성")
+    parser.add_argument("--images", default=CAPTURE_DIR, help="보정 이미지 폴더 (기본: captures/)")
+    parser.add_argument("--subset", type=int, default=300, help="보정에 사용할 이미지 수")
+    parser.add_argument("--preset", choices=["mixed", "performance"], default="mixed",
+                        help="mixed: 활성값 비대칭 양자화 (정확도 우선)")
+    parser.add_argument("--output", default=os.path.join(ARTIFACTS_DIR, MODEL_NAME_INT8),
+                        help="출력 IR 경로 (확장자 제외)")
+    args = parser.parse_args()
+
+    try:
+        import nncf
+    except ImportError:
+        print("[Quantize] nncf 미설치 - pip install nncf")
+        return
+
+    model = ai_model_service._read_model(ai_model_service.DEFAULT_PRECISION)
+    if model is None:
+        print("[Quantize] 원본 모델 파일 없음 (artifacts/best.xml, best.bin)")
+        return
+
+    paths = [path for path in load_calibration_images(args.images, args.subset)
+             if cv2.imread(path) is not None]
+    if not paths:
+        print(f"[Quantize] 보정 이미지 없음: {args.images}")
+        return
+    print(f"[Quantize] 보정 이미지 {len(paths)}장: {args.images}")
+
+    calibration = nncf.Dataset(paths, transform)
+    quantized = nncf.quantize(
+        model,
+        calibration,
+        preset=nncf.QuantizationPreset.MIXED if args.preset == "mixed" else nncf.QuantizationPreset.PERFORMANCE,
+        subset_size=len(paths),
+        ignored_scope=build_ignored_scope(nncf, model),
+    )
+
+    save_model(quantized, f"{args.output}.xml", compress_to_fp16=False)
+    print(f"[Quantize] INT8 모델 저장: {args.output}.xml / .bin")
+    print("[Quantize] 정확도/지연 비교: python -m scripts.evaluate_variants")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ function DetectorPage() {
   const [selectedDeviceId, setSelectedDeviceId] = useState("");
   const [stream, setStream] = useState(null);
   const [fps, setFps] = useState(0);
+  const [rtt, setRtt] = useState(0); // 프레임 왕복 지연 (ms)
   const [isMonitoring, setIsMonitoring] = useState(false);
 
   // 모델 선택 상태
@@ -181,15 +182,31 @@ function DetectorPage() {
 
     // 정리할 리소스들을 저장
     let ws = null;
-    let intervalId = null;
+    let timeoutId = null;
     let currentStream = null;
 
-    // Binary WebSocket 연결
-    ws = new WebSocket("ws://localhost:8000/security/ws");
+    // 흐름 제어 상태 (서버 control 메시지로 갱신)
+    // - credits: 서버가 허용한 전송 가능 프레임 수
+    // - fps/width/height/quality: 서버 권장 캡처 설정
+    const flow = {
+      credits: 0,
+      fps: 30,
+      width: 320,
+      height: 320,
+      quality: 0.7,
+    };
+    const cameraId = `cam-${selectedDeviceId.slice(0, 8)}`;
+    let seq = 0;
+
+    // Binary WebSocket 연결 (protocol=1: 프레임 헤더 + 크레딧 흐름 제어)
+    ws = new WebSocket(
+      `ws://localhost:8000/security/ws?protocol=1&camera_id=${encodeURIComponent(cameraId)}`
+    );
     ws.binaryType = "arraybuffer";
 
     let frameCount = 0;
     let lastTime = Date.now();
+    let rttEma = 0;
 
     ws.onopen = () => {
       setStatus("Connected");
@@ -209,15 +226,33 @@ function DetectorPage() {
     };
 
     ws.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+
+      // 서버 제어 메시지: 크레딧 + 권장 캡처 설정
+      if (data.type === "control") {
+        flow.credits += data.credits;
+        flow.fps = data.fps;
+        flow.width = data.width;
+        flow.height = data.height;
+        flow.quality = data.quality;
+        return;
+      }
+
       frameCount++;
       const now = Date.now();
+
+      // 프레임별 왕복 지연 (캡처 → 결과 수신)
+      if (data.capture_ts !== undefined) {
+        const frameRtt = now - data.capture_ts;
+        rttEma = rttEma ? rttEma * 0.8 + frameRtt * 0.2 : frameRtt;
+      }
+
       if (now - lastTime >= 1000) {
         setFps(frameCount);
+        setRtt(Math.round(rttEma));
         frameCount = 0;
         lastTime = now;
       }
-
-      const data = JSON.parse(event.data);
       const canvas = canvasRef.current;
       if (!canvas) return;
 
@@ -258,8 +293,8 @@ function DetectorPage() {
       ];
 
       if (data.predictions) {
-        // 320x320 모델 출력 → 640x640 캔버스 스케일
-        const SCALE = 2;
+        // 모델 출력(320 또는 640) → 640x640 캔버스 스케일
+        const SCALE = 640 / (data.input_size || 320);
 
         data.predictions.forEach((prediction) => {
           const [bx1, by1, bx2, by2] = prediction.box;
@@ -375,8 +410,8 @@ function DetectorPage() {
       // 알림(alerts) 표시 - 이상행동, 배회자, 화재 등
       if (data.alerts && data.alerts.length > 0) {
         data.alerts.forEach((alert) => {
-          // 320x320 좌표를 640x640으로 스케일
-          const ALERT_SCALE = 2;
+          // 모델 좌표(320 또는 640)를 640x640으로 스케일
+          const ALERT_SCALE = 640 / (data.input_size || 320);
           const [ax1, ay1, ax2, ay2] = alert.box;
           const x1 = ax1 * ALERT_SCALE;
           const y1 = ay1 * ALERT_SCALE;
@@ -447,37 +482,80 @@ function DetectorPage() {
 
         const hiddenCanvas = document.createElement("canvas");
         const hiddenCtx = hiddenCanvas.getContext("2d");
-        hiddenCanvas.width = 320; // 640 → 320 (속도 향상)
-        hiddenCanvas.height = 320;
+        hiddenCanvas.width = flow.width; // 640 → 320 (속도 향상)
+        hiddenCanvas.height = flow.height;
 
         let isSending = false; // 프레임 전송 중 플래그
 
+        // 프레임 헤더 v1 (backend/app/utils/frame_protocol.py와 동일)
+        // magic "GH" | version | header_len | seq(u32) | capture_ts(f64) | cam_len | camera_id
+        // header_len이 1바이트 → 카메라 ID는 255 - 17 = 238바이트까지 (UTF-8 문자 중간에서 자르지 않음)
+        const MAX_CAMERA_ID_BYTES = 255 - 17;
+        let cameraIdBytes = new TextEncoder().encode(cameraId);
+        if (cameraIdBytes.length > MAX_CAMERA_ID_BYTES) {
+          let end = MAX_CAMERA_ID_BYTES;
+          while (end > 0 && (cameraIdBytes[end] & 0xc0) === 0x80) end--; // 연속 바이트면 문자 시작까지 뒤로
+          cameraIdBytes = cameraIdBytes.slice(0, end);
+        }
+        const HEADER_SIZE = 17 + cameraIdBytes.length;
+
+        function buildFrame(jpegBuffer, frameSeq, captureTs) {
+          const message = new Uint8Array(HEADER_SIZE + jpegBuffer.byteLength);
+          const view = new DataView(message.buffer);
+          message[0] = 0x47; // 'G'
+          message[1] = 0x48; // 'H'
+          view.setUint8(2, 1); // version
+          view.setUint8(3, HEADER_SIZE);
+          view.setUint32(4, frameSeq >>> 0, true);
+          view.setFloat64(8, captureTs, true);
+          view.setUint8(16, cameraIdBytes.length);
+          message.set(cameraIdBytes, 17);
+          message.set(new Uint8Array(jpegBuffer), HEADER_SIZE);
+          return message.buffer;
+        }
+
         function sendFrame() {
           if (!videoRef.current || !hiddenCtx) return;
           if (isSending) return; // 이전 프레임 전송 중이면 스킵
+          if (flow.credits <= 0) return; // 서버가 허용한 크레딧 없음 → 대기
 
           if (ws && ws.readyState === WebSocket.OPEN) {
             isSending = true;
-            hiddenCtx.drawImage(videoRef.current, 0, 0, 320, 320);
+            flow.credits--;
+
+            // 서버 권장 해상도 반영
+            if (hiddenCanvas.width !== flow.width || hiddenCanvas.height !== flow.height) {
+              hiddenCanvas.width = flow.width;
+              hiddenCanvas.height = flow.height;
+            }
+            hiddenCtx.drawImage(videoRef.current, 0, 0, flow.width, flow.height);
+            const captureTs = Date.now();
+            const frameSeq = seq++;
 
             hiddenCanvas.toBlob(
               (blob) => {
                 if (blob && ws && ws.readyState === WebSocket.OPEN) {
                   blob.arrayBuffer().then((buffer) => {
-                    ws.send(buffer);
+                    ws.send(buildFrame(buffer, frameSeq, captureTs));
                     isSending = false; // 전송 완료
                   });
                 } else {
+                  flow.credits++; // 전송 못 한 크레딧 반환
                   isSending = false;
                 }
               },
               "image/jpeg",
-              0.7 // 품질 약간 높임
+              flow.quality // 서버 권장 품질
             );
           }
         }
 
-        intervalId = setInterval(sendFrame, 33); // 약 30 FPS
+        // 서버 권장 FPS 주기로 전송 (고정 30FPS 대신)
+        function scheduleNext() {
+          sendFrame();
+          timeoutId = setTimeout(scheduleNext, 1000 / flow.fps);
+        }
+        scheduleNext();
       })
       .catch((error) => {
         console.error("카메라 접근 실패:", error);
@@ -488,10 +566,10 @@ function DetectorPage() {
     return () => {
       console.log("페이지 이동 - 리소스 정리 시작");
 
-      // 1. interval 정리
-      if (intervalId) {
-        clearInterval(intervalId);
-        console.log("  ✓ Frame 전송 interval 정리");
+      // 1. 전송 타이머 정리
+      if (timeoutId) {
+        clearTimeout(timeoutId);
+        console.log("  ✓ Frame 전송 타이머 정리");
       }
 
       // 2. WebSocket 연결 종료
@@ -570,7 +648,7 @@ function DetectorPage() {
               : styles.statusDisconnected
           }`}
         >
-          상태: {status} | : {fps}
+          상태: {status} | : {fps} | RTT: {rtt}ms
         </div>
 
         <video